@@ -0,0 +1,65 @@
+"""
+Add hibernation_savings_daily table.
+
+The listener starts incrementing the rollup as soon as the table exists,
+so the backfill rebuilds it from all events (delete + insert, same as
+rebuild_savings_rollup) and records it in hibernation_savings_backfill.
+
+Revision ID: add_hibernation_savings_daily
+Create Date: 2026-10-16
+"""
+
+# revision identifiers, used by Alembic (if used)
+revision = 'add_hibernation_savings_daily'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def get_table_definition():
+    """Return the SQLAlchemy table definition for reference."""
+    from src.models.instance_status import HibernationSavingsDaily
+    return HibernationSavingsDaily
+
+
+def get_sql_upgrade():
+    """SQL statements to create and backfill the table."""
+    return """
+    CREATE TABLE IF NOT EXISTS hibernation_savings_daily (
+        id SERIAL PRIMARY KEY,
+        day DATE NOT NULL,
+        user_id VARCHAR(100) NOT NULL DEFAULT '',
+        gpu_type VARCHAR(100) NOT NULL DEFAULT '',
+        hibernations INTEGER NOT NULL DEFAULT 0,
+        hours_saved FLOAT NOT NULL DEFAULT 0.0,
+        usd_saved FLOAT NOT NULL DEFAULT 0.0,
+        CONSTRAINT uq_savings_day_user_gpu UNIQUE (day, user_id, gpu_type)
+    );
+
+    CREATE INDEX IF NOT EXISTS idx_savings_user_day ON hibernation_savings_daily (user_id, day);
+
+    CREATE TABLE IF NOT EXISTS hibernation_savings_backfill (
+        id SERIAL PRIMARY KEY,
+        completed_at TIMESTAMP NOT NULL DEFAULT NOW(),
+        rows INTEGER NOT NULL DEFAULT 0
+    );
+
+    DELETE FROM hibernation_savings_daily;
+    INSERT INTO hibernation_savings_daily (day, user_id, gpu_type, hibernations, hours_saved, usd_saved)
+    SELECT date(e.timestamp), COALESCE(i.user_id, ''), COALESCE(i.gpu_type, ''),
+           COUNT(e.id), COALESCE(SUM(e.idle_hours), 0), COALESCE(SUM(e.savings_usd), 0)
+    FROM hibernation_events e
+    LEFT JOIN instance_status i ON i.instance_id = e.instance_id
+    WHERE e.event_type IN ('hibernated', 'deleted')
+    GROUP BY date(e.timestamp), COALESCE(i.user_id, ''), COALESCE(i.gpu_type, '');
+    INSERT INTO hibernation_savings_backfill (rows) SELECT COUNT(*) FROM hibernation_savings_daily;
+    """
+
+
+def get_sql_downgrade():
+    """SQL statements to drop the table."""
+    return """
+    DROP TABLE IF EXISTS hibernation_savings_backfill;
+    DROP INDEX IF EXISTS idx_savings_user_day;
+    DROP TABLE IF EXISTS hibernation_savings_daily;
+    """
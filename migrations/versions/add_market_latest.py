@@ -0,0 +1,62 @@
+"""
+Add market_latest table.
+
+Revision ID: add_market_latest
+Create Date: 2026-10-16
+"""
+
+# revision identifiers, used by Alembic (if used)
+revision = 'add_market_latest'
+down_revision = None
+branch_labels = None
+depends_on = None
+
+
+def get_table_definition():
+    """Return the SQLAlchemy table definition for reference."""
+    from src.models.metrics import MarketLatest
+    return MarketLatest
+
+
+def get_sql_upgrade():
+    """SQL statements to create the table and seed it from market_snapshots."""
+    return """
+    CREATE TABLE IF NOT EXISTS market_latest (
+        id SERIAL PRIMARY KEY,
+        gpu_name VARCHAR(100) NOT NULL,
+        machine_type VARCHAR(20) NOT NULL,
+        timestamp TIMESTAMP WITHOUT TIME ZONE NOT NULL,
+        min_price FLOAT NOT NULL,
+        max_price FLOAT NOT NULL,
+        avg_price FLOAT NOT NULL,
+        median_price FLOAT NOT NULL,
+        total_offers INTEGER NOT NULL,
+        available_gpus INTEGER NOT NULL,
+        verified_offers INTEGER DEFAULT 0,
+        avg_reliability FLOAT,
+        avg_total_flops FLOAT,
+        min_cost_per_tflops FLOAT,
+        CONSTRAINT uq_market_latest_gpu_type UNIQUE (gpu_name, machine_type)
+    );
+
+    CREATE INDEX IF NOT EXISTS ix_market_latest_gpu_name ON market_latest (gpu_name);
+
+    INSERT INTO market_latest (
+        gpu_name, machine_type, timestamp, min_price, max_price, avg_price, median_price,
+        total_offers, available_gpus, verified_offers, avg_reliability, avg_total_flops, min_cost_per_tflops
+    )
+    SELECT DISTINCT ON (gpu_name, machine_type)
+        gpu_name, machine_type, timestamp, min_price, max_price, avg_price, median_price,
+        total_offers, available_gpus, verified_offers, avg_reliability, avg_total_flops, min_cost_per_tflops
+    FROM market_snapshots
+    ORDER BY gpu_name, machine_type, timestamp DESC
+    ON CONFLICT (gpu_name, machine_type) DO NOTHING;
+    """
+
+
+def get_sql_downgrade():
+    """SQL statements to drop the table."""
+    return """
+    DROP INDEX IF EXISTS ix_market_latest_gpu_name;
+    DROP TABLE IF EXISTS market_latest;
+    """
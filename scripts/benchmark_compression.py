@@ -3,6 +3,9 @@
 Benchmark completo de compressão para Dumont Snapshot
 Testa diferentes compressores em diferentes tipos de arquivos
 """
+import os
+import sys
+import tempfile
 import lz4.frame
 import zlib
 import zipnn
@@ -11,6 +14,11 @@ import json
 import hashlib
 import numpy as np
 
+# Add parent directory to path for imports
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from src.snapshot.compression import DumontArchive
+
 print("=" * 70)
 print("BENCHMARK COMPLETO DE COMPRESSÃO PARA SNAPSHOT")
 print("Chunks de 64MB")
@@ -167,6 +175,33 @@ for comp, r in results.items():
     if "error" not in r:
         print(f"  {comp:12s}: {r['ratio']:6.1f}x | Compress: {r['compress_speed_mb']:7.0f} MB/s | Decompress: {r['decompress_speed_mb']:7.0f} MB/s | OK: {r['integrity']}")
 
+print("\n" + "=" * 70)
+print("7. PIPELINE PARALELO (.dumont, escalonamento por cores)")
+print("=" * 70)
+with tempfile.TemporaryDirectory() as tmp:
+    workspace = os.path.join(tmp, "workspace")
+    os.makedirs(workspace)
+    with open(os.path.join(workspace, "weights.bin"), "wb") as f:
+        f.write(weight_data * 4)
+    with open(os.path.join(workspace, "train.log"), "wb") as f:
+        f.write(log_data * 4)
+    with open(os.path.join(workspace, "model.py"), "wb") as f:
+        f.write(code_data * 4)
+    workspace_size = sum(os.path.getsize(os.path.join(workspace, n)) for n in os.listdir(workspace))
+    print(f"Tamanho: {workspace_size/1024/1024:.1f} MB")
+
+    archive_path = os.path.join(tmp, "bench.dumont")
+    baseline = None
+    worker_counts = sorted({1, 2, 4, 8, 16, 32, os.cpu_count() or 1})
+    for workers in [w for w in worker_counts if w <= (os.cpu_count() or 1)]:
+        start = time.time()
+        with DumontArchive.create(archive_path, chunk_size=CHUNK_SIZE, workers=workers) as archive:
+            archive.add_directory(workspace)
+        elapsed = time.time() - start
+        speed = workspace_size / 1024 / 1024 / elapsed if elapsed > 0 else 0
+        baseline = baseline or speed
+        print(f"  workers={workers:3d}: {speed:7.0f} MB/s | Speedup: {speed / baseline:5.2f}x")
+
 print("\n" + "=" * 70)
 print("TABELA RESUMO - MELHOR COMPRESSOR POR TIPO")
 print("=" * 70)
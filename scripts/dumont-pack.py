@@ -5,6 +5,7 @@ dumont-pack - Create optimized workspace snapshots
 Usage:
     dumont-pack /workspace -o snapshot.dumont
     dumont-pack /workspace --chunk-size 64  # 64 MB chunks
+    dumont-pack /workspace -o snapshot.dumont -m zstd -T 4  # zstd, 4 threads per frame
 
 Features:
     - Hybrid compression by file type
@@ -32,6 +33,37 @@ def format_size(size_bytes: int) -> str:
     return f"{size_bytes:.1f} PB"
 
 
+def pack_dedup(args, progress_callback):
+    """Incremental snapshot into a content-addressed chunk store"""
+    from src.snapshot import ChunkStore, ChunkIndex, LocalChunkBackend
+
+    store = ChunkStore(
+        LocalChunkBackend(args.store),
+        ChunkIndex(args.index),
+        workers=args.workers,
+    )
+
+    print("Creating deduplicated snapshot...")
+    try:
+        stats = store.create_snapshot(args.source, args.output, progress_callback)
+    except Exception as e:
+        print(f"\nError creating snapshot: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print()
+    print("=" * 60)
+    print("Snapshot created successfully!")
+    print("=" * 60)
+    print(f"Snapshot ID: {stats.snapshot_id}")
+    print(f"Files:       {stats.num_files} ({stats.files_unchanged} unchanged)")
+    print(f"Chunks:      {stats.chunks_total} ({stats.chunks_new} new)")
+    print()
+    print(f"Total:       {format_size(stats.bytes_total)}")
+    print(f"New data:    {format_size(stats.bytes_new)}")
+    print(f"Uploaded:    {format_size(stats.bytes_uploaded)}")
+    print(f"Time:        {stats.elapsed_seconds:.1f}s")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Create optimized workspace snapshot',
@@ -40,13 +72,27 @@ def main():
 Examples:
     dumont-pack /workspace -o workspace.dumont
     dumont-pack /workspace --chunk-size 128  # 128 MB chunks
+    dumont-pack /workspace -o backup.dumont -j 16  # 16 compression threads
+    dumont-pack /workspace -o backup.dumont -m hybrid_zstd -T 2  # zstd frames on 2 threads each
+    dumont-pack /workspace --store /mnt/b2/chunks -o ws-2024-12-17  # dedup/incremental
     dumont-pack /workspace -o backup.dumont -v  # verbose
         """
     )
     parser.add_argument('source', help='Directory to snapshot')
-    parser.add_argument('-o', '--output', required=True, help='Output .dumont file')
+    parser.add_argument('-o', '--output', required=True,
+                        help='Output .dumont file (snapshot id with --store)')
+    parser.add_argument('--store', default=None,
+                        help='Content-addressed chunk store directory (incremental, deduplicated)')
+    parser.add_argument('--index', default=os.path.expanduser('~/.dumont/chunk_index.db'),
+                        help='Local chunk index for --store (default: ~/.dumont/chunk_index.db)')
     parser.add_argument('--chunk-size', type=int, default=64,
                         help='Chunk size in MB (default: 64)')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Compression threads (default: all CPUs)')
+    parser.add_argument('-m', '--method', default=None,
+                        help='Compression method, e.g. zstd, hybrid_zstd, lz4_fast (default: hybrid_v1)')
+    parser.add_argument('-T', '--zstd-threads', type=int, default=None,
+                        help='zstd threads per frame, on top of -j (-1 = all CPUs; default: method setting)')
     parser.add_argument('-v', '--verbose', action='store_true',
                         help='Verbose output')
 
@@ -77,7 +123,12 @@ Examples:
 
     # Create snapshot service
     chunk_size = args.chunk_size * 1024 * 1024
-    service = SnapshotService(chunk_size=chunk_size)
+    service = SnapshotService(
+        chunk_size=chunk_size,
+        workers=args.workers,
+        method=args.method,
+        zstd_threads=args.zstd_threads,
+    )
 
     # Progress tracking
     start_time = time.time()
@@ -101,6 +152,10 @@ Examples:
                   f"{display_path:<50}", end='', flush=True)
             last_update[0] = now
 
+    if args.store:
+        pack_dedup(args, progress_callback if args.verbose else None)
+        return
+
     # Create snapshot
     print("Creating snapshot...")
     try:
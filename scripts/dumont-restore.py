@@ -6,11 +6,14 @@ Usage:
     dumont-restore snapshot.dumont /workspace
     dumont-restore snapshot.dumont /workspace --gpu  # Use GPU decompression
     dumont-restore snapshot.dumont --info  # Show snapshot info
+    dumont-restore https://.../snap.dumont /workspace --only 'code/' --only '*.yaml' --rest
 
 Features:
     - GPU-accelerated decompression (with nvCOMP)
     - Progress display
     - Resume support
+    - Selective restore (globs / paths), reading only the needed byte ranges
+    - Local files or HTTP(S) URLs (B2/R2 presigned URLs, via Range requests)
 """
 
 import sys
@@ -23,6 +26,7 @@ sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
 
 from src.snapshot import SnapshotService
 from src.snapshot.snapshot_service import RestoreProgress
+from src.snapshot.compression.range_reader import is_url
 
 
 def format_size(size_bytes: int) -> str:
@@ -62,6 +66,41 @@ def show_info(snapshot_path: str):
         print(f"  ... and {len(files) - 20} more")
 
 
+def restore_selected(service: SnapshotService, args, progress_callback):
+    """Restore --only patterns first, then optionally the rest in priority order"""
+    print(f"Restoring: {', '.join(args.only)}")
+    try:
+        if args.rest:
+            restore = service.restore_lazy(
+                args.snapshot,
+                args.target,
+                args.only,
+                priority=args.priority,
+                progress_callback=progress_callback,
+            )
+            first = restore.first_phase
+        else:
+            first = service.restore_files(args.snapshot, args.target, args.only, progress_callback)
+    except Exception as e:
+        print(f"\nError restoring snapshot: {e}", file=sys.stderr)
+        sys.exit(1)
+
+    print()
+    print(f"Ready: {first['files_restored']} files ({format_size(first['bytes_original'])}) "
+          f"in {first['elapsed_seconds']:.1f}s")
+
+    if args.rest:
+        print("Restoring remaining files in background...")
+        try:
+            restore.wait()
+        except Exception as e:
+            print(f"\nError restoring snapshot: {e}", file=sys.stderr)
+            sys.exit(1)
+        print()
+        print(f"Remaining: {len(restore.restored_files)} files "
+              f"({format_size(restore.bytes_restored)}) in {time.time() - restore.started_at:.1f}s")
+
+
 def main():
     parser = argparse.ArgumentParser(
         description='Restore workspace from snapshot',
@@ -72,14 +111,26 @@ Examples:
     dumont-restore snapshot.dumont /workspace --gpu
     dumont-restore snapshot.dumont --info
     dumont-restore snapshot.dumont --list
+    dumont-restore snapshot.dumont /workspace --only 'configs/' --only '*.py'
+    dumont-restore snapshot.dumont /workspace --only 'code/' --rest --priority 'models/llama/'
         """
     )
-    parser.add_argument('snapshot', help='Path to .dumont snapshot file')
+    parser.add_argument('snapshot', help='Path or HTTP(S) URL of .dumont snapshot file')
     parser.add_argument('target', nargs='?', help='Target directory to restore to')
     parser.add_argument('--gpu', action='store_true', default=None,
                         help='Force GPU decompression (auto-detected by default)')
     parser.add_argument('--no-gpu', action='store_true',
                         help='Disable GPU decompression')
+    parser.add_argument('-j', '--workers', type=int, default=None,
+                        help='Decompression threads (default: all CPUs)')
+    parser.add_argument('--max-inflight', type=int, default=None,
+                        help='Max chunks held in memory (default: 2 x workers)')
+    parser.add_argument('--only', action='append', metavar='PATTERN',
+                        help='Restore only files matching glob/path (repeatable)')
+    parser.add_argument('--rest', action='store_true',
+                        help='With --only: restore the rest of the workspace afterwards')
+    parser.add_argument('--priority', action='append', metavar='PATTERN', default=[],
+                        help='With --rest: restore these globs/paths first (repeatable, in order)')
     parser.add_argument('--info', action='store_true',
                         help='Show snapshot information')
     parser.add_argument('--list', action='store_true',
@@ -90,7 +141,7 @@ Examples:
     args = parser.parse_args()
 
     # Validate snapshot file
-    if not os.path.isfile(args.snapshot):
+    if not is_url(args.snapshot) and not os.path.isfile(args.snapshot):
         print(f"Error: Snapshot file not found: {args.snapshot}", file=sys.stderr)
         sys.exit(1)
 
@@ -113,7 +164,7 @@ Examples:
         parser.print_help()
         sys.exit(1)
 
-    service = SnapshotService()
+    service = SnapshotService(workers=args.workers, max_inflight_chunks=args.max_inflight)
     info = service.get_snapshot_info(args.snapshot)
 
     # Determine GPU usage
@@ -152,7 +203,7 @@ Examples:
         now = time.time()
         # Update every 0.3 seconds
         if now - last_update[0] >= 0.3:
-            pct = (progress.current_chunk / progress.total_chunks) * 100 if progress.total_chunks > 0 else 0
+            pct = (progress.bytes_processed / progress.bytes_total) * 100 if progress.bytes_total > 0 else 0
 
             # Speed calculation
             if progress.elapsed_seconds > 0:
@@ -167,6 +218,11 @@ Examples:
                   f"ETA: {progress.estimated_remaining:.0f}s", end='', flush=True)
             last_update[0] = now
 
+    # Selective restore
+    if args.only:
+        restore_selected(service, args, progress_callback if args.verbose else None)
+        return
+
     # Restore
     print("Restoring...")
     try:
@@ -439,6 +439,7 @@ def get_instance_service_public() -> InstanceService:
         )
 
     logger.info(f"get_instance_service_public: using system API key")
+    # Cheap per request: the provider reuses the pooled session for this key
     gpu_provider = VastProvider(api_key=api_key)
     return InstanceService(gpu_provider=gpu_provider)
 
@@ -475,6 +476,7 @@ def get_instance_service(
             detail="Vast.ai API key not configured. Please update settings.",
         )
 
+    # Cheap per request: the provider reuses the pooled session for this key
     gpu_provider = VastProvider(api_key=api_key)
     return InstanceService(gpu_provider=gpu_provider)
 
@@ -11,8 +11,14 @@ Fornece acesso a:
 
 Os relatórios Spot estão em endpoints/spot/ (modular)
 """
+import asyncio
+import os
+import threading
+import time
+from collections import OrderedDict
+
 from fastapi import APIRouter, Query, HTTPException, status, Depends, Path
-from typing import Optional, List
+from typing import Any, Callable, Optional, List, Tuple
 from datetime import datetime, timedelta
 from sqlalchemy import func
 
@@ -36,6 +42,7 @@ from ..schemas.spot.reliability import (
 from ....config.database import get_session_factory
 from ....models.metrics import (
     MarketSnapshot,
+    MarketLatest,
     ProviderReliability,
     CostEfficiencyRanking,
     PricePrediction,
@@ -54,6 +61,41 @@ router = APIRouter(
 )
 
 
+# Cache em memória das respostas de resumo (o dashboard faz polling).
+# LRU limitado: as chaves vêm da query string (ex.: /compare?gpus=...)
+MARKET_CACHE_TTL_SECONDS = float(os.environ.get("MARKET_CACHE_TTL", "15"))
+MARKET_CACHE_MAX_ENTRIES = int(os.environ.get("MARKET_CACHE_MAX_ENTRIES", "256"))
+_market_cache: "OrderedDict[Tuple, Tuple[float, Any]]" = OrderedDict()
+_market_cache_lock = threading.Lock()
+
+
+async def _cached_market_response(key: Tuple, load: Callable[[], Any]) -> Any:
+    """Retorna a resposta em cache ou executa load() fora do event loop."""
+    with _market_cache_lock:
+        hit = _market_cache.get(key)
+        if hit and time.monotonic() - hit[0] < MARKET_CACHE_TTL_SECONDS:
+            _market_cache.move_to_end(key)
+            return hit[1]
+
+    value = await asyncio.to_thread(load)
+    now = time.monotonic()
+    with _market_cache_lock:
+        _market_cache[key] = (now, value)
+        _market_cache.move_to_end(key)
+        # Descarta expirados e, acima do limite, os menos usados
+        for stale in [k for k, (stored, _) in _market_cache.items() if now - stored >= MARKET_CACHE_TTL_SECONDS]:
+            del _market_cache[stale]
+        while len(_market_cache) > MARKET_CACHE_MAX_ENTRIES:
+            _market_cache.popitem(last=False)
+    return value
+
+
+def clear_market_cache() -> None:
+    """Descarta as respostas em cache."""
+    with _market_cache_lock:
+        _market_cache.clear()
+
+
 @router.get("/market", response_model=List[MarketSnapshotResponse])
 async def get_market_snapshots(
     gpu_name: Optional[str] = Query(None, description="Filtrar por GPU"),
@@ -122,50 +164,38 @@ async def get_market_summary(
     Se gpu_name não for especificado, retorna resumo de TODAS as GPUs.
     Formato: { "data": { "GPU_NAME": { "machine_type": { dados } } } }
     """
-    db = get_session_factory()()
-    try:
-        # Build query for latest snapshots
-        query = db.query(MarketSnapshot)
 
-        if gpu_name:
-            query = query.filter(MarketSnapshot.gpu_name == gpu_name)
-        if machine_type:
-            query = query.filter(MarketSnapshot.machine_type == machine_type)
-
-        # Get all recent snapshots (last 24 hours)
-        recent_time = datetime.utcnow() - timedelta(hours=24)
-        snapshots = query.filter(
-            MarketSnapshot.timestamp >= recent_time
-        ).order_by(MarketSnapshot.timestamp.desc()).all()
-
-        # Group by GPU and machine type - take latest for each
-        seen = set()
-        result = {}
-
-        for snap in snapshots:
-            key = (snap.gpu_name, snap.machine_type)
-            if key in seen:
-                continue
-            seen.add(key)
-
-            if snap.gpu_name not in result:
-                result[snap.gpu_name] = {}
-
-            result[snap.gpu_name][snap.machine_type] = {
-                "min_price": snap.min_price,
-                "max_price": snap.max_price,
-                "avg_price": snap.avg_price,
-                "median_price": snap.median_price,
-                "total_offers": snap.total_offers,
-                "available_gpus": snap.available_gpus,
-                "avg_reliability": snap.avg_reliability,
-                "min_cost_per_tflops": snap.min_cost_per_tflops,
-                "last_update": snap.timestamp.isoformat(),
-            }
-
-        return {"data": result, "generated_at": datetime.utcnow().isoformat()}
-    finally:
-        db.close()
+    def load():
+        db = get_session_factory()()
+        try:
+            # Uma linha por GPU + tipo (market_latest), só dados das últimas 24h
+            recent_time = datetime.utcnow() - timedelta(hours=24)
+            query = db.query(MarketLatest).filter(MarketLatest.timestamp >= recent_time)
+
+            if gpu_name:
+                query = query.filter(MarketLatest.gpu_name == gpu_name)
+            if machine_type:
+                query = query.filter(MarketLatest.machine_type == machine_type)
+
+            result = {}
+            for snap in query.all():
+                result.setdefault(snap.gpu_name, {})[snap.machine_type] = {
+                    "min_price": snap.min_price,
+                    "max_price": snap.max_price,
+                    "avg_price": snap.avg_price,
+                    "median_price": snap.median_price,
+                    "total_offers": snap.total_offers,
+                    "available_gpus": snap.available_gpus,
+                    "avg_reliability": snap.avg_reliability,
+                    "min_cost_per_tflops": snap.min_cost_per_tflops,
+                    "last_update": snap.timestamp.isoformat(),
+                }
+
+            return {"data": result, "generated_at": datetime.utcnow().isoformat()}
+        finally:
+            db.close()
+
+    return await _cached_market_response(("summary", gpu_name, machine_type), load)
 
 
 @router.get("/providers", response_model=List[ProviderRankingResponse])
@@ -362,48 +392,56 @@ async def compare_gpus(
     """
     Compara múltiplas GPUs em termos de preço e custo-benefício.
     """
-    db = get_session_factory()()
-    try:
-        gpu_list = [g.strip() for g in gpus.split(",")]
-        comparison = []
-
-        for gpu_name in gpu_list:
-            # Último snapshot
-            latest = db.query(MarketSnapshot).filter(
-                MarketSnapshot.gpu_name == gpu_name,
-                MarketSnapshot.machine_type == machine_type,
-            ).order_by(MarketSnapshot.timestamp.desc()).first()
-
-            if latest:
-                comparison.append(GpuComparisonItem(
+    # Normalizada: "A100,H100" e "H100, A100" usam a mesma entrada do cache
+    gpu_list = sorted({g.strip() for g in gpus.split(",") if g.strip()})
+
+    def load():
+        db = get_session_factory()()
+        try:
+            # Último snapshot de todas as GPUs pedidas numa query
+            latest = {
+                row.gpu_name: row
+                for row in db.query(MarketLatest).filter(
+                    MarketLatest.gpu_name.in_(gpu_list),
+                    MarketLatest.machine_type == machine_type,
+                ).all()
+            }
+
+            comparison = [
+                GpuComparisonItem(
                     gpu_name=gpu_name,
-                    avg_price=latest.avg_price,
-                    min_price=latest.min_price,
-                    total_offers=latest.total_offers,
-                    avg_reliability=latest.avg_reliability,
-                    min_cost_per_tflops=latest.min_cost_per_tflops,
-                    avg_total_flops=latest.avg_total_flops,
-                ))
-
-        # Ordenar por preço
-        comparison.sort(key=lambda x: x.avg_price)
-
-        # Identificar melhor custo-benefício
-        best_value = None
-        if comparison:
-            with_tflops = [c for c in comparison if c.min_cost_per_tflops]
-            if with_tflops:
-                best_value = min(with_tflops, key=lambda x: x.min_cost_per_tflops)
-
-        return ComparisonResponse(
-            machine_type=machine_type,
-            gpus=comparison,
-            cheapest=comparison[0] if comparison else None,
-            best_value=best_value,
-            generated_at=datetime.utcnow().isoformat(),
-        )
-    finally:
-        db.close()
+                    avg_price=latest[gpu_name].avg_price,
+                    min_price=latest[gpu_name].min_price,
+                    total_offers=latest[gpu_name].total_offers,
+                    avg_reliability=latest[gpu_name].avg_reliability,
+                    min_cost_per_tflops=latest[gpu_name].min_cost_per_tflops,
+                    avg_total_flops=latest[gpu_name].avg_total_flops,
+                )
+                for gpu_name in gpu_list
+                if gpu_name in latest
+            ]
+
+            # Ordenar por preço
+            comparison.sort(key=lambda x: x.avg_price)
+
+            # Identificar melhor custo-benefício
+            best_value = None
+            if comparison:
+                with_tflops = [c for c in comparison if c.min_cost_per_tflops]
+                if with_tflops:
+                    best_value = min(with_tflops, key=lambda x: x.min_cost_per_tflops)
+
+            return ComparisonResponse(
+                machine_type=machine_type,
+                gpus=comparison,
+                cheapest=comparison[0] if comparison else None,
+                best_value=best_value,
+                generated_at=datetime.utcnow().isoformat(),
+            )
+        finally:
+            db.close()
+
+    return await _cached_market_response(("compare", tuple(gpu_list), machine_type), load)
 
 
 @router.get("/gpus", response_model=List[str])
@@ -411,12 +449,15 @@ async def list_available_gpus():
     """
     Lista todas as GPUs disponíveis com dados de mercado.
     """
-    db = get_session_factory()()
-    try:
-        gpus = db.query(MarketSnapshot.gpu_name).distinct().all()
-        return sorted([gpu[0] for gpu in gpus if gpu[0]])
-    finally:
-        db.close()
+    def load():
+        db = get_session_factory()()
+        try:
+            gpus = db.query(MarketLatest.gpu_name).distinct().all()
+            return sorted([gpu[0] for gpu in gpus if gpu[0]])
+        finally:
+            db.close()
+
+    return await _cached_market_response(("gpus",), load)
 
 
 @router.get("/types", response_model=List[str])
@@ -440,82 +481,42 @@ async def get_real_savings(
     - Total em USD economizado
     - Média por dia
     - Breakdown por GPU
+    
+    Lê o rollup diário (uma query agregada) fora do event loop.
     """
-    from ....models.instance_status import HibernationEvent, InstanceStatus
-    from sqlalchemy import func
+    from ....services.hibernation_savings import get_real_savings as query_real_savings
+
+    def _query():
+        db = get_session_factory()()
+        try:
+            return query_real_savings(db, days, user_id)
+        finally:
+            db.close()
+
+    savings = await asyncio.to_thread(_query)
+    total_savings_usd = savings["total_savings_usd"]
+    total_idle_hours = savings["total_hours_saved"]
+
+    # Calcular médias
+    avg_daily_savings = total_savings_usd / days if days > 0 else 0
+    avg_daily_hours = total_idle_hours / days if days > 0 else 0
     
-    db = get_session_factory()()
-    try:
-        start_date = datetime.utcnow() - timedelta(days=days)
-        
-        # Query base para eventos de hibernação
-        query = db.query(HibernationEvent).filter(
-            HibernationEvent.timestamp >= start_date,
-            HibernationEvent.event_type.in_(["hibernated", "deleted"])
-        )
-        
-        if user_id:
-            # Filtrar por instâncias do usuário
-            user_instances = db.query(InstanceStatus.instance_id).filter(
-                InstanceStatus.user_id == user_id
-            ).subquery()
-            query = query.filter(HibernationEvent.instance_id.in_(user_instances))
-        
-        events = query.all()
-        
-        # Calcular economia
-        total_savings_usd = 0.0
-        total_idle_hours = 0.0
-        gpu_breakdown = {}
-        hibernation_count = 0
-        
-        for event in events:
-            if event.savings_usd:
-                total_savings_usd += event.savings_usd
-            if event.idle_hours:
-                total_idle_hours += event.idle_hours
-            hibernation_count += 1
-            
-            # Buscar info da instância para breakdown
-            instance = db.query(InstanceStatus).filter(
-                InstanceStatus.instance_id == event.instance_id
-            ).first()
-            
-            if instance and instance.gpu_type:
-                gpu_type = instance.gpu_type
-                if gpu_type not in gpu_breakdown:
-                    gpu_breakdown[gpu_type] = {
-                        "hibernations": 0,
-                        "hours_saved": 0,
-                        "usd_saved": 0
-                    }
-                gpu_breakdown[gpu_type]["hibernations"] += 1
-                gpu_breakdown[gpu_type]["hours_saved"] += event.idle_hours or 0
-                gpu_breakdown[gpu_type]["usd_saved"] += event.savings_usd or 0
-        
-        # Calcular médias
-        avg_daily_savings = total_savings_usd / days if days > 0 else 0
-        avg_daily_hours = total_idle_hours / days if days > 0 else 0
-        
-        # Projeção mensal
-        projected_monthly = avg_daily_savings * 30
-        
-        return {
-            "period_days": days,
-            "summary": {
-                "total_savings_usd": round(total_savings_usd, 2),
-                "total_hours_saved": round(total_idle_hours, 1),
-                "hibernation_count": hibernation_count,
-                "avg_daily_savings_usd": round(avg_daily_savings, 2),
-                "avg_daily_hours_saved": round(avg_daily_hours, 1),
-                "projected_monthly_savings_usd": round(projected_monthly, 2),
-            },
-            "gpu_breakdown": gpu_breakdown,
-            "generated_at": datetime.utcnow().isoformat(),
-        }
-        
-    finally:
-        db.close()
+    # Projeção mensal
+    projected_monthly = avg_daily_savings * 30
+    
+    return {
+        "period_days": days,
+        "summary": {
+            "total_savings_usd": round(total_savings_usd, 2),
+            "total_hours_saved": round(total_idle_hours, 1),
+            "hibernation_count": savings["hibernation_count"],
+            "avg_daily_savings_usd": round(avg_daily_savings, 2),
+            "avg_daily_hours_saved": round(avg_daily_hours, 1),
+            "projected_monthly_savings_usd": round(projected_monthly, 2),
+        },
+        "gpu_breakdown": savings["gpu_breakdown"],
+        "generated_at": datetime.utcnow().isoformat(),
+    }
 
 
 @router.get("/savings/history")
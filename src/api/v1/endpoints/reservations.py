@@ -20,6 +20,7 @@ from ..schemas.response import (
     ReservationResponse,
     ListReservationsResponse,
     AvailabilityResponse,
+    AvailabilitySlotsResponse,
     PricingEstimateResponse,
     CancelReservationResponse,
     CreditBalanceResponse,
@@ -202,7 +203,8 @@ async def check_availability(
     availability = service.get_availability_details(
         gpu_type=gpu_type,
         start_time=start_time,
-        end_time=end_time
+        end_time=end_time,
+        gpu_count=gpu_count
     )
 
     return AvailabilityResponse(
@@ -211,12 +213,59 @@ async def check_availability(
         gpu_count=gpu_count,
         start_time=start,
         end_time=end,
-        capacity=1 if availability["available"] else 0,
+        capacity=availability["free_capacity"],
         conflicting_reservations=availability["conflicting_reservations"],
         message="GPU available for reservation" if availability["available"] else "GPU not available for requested time slot"
     )
 
 
+@router.get("/availability/slots", response_model=AvailabilitySlotsResponse)
+async def list_availability_slots(
+    gpu_type: str = Query(..., description="GPU type (e.g., 'A100', 'H100')"),
+    start: str = Query(..., alias="start", description="Range start (ISO 8601 format, UTC)"),
+    end: str = Query(..., alias="end", description="Range end (ISO 8601 format, UTC)"),
+    gpu_count: int = Query(1, ge=1, le=8, description="Number of GPUs"),
+    min_duration_hours: float = Query(0, ge=0, description="Skip slots shorter than this"),
+    service: ReservationService = Depends(get_reservation_service),
+):
+    """
+    List free capacity windows for a GPU type over a range.
+
+    Used by the reservation calendar to show when the requested
+    number of GPUs can be booked.
+    """
+    try:
+        start_time = datetime.fromisoformat(start.replace('Z', '+00:00')).replace(tzinfo=None)
+        end_time = datetime.fromisoformat(end.replace('Z', '+00:00')).replace(tzinfo=None)
+    except ValueError as e:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail=f"Invalid datetime format: {e}. Use ISO 8601 format"
+        )
+
+    if end_time <= start_time or (end_time - start_time).days > 90:
+        raise HTTPException(
+            status_code=status.HTTP_400_BAD_REQUEST,
+            detail="Range end must be after start and span at most 90 days"
+        )
+
+    slots = service.get_free_slots(
+        gpu_type=gpu_type,
+        start_time=start_time,
+        end_time=end_time,
+        gpu_count=gpu_count,
+        min_duration_hours=min_duration_hours
+    )
+
+    return AvailabilitySlotsResponse(
+        gpu_type=gpu_type,
+        gpu_count=gpu_count,
+        start_time=start,
+        end_time=end,
+        slots=slots,
+    )
+
+
 @router.get("/pricing", response_model=PricingEstimateResponse)
 async def get_pricing_estimate(
     gpu_type: str = Query(..., description="GPU type (e.g., 'A100', 'H100')"),
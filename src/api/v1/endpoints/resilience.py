@@ -7,6 +7,7 @@ Provides API access to:
 - Circuit breaker status
 - Resource cleanup
 - Snapshot garbage collection
+- HTTP connection pool (Vast.ai keep-alive reuse)
 - Audit logs
 - Configuration
 """
@@ -26,6 +27,7 @@ from ....core.resilience import (
     get_failover_progress,
     get_prometheus_metrics,
 )
+from ....infrastructure.http_pool import get_http_pool_stats
 from ..dependencies import require_auth
 
 router = APIRouter(
@@ -329,6 +331,24 @@ async def resilience_health():
     }
 
 
+# =============================================================================
+# HTTP CONNECTION POOL
+# =============================================================================
+
+@router.get("/http-pool")
+async def get_http_pool_status():
+    """
+    Get Vast.ai HTTP session pool metrics.
+
+    Shows how many requests reused a keep-alive connection instead of
+    opening a new TCP+TLS connection, overall and per API key fingerprint.
+    """
+    return {
+        "success": True,
+        "pool": get_http_pool_stats(),
+    }
+
+
 # =============================================================================
 # STORAGE FALLBACK
 # =============================================================================
@@ -4,6 +4,7 @@ Webhook management API endpoints
 Provides CRUD operations for webhook configurations and a test endpoint
 for verifying webhook delivery.
 """
+import asyncio
 import logging
 from typing import List, Optional
 from datetime import datetime
@@ -503,3 +504,18 @@ async def get_event_types(
         "events": list(event_descriptions.keys()),
         "descriptions": event_descriptions,
     }
+
+
+@router.get("/delivery/metrics", response_model=dict)
+async def get_delivery_metrics(
+    user_email: str = Depends(get_current_user_email),
+):
+    """
+    Get webhook delivery engine metrics.
+
+    Returns outbox depth (pending/in-flight), delivery counters and
+    request latency / end-to-end lag percentiles in milliseconds.
+    """
+    from src.services.webhook_delivery import get_delivery_engine
+
+    return await asyncio.to_thread(get_delivery_engine().get_metrics)
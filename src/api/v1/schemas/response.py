@@ -428,6 +428,22 @@ class AvailabilityResponse(BaseModel):
     message: Optional[str] = Field(None, description="Additional information")
 
 
+class AvailabilitySlot(BaseModel):
+    """Free capacity window"""
+    start_time: str = Field(..., description="Slot start time")
+    end_time: str = Field(..., description="Slot end time")
+    free_capacity: int = Field(..., description="Minimum free GPUs during the slot")
+
+
+class AvailabilitySlotsResponse(BaseModel):
+    """Free capacity windows over a range (calendar view)"""
+    gpu_type: str = Field(..., description="GPU type checked")
+    gpu_count: int = Field(1, description="Number of GPUs requested")
+    start_time: str = Field(..., description="Range start time")
+    end_time: str = Field(..., description="Range end time")
+    slots: List[AvailabilitySlot] = Field(default_factory=list, description="Windows where the GPUs fit")
+
+
 class PricingEstimateResponse(BaseModel):
     """Reservation pricing estimate response"""
     gpu_type: str = Field(..., description="GPU type")
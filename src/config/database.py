@@ -38,7 +38,7 @@ def get_db():
 def init_db():
     """Inicializa o banco de dados criando todas as tabelas."""
     # Import all models to register them with Base.metadata
-    from src.models.webhook_config import WebhookConfig, WebhookLog
+    from src.models.webhook_config import WebhookConfig, WebhookLog, WebhookOutbox
 
     Base.metadata.create_all(bind=engine)
 
@@ -46,6 +46,9 @@ class VastSettings(BaseSettings):
     default_region: str = Field(default="EU", validation_alias=AliasChoices("default_region", "VAST_DEFAULT_REGION"))
     min_reliability: float = Field(default=0.95, validation_alias=AliasChoices("min_reliability", "VAST_MIN_RELIABILITY"))
     min_cuda: str = Field(default="12.0", validation_alias=AliasChoices("min_cuda", "VAST_MIN_CUDA"))
+    pool_connections: int = Field(default=10, validation_alias=AliasChoices("pool_connections", "VAST_POOL_CONNECTIONS"))
+    pool_maxsize: int = Field(default=32, validation_alias=AliasChoices("pool_maxsize", "VAST_POOL_MAXSIZE"))
+    max_concurrency: int = Field(default=8, validation_alias=AliasChoices("max_concurrency", "VAST_MAX_CONCURRENCY"))
 
 
 class AppSettings(BaseSettings):
@@ -0,0 +1,234 @@
+"""
+HTTP Session Pool - Process-wide keep-alive sessions per API key
+
+Every Vast.ai client (VastProvider, VastService, HostFinder) used to open a
+fresh TCP+TLS connection per call. This module keeps one requests.Session
+per API key, backed by a urllib3 connection pool, so polling loops reuse
+warm connections.
+
+Usage:
+    from src.infrastructure.http_pool import get_vast_session
+
+    session = get_vast_session(api_key)
+    resp = session.get(f"{VAST_API_URL}/instances/", timeout=30)
+
+Pool sizing comes from VastSettings (VAST_POOL_CONNECTIONS, VAST_POOL_MAXSIZE).
+"""
+
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+from typing import Any, Dict, Optional
+
+import requests
+from requests.adapters import HTTPAdapter
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_POOL_CONNECTIONS = 10   # Distinct hosts cached per session
+DEFAULT_POOL_MAXSIZE = 32       # Keep-alive connections per host
+DEFAULT_MAX_SESSIONS = 256      # API keys kept warm (LRU)
+
+
+def _key_fingerprint(api_key: str) -> str:
+    """Short, non-reversible id for an API key (safe for logs and metrics)"""
+    return hashlib.sha256(api_key.encode()).hexdigest()[:12]
+
+
+class CountingHTTPAdapter(HTTPAdapter):
+    """
+    HTTPAdapter that counts requests sent and connections opened.
+
+    Requests are counted in send(); new connections through a subclass of
+    each pool's ConnectionCls whose connect() records the event, so reuse
+    metrics rely only on urllib3's public pool/connection hooks.
+    """
+
+    def __init__(self, *args, **kwargs):
+        self.requests_sent = 0
+        self.connections_opened = 0
+        self._stats_lock = threading.Lock()
+        super().__init__(*args, **kwargs)
+
+    def _record_connection(self):
+        with self._stats_lock:
+            self.connections_opened += 1
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        adapter = self
+        pool_classes = {}
+        for scheme, pool_cls in self.poolmanager.pool_classes_by_scheme.items():
+            class CountingConnection(pool_cls.ConnectionCls):
+                def connect(self):
+                    adapter._record_connection()
+                    return super().connect()
+
+            pool_classes[scheme] = type(pool_cls.__name__, (pool_cls,), {"ConnectionCls": CountingConnection})
+        self.poolmanager.pool_classes_by_scheme = pool_classes
+
+    def send(self, request, *args, **kwargs):
+        with self._stats_lock:
+            self.requests_sent += 1
+        return super().send(request, *args, **kwargs)
+
+    def connection_stats(self) -> Dict[str, int]:
+        """New connections vs requests sent through this adapter"""
+        with self._stats_lock:
+            return {
+                "connections_opened": self.connections_opened,
+                "requests": self.requests_sent,
+                "connections_reused": max(0, self.requests_sent - self.connections_opened),
+            }
+
+
+class HTTPSessionPool:
+    """
+    Thread-safe cache of keep-alive sessions, one per API key.
+
+    Sessions carry the key's Authorization header and share nothing else, so
+    a revoked key never leaks into another user's requests. The least
+    recently used session is closed once max_sessions is exceeded.
+    """
+
+    def __init__(
+        self,
+        pool_connections: int = DEFAULT_POOL_CONNECTIONS,
+        pool_maxsize: int = DEFAULT_POOL_MAXSIZE,
+        max_sessions: int = DEFAULT_MAX_SESSIONS,
+    ):
+        """
+        Initialize session pool.
+
+        Args:
+            pool_connections: Number of host pools cached per session
+            pool_maxsize: Max keep-alive connections per host
+            max_sessions: Max API keys kept open at once
+        """
+        self.pool_connections = pool_connections
+        self.pool_maxsize = pool_maxsize
+        self.max_sessions = max_sessions
+        self._sessions: "OrderedDict[str, requests.Session]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._sessions_created = 0
+        self._sessions_evicted = 0
+
+    def _new_session(self, api_key: str) -> requests.Session:
+        session = requests.Session()
+        # pool_block=False: overflow connections are opened and discarded
+        # instead of blocking callers when the pool is exhausted
+        adapter = CountingHTTPAdapter(
+            pool_connections=self.pool_connections,
+            pool_maxsize=self.pool_maxsize,
+        )
+        session.mount("https://", adapter)
+        session.mount("http://", adapter)
+        session.headers.update({
+            "Authorization": f"Bearer {api_key}",
+            "Accept": "application/json",
+            "Connection": "keep-alive",
+        })
+        return session
+
+    def get_session(self, api_key: str) -> requests.Session:
+        """Get (or create) the pooled session for an API key"""
+        fingerprint = _key_fingerprint(api_key)
+        with self._lock:
+            session = self._sessions.get(fingerprint)
+            if session is not None:
+                self._sessions.move_to_end(fingerprint)
+                return session
+
+            session = self._new_session(api_key)
+            self._sessions[fingerprint] = session
+            self._sessions_created += 1
+
+            while len(self._sessions) > self.max_sessions:
+                old_fingerprint, old_session = self._sessions.popitem(last=False)
+                old_session.close()
+                self._sessions_evicted += 1
+                logger.debug(f"[HTTPSessionPool] Evicted session {old_fingerprint}")
+            return session
+
+    @staticmethod
+    def _connection_stats(session: requests.Session) -> Dict[str, int]:
+        """New connections vs requests sent, summed over the session's adapters"""
+        stats = {"connections_opened": 0, "requests": 0, "connections_reused": 0}
+        adapters = {id(a): a for a in session.adapters.values() if isinstance(a, CountingHTTPAdapter)}
+        for adapter in adapters.values():
+            for name, value in adapter.connection_stats().items():
+                stats[name] += value
+        return stats
+
+    def get_stats(self) -> Dict[str, Any]:
+        """
+        Connection reuse metrics.
+
+        Returns:
+            Dict with totals, reuse ratio and per-key (fingerprint) breakdown
+        """
+        with self._lock:
+            sessions = list(self._sessions.items())
+            created = self._sessions_created
+            evicted = self._sessions_evicted
+
+        per_key = {fingerprint: self._connection_stats(session) for fingerprint, session in sessions}
+        total_requests = sum(s["requests"] for s in per_key.values())
+        total_connections = sum(s["connections_opened"] for s in per_key.values())
+        reused = sum(s["connections_reused"] for s in per_key.values())
+
+        return {
+            "active_sessions": len(sessions),
+            "sessions_created": created,
+            "sessions_evicted": evicted,
+            "pool_connections": self.pool_connections,
+            "pool_maxsize": self.pool_maxsize,
+            "requests": total_requests,
+            "connections_opened": total_connections,
+            "connections_reused": reused,
+            "reuse_ratio": round(reused / total_requests, 4) if total_requests else 0.0,
+            "sessions": per_key,
+        }
+
+    def close(self):
+        """Close every pooled session"""
+        with self._lock:
+            for session in self._sessions.values():
+                session.close()
+            self._sessions.clear()
+
+
+# Global pool instance
+_session_pool: Optional[HTTPSessionPool] = None
+_session_pool_lock = threading.Lock()
+
+
+def get_session_pool() -> HTTPSessionPool:
+    """Get or create the process-wide session pool (sized from VastSettings)"""
+    global _session_pool
+    if _session_pool is None:
+        with _session_pool_lock:
+            if _session_pool is None:
+                pool_connections = DEFAULT_POOL_CONNECTIONS
+                pool_maxsize = DEFAULT_POOL_MAXSIZE
+                try:
+                    from ..core.config import get_settings
+                    vast = get_settings().vast
+                    pool_connections = vast.pool_connections
+                    pool_maxsize = vast.pool_maxsize
+                except Exception as e:
+                    logger.debug(f"[HTTPSessionPool] Using default pool size: {e}")
+                _session_pool = HTTPSessionPool(pool_connections=pool_connections, pool_maxsize=pool_maxsize)
+    return _session_pool
+
+
+def get_vast_session(api_key: str) -> requests.Session:
+    """Pooled keep-alive session for a Vast.ai API key"""
+    return get_session_pool().get_session(api_key)
+
+
+def get_http_pool_stats() -> Dict[str, Any]:
+    """Connection reuse metrics of the process-wide pool"""
+    return get_session_pool().get_stats()
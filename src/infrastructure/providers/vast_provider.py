@@ -4,11 +4,14 @@ Implements IGpuProvider interface (Dependency Inversion Principle)
 """
 import json
 import logging
+import threading
 import time
 import requests
+from concurrent.futures import ThreadPoolExecutor
 from typing import List, Optional, Dict, Any, TypeVar, Callable
 from datetime import datetime
 from functools import wraps
+from urllib.parse import urlparse
 
 from ...core.exceptions import (
     VastAPIException,
@@ -23,11 +26,38 @@ from ...core.constants import VAST_API_URL, VAST_DEFAULT_TIMEOUT
 from ...domain.repositories import IGpuProvider
 from ...domain.models import GpuOffer, Instance
 from ...services.region_mapper import get_region_mapper
+from ..http_pool import get_vast_session
 
 logger = logging.getLogger(__name__)
 
 T = TypeVar('T')
 
+# Max concurrent requests per API host, shared by every provider in the process
+DEFAULT_HOST_CONCURRENCY = 8
+
+_host_semaphores: Dict[str, threading.BoundedSemaphore] = {}
+_host_semaphores_lock = threading.Lock()
+
+
+def get_host_concurrency() -> int:
+    """Configured max concurrent requests per API host (VAST_MAX_CONCURRENCY)"""
+    try:
+        from ...core.config import get_settings
+        return max(1, get_settings().vast.max_concurrency)
+    except Exception:
+        return DEFAULT_HOST_CONCURRENCY
+
+
+def _get_host_semaphore(url: str) -> threading.BoundedSemaphore:
+    """Per-host concurrency limiter"""
+    host = urlparse(url).netloc
+    with _host_semaphores_lock:
+        semaphore = _host_semaphores.get(host)
+        if semaphore is None:
+            semaphore = threading.BoundedSemaphore(get_host_concurrency())
+            _host_semaphores[host] = semaphore
+        return semaphore
+
 
 def retry_with_backoff(
     max_retries: int = 3,
@@ -112,6 +142,10 @@ class VastProvider(IGpuProvider):
         self.api_url = api_url
         self.timeout = timeout
         self.headers = {"Authorization": f"Bearer {api_key}"}
+        # Process-wide keep-alive session shared by every provider for this key
+        self.session = get_vast_session(api_key)
+        # Per-query latency of the last fetch_all_market_data sweep
+        self.last_fetch_stats: Dict[str, Any] = {}
 
     @retry_with_backoff(max_retries=3, initial_delay=2.0, max_delay=30.0)
     def _make_request(
@@ -138,14 +172,16 @@ class VastProvider(IGpuProvider):
             Response object
         """
         url = f"{self.api_url}/{endpoint.lstrip('/')}"
-        response = requests.request(
-            method=method,
-            url=url,
-            headers=self.headers,
-            params=params,
-            json=json_data,
-            timeout=timeout or self.timeout,
-        )
+        # Held only for the request itself: retry backoff sleeps release it
+        with _get_host_semaphore(url):
+            response = self.session.request(
+                method=method,
+                url=url,
+                headers=self.headers,
+                params=params,
+                json=json_data,
+                timeout=timeout or self.timeout,
+            )
         # For rate limiting to work with decorator, we need to raise on 429/5xx
         if response.status_code == 429 or (500 <= response.status_code < 600):
             response.raise_for_status()
@@ -442,40 +478,76 @@ class VastProvider(IGpuProvider):
         machine_types: Optional[List[str]] = None,
         max_price: float = 100.0,
         limit_per_query: int = 200,
+        max_workers: Optional[int] = None,
     ) -> Dict[str, List[GpuOffer]]:
         """
         Busca dados de mercado completos para todas as GPUs e tipos.
 
+        As queries GPU x tipo rodam em paralelo num pool de threads; o limite
+        por host (VAST_MAX_CONCURRENCY) e o retry em 429 de _make_request (a
+        unica camada de retry) mantem o ritmo dentro do rate limit da VAST.ai.
+        A latencia de cada query fica em self.last_fetch_stats.
+
         Args:
             gpus_to_monitor: Lista de GPUs para monitorar
             machine_types: Lista de tipos de máquina (padrão: todos)
             max_price: Preço máximo por hora
             limit_per_query: Limite de resultados por query
+            max_workers: Threads do pool (padrão: limite de concorrência por host)
 
         Returns:
             Dict agrupado por "gpu_name:machine_type" -> List[GpuOffer]
         """
         machine_types = machine_types or self.MACHINE_TYPES
-        all_offers = {}
+        keys = [(gpu_name, machine_type) for gpu_name in gpus_to_monitor for machine_type in machine_types]
+        if max_workers is None:
+            max_workers = get_host_concurrency()
 
-        for gpu_name in gpus_to_monitor:
-            for machine_type in machine_types:
-                key = f"{gpu_name}:{machine_type}"
-                try:
-                    offers = self.search_offers_by_type(
-                        machine_type=machine_type,
-                        gpu_name=gpu_name,
-                        max_price=max_price,
-                        limit=limit_per_query,
-                    )
-                    all_offers[key] = offers
-                    logger.debug(f"Fetched {len(offers)} offers for {key}")
-                except Exception as e:
-                    logger.warning(f"Failed to fetch {key}: {e}")
-                    all_offers[key] = []
+        def fetch(gpu_name: str, machine_type: str):
+            key = f"{gpu_name}:{machine_type}"
+            start = time.perf_counter()
+            try:
+                # No retry here: _make_request already backs off on 429/5xx
+                offers = self.search_offers_by_type(
+                    machine_type=machine_type,
+                    gpu_name=gpu_name,
+                    max_price=max_price,
+                    limit=limit_per_query,
+                )
+                error = None
+                logger.debug(f"Fetched {len(offers)} offers for {key}")
+            except Exception as e:
+                logger.warning(f"Failed to fetch {key}: {e}")
+                offers = []
+                error = str(e)
+            latency_ms = (time.perf_counter() - start) * 1000
+            return key, offers, {"latency_ms": round(latency_ms, 1), "offers": len(offers), "error": error}
+
+        sweep_start = time.perf_counter()
+        all_offers = {}
+        queries = {}
+        with ThreadPoolExecutor(max_workers=max(1, min(max_workers, len(keys) or 1)),
+                                thread_name_prefix="vast-market") as executor:
+            # Results keep the (gpu, type) order of the serial loop
+            for key, offers, query_stats in executor.map(lambda k: fetch(*k), keys):
+                all_offers[key] = offers
+                queries[key] = query_stats
+
+        total_ms = (time.perf_counter() - sweep_start) * 1000
+        latencies = [q["latency_ms"] for q in queries.values()]
+        self.last_fetch_stats = {
+            "total_ms": round(total_ms, 1),
+            "queries": queries,
+            "max_query_ms": max(latencies) if latencies else 0.0,
+            "sum_query_ms": round(sum(latencies), 1),
+            "failed": sum(1 for q in queries.values() if q["error"]),
+        }
 
         total = sum(len(v) for v in all_offers.values())
-        logger.info(f"Total market data fetched: {total} offers across {len(all_offers)} GPU/type combinations")
+        logger.info(
+            f"Total market data fetched: {total} offers across {len(all_offers)} GPU/type combinations "
+            f"in {total_ms:.0f}ms (slowest query {self.last_fetch_stats['max_query_ms']:.0f}ms)"
+        )
         return all_offers
 
     def create_instance(
@@ -1012,7 +1084,7 @@ class VastProvider(IGpuProvider):
 
         start = _time.time()
         try:
-            resp = requests.get(
+            resp = self.session.get(
                 f"{self.api_url}/bundles/",
                 params={"q": json.dumps({"rentable": {"eq": True}}), "limit": 1},
                 headers=self.headers,
@@ -152,6 +152,7 @@ async def lifespan(app: FastAPI):
             b2_endpoint = os.environ.get("B2_ENDPOINT", "")
             b2_bucket = os.environ.get("B2_BUCKET", "")
             snapshot_interval = int(os.environ.get("PERIODIC_SNAPSHOT_INTERVAL_MINUTES", "60"))
+            snapshot_dedup = os.environ.get("PERIODIC_SNAPSHOT_DEDUP", "false").lower() == "true"
 
             if b2_endpoint and b2_bucket:
                 snapshot_service = GPUSnapshotService(
@@ -161,7 +162,8 @@ async def lifespan(app: FastAPI):
                 periodic_snapshot = get_periodic_snapshot_service(
                     snapshot_service=snapshot_service,
                     interval_minutes=snapshot_interval,
-                    keep_last_n=24  # Keep last 24 snapshots (1 day at 1/hour)
+                    keep_last_n=24,  # Keep last 24 snapshots (1 day at 1/hour)
+                    dedup=snapshot_dedup  # Upload only new chunks (ChunkStore)
                 )
                 # Note: start() is async, will be called separately if needed
                 # For now, the service is created and ready to use via API
@@ -204,6 +206,27 @@ async def lifespan(app: FastAPI):
         except Exception as e:
             logger.warning(f"⚠ GPU Reservation Scheduler not started: {e}")
 
+        # Initialize Webhook Delivery Engine (delivers the webhook outbox)
+        try:
+            from .services.webhook_delivery import get_delivery_engine
+
+            delivery_engine = get_delivery_engine()
+            await delivery_engine.start()
+            agents_started.append(f"WebhookDeliveryEngine ({delivery_engine.workers} workers)")
+            logger.info("✓ WebhookDeliveryEngine started")
+        except Exception as e:
+            logger.warning(f"⚠ WebhookDeliveryEngine not started: {e}")
+
+        # Warm model registry cache with the marketplace's popular models (background)
+        try:
+            import asyncio
+            from .modules.models.registry import get_registry
+
+            asyncio.get_running_loop().run_in_executor(None, get_registry().warm_up)
+            logger.info("✓ Model registry warm-up scheduled")
+        except Exception as e:
+            logger.warning(f"⚠ Model registry warm-up not scheduled: {e}")
+
         logger.info(f"   Started agents: {', '.join(agents_started) if agents_started else 'None'}")
         
     except Exception as e:
@@ -224,6 +247,14 @@ async def lifespan(app: FastAPI):
     except Exception as e:
         logger.error(f"Error stopping AutoHibernationManager: {e}")
 
+    # Stop webhook delivery (flushes buffered logs, releases claimed deliveries)
+    try:
+        from .services.webhook_delivery import get_delivery_engine
+        await get_delivery_engine().stop()
+        logger.info("✓ WebhookDeliveryEngine stopped")
+    except Exception as e:
+        logger.error(f"Error stopping WebhookDeliveryEngine: {e}")
+
     # Stop exchange rate scheduler
     try:
         from .core.scheduler import shutdown_scheduler
@@ -0,0 +1,71 @@
+"""
+Database migration script to make offer_stability unique per machine.
+
+The market collector writes offer_stability with
+INSERT ... ON CONFLICT (provider, machine_id) DO UPDATE, which needs a
+unique index on those columns.
+
+This:
+- Removes duplicate (provider, machine_id) rows, keeping the most recent
+- Replaces idx_stability_provider_machine with a UNIQUE index
+
+Run with: python -m src.migrations.add_offer_stability_unique
+"""
+import logging
+from sqlalchemy import text, inspect
+from src.config.database import engine
+
+logging.basicConfig(level=logging.INFO)
+logger = logging.getLogger(__name__)
+
+
+def run_migration():
+    """Execute database migration to add the unique offer_stability index."""
+
+    conn = engine.connect()
+    inspector = inspect(engine)
+
+    try:
+        if 'offer_stability' not in inspector.get_table_names():
+            logger.info("offer_stability table does not exist, skipping...")
+            return
+
+        indexes = {i['name']: i for i in inspector.get_indexes('offer_stability')}
+        existing = indexes.get('idx_stability_provider_machine')
+        if existing and existing.get('unique'):
+            logger.info("idx_stability_provider_machine already unique, skipping...")
+            return
+
+        logger.info("Removing duplicate offer_stability rows...")
+        result = conn.execute(text("""
+            DELETE FROM offer_stability
+            WHERE id NOT IN (
+                SELECT MAX(id) FROM offer_stability GROUP BY provider, machine_id
+            )
+        """))
+        conn.commit()
+        logger.info(f"  Removed {result.rowcount} duplicates")
+
+        if existing:
+            conn.execute(text("DROP INDEX idx_stability_provider_machine"))
+            conn.commit()
+
+        conn.execute(text("""
+            CREATE UNIQUE INDEX idx_stability_provider_machine
+            ON offer_stability (provider, machine_id)
+        """))
+        conn.commit()
+        logger.info("✓ Created unique index idx_stability_provider_machine")
+
+        logger.info("Migration completed successfully!")
+
+    except Exception as e:
+        logger.error(f"Migration failed: {e}")
+        conn.rollback()
+        raise
+    finally:
+        conn.close()
+
+
+if __name__ == "__main__":
+    run_migration()
@@ -4,6 +4,7 @@ Database migration script to create webhook configuration and log tables.
 This creates:
 - webhook_configs: Stores user webhook configurations
 - webhook_logs: Stores webhook delivery attempts and results
+- webhook_outbox: Durable queue of pending webhook deliveries
 
 Run with: python -m src.migrations.add_webhooks
 """
@@ -18,7 +19,7 @@ logger = logging.getLogger(__name__)
 def create_webhook_tables():
     """Create webhook tables using SQLAlchemy models."""
     # Import models to register them with Base.metadata
-    from src.models.webhook_config import WebhookConfig, WebhookLog
+    from src.models.webhook_config import WebhookConfig, WebhookLog, WebhookOutbox
 
     inspector = inspect(engine)
     tables = inspector.get_table_names()
@@ -33,6 +34,10 @@ def create_webhook_tables():
     if 'webhook_logs' not in tables:
         tables_to_create.append('webhook_logs')
 
+    # Check if webhook_outbox table exists
+    if 'webhook_outbox' not in tables:
+        tables_to_create.append('webhook_outbox')
+
     if tables_to_create:
         logger.info(f"Creating tables: {', '.join(tables_to_create)}")
 
@@ -42,7 +47,8 @@ def create_webhook_tables():
             bind=engine,
             tables=[
                 WebhookConfig.__table__,
-                WebhookLog.__table__
+                WebhookLog.__table__,
+                WebhookOutbox.__table__,
             ]
         )
 
@@ -86,6 +92,11 @@ def run_migration():
             index_names = [idx['name'] for idx in indexes]
             logger.info(f"  Indexes on webhook_logs: {', '.join(index_names)}")
 
+        if 'webhook_outbox' in tables:
+            indexes = inspector.get_indexes('webhook_outbox')
+            index_names = [idx['name'] for idx in indexes]
+            logger.info(f"  Indexes on webhook_outbox: {', '.join(index_names)}")
+
         logger.info("Migration completed successfully!")
 
     except Exception as e:
@@ -1,8 +1,8 @@
 """Modelos de banco de dados."""
 
 from .price_history import PriceHistory, PriceAlert
-from .instance_status import InstanceStatus, HibernationEvent
-from .metrics import MarketSnapshot, ProviderReliability, PricePrediction, CostEfficiencyRanking
+from .instance_status import InstanceStatus, HibernationEvent, HibernationSavingsDaily, HibernationSavingsBackfill
+from .metrics import MarketSnapshot, MarketLatest, ProviderReliability, PricePrediction, CostEfficiencyRanking
 from .machine_history import MachineAttempt, MachineBlacklist, MachineStats
 from .snapshot_config import SnapshotConfig
 from .economy import SavingsHistory, ProviderPricing
@@ -12,7 +12,7 @@ from .snapshot_metadata import SnapshotMetadata, SnapshotStatus, DeletionReason
 from .email_preferences import EmailPreference
 from .email_delivery_log import EmailDeliveryLog
 from .shareable_report import ShareableReport
-from .webhook_config import WebhookConfig, WebhookLog
+from .webhook_config import WebhookConfig, WebhookLog, WebhookOutbox
 from .cost_optimization import UsageMetrics
 from .currency import ExchangeRate, UserCurrencyPreference, SUPPORTED_CURRENCIES
 from .sso_config import SSOConfig, SSOUserMapping
@@ -36,8 +36,11 @@ __all__ = [
     'PriceAlert',
     'InstanceStatus',
     'HibernationEvent',
+    'HibernationSavingsDaily',
+    'HibernationSavingsBackfill',
     # Novos modelos de métricas expandidas
     'MarketSnapshot',
+    'MarketLatest',
     'ProviderReliability',
     'PricePrediction',
     'CostEfficiencyRanking',
@@ -66,6 +69,7 @@ __all__ = [
     # Webhook integrations
     'WebhookConfig',
     'WebhookLog',
+    'WebhookOutbox',
     # Cost optimization models
     'UsageMetrics',
     # Currency models for multi-currency pricing
@@ -2,10 +2,18 @@
 Modelos de banco de dados para status de instâncias e auto-hibernação.
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index, ForeignKey, BigInteger, Text
+import logging
+
+from sqlalchemy import (
+    Column, Integer, String, Float, Date, DateTime, Boolean, Index, ForeignKey, BigInteger, Text,
+    UniqueConstraint, delete, event, insert, select, update,
+)
+from sqlalchemy.exc import SQLAlchemyError
 from datetime import datetime
 from src.config.database import Base
 
+logger = logging.getLogger(__name__)
+
 
 class InstanceStatus(Base):
     """Tabela para armazenar status e configuração de auto-hibernação de instâncias."""
@@ -151,6 +159,140 @@ class HibernationEvent(Base):
         }
 
 
+# Eventos que contam como economia (máquina desligada)
+SAVINGS_EVENT_TYPES = ("hibernated", "deleted")
+
+
+class HibernationSavingsDaily(Base):
+    """
+    Rollup diário da economia por usuário e GPU.
+
+    Mantido incrementalmente a cada HibernationEvent de economia (listener
+    abaixo), para que /metrics/savings/real agregue poucas linhas por dia
+    em vez de varrer todos os eventos. user_id/gpu_type ficam "" quando a
+    instância não é conhecida.
+    """
+
+    __tablename__ = "hibernation_savings_daily"
+
+    id = Column(Integer, primary_key=True, index=True)
+    day = Column(Date, nullable=False)
+    user_id = Column(String(100), nullable=False, default="")
+    gpu_type = Column(String(100), nullable=False, default="")
+
+    hibernations = Column(Integer, nullable=False, default=0)
+    hours_saved = Column(Float, nullable=False, default=0.0)
+    usd_saved = Column(Float, nullable=False, default=0.0)
+
+    __table_args__ = (
+        UniqueConstraint('day', 'user_id', 'gpu_type', name='uq_savings_day_user_gpu'),
+        Index('idx_savings_user_day', 'user_id', 'day'),
+    )
+
+    def __repr__(self):
+        return f"<HibernationSavingsDaily(day={self.day}, user={self.user_id}, gpu={self.gpu_type}, usd={self.usd_saved})>"
+
+
+class HibernationSavingsBackfill(Base):
+    """
+    Marca de que o rollup foi reconstruído a partir de todos os eventos.
+
+    O listener começa a preencher HibernationSavingsDaily assim que a tabela
+    existe, então "rollup vazio" não indica que os eventos anteriores ao
+    deploy já foram somados; esta linha indica.
+    """
+
+    __tablename__ = "hibernation_savings_backfill"
+
+    id = Column(Integer, primary_key=True)
+    completed_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+    rows = Column(Integer, nullable=False, default=0)
+
+
+def increment_savings_rollup(connection, day, user_id: str, gpu_type: str,
+                             hibernations: int, hours_saved: float, usd_saved: float):
+    """Soma valores na linha (day, user_id, gpu_type) do rollup, criando se preciso."""
+    table = HibernationSavingsDaily.__table__
+    values = {
+        'day': day,
+        'user_id': user_id or "",
+        'gpu_type': gpu_type or "",
+        'hibernations': hibernations,
+        'hours_saved': hours_saved,
+        'usd_saved': usd_saved,
+    }
+
+    dialect = connection.dialect.name
+    if dialect in ("postgresql", "sqlite"):
+        if dialect == "postgresql":
+            from sqlalchemy.dialects.postgresql import insert as dialect_insert
+        else:
+            from sqlalchemy.dialects.sqlite import insert as dialect_insert
+        stmt = dialect_insert(table).values(**values)
+        stmt = stmt.on_conflict_do_update(
+            index_elements=['day', 'user_id', 'gpu_type'],
+            set_={
+                'hibernations': table.c.hibernations + stmt.excluded.hibernations,
+                'hours_saved': table.c.hours_saved + stmt.excluded.hours_saved,
+                'usd_saved': table.c.usd_saved + stmt.excluded.usd_saved,
+            },
+        )
+        connection.execute(stmt)
+        return
+
+    result = connection.execute(
+        update(table).where(
+            table.c.day == values['day'],
+            table.c.user_id == values['user_id'],
+            table.c.gpu_type == values['gpu_type'],
+        ).values(
+            hibernations=table.c.hibernations + hibernations,
+            hours_saved=table.c.hours_saved + hours_saved,
+            usd_saved=table.c.usd_saved + usd_saved,
+        )
+    )
+    if result.rowcount == 0:
+        connection.execute(insert(table).values(**values))
+
+
+@event.listens_for(HibernationEvent, 'after_insert')
+def rollup_hibernation_savings(mapper, connection, target: HibernationEvent):
+    """
+    Atualiza o rollup diário na mesma transação do evento.
+
+    Roda num SAVEPOINT: se o rollup falhar (ex: tabela ainda não criada),
+    só ele é desfeito e o evento/status da instância são gravados. A marca
+    de backfill é removida para que o próximo rebuild cubra a lacuna.
+    """
+    if target.event_type not in SAVINGS_EVENT_TYPES:
+        return
+
+    try:
+        with connection.begin_nested():
+            owner = connection.execute(
+                select(InstanceStatus.user_id, InstanceStatus.gpu_type).where(
+                    InstanceStatus.instance_id == target.instance_id
+                )
+            ).first()
+
+            increment_savings_rollup(
+                connection,
+                day=(target.timestamp or datetime.utcnow()).date(),
+                user_id=owner.user_id if owner else "",
+                gpu_type=owner.gpu_type if owner else "",
+                hibernations=1,
+                hours_saved=target.idle_hours or 0.0,
+                usd_saved=target.savings_usd or 0.0,
+            )
+    except SQLAlchemyError as e:
+        logger.error(f"Savings rollup not updated for {target.instance_id} (rebuilt on next backfill): {e}")
+        try:
+            with connection.begin_nested():
+                connection.execute(delete(HibernationSavingsBackfill.__table__))
+        except SQLAlchemyError:
+            pass  # Sem tabela de marca: o backfill já vai rodar quando ela existir
+
+
 class FailoverTestEvent(Base):
     """Tabela para armazenar resultados de testes de failover realistas."""
 
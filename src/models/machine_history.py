@@ -285,7 +285,8 @@ class OfferStability(Base):
     updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow)
 
     __table_args__ = (
-        Index('idx_stability_provider_machine', 'provider', 'machine_id'),
+        # Unico: alvo do INSERT ... ON CONFLICT da coleta em lote
+        Index('idx_stability_provider_machine', 'provider', 'machine_id', unique=True),
         Index('idx_stability_score', 'stability_score'),
         Index('idx_stability_unstable', 'is_unstable'),
         Index('idx_stability_exclude', 'exclude_from_default'),
@@ -3,6 +3,7 @@ Modelos expandidos para métricas de mercado VAST.ai.
 
 Inclui:
 - MarketSnapshot: Snapshots agregados por GPU + tipo de máquina
+- MarketLatest: Último snapshot por GPU + tipo de máquina
 - ProviderReliability: Histórico de confiabilidade por host
 - PricePrediction: Previsões de preço geradas por ML
 - CostEfficiencyRanking: Rankings de custo-benefício
@@ -11,7 +12,7 @@ Inclui:
 - BudgetAlert: Alertas de orçamento configuráveis por usuário
 """
 
-from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index, Text
+from sqlalchemy import Column, Integer, String, Float, DateTime, Boolean, Index, Text, UniqueConstraint
 from sqlalchemy.dialects.postgresql import JSONB
 from datetime import datetime
 from src.config.database import Base
@@ -68,6 +69,45 @@ class MarketSnapshot(Base):
         return f"<MarketSnapshot {self.gpu_name}:{self.machine_type} @ {self.timestamp}>"
 
 
+class MarketLatest(Base):
+    """
+    Último snapshot de mercado por GPU + tipo de máquina.
+
+    Atualizado (upsert) na mesma transação que grava os MarketSnapshot,
+    para que os endpoints de resumo leiam uma linha por combinação em vez
+    de varrer o histórico.
+    """
+    __tablename__ = "market_latest"
+
+    id = Column(Integer, primary_key=True, index=True)
+    gpu_name = Column(String(100), nullable=False, index=True)
+    machine_type = Column(String(20), nullable=False)
+    timestamp = Column(DateTime, nullable=False)
+
+    # Estatísticas de preço
+    min_price = Column(Float, nullable=False)
+    max_price = Column(Float, nullable=False)
+    avg_price = Column(Float, nullable=False)
+    median_price = Column(Float, nullable=False)
+
+    # Disponibilidade
+    total_offers = Column(Integer, nullable=False)
+    available_gpus = Column(Integer, nullable=False)
+    verified_offers = Column(Integer, default=0)
+
+    # Performance e custo-benefício
+    avg_reliability = Column(Float)
+    avg_total_flops = Column(Float)
+    min_cost_per_tflops = Column(Float)
+
+    __table_args__ = (
+        UniqueConstraint('gpu_name', 'machine_type', name='uq_market_latest_gpu_type'),
+    )
+
+    def __repr__(self):
+        return f"<MarketLatest {self.gpu_name}:{self.machine_type} @ {self.timestamp}>"
+
+
 class ProviderReliability(Base):
     """
     Histórico de confiabilidade por provedor/host.
@@ -98,3 +98,41 @@ class WebhookLog(Base):
             'error': self.error,
             'created_at': self.created_at.isoformat() if self.created_at else None,
         }
+
+
+class WebhookOutbox(Base):
+    """
+    Fila persistente de entregas de webhooks (outbox).
+
+    Cada evento vira uma linha por webhook inscrito; o WebhookDeliveryEngine
+    reivindica as linhas vencidas, entrega e agenda retentativas. Entregas
+    pendentes sobrevivem a reinicios da API.
+    """
+
+    __tablename__ = "webhook_outbox"
+
+    id = Column(Integer, primary_key=True, index=True)
+    webhook_id = Column(Integer, ForeignKey('webhook_configs.id'), nullable=False, index=True)
+
+    # Evento a entregar
+    event_type = Column(String(50), nullable=False)
+    payload = Column(JSON, nullable=False)
+
+    # Estado da entrega
+    status = Column(String(20), default="pending", nullable=False)  # pending, in_flight, delivered, failed
+    attempts = Column(Integer, default=0, nullable=False)
+    next_attempt_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    locked_until = Column(DateTime, nullable=True)  # Lease do worker que reivindicou a linha
+    last_error = Column(String(500), nullable=True)
+
+    # Timestamps
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    delivered_at = Column(DateTime, nullable=True)
+
+    # Indice para o dispatcher (linhas vencidas por status)
+    __table_args__ = (
+        Index('idx_webhook_outbox_due', 'status', 'next_attempt_at'),
+    )
+
+    def __repr__(self):
+        return f"<WebhookOutbox(id={self.id}, webhook_id={self.webhook_id}, event={self.event_type}, status={self.status})>"
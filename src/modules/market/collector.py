@@ -10,12 +10,12 @@ Responsável por:
 """
 
 import logging
-import statistics as stats
 from datetime import datetime
 from typing import List, Dict, Optional, Any
 from collections import defaultdict
 from contextlib import contextmanager
 
+from .persistence import upsert_market_latest, upsert_offer_stability, upsert_provider_reliability
 from .statistics import StatisticsCalculator, get_statistics_calculator
 
 logger = logging.getLogger(__name__)
@@ -92,6 +92,9 @@ class MarketCollector:
         # Provider lazy-loaded
         self._vast_provider = None
 
+        # Latencia por query do ultimo ciclo (ver VastProvider.fetch_all_market_data)
+        self.last_collection_stats: Dict[str, Any] = {}
+
     @property
     def vast_provider(self):
         """Lazy load do VastProvider."""
@@ -158,23 +161,24 @@ class MarketCollector:
             return []
 
     def _collect_market_data(self) -> Dict[str, List[Any]]:
-        """Coleta dados de todas GPUs e tipos."""
-        all_offers = {}
-        total_collected = 0
-
-        for gpu_name in self.gpus_to_monitor:
-            for machine_type in self.machine_types:
-                key = f"{gpu_name}:{machine_type}"
-                offers = self.collect_gpu(gpu_name, machine_type)
-                all_offers[key] = offers
-                total_collected += len(offers)
+        """Coleta dados de todas GPUs e tipos (queries em paralelo)."""
+        all_offers = self.vast_provider.fetch_all_market_data(
+            gpus_to_monitor=self.gpus_to_monitor,
+            machine_types=self.machine_types,
+            max_price=100.0,
+            limit_per_query=200,
+        )
+        self.last_collection_stats = self.vast_provider.last_fetch_stats
+        total_collected = sum(len(offers) for offers in all_offers.values())
 
-                if offers:
-                    min_price = min(o.dph_total for o in offers if o.dph_total)
-                    logger.debug(f"{key}: {len(offers)} ofertas, min=${min_price:.4f}/h")
+        for key, offers in all_offers.items():
+            prices = [o.dph_total for o in offers if o.dph_total]
+            if prices:
+                logger.debug(f"{key}: {len(offers)} ofertas, min=${min(prices):.4f}/h")
 
         logger.info(f"Total coletado: {total_collected} ofertas em "
-                   f"{len([k for k, v in all_offers.items() if v])} combinações")
+                   f"{len([k for k, v in all_offers.items() if v])} combinações "
+                   f"({self.last_collection_stats.get('total_ms', 0):.0f}ms)")
         return all_offers
 
     def _save_market_snapshots(self, all_offers: Dict[str, List[Any]]):
@@ -184,7 +188,7 @@ class MarketCollector:
         try:
             with get_db_session() as db:
                 timestamp = datetime.utcnow()
-                snapshots_saved = 0
+                snapshots = []
 
                 for key, offers in all_offers.items():
                     if not offers:
@@ -216,82 +220,21 @@ class MarketCollector:
                         region_distribution=market_stats.region_distribution,
                     )
                     db.add(snapshot)
-                    snapshots_saved += 1
+                    snapshots.append(snapshot)
 
-                logger.info(f"Salvos {snapshots_saved} snapshots de mercado")
+                # Ultimo valor por gpu:tipo (savepoint: se falhar, o historico e gravado)
+                upsert_market_latest(db, snapshots)
+
+                logger.info(f"Salvos {len(snapshots)} snapshots de mercado")
 
         except Exception as e:
             logger.error(f"Erro ao salvar snapshots: {e}")
 
     def _update_provider_data(self, all_offers: Dict[str, List[Any]]):
-        """Atualiza dados de confiabilidade de provedores."""
-        from src.models.metrics import ProviderReliability
-
+        """Atualiza dados de confiabilidade de provedores (upsert em lote)."""
         try:
             with get_db_session() as db:
-                # Agrupar por machine_id
-                providers = defaultdict(list)
-                for offers in all_offers.values():
-                    for offer in offers:
-                        if offer.machine_id:
-                            providers[offer.machine_id].append(offer)
-
-                providers_updated = 0
-                for machine_id, machine_offers in providers.items():
-                    provider = db.query(ProviderReliability).filter(
-                        ProviderReliability.machine_id == machine_id
-                    ).first()
-
-                    if not provider:
-                        provider = ProviderReliability(
-                            machine_id=machine_id,
-                            first_seen=datetime.utcnow()
-                        )
-                        db.add(provider)
-
-                    # Atualizar com dados mais recentes
-                    latest = machine_offers[0]
-                    provider.hostname = latest.hostname
-                    provider.geolocation = latest.geolocation
-                    provider.verified = latest.verified
-                    provider.gpu_name = latest.gpu_name
-                    provider.last_seen = datetime.utcnow()
-                    provider.last_updated = datetime.utcnow()
-
-                    # Contadores
-                    provider.total_observations = (provider.total_observations or 0) + 1
-                    provider.times_available = (provider.times_available or 0) + 1
-
-                    # Preços
-                    prices = [o.dph_total for o in machine_offers if o.dph_total > 0]
-                    if prices:
-                        min_price = min(prices)
-                        max_price = max(prices)
-                        avg_price = stats.mean(prices)
-
-                        if provider.min_price_seen is None or min_price < provider.min_price_seen:
-                            provider.min_price_seen = min_price
-                        if provider.max_price_seen is None or max_price > provider.max_price_seen:
-                            provider.max_price_seen = max_price
-
-                        if provider.avg_price:
-                            provider.avg_price = provider.avg_price * 0.9 + avg_price * 0.1
-                        else:
-                            provider.avg_price = avg_price
-
-                    # Performance
-                    flops = [o.total_flops for o in machine_offers if o.total_flops]
-                    if flops:
-                        provider.avg_total_flops = stats.mean(flops)
-
-                    dlperfs = [o.dlperf for o in machine_offers if o.dlperf]
-                    if dlperfs:
-                        provider.avg_dlperf = stats.mean(dlperfs)
-
-                    # Calcular scores
-                    self._update_provider_scores(provider, latest)
-                    providers_updated += 1
-
+                providers_updated = upsert_provider_reliability(db, all_offers, self._update_provider_scores)
                 logger.info(f"Atualizados {providers_updated} provedores")
 
         except Exception as e:
@@ -390,85 +333,20 @@ class MarketCollector:
             logger.error(f"Erro ao calcular rankings: {e}")
 
     def _update_offer_stability(self, all_offers: Dict[str, List[Any]]):
-        """Atualiza estabilidade de ofertas."""
+        """Atualiza estabilidade de ofertas (upsert em lote)."""
         from src.models.machine_history import OfferStability
 
         try:
             with get_db_session() as db:
-                # Coletar machine_ids atuais
-                current_ids = set()
-                machine_data = {}
+                counts = upsert_offer_stability(db, all_offers)
 
-                for offers in all_offers.values():
-                    for offer in offers:
-                        mid = str(offer.machine_id) if offer.machine_id else None
-                        if mid:
-                            current_ids.add(mid)
-                            machine_data[mid] = (
-                                offer.gpu_name,
-                                offer.dph_total or offer.min_bid,
-                                offer.geolocation
-                            )
-
-                # Buscar anteriores
-                previously_available = db.query(OfferStability).filter(
-                    OfferStability.provider == "vast",
-                    OfferStability.is_available == True,
-                ).all()
-                previous_ids = {str(m.machine_id) for m in previously_available}
-
-                # Desapareceram
-                disappeared = previous_ids - current_ids
-                for mid in disappeared:
-                    stability = db.query(OfferStability).filter(
-                        OfferStability.provider == "vast",
-                        OfferStability.machine_id == mid,
-                    ).first()
-                    if stability:
-                        stability.record_disappeared()
-
-                # Apareceram
-                appeared = current_ids - previous_ids
-                for mid in appeared:
-                    stability = db.query(OfferStability).filter(
-                        OfferStability.provider == "vast",
-                        OfferStability.machine_id == mid,
-                    ).first()
-
-                    gpu_name, price, geo = machine_data.get(mid, (None, None, None))
-
-                    if not stability:
-                        stability = OfferStability(
-                            provider="vast",
-                            machine_id=mid,
-                            gpu_name=gpu_name,
-                            geolocation=geo,
-                        )
-                        db.add(stability)
-
-                    stability.record_appeared(price=price, gpu_name=gpu_name, geolocation=geo)
-
-                # Ainda disponíveis
-                still_available = current_ids & previous_ids
-                for mid in still_available:
-                    stability = db.query(OfferStability).filter(
-                        OfferStability.provider == "vast",
-                        OfferStability.machine_id == mid,
-                    ).first()
-                    if stability:
-                        stability.last_seen_at = datetime.utcnow()
-                        gpu_name, price, geo = machine_data.get(mid, (None, None, None))
-                        if price:
-                            stability.price_per_hour = price
-
-                # Log
                 unstable_count = db.query(OfferStability).filter(
                     OfferStability.provider == "vast",
                     OfferStability.is_unstable == True,
                 ).count()
 
-                logger.info(f"Stability update: {len(appeared)} appeared, {len(disappeared)} disappeared, "
-                           f"{len(still_available)} stable, {unstable_count} marked unstable")
+                logger.info(f"Stability update: {counts['appeared']} appeared, {counts['disappeared']} disappeared, "
+                           f"{counts['still_available']} stable, {unstable_count} marked unstable")
 
         except Exception as e:
             logger.error(f"Error updating offer stability: {e}")
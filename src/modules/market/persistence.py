@@ -0,0 +1,327 @@
+"""
+Market Persistence - Escrita em lote dos dados de mercado
+
+Um ciclo de coleta toca milhares de machine_ids. Em vez de um
+db.query(...).first() por maquina, este modulo:
+- Carrega as linhas existentes com poucas queries IN (...) em lotes
+- Calcula os novos valores em objetos transientes (fora da sessao)
+- Grava tudo com INSERT ... ON CONFLICT DO UPDATE em lotes
+
+Usado por MarketCollector e pelo MarketMonitorAgent legado.
+"""
+
+import logging
+import statistics as stats
+from collections import defaultdict
+from datetime import datetime
+from typing import Any, Callable, Dict, Iterable, List, Optional
+
+from sqlalchemy import select
+from sqlalchemy.exc import SQLAlchemyError
+
+logger = logging.getLogger(__name__)
+
+
+# Linhas por statement (IN e upsert); fica bem abaixo do limite de
+# 65535 parametros do PostgreSQL mesmo com ~25 colunas
+BATCH_SIZE = 1000
+
+
+def _batches(items: List[Any], size: int) -> Iterable[List[Any]]:
+    for i in range(0, len(items), size):
+        yield items[i:i + size]
+
+
+def _column_defaults(model) -> Dict[str, Any]:
+    """Defaults Python das colunas (aplicados a linhas novas)"""
+    defaults = {}
+    for column in model.__table__.columns:
+        default = column.default
+        if default is None or not default.is_scalar and not default.is_callable:
+            continue
+        defaults[column.name] = default.arg(None) if default.is_callable else default.arg
+    return defaults
+
+
+def to_row(obj, defaults: Optional[Dict[str, Any]] = None) -> Dict[str, Any]:
+    """Valores das colunas de um objeto ORM (sem a PK), com defaults para None"""
+    defaults = defaults or {}
+    row = {}
+    for column in obj.__table__.columns:
+        if column.primary_key:
+            continue
+        value = getattr(obj, column.key)
+        if value is None and column.name in defaults:
+            value = defaults[column.name]
+        row[column.name] = value
+    return row
+
+
+def load_existing(db, model, key_column, keys: Iterable[Any], *criteria, batch_size: int = BATCH_SIZE) -> Dict[Any, Any]:
+    """
+    Carrega linhas existentes por chave com queries IN (...) em lotes.
+
+    Retorna objetos transientes (nao anexados a sessao): alteracoes neles
+    nao geram UPDATEs implicitos, so o que for passado a bulk_upsert.
+
+    Args:
+        db: Sessao SQLAlchemy
+        model: Classe ORM
+        key_column: Coluna usada como chave (ex: Model.machine_id)
+        keys: Valores da chave
+        *criteria: Filtros extras (ex: Model.provider == "vast")
+
+    Returns:
+        Dict chave -> objeto transiente
+    """
+    table = model.__table__
+    existing = {}
+    for batch in _batches(list(keys), batch_size):
+        result = db.execute(select(table).where(key_column.in_(batch), *criteria))
+        for row in result.mappings():
+            existing[row[key_column.key]] = model(**dict(row))
+    return existing
+
+
+def bulk_upsert(db, model, rows: List[Dict[str, Any]], conflict_columns: List[str], batch_size: int = BATCH_SIZE) -> int:
+    """
+    INSERT ... ON CONFLICT (conflict_columns) DO UPDATE em lotes.
+
+    Usa o dialeto PostgreSQL (producao) ou SQLite (testes/dev); outros
+    bancos caem em session.merge linha a linha.
+
+    Args:
+        db: Sessao SQLAlchemy (o commit fica com o chamador)
+        model: Classe ORM
+        rows: Dicts com as mesmas colunas em todas as linhas
+        conflict_columns: Colunas do indice unico usado no conflito
+
+    Returns:
+        Numero de linhas gravadas
+    """
+    if not rows:
+        return 0
+
+    dialect = db.get_bind().dialect.name
+    if dialect == "postgresql":
+        from sqlalchemy.dialects.postgresql import insert
+    elif dialect == "sqlite":
+        from sqlalchemy.dialects.sqlite import insert
+    else:
+        for row in rows:
+            db.merge(model(**row))
+        return len(rows)
+
+    update_columns = [c for c in rows[0] if c not in conflict_columns]
+    stmt = insert(model.__table__)
+    stmt = stmt.on_conflict_do_update(
+        index_elements=conflict_columns,
+        set_={c: stmt.excluded[c] for c in update_columns},
+    )
+    # executemany: compiled once and cached; on PostgreSQL SQLAlchemy packs
+    # each batch into multi-row VALUES ("insertmanyvalues")
+    for batch in _batches(rows, batch_size):
+        db.execute(stmt, batch)
+    return len(rows)
+
+
+def upsert_provider_reliability(
+    db,
+    all_offers: Dict[str, List[Any]],
+    score_provider: Callable[[Any, Any], None],
+) -> int:
+    """
+    Atualiza ProviderReliability de todas as maquinas vistas no ciclo.
+
+    Args:
+        db: Sessao SQLAlchemy
+        all_offers: Ofertas por "gpu:tipo"
+        score_provider: callback(provider, latest_offer) que recalcula os scores
+
+    Returns:
+        Numero de provedores atualizados
+    """
+    from src.models.metrics import ProviderReliability
+
+    providers = defaultdict(list)
+    for offers in all_offers.values():
+        for offer in offers:
+            if offer.machine_id:
+                providers[offer.machine_id].append(offer)
+    if not providers:
+        return 0
+
+    existing = load_existing(db, ProviderReliability, ProviderReliability.machine_id, providers.keys())
+    defaults = _column_defaults(ProviderReliability)
+    now = datetime.utcnow()
+    rows = []
+
+    for machine_id, machine_offers in providers.items():
+        provider = existing.get(machine_id)
+        if provider is None:
+            provider = ProviderReliability(machine_id=machine_id, first_seen=now)
+
+        # Atualizar com dados mais recentes
+        latest = machine_offers[0]
+        provider.hostname = latest.hostname
+        provider.geolocation = latest.geolocation
+        provider.verified = latest.verified
+        provider.gpu_name = latest.gpu_name
+        provider.last_seen = now
+        provider.last_updated = now
+
+        # Contadores
+        provider.total_observations = (provider.total_observations or 0) + 1
+        provider.times_available = (provider.times_available or 0) + 1
+
+        # Preços
+        prices = [o.dph_total for o in machine_offers if o.dph_total > 0]
+        if prices:
+            min_price = min(prices)
+            max_price = max(prices)
+            avg_price = stats.mean(prices)
+
+            if provider.min_price_seen is None or min_price < provider.min_price_seen:
+                provider.min_price_seen = min_price
+            if provider.max_price_seen is None or max_price > provider.max_price_seen:
+                provider.max_price_seen = max_price
+
+            # Média móvel exponencial
+            if provider.avg_price:
+                provider.avg_price = provider.avg_price * 0.9 + avg_price * 0.1
+            else:
+                provider.avg_price = avg_price
+
+        # Performance
+        flops = [o.total_flops for o in machine_offers if o.total_flops]
+        if flops:
+            provider.avg_total_flops = stats.mean(flops)
+
+        dlperfs = [o.dlperf for o in machine_offers if o.dlperf]
+        if dlperfs:
+            provider.avg_dlperf = stats.mean(dlperfs)
+
+        score_provider(provider, latest)
+        rows.append(to_row(provider, defaults))
+
+    return bulk_upsert(db, ProviderReliability, rows, ["machine_id"])
+
+
+def upsert_offer_stability(db, all_offers: Dict[str, List[Any]], provider_name: str = "vast") -> Dict[str, int]:
+    """
+    Atualiza OfferStability (aparecer/desaparecer) de todas as maquinas.
+
+    Args:
+        db: Sessao SQLAlchemy
+        all_offers: Ofertas por "gpu:tipo"
+        provider_name: Provedor das ofertas
+
+    Returns:
+        Dict com contagens appeared/disappeared/still_available
+    """
+    from src.models.machine_history import OfferStability
+
+    # 1. Machine_ids vistos neste ciclo
+    machine_data = {}  # machine_id -> (gpu_name, price, geolocation)
+    for offers in all_offers.values():
+        for offer in offers:
+            if offer.machine_id:
+                machine_data[str(offer.machine_id)] = (
+                    offer.gpu_name,
+                    offer.dph_total or offer.min_bid,
+                    offer.geolocation,
+                )
+    current_ids = set(machine_data)
+
+    # 2. Disponiveis no ciclo anterior (1 query) + linhas das maquinas atuais (IN em lotes)
+    table = OfferStability.__table__
+    previous = {
+        row["machine_id"]: OfferStability(**dict(row))
+        for row in db.execute(
+            select(table).where(
+                OfferStability.provider == provider_name,
+                OfferStability.is_available == True,  # noqa: E712
+            )
+        ).mappings()
+    }
+    missing = [mid for mid in current_ids if mid not in previous]
+    known = load_existing(
+        db, OfferStability, OfferStability.machine_id, missing,
+        OfferStability.provider == provider_name,
+    )
+
+    defaults = _column_defaults(OfferStability)
+    now = datetime.utcnow()
+    rows = []
+
+    # 3. Desapareceram (estavam, não estão mais)
+    disappeared = set(previous) - current_ids
+    for mid in disappeared:
+        stability = previous[mid]
+        stability.record_disappeared()
+        rows.append(to_row(stability, defaults))
+
+    # 4. Apareceram (novas ou reapareceram)
+    appeared = current_ids - set(previous)
+    for mid in appeared:
+        gpu_name, price, geo = machine_data[mid]
+        stability = known.get(mid)
+        if stability is None:
+            stability = OfferStability(
+                provider=provider_name,
+                machine_id=mid,
+                gpu_name=gpu_name,
+                geolocation=geo,
+            )
+        stability.record_appeared(price=price, gpu_name=gpu_name, geolocation=geo)
+        rows.append(to_row(stability, defaults))
+
+    # 5. Continuam disponíveis
+    still_available = current_ids & set(previous)
+    for mid in still_available:
+        stability = previous[mid]
+        stability.last_seen_at = now
+        stability.updated_at = now
+        _, price, _ = machine_data[mid]
+        if price:
+            stability.price_per_hour = price
+        rows.append(to_row(stability, defaults))
+
+    bulk_upsert(db, OfferStability, rows, ["provider", "machine_id"])
+    return {
+        "appeared": len(appeared),
+        "disappeared": len(disappeared),
+        "still_available": len(still_available),
+    }
+
+
+def upsert_market_latest(db, snapshots: List[Any]) -> int:
+    """
+    Copia os snapshots do ciclo para market_latest (uma linha por gpu:tipo).
+
+    Chamado com a mesma sessao que adicionou os MarketSnapshot, antes do
+    commit. Roda num SAVEPOINT: se market_latest falhar (ex.: tabela ainda
+    nao criada), so o upsert e desfeito e o historico continua sendo gravado.
+
+    Args:
+        db: Sessao SQLAlchemy
+        snapshots: MarketSnapshot gravados no ciclo
+
+    Returns:
+        Numero de linhas gravadas
+    """
+    from src.models.metrics import MarketLatest
+
+    columns = [c.name for c in MarketLatest.__table__.columns if not c.primary_key]
+    latest = {}
+    for snapshot in snapshots:
+        key = (snapshot.gpu_name, snapshot.machine_type)
+        if key not in latest or snapshot.timestamp >= latest[key]["timestamp"]:
+            latest[key] = {c: getattr(snapshot, c) for c in columns}
+
+    try:
+        with db.begin_nested():
+            return bulk_upsert(db, MarketLatest, list(latest.values()), ["gpu_name", "machine_type"])
+    except SQLAlchemyError as e:
+        logger.error(f"Erro ao atualizar market_latest (historico mantido): {e}")
+        return 0
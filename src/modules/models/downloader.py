@@ -5,8 +5,10 @@ Faz download de modelos para cache local ou remoto (na GPU instance).
 Suporta:
 - Download local (para desenvolvimento)
 - Download remoto via SSH (para GPU instances)
+- Mirror próprio (B2/R2/GCS do StorageService) antes do HuggingFace Hub
+- Download paralelo por ranges, com retomada e SHA-256 (shard_fetcher)
 - Cache persistente para evitar re-downloads
-- Progress tracking
+- Progress tracking e throughput medido em bytes
 """
 
 import os
@@ -15,12 +17,15 @@ import time
 import logging
 import subprocess
 import hashlib
+import urllib.parse
 from typing import Optional, Dict, Any, Callable
 from dataclasses import dataclass
 from pathlib import Path
 from enum import Enum
 
 from .registry import ModelInfo, ModelRegistry, get_registry, ModelRuntime
+from . import shard_fetcher
+from .shard_fetcher import FetchError, ShardFile, fetch_snapshot, http_get_json
 
 logger = logging.getLogger(__name__)
 
@@ -44,10 +49,22 @@ class DownloadResult:
     download_time_seconds: Optional[float] = None
     error: Optional[str] = None
 
+    # Origem e bytes efetivamente transferidos (mirror, hub, hub-client)
+    source: Optional[str] = None
+    bytes_downloaded: Optional[int] = None
+    bytes_reused: Optional[int] = None
+
     @property
     def success(self) -> bool:
         return self.status in (DownloadStatus.COMPLETED, DownloadStatus.CACHED)
 
+    @property
+    def throughput_bytes_per_second(self) -> Optional[float]:
+        """Bytes recebidos da rede por segundo de download"""
+        if not self.bytes_downloaded or not self.download_time_seconds:
+            return None
+        return self.bytes_downloaded / self.download_time_seconds
+
 
 class ModelDownloader:
     """
@@ -70,6 +87,17 @@ class ModelDownloader:
     # Diretório padrão de cache do HuggingFace
     DEFAULT_CACHE_DIR = "~/.cache/huggingface/hub"
 
+    # HuggingFace Hub (HF_ENDPOINT permite apontar para um proxy)
+    HF_ENDPOINT = os.environ.get("HF_ENDPOINT", "https://huggingface.co")
+
+    # Prefixo dos modelos no bucket do StorageService:
+    #   <prefix>/<model_id>/<revision>/manifest.json  -> {"commit", "files": [{path, size, sha256}]}
+    #   <prefix>/<model_id>/<commit>/<path>           -> arquivos
+    MIRROR_PREFIX = os.environ.get("MODEL_MIRROR_PREFIX", "models")
+
+    # URLs assinadas precisam durar o download inteiro
+    MIRROR_URL_EXPIRES_HOURS = 6
+
     # Scripts para download em máquina remota
     DOWNLOAD_SCRIPT = '''#!/bin/bash
 set -e
@@ -159,14 +187,26 @@ PYEOF
         self,
         cache_dir: Optional[str] = None,
         registry: Optional[ModelRegistry] = None,
+        storage: Optional[Any] = None,
+        max_workers: int = shard_fetcher.DEFAULT_MAX_WORKERS,
+        chunk_size: int = shard_fetcher.DEFAULT_CHUNK_SIZE,
+        hf_token: Optional[str] = None,
     ):
         """
         Args:
             cache_dir: Diretório de cache local
             registry: Registry para obter info do modelo
+            storage: StorageService do mirror (None = configuração do ambiente)
+            max_workers: Requisições Range simultâneas
+            chunk_size: Tamanho de cada range em bytes
+            hf_token: Token do HuggingFace (ou HF_TOKEN)
         """
         self.cache_dir = Path(cache_dir or os.path.expanduser(self.DEFAULT_CACHE_DIR))
         self.registry = registry or get_registry()
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.hf_token = hf_token or os.environ.get("HF_TOKEN")
+        self._storage = storage
 
     def is_cached_locally(self, model_id: str) -> bool:
         """Verifica se modelo está em cache local"""
@@ -194,6 +234,109 @@ PYEOF
         # Retornar o mais recente
         return max(snapshots, key=lambda p: p.stat().st_mtime)
 
+    # ==================== Resolução de arquivos ====================
+
+    def _get_storage(self) -> Optional[Any]:
+        """StorageService do mirror (lazy); None se não configurado"""
+        if self._storage is None:
+            try:
+                from src.modules.storage.service import StorageService, StorageProviderType
+                from src.config.database import SessionLocal
+
+                storage = StorageService(SessionLocal)
+                has_credentials = storage.config.provider == StorageProviderType.gcs or storage.config.access_key
+                self._storage = storage if has_credentials else False
+            except Exception as e:
+                logger.debug(f"[DOWNLOAD] Mirror disabled: {e}")
+                self._storage = False
+        return self._storage or None
+
+    def _resolve_from_mirror(self, model_id: str, revision: str) -> Optional[Dict[str, Any]]:
+        """Lista os arquivos do modelo no mirror (B2/R2/GCS)"""
+        storage = self._get_storage()
+        if storage is None:
+            return None
+
+        prefix = f"{self.MIRROR_PREFIX}/{model_id}"
+        try:
+            manifest = http_get_json(storage.get_object_url(f"{prefix}/{revision}/manifest.json"))
+        except Exception as e:
+            logger.info(f"[DOWNLOAD] Mirror miss for {model_id}@{revision}: {e}")
+            return None
+
+        commit = manifest["commit"]
+        files = [
+            ShardFile(
+                path=f["path"],
+                size=f["size"],
+                sha256=f.get("sha256"),
+                url=storage.get_object_url(
+                    f"{prefix}/{commit}/{f['path']}", expires_hours=self.MIRROR_URL_EXPIRES_HOURS
+                ),
+            )
+            for f in manifest["files"]
+        ]
+        return {"source": "mirror", "commit": commit, "files": files}
+
+    def _resolve_from_hub(self, model_id: str, revision: str) -> Dict[str, Any]:
+        """Lista os arquivos do modelo no HuggingFace Hub (tamanho e sha256 LFS)"""
+        headers = {"Authorization": f"Bearer {self.hf_token}"} if self.hf_token else {}
+        info = http_get_json(
+            f"{self.HF_ENDPOINT}/api/models/{model_id}/revision/{revision}?blobs=true",
+            headers=headers,
+        )
+
+        commit = info["sha"]
+        files = []
+        for sibling in info.get("siblings", []):
+            path = sibling["rfilename"]
+            lfs = sibling.get("lfs") or {}
+            files.append(ShardFile(
+                path=path,
+                size=lfs.get("size", sibling.get("size", 0)),
+                sha256=lfs.get("sha256"),
+                url=f"{self.HF_ENDPOINT}/{model_id}/resolve/{commit}/{urllib.parse.quote(path)}",
+                headers=headers,
+            ))
+        return {"source": "hub", "commit": commit, "files": files}
+
+    def resolve_plan(
+        self, model_id: str, cache_dir: str, revision: str = "main", use_mirror: bool = True
+    ) -> Dict[str, Any]:
+        """
+        Monta o plano de download: mirror primeiro, Hub como fallback.
+
+        Args:
+            use_mirror: False pula o mirror (ex: objetos do mirror faltando ou corrompidos)
+
+        Returns:
+            Plano aceito por shard_fetcher.fetch_snapshot
+        """
+        resolved = (use_mirror and self._resolve_from_mirror(model_id, revision)) or self._resolve_from_hub(model_id, revision)
+        return {
+            "model_id": model_id,
+            "revision": revision,
+            "commit": resolved["commit"],
+            "cache_dir": cache_dir,
+            "source": resolved["source"],
+            "max_workers": self.max_workers,
+            "chunk_size": self.chunk_size,
+            "files": [f.to_dict() for f in resolved["files"]],
+        }
+
+    @staticmethod
+    def _result_from_fetch(model_id: str, data: Dict[str, Any], elapsed: float) -> DownloadResult:
+        return DownloadResult(
+            model_id=model_id,
+            status=DownloadStatus.COMPLETED,
+            cache_path=data.get("path"),
+            size_bytes=data.get("size_bytes"),
+            download_time_seconds=data.get("elapsed_seconds") or elapsed,
+            source=data.get("source"),
+            bytes_downloaded=data.get("bytes_downloaded"),
+            bytes_reused=data.get("bytes_reused"),
+        )
+
     def download_local(
         self,
         model_id: str,
@@ -227,6 +370,50 @@ PYEOF
             if progress_callback:
                 progress_callback(f"Downloading {model_id}...", 0.0)
 
+            try:
+                plan = self.resolve_plan(model_id, str(self.cache_dir))
+            except Exception as e:
+                logger.warning(f"[DOWNLOAD] Could not list files for {model_id} ({e}), using hub client")
+                return self._download_with_hub_client(model_id, start_time, progress_callback)
+
+            def on_progress(ready: int, total: int) -> None:
+                if progress_callback and total:
+                    progress_callback(f"Downloading {model_id}...", 100.0 * ready / total)
+
+            try:
+                data = fetch_snapshot(plan, progress_callback=on_progress)
+            except FetchError as e:
+                if plan["source"] != "mirror":
+                    raise
+                logger.warning(f"[DOWNLOAD] Mirror copy of {model_id} failed ({e}), retrying from the Hub")
+                plan = self.resolve_plan(model_id, str(self.cache_dir), use_mirror=False)
+                data = fetch_snapshot(plan, progress_callback=on_progress)
+            result = self._result_from_fetch(model_id, data, time.time() - start_time)
+
+            throughput = result.throughput_bytes_per_second or 0
+            logger.info(
+                f"[DOWNLOAD] Completed: {model_id} from {result.source} "
+                f"({result.size_bytes / 1e9:.2f} GB, {result.bytes_downloaded / 1e9:.2f} GB transferred, "
+                f"{throughput / 1e6:.1f} MB/s)"
+            )
+            return result
+
+        except Exception as e:
+            logger.error(f"[DOWNLOAD] Failed: {model_id} - {e}")
+            return DownloadResult(
+                model_id=model_id,
+                status=DownloadStatus.FAILED,
+                error=str(e),
+            )
+
+    def _download_with_hub_client(
+        self,
+        model_id: str,
+        start_time: float,
+        progress_callback: Optional[Callable[[str, float], None]] = None,
+    ) -> DownloadResult:
+        """Fallback: huggingface_hub.snapshot_download ou huggingface-cli"""
+        try:
             # Usar huggingface_hub se disponível
             try:
                 from huggingface_hub import snapshot_download
@@ -256,6 +443,7 @@ PYEOF
                     cache_path=path,
                     size_bytes=total_size,
                     download_time_seconds=download_time,
+                    source="hub-client",
                 )
 
             except ImportError:
@@ -279,6 +467,7 @@ PYEOF
                     status=DownloadStatus.COMPLETED,
                     cache_path=str(cache_path) if cache_path else None,
                     download_time_seconds=time.time() - start_time,
+                    source="hub-client",
                 )
 
         except Exception as e:
@@ -334,36 +523,47 @@ PYEOF
         try:
             logger.info(f"[DOWNLOAD] Starting remote download: {model_id}")
 
-            # Executar script de download
-            result = self._ssh_exec(
-                ssh_host, ssh_port, ssh_user,
-                f'MODEL_ID="{model_id}" HF_HUB_CACHE="{cache_dir}" ' + self.DOWNLOAD_SCRIPT.replace("$1", model_id).replace("$2", cache_dir),
-                timeout=timeout,
-            )
-
-            if result.returncode != 0:
-                raise Exception(f"Download failed: {result.stderr}")
-
-            # Parsear resultado JSON
-            output = result.stdout.strip()
-            for line in output.split('\n'):
-                if line.startswith('{'):
-                    data = json.loads(line)
-                    if data.get("error"):
-                        raise Exception(data["error"])
-
-                    download_time = time.time() - start_time
-                    logger.info(f"[DOWNLOAD] Remote completed: {model_id} in {download_time:.1f}s")
+            def run_plan(plan: Dict[str, Any]) -> Dict[str, Any]:
+                return self._parse_remote_output(self._ssh_exec(
+                    ssh_host, ssh_port, ssh_user,
+                    "python3 -",
+                    timeout=timeout,
+                    input=self._remote_fetch_script(plan),
+                ))
 
-                    return DownloadResult(
-                        model_id=model_id,
-                        status=DownloadStatus.COMPLETED,
-                        cache_path=data.get("path"),
-                        size_bytes=data.get("size_bytes"),
-                        download_time_seconds=download_time,
-                    )
+            try:
+                # URLs (assinadas, no caso do mirror) resolvidas aqui; a instância só baixa
+                plan = self.resolve_plan(model_id, cache_dir)
+            except Exception as e:
+                logger.warning(f"[DOWNLOAD] Could not list files for {model_id} ({e}), using hub client")
+                # Executar script de download
+                data = self._parse_remote_output(self._ssh_exec(
+                    ssh_host, ssh_port, ssh_user,
+                    f'MODEL_ID="{model_id}" HF_HUB_CACHE="{cache_dir}" ' + self.DOWNLOAD_SCRIPT.replace("$1", model_id).replace("$2", cache_dir),
+                    timeout=timeout,
+                ))
+            else:
+                try:
+                    data = run_plan(plan)
+                except FetchError as e:
+                    if plan["source"] != "mirror":
+                        raise
+                    logger.warning(f"[DOWNLOAD] Mirror copy of {model_id} failed ({e}), retrying from the Hub")
+                    data = run_plan(self.resolve_plan(model_id, cache_dir, use_mirror=False))
+
+            download_time = time.time() - start_time
+            logger.info(f"[DOWNLOAD] Remote completed: {model_id} in {download_time:.1f}s")
+
+            if "bytes_downloaded" in data:
+                return self._result_from_fetch(model_id, data, download_time)
 
-            raise Exception("No JSON output from download script")
+            return DownloadResult(
+                model_id=model_id,
+                status=DownloadStatus.COMPLETED,
+                cache_path=data.get("path"),
+                size_bytes=data.get("size_bytes"),
+                download_time_seconds=download_time,
+            )
 
         except Exception as e:
             logger.error(f"[DOWNLOAD] Remote failed: {model_id} - {e}")
@@ -373,6 +573,28 @@ PYEOF
                 error=str(e),
             )
 
+    @staticmethod
+    def _parse_remote_output(result: subprocess.CompletedProcess) -> Dict[str, Any]:
+        """
+        Linha JSON impressa pelo script remoto.
+
+        O erro vem no stdout ({"error": ...}, com exit 1), então é lido antes
+        do código de saída; o stderr só serve quando não há JSON.
+        """
+        for line in result.stdout.strip().split('\n'):
+            if line.startswith('{'):
+                data = json.loads(line)
+                if data.get("error"):
+                    if data.get("error_type") == "FetchError":
+                        raise FetchError(data["error"])
+                    raise Exception(data["error"])
+                if result.returncode == 0:
+                    return data
+
+        if result.returncode != 0:
+            raise Exception(f"Download failed: {result.stderr.strip() or f'exit code {result.returncode}'}")
+        raise Exception("No JSON output from download script")
+
     def _check_remote_cache(
         self,
         model_id: str,
@@ -406,8 +628,9 @@ PYEOF
         ssh_user: str,
         command: str,
         timeout: int = 30,
+        input: Optional[str] = None,
     ) -> subprocess.CompletedProcess:
-        """Executa comando via SSH"""
+        """Executa comando via SSH (input vai para o stdin remoto)"""
         ssh_cmd = [
             "ssh",
             "-o", "StrictHostKeyChecking=no",
@@ -423,8 +646,15 @@ PYEOF
             capture_output=True,
             text=True,
             timeout=timeout,
+            input=input,
         )
 
+    @staticmethod
+    def _remote_fetch_script(plan: Dict[str, Any]) -> str:
+        """Código do shard_fetcher + chamada run_plan, enviado pelo stdin do SSH"""
+        source = Path(shard_fetcher.__file__).read_text()
+        return f"{source}\n\nrun_plan({json.dumps(json.dumps(plan))})\n"
+
     def get_download_command(self, model_id: str, runtime: str = "auto") -> str:
         """
         Retorna comando para download do modelo no runtime correto.
@@ -6,18 +6,22 @@ e o runtime necessário (vLLM, transformers, diffusers).
 
 Estratégia:
 1. Primeiro tenta mapeamento estático (zero API calls)
-2. Se não encontrar, busca na API do HuggingFace
-3. Cacheia resultado localmente para não repetir
+2. Se não encontrar, busca na API do HuggingFace (em lote, com concorrência limitada)
+3. Cacheia resultado localmente com TTL (inclusive modelos inexistentes)
 
 Fonte dos dados: https://huggingface.co/docs/hub/en/models-tasks
 """
 
 import os
+import re
 import json
 import time
+import atexit
 import logging
+import threading
 import requests
-from typing import Optional, Dict, Any, List
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Optional, Dict, Any, List, Tuple
 from dataclasses import dataclass, asdict
 from enum import Enum
 from pathlib import Path
@@ -309,15 +313,32 @@ class ModelRegistry:
     """
     Registry de modelos com detecção automática de tipo.
 
+    Cache:
+    - Entradas da API expiram após CACHE_TTL_SECONDS
+    - Modelos inexistentes/sem acesso (404/401) ficam em cache negativo por
+      NEGATIVE_TTL_SECONDS; erros transitórios (timeout, 429) não são cacheados
+    - Entrada expirada ainda é usada se a API falhar (stale-on-error)
+    - Disco: escrita atômica (tmp + rename), agrupada por SAVE_DEBOUNCE_SECONDS
+
     Uso:
         registry = ModelRegistry()
         info = registry.get_model_info("meta-llama/Llama-3.1-8B-Instruct")
         print(info.task)     # "text-generation"
         print(info.runtime)  # "vllm"
+
+        # Vários modelos de uma vez (API consultada em paralelo)
+        infos = registry.get_model_infos(["openai/whisper-large-v3", "org/custom-model"])
     """
 
-    # Cache em memória
-    _cache: Dict[str, ModelInfo] = {}
+    HF_API_URL = "https://huggingface.co/api/models"
+
+    CACHE_TTL_SECONDS = 7 * 24 * 3600
+    NEGATIVE_TTL_SECONDS = 3600
+    SAVE_DEBOUNCE_SECONDS = 2.0
+    MAX_CONCURRENCY = 8
+
+    # Seed do marketplace (modelos populares para warm_up)
+    SEED_FILE = Path(__file__).resolve().parent.parent / "marketplace" / "templates_seed.json"
 
     def __init__(self, cache_dir: Optional[str] = None):
         """
@@ -329,8 +350,16 @@ class ModelRegistry:
         self.cache_dir.mkdir(parents=True, exist_ok=True)
         self.cache_file = self.cache_dir / "registry_cache.json"
 
+        # Cache em memória
+        self._cache: Dict[str, ModelInfo] = {}
+        self._lock = threading.RLock()
+        self._inflight: Dict[str, Future] = {}
+        self._save_timer: Optional[threading.Timer] = None
+        self._session = requests.Session()
+
         # Carregar cache do disco
         self._load_cache()
+        atexit.register(self.flush)
 
     def get_model_info(self, model_id: str, force_refresh: bool = False) -> ModelInfo:
         """
@@ -344,33 +373,150 @@ class ModelRegistry:
             ModelInfo com task, runtime, library, etc.
         """
         # 1. Tentar cache em memória
-        if not force_refresh and model_id in self._cache:
-            logger.debug(f"[REGISTRY] Cache hit (memory): {model_id}")
-            return self._cache[model_id]
+        if not force_refresh:
+            cached = self._get_fresh(model_id)
+            if cached:
+                logger.debug(f"[REGISTRY] Cache hit (memory): {model_id}")
+                return cached
 
         # 2. Tentar mapeamento estático (zero API)
         static_info = self._try_static_mapping(model_id)
         if static_info:
             logger.info(f"[REGISTRY] Static match: {model_id} -> {static_info.runtime}")
-            self._cache[model_id] = static_info
+            with self._lock:
+                self._cache[model_id] = static_info
             return static_info
 
-        # 3. Tentar cache em disco
-        if not force_refresh:
-            disk_info = self._try_disk_cache(model_id)
-            if disk_info:
-                logger.debug(f"[REGISTRY] Cache hit (disk): {model_id}")
-                self._cache[model_id] = disk_info
-                return disk_info
-
-        # 4. Buscar na API do HuggingFace
-        api_info = self._fetch_from_api(model_id)
+        # 3. Buscar na API do HuggingFace (uma busca por modelo em andamento)
+        return self._resolve_remote(model_id)
+
+    def get_model_infos(
+        self,
+        model_ids: List[str],
+        force_refresh: bool = False,
+        max_concurrency: Optional[int] = None,
+    ) -> Dict[str, ModelInfo]:
+        """
+        Resolve vários modelos; os que precisam da API são buscados em paralelo.
+
+        Args:
+            model_ids: IDs dos modelos
+            force_refresh: Se True, ignora cache e busca na API
+            max_concurrency: Requisições simultâneas à API
+
+        Returns:
+            Dicionário model_id -> ModelInfo (mesma ordem de model_ids)
+        """
+        results: Dict[str, ModelInfo] = {}
+        missing: List[str] = []
+
+        for model_id in dict.fromkeys(model_ids):
+            cached = None if force_refresh else self._get_fresh(model_id)
+            static_info = cached or self._try_static_mapping(model_id)
+            if static_info:
+                if not cached:
+                    with self._lock:
+                        self._cache[model_id] = static_info
+                results[model_id] = static_info
+            else:
+                missing.append(model_id)
+
+        if missing:
+            workers = min(max_concurrency or self.MAX_CONCURRENCY, len(missing))
+            with ThreadPoolExecutor(max_workers=workers, thread_name_prefix="registry") as pool:
+                for model_id, info in zip(missing, pool.map(self._resolve_remote, missing)):
+                    results[model_id] = info
+            logger.info(f"[REGISTRY] Batch resolved {len(model_ids)} models ({len(missing)} via API)")
+
+        return {model_id: results[model_id] for model_id in model_ids}
+
+    def warm_up(self, model_ids: Optional[List[str]] = None) -> int:
+        """
+        Pré-carrega o cache com os modelos populares (templates_seed.json).
+
+        Returns:
+            Número de modelos resolvidos
+        """
+        model_ids = model_ids if model_ids is not None else self.seed_model_ids()
+        if not model_ids:
+            return 0
+        self.get_model_infos(model_ids)
+        self.flush()
+        logger.info(f"[REGISTRY] Warm-up complete: {len(model_ids)} models")
+        return len(model_ids)
+
+    @classmethod
+    def seed_model_ids(cls, seed_file: Optional[Path] = None) -> List[str]:
+        """Model IDs do HuggingFace referenciados pelos templates do marketplace"""
+        try:
+            with open(seed_file or cls.SEED_FILE, 'r') as f:
+                templates = json.load(f)
+        except Exception as e:
+            logger.warning(f"[REGISTRY] Failed to read templates seed: {e}")
+            return []
+
+        model_ids: List[str] = []
+        for template in templates:
+            candidates = re.findall(r"--model[= ](\S+)", template.get("launch_command") or "")
+            candidates += [
+                value for key, value in (template.get("env_vars") or {}).items()
+                if "MODEL" in key.upper() and isinstance(value, str)
+            ]
+            model_ids += [c for c in candidates if re.fullmatch(r"[\w.-]+/[\w.-]+", c)]
+        return list(dict.fromkeys(model_ids))
+
+    # ==================== Cache ====================
+
+    def _is_fresh(self, info: ModelInfo) -> bool:
+        if info.source == "static":
+            return True
+        if not info.cached_at:
+            return False
+        ttl = self.NEGATIVE_TTL_SECONDS if info.source == "negative" else self.CACHE_TTL_SECONDS
+        return time.time() - info.cached_at < ttl
+
+    def _get_fresh(self, model_id: str) -> Optional[ModelInfo]:
+        with self._lock:
+            info = self._cache.get(model_id)
+        if info and self._is_fresh(info):
+            return info
+        return None
+
+    def _resolve_remote(self, model_id: str) -> ModelInfo:
+        """Busca na API, agrupando chamadas concorrentes para o mesmo modelo"""
+        with self._lock:
+            future = self._inflight.get(model_id)
+            owner = future is None
+            if owner:
+                future = self._inflight[model_id] = Future()
+
+        if not owner:
+            return future.result()
+
+        try:
+            info = self._resolve_uncached(model_id)
+            future.set_result(info)
+            return info
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._lock:
+                self._inflight.pop(model_id, None)
+
+    def _resolve_uncached(self, model_id: str) -> ModelInfo:
+        api_info, not_found = self._fetch(model_id)
         if api_info:
             logger.info(f"[REGISTRY] API fetch: {model_id} -> {api_info.runtime}")
-            self._cache[model_id] = api_info
-            self._save_cache()
+            self._store(model_id, api_info)
             return api_info
 
+        with self._lock:
+            stale = self._cache.get(model_id)
+        if stale and stale.source not in ("negative", "fallback") and not not_found:
+            logger.info(f"[REGISTRY] API unavailable, using stale entry: {model_id}")
+            return stale
+
         # 5. Fallback: assumir genérico
         logger.warning(f"[REGISTRY] Unknown model, using defaults: {model_id}")
         fallback = ModelInfo(
@@ -378,11 +524,18 @@ class ModelRegistry:
             task=ModelTask.UNKNOWN,
             runtime=ModelRuntime.TRANSFORMERS,
             library="transformers",
-            source="fallback",
+            source="negative" if not_found else "fallback",
+            cached_at=time.time(),
         )
-        self._cache[model_id] = fallback
+        if not_found:
+            self._store(model_id, fallback)
         return fallback
 
+    def _store(self, model_id: str, info: ModelInfo) -> None:
+        with self._lock:
+            self._cache[model_id] = info
+        self._schedule_save()
+
     def _try_static_mapping(self, model_id: str) -> Optional[ModelInfo]:
         """Tenta encontrar no mapeamento estático (zero API calls)"""
         for prefix, config in KNOWN_MODEL_PREFIXES.items():
@@ -410,39 +563,34 @@ class ModelRegistry:
 
         return None
 
-    def _try_disk_cache(self, model_id: str) -> Optional[ModelInfo]:
-        """Tenta carregar do cache em disco"""
-        try:
-            if self.cache_file.exists():
-                with open(self.cache_file, 'r') as f:
-                    cache_data = json.load(f)
-                    if model_id in cache_data:
-                        info = ModelInfo.from_dict(cache_data[model_id])
-                        info.source = "cache"
-                        return info
-        except Exception as e:
-            logger.warning(f"[REGISTRY] Failed to read cache: {e}")
-        return None
-
     def _fetch_from_api(self, model_id: str) -> Optional[ModelInfo]:
         """Busca informações na API do HuggingFace"""
+        return self._fetch(model_id)[0]
+
+    def _fetch(self, model_id: str) -> Tuple[Optional[ModelInfo], bool]:
+        """
+        Busca na API do HuggingFace.
+
+        Returns:
+            (ModelInfo ou None, True se o modelo não existe/não é acessível)
+        """
         try:
-            url = f"https://huggingface.co/api/models/{model_id}"
+            url = f"{self.HF_API_URL}/{model_id}"
 
             headers = {}
             hf_token = os.environ.get("HF_TOKEN") or os.environ.get("HUGGINGFACE_TOKEN")
             if hf_token:
                 headers["Authorization"] = f"Bearer {hf_token}"
 
-            response = requests.get(url, headers=headers, timeout=10)
+            response = self._session.get(url, headers=headers, timeout=10)
 
             if response.status_code == 429:
                 logger.warning(f"[REGISTRY] Rate limited by HuggingFace API")
-                return None
+                return None, False
 
             if response.status_code != 200:
                 logger.warning(f"[REGISTRY] API returned {response.status_code} for {model_id}")
-                return None
+                return None, response.status_code in (401, 403, 404)
 
             data = response.json()
 
@@ -465,45 +613,73 @@ class ModelRegistry:
                 size_gb=self._estimate_size(model_id),
                 source="api",
                 cached_at=time.time(),
-            )
+            ), False
 
         except requests.exceptions.Timeout:
             logger.warning(f"[REGISTRY] API timeout for {model_id}")
-            return None
+            return None, False
         except Exception as e:
             logger.warning(f"[REGISTRY] API error for {model_id}: {e}")
-            return None
+            return None, False
 
     def _load_cache(self):
-        """Carrega cache do disco"""
+        """Carrega cache do disco (entradas expiradas ficam como fallback stale)"""
         try:
             if self.cache_file.exists():
                 with open(self.cache_file, 'r') as f:
                     cache_data = json.load(f)
+                with self._lock:
                     for model_id, info_dict in cache_data.items():
-                        self._cache[model_id] = ModelInfo.from_dict(info_dict)
-                logger.debug(f"[REGISTRY] Loaded {len(self._cache)} models from cache")
+                        info = ModelInfo.from_dict(info_dict)
+                        if info.source == "api":
+                            info.source = "cache"
+                        self._cache[model_id] = info
+                logger.debug(f"[REGISTRY] Loaded {len(cache_data)} models from cache")
         except Exception as e:
             logger.warning(f"[REGISTRY] Failed to load cache: {e}")
 
+    def _schedule_save(self) -> None:
+        """Agenda uma gravação; várias alterações seguidas viram uma escrita"""
+        with self._lock:
+            if self._save_timer is not None:
+                return
+            self._save_timer = threading.Timer(self.SAVE_DEBOUNCE_SECONDS, self.flush)
+            self._save_timer.daemon = True
+            self._save_timer.start()
+
+    def flush(self) -> None:
+        """Grava o cache pendente agora"""
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._save_cache()
+
     def _save_cache(self):
-        """Salva cache no disco"""
+        """Salva cache no disco (tmp + rename atômico)"""
         try:
-            cache_data = {
-                model_id: info.to_dict()
-                for model_id, info in self._cache.items()
-                if info.source in ("api", "cache")  # Só salva API results
-            }
-            with open(self.cache_file, 'w') as f:
+            with self._lock:
+                cache_data = {
+                    model_id: info.to_dict()
+                    for model_id, info in self._cache.items()
+                    if info.source in ("api", "cache", "negative")  # Só salva API results
+                }
+            tmp_file = self.cache_file.with_name(f"{self.cache_file.name}.{os.getpid()}.tmp")
+            with open(tmp_file, 'w') as f:
                 json.dump(cache_data, f, indent=2)
+            os.replace(tmp_file, self.cache_file)
         except Exception as e:
             logger.warning(f"[REGISTRY] Failed to save cache: {e}")
 
     def clear_cache(self):
         """Limpa cache em memória e disco"""
-        self._cache.clear()
-        if self.cache_file.exists():
-            self.cache_file.unlink()
+        with self._lock:
+            if self._save_timer is not None:
+                self._save_timer.cancel()
+                self._save_timer = None
+            self._cache.clear()
+            if self.cache_file.exists():
+                self.cache_file.unlink()
         logger.info("[REGISTRY] Cache cleared")
 
     def list_known_prefixes(self) -> List[str]:
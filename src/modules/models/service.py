@@ -97,6 +97,9 @@ class DeploymentResult:
 
     # Metrics
     download_time_seconds: Optional[float] = None
+    download_source: Optional[str] = None           # mirror, hub, hub-client
+    download_bytes: Optional[int] = None            # Bytes transferidos (sem cache/retomada)
+    download_throughput_mbps: Optional[float] = None  # MB/s medidos pelo downloader
     startup_time_seconds: Optional[float] = None
     total_time_seconds: Optional[float] = None
 
@@ -116,6 +119,9 @@ class DeploymentResult:
             "port": self.port,
             "error": self.error,
             "download_time_seconds": self.download_time_seconds,
+            "download_source": self.download_source,
+            "download_bytes": self.download_bytes,
+            "download_throughput_mbps": self.download_throughput_mbps,
             "startup_time_seconds": self.startup_time_seconds,
             "total_time_seconds": self.total_time_seconds,
         }
@@ -247,7 +253,15 @@ class ServerlessModelService:
                 raise Exception(f"Download failed: {download_result.error}")
 
             result.download_time_seconds = time.time() - download_start
-            logger.info(f"[DEPLOY] Download complete in {result.download_time_seconds:.1f}s")
+            result.download_source = download_result.source
+            result.download_bytes = download_result.bytes_downloaded
+            throughput = download_result.throughput_bytes_per_second
+            if throughput is not None:
+                result.download_throughput_mbps = round(throughput / 1e6, 2)
+            logger.info(
+                f"[DEPLOY] Download complete in {result.download_time_seconds:.1f}s "
+                f"(source={download_result.source}, {result.download_throughput_mbps or 0:.1f} MB/s)"
+            )
 
             # 4. Instalar dependências
             result.status = DeploymentStatus.INSTALLING
@@ -328,10 +342,11 @@ class ServerlessModelService:
         config: DeploymentConfig,
         result: DeploymentResult,
     ) -> DownloadResult:
-        """Baixa o modelo para cache"""
+        """Baixa o modelo para cache (em thread: o download é bloqueante)"""
         if result.ssh_host:
             # Download remoto
-            return self.downloader.download_remote(
+            return await asyncio.to_thread(
+                self.downloader.download_remote,
                 model_id=config.model_id,
                 ssh_host=result.ssh_host,
                 ssh_port=result.ssh_port or 22,
@@ -339,7 +354,8 @@ class ServerlessModelService:
             )
         else:
             # Download local
-            return self.downloader.download_local(
+            return await asyncio.to_thread(
+                self.downloader.download_local,
                 model_id=config.model_id,
                 force=config.force_download,
             )
@@ -0,0 +1,409 @@
+"""
+Shard Fetcher - Download paralelo por ranges com retomada
+
+Baixa os arquivos de um modelo (shards de pesos, configs, tokenizer) com
+várias requisições HTTP Range em paralelo:
+- Cada arquivo é dividido em ranges de chunk_size, baixados por um pool de threads
+- Progresso por arquivo fica em <arquivo>.incomplete.json; uma nova execução
+  retoma só os ranges que faltam
+- SHA-256 verificado antes de publicar o arquivo (rename atômico)
+- Bytes baixados vs reaproveitados contados exatamente (throughput real)
+
+Usa apenas a stdlib: o mesmo código roda no control plane (download local)
+e é enviado por SSH para a GPU instance (download remoto), ver run_plan().
+"""
+
+import hashlib
+import json
+import os
+import shutil
+import sys
+import threading
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from dataclasses import dataclass, field
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+
+DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024
+DEFAULT_MAX_WORKERS = 16
+READ_BUFFER = 1024 * 1024
+HASH_BUFFER = 8 * 1024 * 1024
+
+
+class FetchError(Exception):
+    """Falha ao baixar ou verificar um arquivo"""
+
+
+@dataclass
+class ShardFile:
+    """Arquivo a baixar"""
+    path: str                       # Caminho relativo no snapshot
+    size: int
+    url: str
+    sha256: Optional[str] = None
+    headers: Dict[str, str] = field(default_factory=dict)
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "path": self.path,
+            "size": self.size,
+            "url": self.url,
+            "sha256": self.sha256,
+            "headers": self.headers,
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "ShardFile":
+        return cls(
+            path=data["path"],
+            size=int(data["size"]),
+            url=data["url"],
+            sha256=data.get("sha256"),
+            headers=data.get("headers") or {},
+        )
+
+
+@dataclass
+class FetchStats:
+    """Contadores de um fetch"""
+    files: int = 0
+    total_bytes: int = 0
+    bytes_downloaded: int = 0       # Bytes efetivamente recebidos da rede
+    bytes_reused: int = 0           # Arquivos/ranges já presentes em disco
+    elapsed_seconds: float = 0.0
+
+    @property
+    def throughput_bytes_per_second(self) -> float:
+        if self.elapsed_seconds <= 0:
+            return 0.0
+        return self.bytes_downloaded / self.elapsed_seconds
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            "files": self.files,
+            "total_bytes": self.total_bytes,
+            "bytes_downloaded": self.bytes_downloaded,
+            "bytes_reused": self.bytes_reused,
+            "elapsed_seconds": self.elapsed_seconds,
+        }
+
+
+def http_get_json(url: str, headers: Optional[Dict[str, str]] = None, timeout: float = 30) -> Any:
+    """GET de um documento JSON"""
+    request = urllib.request.Request(url, headers=headers or {})
+    with urllib.request.urlopen(request, timeout=timeout) as response:
+        return json.loads(response.read().decode("utf-8"))
+
+
+def sha256_file(path: Path) -> str:
+    """SHA-256 de um arquivo em blocos"""
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for block in iter(lambda: f.read(HASH_BUFFER), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+class _PartialFile:
+    """Arquivo .incomplete pré-alocado e o registro dos ranges concluídos"""
+
+    def __init__(self, shard: ShardFile, final_path: Path, chunk_size: int):
+        self.shard = shard
+        self.final_path = final_path
+        self.part_path = final_path.with_name(final_path.name + ".incomplete")
+        self.state_path = final_path.with_name(final_path.name + ".incomplete.json")
+        self.chunk_size = chunk_size
+        self.ranges = [
+            (start, min(start + chunk_size, shard.size) - 1)
+            for start in range(0, shard.size, chunk_size)
+        ]
+        self.done: set = set()
+        self.lock = threading.Lock()
+        self.fd: Optional[int] = None
+
+    def open(self) -> None:
+        """Abre (ou retoma) o arquivo parcial"""
+        self.final_path.parent.mkdir(parents=True, exist_ok=True)
+        if self.part_path.exists() and self.state_path.exists():
+            try:
+                state = json.loads(self.state_path.read_text())
+                if state.get("size") == self.shard.size and state.get("sha256") == self.shard.sha256 \
+                        and state.get("chunk_size") == self.chunk_size:
+                    self.done = set(state.get("done", []))
+            except (ValueError, OSError):
+                self.done = set()
+
+        self.fd = os.open(self.part_path, os.O_RDWR | os.O_CREAT, 0o644)
+        os.ftruncate(self.fd, self.shard.size)
+
+    @property
+    def pending(self) -> List[int]:
+        return [i for i in range(len(self.ranges)) if i not in self.done]
+
+    @property
+    def reused_bytes(self) -> int:
+        return sum(self.ranges[i][1] - self.ranges[i][0] + 1 for i in self.done)
+
+    def mark_done(self, index: int) -> bool:
+        """Registra um range concluído; retorna True quando o arquivo terminou"""
+        with self.lock:
+            self.done.add(index)
+            state = {
+                "size": self.shard.size,
+                "sha256": self.shard.sha256,
+                "chunk_size": self.chunk_size,
+                "done": sorted(self.done),
+            }
+            tmp = self.state_path.with_name(self.state_path.name + ".tmp")
+            tmp.write_text(json.dumps(state))
+            os.replace(tmp, self.state_path)
+            return len(self.done) == len(self.ranges)
+
+    def finalize(self) -> None:
+        """Verifica o checksum e publica o arquivo"""
+        os.fsync(self.fd)
+        os.close(self.fd)
+        self.fd = None
+
+        if self.shard.sha256:
+            actual = sha256_file(self.part_path)
+            if actual != self.shard.sha256:
+                self.discard()
+                raise FetchError(
+                    f"{self.shard.path}: sha256 mismatch (expected {self.shard.sha256}, got {actual})"
+                )
+
+        os.replace(self.part_path, self.final_path)
+        self.state_path.unlink(missing_ok=True)
+
+    def discard(self) -> None:
+        if self.fd is not None:
+            os.close(self.fd)
+            self.fd = None
+        self.part_path.unlink(missing_ok=True)
+        self.state_path.unlink(missing_ok=True)
+
+
+class ShardFetcher:
+    """
+    Baixa uma lista de ShardFile para um diretório.
+
+    Uso:
+        fetcher = ShardFetcher(max_workers=16)
+        stats = fetcher.fetch(files, "/root/.cache/.../snapshots/abc123")
+        print(stats.throughput_bytes_per_second)
+    """
+
+    def __init__(
+        self,
+        max_workers: int = DEFAULT_MAX_WORKERS,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        retries: int = 4,
+        timeout: float = 60,
+        progress_callback: Optional[Callable[[int, int], None]] = None,
+    ):
+        """
+        Args:
+            max_workers: Requisições Range simultâneas (todos os arquivos)
+            chunk_size: Tamanho de cada range em bytes
+            retries: Tentativas por range
+            timeout: Timeout de socket em segundos
+            progress_callback: Chamado com (bytes_prontos, bytes_totais)
+        """
+        self.max_workers = max_workers
+        self.chunk_size = chunk_size
+        self.retries = retries
+        self.timeout = timeout
+        self.progress_callback = progress_callback
+
+        self._lock = threading.Lock()
+        self._stats = FetchStats()
+        self._ready_bytes = 0
+
+    def fetch(self, files: List[ShardFile], dest_dir: str) -> FetchStats:
+        """
+        Baixa os arquivos que faltam em dest_dir.
+
+        Arquivos já presentes com o tamanho esperado são reaproveitados (só
+        são publicados depois de verificados). Levanta FetchError se algum
+        arquivo falhar; os ranges concluídos ficam para a próxima execução.
+        """
+        start = time.monotonic()
+        dest = Path(dest_dir)
+        self._stats = FetchStats(files=len(files), total_bytes=sum(f.size for f in files))
+        self._ready_bytes = 0
+
+        partials: List[_PartialFile] = []
+        for shard in files:
+            final_path = dest / shard.path
+            if final_path.exists() and final_path.stat().st_size == shard.size:
+                self._add_ready(shard.size, reused=True)
+                continue
+            if shard.size == 0:
+                final_path.parent.mkdir(parents=True, exist_ok=True)
+                final_path.touch()
+                continue
+
+            partial = _PartialFile(shard, final_path, self.chunk_size)
+            partial.open()
+            self._add_ready(partial.reused_bytes, reused=True)
+            partials.append(partial)
+
+        tasks: List[Tuple[_PartialFile, int]] = [(p, i) for p in partials for i in p.pending]
+        errors: List[str] = []
+
+        # Arquivos retomados com todos os ranges prontos só faltam publicar
+        for partial in partials:
+            if not partial.pending:
+                try:
+                    partial.finalize()
+                except FetchError as e:
+                    errors.append(str(e))
+
+        if tasks:
+            with ThreadPoolExecutor(max_workers=self.max_workers, thread_name_prefix="shard-fetch") as pool:
+                futures = {pool.submit(self._fetch_range, p, i): p for p, i in tasks}
+                failed = set()
+                for future in as_completed(futures):
+                    partial = futures[future]
+                    try:
+                        future.result()
+                    except Exception as e:
+                        if partial.shard.path not in failed:
+                            failed.add(partial.shard.path)
+                            errors.append(f"{partial.shard.path}: {e}")
+
+            for partial in partials:
+                if partial.fd is not None:
+                    os.close(partial.fd)
+                    partial.fd = None
+
+        self._stats.elapsed_seconds = time.monotonic() - start
+        if errors:
+            raise FetchError("; ".join(errors))
+        return self._stats
+
+    def _add_ready(self, nbytes: int, reused: bool = False, downloaded: int = 0) -> None:
+        with self._lock:
+            self._ready_bytes += nbytes
+            if reused:
+                self._stats.bytes_reused += nbytes
+            self._stats.bytes_downloaded += downloaded
+            ready, total = self._ready_bytes, self._stats.total_bytes
+        if self.progress_callback and nbytes:
+            self.progress_callback(ready, total)
+
+    def _fetch_range(self, partial: _PartialFile, index: int) -> None:
+        """Baixa um range com retentativas; o último range publica o arquivo"""
+        first, last = partial.ranges[index]
+        expected = last - first + 1
+        last_error: Optional[Exception] = FetchError("no attempts")
+
+        for attempt in range(self.retries):
+            received = 0
+            try:
+                headers = dict(partial.shard.headers)
+                headers["Range"] = f"bytes={first}-{last}"
+                request = urllib.request.Request(partial.shard.url, headers=headers)
+                with urllib.request.urlopen(request, timeout=self.timeout) as response:
+                    if response.status == 200 and not (first == 0 and expected == partial.shard.size):
+                        raise FetchError("server ignored Range header")
+
+                    offset = first
+                    while received < expected:
+                        block = response.read(min(READ_BUFFER, expected - received))
+                        if not block:
+                            break
+                        os.pwrite(partial.fd, block, offset)
+                        offset += len(block)
+                        received += len(block)
+
+                if received != expected:
+                    raise FetchError(f"short read ({received}/{expected} bytes)")
+
+                with self._lock:
+                    self._stats.bytes_downloaded += received
+                last_error = None
+                break
+
+            except (urllib.error.URLError, OSError, FetchError) as e:
+                with self._lock:
+                    self._stats.bytes_downloaded += received
+                last_error = e
+                if isinstance(e, urllib.error.HTTPError) and e.code in (401, 403, 404):
+                    break
+                time.sleep(min(2 ** attempt, 10))
+
+        if last_error is not None:
+            raise FetchError(f"range {first}-{last} failed: {last_error}")
+
+        self._add_ready(expected)
+        if partial.mark_done(index):
+            # Checksum calculado no worker: arquivos verificam em paralelo
+            partial.finalize()
+
+
+# ==================== Layout do cache HuggingFace ====================
+
+def hf_cache_repo_dir(cache_dir: str, model_id: str) -> Path:
+    """models--org--name dentro do cache do HuggingFace"""
+    return Path(cache_dir) / ("models--" + model_id.replace("/", "--"))
+
+
+def fetch_snapshot(plan: Dict[str, Any], progress_callback: Optional[Callable[[int, int], None]] = None) -> Dict[str, Any]:
+    """
+    Baixa um snapshot para o layout do cache HuggingFace.
+
+    Os arquivos são montados em downloads/<commit> e o diretório só vira
+    snapshots/<commit> quando todos estão verificados, então um snapshot
+    presente está sempre completo.
+
+    Args:
+        plan: {"model_id", "commit", "revision", "cache_dir", "files": [ShardFile dict],
+               "max_workers"?, "chunk_size"?, "source"?}
+
+    Returns:
+        Dicionário com path, size_bytes e os contadores do FetchStats
+    """
+    repo_dir = hf_cache_repo_dir(plan["cache_dir"], plan["model_id"])
+    commit = plan["commit"]
+    staging = repo_dir / "downloads" / commit
+    snapshot = repo_dir / "snapshots" / commit
+
+    fetcher = ShardFetcher(
+        max_workers=plan.get("max_workers", DEFAULT_MAX_WORKERS),
+        chunk_size=plan.get("chunk_size", DEFAULT_CHUNK_SIZE),
+        progress_callback=progress_callback,
+    )
+    files = [ShardFile.from_dict(f) for f in plan["files"]]
+    stats = fetcher.fetch(files, str(staging))
+
+    if snapshot.exists():
+        shutil.rmtree(snapshot)
+    snapshot.parent.mkdir(parents=True, exist_ok=True)
+    os.replace(staging, snapshot)
+
+    refs = repo_dir / "refs"
+    refs.mkdir(parents=True, exist_ok=True)
+    (refs / plan.get("revision", "main")).write_text(commit)
+
+    return {
+        "path": str(snapshot),
+        "size_bytes": stats.total_bytes,
+        "source": plan.get("source"),
+        **stats.to_dict(),
+    }
+
+
+def run_plan(plan_json: str) -> None:
+    """Entrada usada na máquina remota: imprime uma linha JSON com o resultado"""
+    try:
+        result = fetch_snapshot(json.loads(plan_json))
+        print(json.dumps({"success": True, **result}))
+    except Exception as e:
+        print(json.dumps({"error": str(e), "error_type": type(e).__name__}))
+        sys.exit(1)
@@ -799,6 +799,10 @@ fi
 
     # ==================== Download ====================
 
+    def get_object_url(self, object_key: str, expires_hours: int = 1) -> str:
+        """URL assinada de leitura para uma chave do bucket (sem registro no banco)"""
+        return self._generate_presigned_url(object_key, expires_hours)
+
     def get_download_url(
         self,
         file_key: str,
@@ -9,9 +9,10 @@ Responsável por:
 - Logging de eventos de fraude
 """
 import logging
+import os
+import time
 from datetime import datetime, timedelta
-from typing import Dict, List, Optional, Tuple
-from collections import defaultdict
+from typing import Callable, Dict, List, Optional, Tuple, Union
 from dataclasses import dataclass, field
 import threading
 
@@ -55,14 +56,74 @@ class FraudCheckResult:
 
 class InMemoryRateLimiter:
     """
-    Rate limiter em memória thread-safe.
+    Rate limiter em memória thread-safe (sliding window counter aproximado).
+
+    Cada chave guarda só 3 números: índice da janela fixa atual, contagem
+    da janela anterior e da atual. A contagem na janela deslizante é
+    estimada ponderando a janela anterior pela fração ainda coberta:
+
+        estimativa = anterior * (1 - decorrido / janela) + atual
+
+    Memória O(1) por chave e trabalho O(1) por verificação, mesmo sob
+    rajadas. As chaves ficam em shards com lock próprio; a cada
+    EVICTION_INTERVAL segundos um shard é varrido e chaves sem uso há mais
+    de duas janelas são descartadas.
 
     Usado como fallback quando Redis não está disponível.
     """
 
-    def __init__(self):
-        self._counts: Dict[str, List[datetime]] = defaultdict(list)
-        self._lock = threading.Lock()
+    NUM_SHARDS = 16
+    EVICTION_INTERVAL = 60  # segundos entre varreduras (um shard por vez)
+
+    def __init__(self, clock: Callable[[], float] = time.time):
+        self._clock = clock
+        # (key, window_seconds) -> [window_index, previous_count, current_count]
+        self._shards: List[Dict[Tuple[str, int], List[int]]] = [{} for _ in range(self.NUM_SHARDS)]
+        self._locks = [threading.Lock() for _ in range(self.NUM_SHARDS)]
+        self._next_eviction = clock() + self.EVICTION_INTERVAL
+        self._eviction_shard = 0
+        self._eviction_lock = threading.Lock()
+
+    def _shard(self, key: str) -> int:
+        return hash(key) % self.NUM_SHARDS
+
+    @staticmethod
+    def _roll(state: List[int], window_index: int) -> None:
+        """Avança o estado para a janela atual"""
+        if state[0] == window_index:
+            return
+        state[1] = state[2] if state[0] == window_index - 1 else 0
+        state[2] = 0
+        state[0] = window_index
+
+    def _estimate(self, key: str, window_seconds: int, increment: bool, max_count: Optional[int] = None) -> Tuple[bool, int]:
+        now = self._clock()
+        window_index = int(now // window_seconds)
+        weight = 1.0 - (now % window_seconds) / window_seconds
+        shard = self._shard(key)
+
+        with self._locks[shard]:
+            entries = self._shards[shard]
+            state = entries.get((key, window_seconds))
+            if state is None:
+                if not increment:
+                    return True, 0
+                state = entries[(key, window_seconds)] = [window_index, 0, 0]
+            self._roll(state, window_index)
+            estimate = state[1] * weight + state[2]
+
+            if not increment:
+                allowed = True
+            elif max_count is not None and estimate >= max_count:
+                allowed = False
+            else:
+                state[2] += 1
+                estimate += 1
+                allowed = True
+
+        if increment:
+            self._maybe_evict(now)
+        return allowed, int(estimate)
 
     def check_and_increment(
         self,
@@ -81,59 +142,159 @@ class InMemoryRateLimiter:
         Returns:
             Tuple (allowed: bool, current_count: int)
         """
-        now = datetime.utcnow()
-        cutoff = now - timedelta(seconds=window_seconds)
-
-        with self._lock:
-            # Limpar entradas expiradas
-            self._counts[key] = [
-                ts for ts in self._counts[key]
-                if ts > cutoff
+        return self._estimate(key, window_seconds, increment=True, max_count=max_count)
+
+    def get_count(self, key: str, window_seconds: int) -> int:
+        """Retorna contagem atual sem incrementar."""
+        return self._estimate(key, window_seconds, increment=False)[1]
+
+    def reset(self, key: str) -> None:
+        """Reseta contador para uma chave (todas as janelas)."""
+        shard = self._shard(key)
+        with self._locks[shard]:
+            entries = self._shards[shard]
+            for entry_key in [k for k in entries if k[0] == key]:
+                del entries[entry_key]
+
+    def _evict_shard(self, shard: int, now: float) -> int:
+        """Remove chaves cuja última janela usada terminou há mais de uma janela"""
+        with self._locks[shard]:
+            entries = self._shards[shard]
+            expired = [
+                k for k, state in entries.items()
+                if int(now // k[1]) - state[0] >= 2
             ]
+            for k in expired:
+                del entries[k]
+        return len(expired)
+
+    def _maybe_evict(self, now: float) -> None:
+        """Varredura incremental: um shard por intervalo, sem parar o mundo"""
+        if now < self._next_eviction or not self._eviction_lock.acquire(blocking=False):
+            return
+        try:
+            self._next_eviction = now + self.EVICTION_INTERVAL
+            shard = self._eviction_shard
+            self._eviction_shard = (shard + 1) % self.NUM_SHARDS
+            self._evict_shard(shard, now)
+        finally:
+            self._eviction_lock.release()
+
+    def cleanup_expired(self) -> int:
+        """Remove as chaves expiradas de todos os shards. Retorna quantas."""
+        now = self._clock()
+        return sum(self._evict_shard(shard, now) for shard in range(self.NUM_SHARDS))
+
+    def key_count(self) -> int:
+        """Número de chaves (por janela) em memória."""
+        return sum(len(entries) for entries in self._shards)
 
-            current_count = len(self._counts[key])
 
-            if current_count >= max_count:
-                return False, current_count
+class RedisRateLimiter:
+    """
+    Rate limiter distribuído (mesmo algoritmo do InMemoryRateLimiter).
 
-            # Adicionar nova entrada
-            self._counts[key].append(now)
-            return True, current_count + 1
+    As contagens das janelas fixas ficam em chaves Redis com TTL de duas
+    janelas; verificação e incremento rodam num script Lua atômico, então
+    o limite vale para todos os workers da API.
+
+    Reusa a conexão do RegionCache (REDIS_URL). Se o Redis falhar, usa o
+    limiter em memória do processo até a conexão voltar.
+    """
+
+    KEY_PREFIX = "dumont:fraud_rate_limit:"
+
+    # KEYS: janela atual, janela anterior
+    # ARGV: peso da anterior, max_count (-1 = só ler), ttl
+    _SCRIPT = """
+local current = tonumber(redis.call('GET', KEYS[1]) or '0')
+local previous = tonumber(redis.call('GET', KEYS[2]) or '0')
+local estimate = previous * tonumber(ARGV[1]) + current
+local max_count = tonumber(ARGV[2])
+if max_count < 0 then
+    return {1, tostring(estimate)}
+end
+if estimate >= max_count then
+    return {0, tostring(estimate)}
+end
+redis.call('INCR', KEYS[1])
+redis.call('EXPIRE', KEYS[1], tonumber(ARGV[3]))
+return {1, tostring(estimate + 1)}
+"""
+
+    def __init__(self, redis_client, fallback: Optional[InMemoryRateLimiter] = None, clock: Callable[[], float] = time.time):
+        self._redis = redis_client
+        self._fallback = fallback or InMemoryRateLimiter(clock=clock)
+        self._clock = clock
+        self._script = redis_client.register_script(self._SCRIPT)
+
+    def _keys(self, key: str, window_seconds: int, window_index: int) -> List[str]:
+        base = f"{self.KEY_PREFIX}{key}:{window_seconds}:"
+        return [f"{base}{window_index}", f"{base}{window_index - 1}"]
+
+    def _run(self, key: str, window_seconds: int, max_count: int) -> Tuple[bool, int]:
+        now = self._clock()
+        window_index = int(now // window_seconds)
+        weight = 1.0 - (now % window_seconds) / window_seconds
+        allowed, estimate = self._script(
+            keys=self._keys(key, window_seconds, window_index),
+            args=[weight, max_count, window_seconds * 2],
+        )
+        return bool(int(allowed)), int(float(estimate))
+
+    def check_and_increment(self, key: str, max_count: int, window_seconds: int) -> Tuple[bool, int]:
+        """Verifica rate limit e incrementa contador (atômico no Redis)."""
+        try:
+            return self._run(key, window_seconds, max_count)
+        except Exception as e:
+            logger.warning(f"Redis rate limiter indisponível, usando memória local: {e}")
+            return self._fallback.check_and_increment(key, max_count, window_seconds)
 
     def get_count(self, key: str, window_seconds: int) -> int:
         """Retorna contagem atual sem incrementar."""
-        now = datetime.utcnow()
-        cutoff = now - timedelta(seconds=window_seconds)
-
-        with self._lock:
-            return len([ts for ts in self._counts[key] if ts > cutoff])
+        try:
+            return self._run(key, window_seconds, -1)[1]
+        except Exception as e:
+            logger.warning(f"Redis rate limiter indisponível, usando memória local: {e}")
+            return self._fallback.get_count(key, window_seconds)
 
     def reset(self, key: str) -> None:
-        """Reseta contador para uma chave."""
-        with self._lock:
-            self._counts.pop(key, None)
+        """Reseta contador para uma chave (todas as janelas)."""
+        self._fallback.reset(key)
+        try:
+            keys = list(self._redis.scan_iter(match=f"{self.KEY_PREFIX}{key}:*", count=100))
+            if keys:
+                self._redis.delete(*keys)
+        except Exception as e:
+            logger.warning(f"Falha ao resetar rate limit no Redis para {key}: {e}")
 
     def cleanup_expired(self) -> int:
-        """Remove todas as entradas expiradas de todas as chaves."""
-        now = datetime.utcnow()
-        # Usar janela de 24h para limpeza geral
-        cutoff = now - timedelta(hours=24)
-        removed = 0
+        """Chaves Redis expiram por TTL; só limpa o fallback local."""
+        return self._fallback.cleanup_expired()
 
-        with self._lock:
-            keys_to_remove = []
-            for key, timestamps in self._counts.items():
-                original_len = len(timestamps)
-                self._counts[key] = [ts for ts in timestamps if ts > cutoff]
-                removed += original_len - len(self._counts[key])
+    def key_count(self) -> int:
+        """Número de chaves de janela no Redis (SCAN, uso administrativo)."""
+        try:
+            return sum(1 for _ in self._redis.scan_iter(match=f"{self.KEY_PREFIX}*", count=1000))
+        except Exception:
+            return self._fallback.key_count()
 
-                if not self._counts[key]:
-                    keys_to_remove.append(key)
 
-            for key in keys_to_remove:
-                del self._counts[key]
+def create_rate_limiter():
+    """
+    Cria o rate limiter de anti-fraude.
+
+    Usa Redis quando REDIS_URL está configurado e acessível (limites
+    compartilhados entre workers); caso contrário, memória do processo.
+    """
+    if os.getenv("REDIS_URL"):
+        from src.utils.region_cache import get_region_cache
 
-        return removed
+        client = get_region_cache().redis_client
+        if client is not None:
+            logger.info("Rate limiter anti-fraude usando Redis")
+            return RedisRateLimiter(client)
+    return InMemoryRateLimiter()
 
 
 class FraudDetectionService:
@@ -147,15 +308,21 @@ class FraudDetectionService:
     - Detecção de padrões suspeitos
     """
 
-    # Rate limiter singleton compartilhado
-    _rate_limiter = InMemoryRateLimiter()
+    # Rate limiter singleton compartilhado (criado no primeiro uso)
+    _rate_limiter: Optional[Union[InMemoryRateLimiter, RedisRateLimiter]] = None
+    _rate_limiter_lock = threading.Lock()
 
     def __init__(self, db: Session):
         self.db = db
+        self._rate_limiter = self.get_rate_limiter()
 
     @classmethod
-    def get_rate_limiter(cls) -> InMemoryRateLimiter:
+    def get_rate_limiter(cls) -> Union[InMemoryRateLimiter, RedisRateLimiter]:
         """Retorna o rate limiter compartilhado."""
+        if cls._rate_limiter is None:
+            with cls._rate_limiter_lock:
+                if cls._rate_limiter is None:
+                    cls._rate_limiter = create_rate_limiter()
         return cls._rate_limiter
 
     def check_self_referral(
@@ -708,7 +875,7 @@ class FraudDetectionService:
             "blocked_count": blocked_count,
             "fraud_rate_percent": round(fraud_rate, 2),
             "suspicious_rate_percent": round(suspicious_rate, 2),
-            "rate_limiter_keys": len(self._rate_limiter._counts)
+            "rate_limiter_keys": self._rate_limiter.key_count()
         }
 
     def clear_user_rate_limits(self, user_id: str) -> None:
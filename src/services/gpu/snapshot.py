@@ -3,6 +3,7 @@ import time
 import json
 import base64
 import asyncio
+import hashlib
 import logging
 import subprocess
 from datetime import datetime
@@ -57,6 +58,9 @@ class GPUSnapshotService:
     Default Provider: Backblaze B2 (best speed/cost ratio)
     """
 
+    # Key prefix of the deduplicated chunk store inside the bucket
+    CHUNK_STORE_PREFIX = "chunks"
+
     def __init__(self, r2_endpoint: str, r2_bucket: str, provider: str = "auto"):
         self.r2_endpoint = r2_endpoint
         self.r2_bucket = r2_bucket
@@ -203,6 +207,135 @@ class GPUSnapshotService:
             'total_time': total_time
         }
 
+    def create_dedup_snapshot(
+        self,
+        instance_id: str,
+        ssh_host: str,
+        ssh_port: int,
+        workspace_path: str = "/workspace",
+        snapshot_name: Optional[str] = None,
+        user_id: Optional[str] = None
+    ) -> Dict:
+        """
+        Creates a deduplicated snapshot (ChunkStore) of the workspace.
+
+        Only chunks the bucket has never seen are uploaded, so repeated
+        snapshots of the same machine cost what changed, not the workspace size.
+        """
+        if not snapshot_name:
+            snapshot_name = f"{instance_id}_{int(time.time())}"
+
+        logger.info(f"Creating snapshot {snapshot_name} (dedup chunk store)")
+        start_time = time.time()
+
+        stats = self._run_chunk_store(ssh_host, ssh_port, {
+            'action': 'create',
+            'snapshot_id': snapshot_name,
+            'source': workspace_path,
+        })
+
+        overall_time = time.time() - start_time
+
+        snapshot_info = {
+            'snapshot_id': snapshot_name,
+            'instance_id': instance_id,
+            'created_at': datetime.utcnow().isoformat(),
+            'workspace_path': workspace_path,
+            'size_original': stats.get('bytes_total', 0),
+            'size_compressed': stats.get('bytes_uploaded', 0),
+            'compression_ratio': stats.get('dedup_ratio', 1.0),
+            'num_chunks': stats.get('chunks_total', 0),
+            'chunks_new': stats.get('chunks_new', 0),
+            'bytes_new': stats.get('bytes_new', 0),
+            'files_unchanged': stats.get('files_unchanged', 0),
+            'upload_time': stats.get('elapsed_seconds', 0),
+            'total_time': overall_time,
+            'technology': 'dedup_chunk_store',
+            'r2_path': f"{self.CHUNK_STORE_PREFIX}/manifests/{snapshot_name}.json"
+        }
+
+        self._save_snapshot_metadata(snapshot_info)
+
+        logger.info(
+            f"Snapshot complete: {snapshot_name} ({overall_time:.1f}s, "
+            f"{snapshot_info['chunks_new']}/{snapshot_info['num_chunks']} new chunks)"
+        )
+
+        _fire_webhook_from_sync(
+            event_type="snapshot.completed",
+            data={
+                "snapshot_id": snapshot_name,
+                "instance_id": instance_id,
+                "size_original": snapshot_info['size_original'],
+                "size_compressed": snapshot_info['size_compressed'],
+                "compression_ratio": snapshot_info['compression_ratio'],
+                "total_time": overall_time,
+                "workspace_path": workspace_path,
+            },
+            user_id=user_id
+        )
+
+        return snapshot_info
+
+    def restore_dedup_snapshot(
+        self,
+        snapshot_id: str,
+        ssh_host: str,
+        ssh_port: int,
+        workspace_path: str = "/workspace"
+    ) -> Dict:
+        """Restores a deduplicated snapshot created by create_dedup_snapshot."""
+        logger.info(f"Restoring snapshot {snapshot_id} (dedup chunk store)")
+        start_time = time.time()
+
+        stats = self._run_chunk_store(ssh_host, ssh_port, {
+            'action': 'restore',
+            'snapshot_id': snapshot_id,
+            'target': workspace_path,
+        })
+
+        total_time = time.time() - start_time
+        logger.info(f"Restore complete: {snapshot_id} ({total_time:.1f}s)")
+
+        return {
+            'restored': True,
+            'snapshot_id': snapshot_id,
+            'files_restored': stats.get('files_restored', 0),
+            'bytes_original': stats.get('bytes_original', 0),
+            'total_time': total_time
+        }
+
+    def _run_chunk_store(self, host: str, port: int, params: Dict) -> Dict:
+        """Runs a ChunkStore job on the GPU machine (code shipped over SSH stdin)."""
+        from src.snapshot.remote import build_remote_script
+
+        store = f"{self.r2_endpoint}/{self.r2_bucket}/{self.CHUNK_STORE_PREFIX}"
+        params = {
+            'backend': {
+                'type': 's3',
+                'endpoint': self.r2_endpoint,
+                'bucket': self.r2_bucket,
+                'prefix': self.CHUNK_STORE_PREFIX,
+            },
+            # One index per store: it records which chunks that bucket already has
+            'index': f"~/.dumont/chunk_index-{hashlib.sha1(store.encode()).hexdigest()[:12]}.db",
+            **params,
+        }
+
+        result = self._ssh_exec(host, port, build_remote_script(params), stdin=True)
+
+        try:
+            stats = json.loads(result['stdout'].strip().split('\n')[-1])
+        except (json.JSONDecodeError, IndexError):
+            stats = {}
+
+        if result['returncode'] != 0 or not stats.get('success'):
+            error = stats.get('error') or result['stderr']
+            logger.error(f"Remote error: {error}")
+            raise Exception(f"Chunk store {params['action']} failed: {error}")
+
+        return stats
+
     def _generate_hybrid_compress_script(self, workspace_path, snapshot_name, endpoint, bucket) -> str:
         """Generates the Python script to run on the GPU machine for compression."""
         
@@ -1112,15 +1245,20 @@ stats = {{
 print(json.dumps(stats))
 """
 
-    def _ssh_exec(self, host: str, port: int, script: str) -> Dict:
-        """Executes python script via SSH using base64 encoding."""
+    def _ssh_exec(self, host: str, port: int, script: str, stdin: bool = False) -> Dict:
+        """Executes python script via SSH using base64 encoding (or stdin, for large scripts)."""
         import os
 
         # Get B2 credentials from environment to pass to remote
         b2_key_id = os.getenv("B2_KEY_ID", "")
         b2_app_key = os.getenv("B2_APPLICATION_KEY", "")
+        env = f"B2_KEY_ID='{b2_key_id}' B2_APPLICATION_KEY='{b2_app_key}'"
 
-        script_b64 = base64.b64encode(script.encode('utf-8')).decode('utf-8')
+        if stdin:
+            remote_cmd, script_input = f"{env} python3 -", script
+        else:
+            script_b64 = base64.b64encode(script.encode('utf-8')).decode('utf-8')
+            remote_cmd, script_input = f"{env} bash -c \"echo {script_b64} | base64 -d | python3\"", None
 
         # Pass B2 credentials as environment variables via SSH
         cmd = [
@@ -1128,14 +1266,15 @@ print(json.dumps(stats))
             "-p", str(port),
             "-o", "StrictHostKeyChecking=no",
             f"root@{host}",
-            f"B2_KEY_ID='{b2_key_id}' B2_APPLICATION_KEY='{b2_app_key}' bash -c \"echo {script_b64} | base64 -d | python3\""
+            remote_cmd
         ]
 
         result = subprocess.run(
             cmd,
             capture_output=True,
             text=True,
-            timeout=7200 # 2 hours
+            timeout=7200, # 2 hours
+            input=script_input
         )
         return {
             'returncode': result.returncode,
@@ -12,6 +12,7 @@ from typing import Optional, Dict, List, Any, TypeVar, Callable
 from dataclasses import dataclass
 from functools import wraps
 
+from src.infrastructure.http_pool import get_vast_session
 from src.services.webhook_service import trigger_webhooks
 from ..region_mapper import RegionMapper, ParsedGeolocation, get_region_mapper
 
@@ -350,6 +351,8 @@ class VastService:
     def __init__(self, api_key: str):
         self.api_key = api_key
         self.headers = {"Authorization": f"Bearer {api_key}"}
+        # Keep-alive session shared process-wide for this API key
+        self.session = get_vast_session(api_key)
 
     def search_offers(
         self,
@@ -412,7 +415,7 @@ class VastService:
         
         for attempt in range(max_retries + 1):
             try:
-                resp = requests.get(
+                resp = self.session.get(
                     f"{self.API_URL}/bundles",
                     params=params,
                     headers=self.headers,
@@ -857,7 +860,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
             
             for attempt in range(max_retries + 1):
                 try:
-                    resp = requests.put(
+                    resp = self.session.put(
                         f"{self.API_URL}/asks/{offer_id}/",
                         json=payload,
                         headers=self.headers,
@@ -916,7 +919,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
 
         for attempt in range(max_retries + 1):
             try:
-                resp = requests.get(
+                resp = self.session.get(
                     f"{self.API_URL}/instances/{instance_id}/",
                     headers=self.headers,
                     timeout=30,
@@ -993,7 +996,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
 
         for attempt in range(max_retries + 1):
             try:
-                resp = requests.delete(
+                resp = self.session.delete(
                     f"{self.API_URL}/instances/{instance_id}/",
                     headers=self.headers,
                     timeout=30,
@@ -1061,7 +1064,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
 
         for attempt in range(max_retries + 1):
             try:
-                resp = requests.put(
+                resp = self.session.put(
                     f"{self.API_URL}/instances/{instance_id}/",
                     headers={"Accept": "application/json"},
                     params={"api_key": self.api_key},
@@ -1119,7 +1122,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
 
         for attempt in range(max_retries + 1):
             try:
-                resp = requests.put(
+                resp = self.session.put(
                     f"{self.API_URL}/instances/{instance_id}/",
                     headers={"Accept": "application/json"},
                     params={"api_key": self.api_key},
@@ -1169,7 +1172,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
     def get_instance_logs(self, instance_id: int) -> str:
         """Retorna logs de uma instancia"""
         try:
-            resp = requests.get(
+            resp = self.session.get(
                 f"{self.API_URL}/instances/{instance_id}/",
                 headers=self.headers,
                 timeout=30,
@@ -1245,7 +1248,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
         
         for attempt in range(max_retries + 1):
             try:
-                resp = requests.get(
+                resp = self.session.get(
                     f"{self.API_URL}/instances/",
                     params={"owner": "me"},
                     headers=self.headers,
@@ -1290,7 +1293,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
         
         for attempt in range(max_retries + 1):
             try:
-                resp = requests.get(
+                resp = self.session.get(
                     f"{self.API_URL}/users/current/",
                     headers=self.headers,
                     timeout=30,
@@ -1364,7 +1367,7 @@ tailscale up --authkey={tailscale_authkey} --hostname={hostname} --ssh &
         }
 
         try:
-            resp = requests.get(
+            resp = self.session.get(
                 f"{self.API_URL}/bundles/",
                 params=params,
                 headers=self.headers,
@@ -1422,7 +1425,7 @@ apt-get update -qq && apt-get install -y -qq rsync rclone restic
 
             logger.debug(f"create_cpu_instance: offer_id={offer_id}, disk={disk}, ports={ports}")
 
-            resp = requests.put(
+            resp = self.session.put(
                 f"{self.API_URL}/asks/{offer_id}/",
                 json=payload,
                 headers=self.headers,
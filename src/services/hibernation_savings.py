@@ -0,0 +1,184 @@
+"""
+Serviço de economia real por hibernação.
+
+Agrega a economia a partir do rollup diário (HibernationSavingsDaily) e,
+só para o primeiro dia da janela (parcial), dos eventos brutos com um
+JOIN + GROUP BY em InstanceStatus. Tudo numa única query.
+"""
+import logging
+import threading
+from datetime import date, datetime, timedelta
+from typing import Dict, Optional
+
+from sqlalchemy import delete, func, insert, literal, select, union_all
+from sqlalchemy.orm import Session
+
+from src.models.instance_status import (
+    SAVINGS_EVENT_TYPES,
+    HibernationEvent,
+    HibernationSavingsBackfill,
+    HibernationSavingsDaily,
+    InstanceStatus,
+)
+
+logger = logging.getLogger(__name__)
+
+_backfill_lock = threading.Lock()
+
+
+def rebuild_savings_rollup(db: Session, since: Optional[date] = None, commit: bool = True) -> int:
+    """
+    Recalcula o rollup a partir dos eventos (backfill ou correção).
+
+    Eventos gravados fora do ORM (ex: insert em lote) não passam pelo
+    listener; este rebuild cobre esses casos.
+
+    Args:
+        db: Sessão do banco de dados
+        since: Primeiro dia a recalcular (None = tudo)
+        commit: Confirmar a transação (False = o chamador confirma)
+
+    Returns:
+        Número de linhas do rollup gravadas
+    """
+    table = HibernationSavingsDaily.__table__
+    day = func.date(HibernationEvent.timestamp)
+
+    events = select(
+        day.label("day"),
+        func.coalesce(InstanceStatus.user_id, literal("")).label("user_id"),
+        func.coalesce(InstanceStatus.gpu_type, literal("")).label("gpu_type"),
+        func.count(HibernationEvent.id).label("hibernations"),
+        func.coalesce(func.sum(HibernationEvent.idle_hours), 0.0).label("hours_saved"),
+        func.coalesce(func.sum(HibernationEvent.savings_usd), 0.0).label("usd_saved"),
+    ).select_from(HibernationEvent).outerjoin(
+        InstanceStatus, InstanceStatus.instance_id == HibernationEvent.instance_id
+    ).where(
+        HibernationEvent.event_type.in_(SAVINGS_EVENT_TYPES)
+    ).group_by(
+        day,
+        func.coalesce(InstanceStatus.user_id, literal("")),
+        func.coalesce(InstanceStatus.gpu_type, literal("")),
+    )
+
+    clear = delete(table)
+    if since is not None:
+        clear = clear.where(table.c.day >= since)
+        events = events.where(HibernationEvent.timestamp >= datetime.combine(since, datetime.min.time()))
+
+    db.execute(clear)
+    result = db.execute(insert(table).from_select(
+        ["day", "user_id", "gpu_type", "hibernations", "hours_saved", "usd_saved"], events
+    ))
+    if commit:
+        db.commit()
+    return result.rowcount
+
+
+def _ensure_backfilled(db: Session) -> None:
+    """
+    Reconstrói o rollup quando falta a marca HibernationSavingsBackfill.
+
+    O rollup não fica vazio até a primeira consulta (o listener já soma os
+    eventos novos), então a condição é a marca: sem ela, o rebuild completo
+    substitui as somas parciais do listener e a marca é gravada na mesma
+    transação. A marca é lida a cada consulta (um SELECT de uma linha)
+    porque o listener a remove quando não consegue atualizar o rollup.
+    """
+    if db.execute(select(HibernationSavingsBackfill.id).limit(1)).first():
+        return
+
+    with _backfill_lock:
+        if db.execute(select(HibernationSavingsBackfill.id).limit(1)).first():
+            return
+        rows = rebuild_savings_rollup(db, commit=False)
+        db.add(HibernationSavingsBackfill(rows=rows))
+        db.commit()
+        logger.info(f"Savings rollup backfilled: {rows} rows")
+
+
+def get_real_savings(db: Session, days: int, user_id: Optional[str] = None) -> Dict:
+    """
+    Economia real dos últimos `days` dias, total e por GPU.
+
+    Args:
+        db: Sessão do banco de dados
+        days: Tamanho da janela em dias
+        user_id: Filtrar por usuário
+
+    Returns:
+        Dict com total_savings_usd, total_hours_saved, hibernation_count e
+        gpu_breakdown ({gpu: {hibernations, hours_saved, usd_saved}})
+    """
+    _ensure_backfilled(db)
+
+    start_date = datetime.utcnow() - timedelta(days=days)
+    first_full_day = start_date.date() + timedelta(days=1)
+    boundary = datetime.combine(first_full_day, datetime.min.time())
+
+    # Dia parcial do início da janela: eventos brutos
+    partial = select(
+        func.coalesce(InstanceStatus.gpu_type, literal("")).label("gpu_type"),
+        func.count(HibernationEvent.id).label("hibernations"),
+        func.coalesce(func.sum(HibernationEvent.idle_hours), 0.0).label("hours_saved"),
+        func.coalesce(func.sum(HibernationEvent.savings_usd), 0.0).label("usd_saved"),
+    ).select_from(HibernationEvent).outerjoin(
+        InstanceStatus, InstanceStatus.instance_id == HibernationEvent.instance_id
+    ).where(
+        HibernationEvent.timestamp >= start_date,
+        HibernationEvent.timestamp < boundary,
+        HibernationEvent.event_type.in_(SAVINGS_EVENT_TYPES),
+    ).group_by(InstanceStatus.gpu_type)
+
+    # Dias completos (e o dia corrente): rollup
+    full_days = select(
+        HibernationSavingsDaily.gpu_type,
+        func.sum(HibernationSavingsDaily.hibernations).label("hibernations"),
+        func.sum(HibernationSavingsDaily.hours_saved).label("hours_saved"),
+        func.sum(HibernationSavingsDaily.usd_saved).label("usd_saved"),
+    ).where(
+        HibernationSavingsDaily.day >= first_full_day
+    ).group_by(HibernationSavingsDaily.gpu_type)
+
+    if user_id:
+        partial = partial.where(InstanceStatus.user_id == user_id)
+        full_days = full_days.where(HibernationSavingsDaily.user_id == user_id)
+
+    combined = union_all(partial, full_days).subquery()
+    rows = db.execute(
+        select(
+            combined.c.gpu_type,
+            func.sum(combined.c.hibernations).label("hibernations"),
+            func.sum(combined.c.hours_saved).label("hours_saved"),
+            func.sum(combined.c.usd_saved).label("usd_saved"),
+        ).group_by(combined.c.gpu_type)
+    ).all()
+
+    total_savings_usd = 0.0
+    total_hours_saved = 0.0
+    hibernation_count = 0
+    gpu_breakdown = {}
+
+    for row in rows:
+        hibernations = int(row.hibernations or 0)
+        hours_saved = float(row.hours_saved or 0)
+        usd_saved = float(row.usd_saved or 0)
+
+        total_savings_usd += usd_saved
+        total_hours_saved += hours_saved
+        hibernation_count += hibernations
+
+        # Eventos sem instância/GPU conhecida entram só no total
+        if row.gpu_type:
+            gpu_breakdown[row.gpu_type] = {
+                "hibernations": hibernations,
+                "hours_saved": hours_saved,
+                "usd_saved": usd_saved,
+            }
+
+    return {
+        "total_savings_usd": total_savings_usd,
+        "total_hours_saved": total_hours_saved,
+        "hibernation_count": hibernation_count,
+        "gpu_breakdown": gpu_breakdown,
+    }
@@ -34,6 +34,7 @@ from collections import defaultdict
 from src.services.agent_manager import Agent
 from src.infrastructure.providers.vast_provider import VastProvider
 from src.config.database import SessionLocal
+from src.modules.market.persistence import upsert_market_latest, upsert_offer_stability, upsert_provider_reliability
 from src.models.metrics import (
     MarketSnapshot,
     ProviderReliability,
@@ -138,32 +139,23 @@ class MarketMonitorAgent(Agent):
         logger.info("Ciclo de monitoramento concluído")
 
     def _collect_market_data(self) -> Dict[str, List[GpuOffer]]:
-        """Coleta dados de todas as GPUs e tipos de máquina."""
-        all_offers = {}
-        total_collected = 0
-
-        for gpu_name in self.gpus_to_monitor:
-            for machine_type in self.machine_types:
-                key = f"{gpu_name}:{machine_type}"
-                try:
-                    offers = self.vast_provider.search_offers_by_type(
-                        machine_type=machine_type,
-                        gpu_name=gpu_name,
-                        max_price=100.0,  # Alto para capturar todas
-                        limit=200,
-                    )
-                    all_offers[key] = offers
-                    total_collected += len(offers)
+        """Coleta dados de todas as GPUs e tipos de máquina (queries em paralelo)."""
+        all_offers = self.vast_provider.fetch_all_market_data(
+            gpus_to_monitor=self.gpus_to_monitor,
+            machine_types=self.machine_types,
+            max_price=100.0,  # Alto para capturar todas
+            limit_per_query=200,
+        )
+        total_collected = sum(len(offers) for offers in all_offers.values())
 
-                    if offers:
-                        logger.debug(f"{key}: {len(offers)} ofertas, "
-                                     f"min=${min(o.dph_total for o in offers):.4f}/h")
-                except Exception as e:
-                    logger.warning(f"Falha ao coletar {key}: {e}")
-                    all_offers[key] = []
+        for key, offers in all_offers.items():
+            prices = [o.dph_total for o in offers if o.dph_total]
+            if prices:
+                logger.debug(f"{key}: {len(offers)} ofertas, min=${min(prices):.4f}/h")
 
         logger.info(f"Total coletado: {total_collected} ofertas em "
-                    f"{len([k for k, v in all_offers.items() if v])} combinações")
+                    f"{len([k for k, v in all_offers.items() if v])} combinações "
+                    f"({self.vast_provider.last_fetch_stats.get('total_ms', 0):.0f}ms)")
         return all_offers
 
     def _save_market_snapshots(self, all_offers: Dict[str, List[GpuOffer]]):
@@ -171,7 +163,7 @@ class MarketMonitorAgent(Agent):
         db = SessionLocal()
         try:
             timestamp = datetime.utcnow()
-            snapshots_saved = 0
+            snapshots = []
 
             for key, offers in all_offers.items():
                 if not offers:
@@ -203,10 +195,13 @@ class MarketMonitorAgent(Agent):
                     region_distribution=stats.get('region_distribution'),
                 )
                 db.add(snapshot)
-                snapshots_saved += 1
+                snapshots.append(snapshot)
+
+            # Ultimo valor por gpu:tipo (savepoint: se falhar, o historico e gravado)
+            upsert_market_latest(db, snapshots)
 
             db.commit()
-            logger.info(f"Salvos {snapshots_saved} snapshots de mercado")
+            logger.info(f"Salvos {len(snapshots)} snapshots de mercado")
 
         except Exception as e:
             logger.error(f"Erro ao salvar snapshots: {e}")
@@ -281,74 +276,10 @@ class MarketMonitorAgent(Agent):
         return "OTHER"
 
     def _update_provider_data(self, all_offers: Dict[str, List[GpuOffer]]):
-        """Atualiza dados de confiabilidade de provedores."""
+        """Atualiza dados de confiabilidade de provedores (upsert em lote)."""
         db = SessionLocal()
         try:
-            # Agrupar ofertas por machine_id
-            providers = defaultdict(list)
-            for offers in all_offers.values():
-                for offer in offers:
-                    if offer.machine_id:
-                        providers[offer.machine_id].append(offer)
-
-            providers_updated = 0
-            for machine_id, machine_offers in providers.items():
-                # Buscar ou criar registro
-                provider = db.query(ProviderReliability).filter(
-                    ProviderReliability.machine_id == machine_id
-                ).first()
-
-                if not provider:
-                    provider = ProviderReliability(
-                        machine_id=machine_id,
-                        first_seen=datetime.utcnow()
-                    )
-                    db.add(provider)
-
-                # Atualizar com dados mais recentes
-                latest = machine_offers[0]
-                provider.hostname = latest.hostname
-                provider.geolocation = latest.geolocation
-                provider.verified = latest.verified
-                provider.gpu_name = latest.gpu_name
-                provider.last_seen = datetime.utcnow()
-                provider.last_updated = datetime.utcnow()
-
-                # Incrementar contadores
-                provider.total_observations = (provider.total_observations or 0) + 1
-                provider.times_available = (provider.times_available or 0) + 1
-
-                # Atualizar preços
-                prices = [o.dph_total for o in machine_offers if o.dph_total > 0]
-                if prices:
-                    min_price = min(prices)
-                    max_price = max(prices)
-                    avg_price = statistics.mean(prices)
-
-                    if provider.min_price_seen is None or min_price < provider.min_price_seen:
-                        provider.min_price_seen = min_price
-                    if provider.max_price_seen is None or max_price > provider.max_price_seen:
-                        provider.max_price_seen = max_price
-
-                    # Média móvel exponencial
-                    if provider.avg_price:
-                        provider.avg_price = provider.avg_price * 0.9 + avg_price * 0.1
-                    else:
-                        provider.avg_price = avg_price
-
-                # Performance
-                flops = [o.total_flops for o in machine_offers if o.total_flops]
-                if flops:
-                    provider.avg_total_flops = statistics.mean(flops)
-
-                dlperfs = [o.dlperf for o in machine_offers if o.dlperf]
-                if dlperfs:
-                    provider.avg_dlperf = statistics.mean(dlperfs)
-
-                # Calcular scores (passando a oferta mais recente para usar dados da API)
-                self._calculate_provider_scores(provider, latest)
-                providers_updated += 1
-
+            providers_updated = upsert_provider_reliability(db, all_offers, self._calculate_provider_scores)
             db.commit()
             logger.info(f"Atualizados {providers_updated} provedores")
 
@@ -603,75 +534,7 @@ class MarketMonitorAgent(Agent):
 
         db = SessionLocal()
         try:
-            # 1. Coletar todos os machine_ids vistos neste ciclo
-            current_machine_ids = set()
-            machine_data = {}  # machine_id -> (gpu_name, price, geolocation)
-
-            for offers in all_offers.values():
-                for offer in offers:
-                    mid = str(offer.machine_id) if offer.machine_id else None
-                    if mid:
-                        current_machine_ids.add(mid)
-                        machine_data[mid] = (
-                            offer.gpu_name,
-                            offer.dph_total or offer.min_bid,
-                            offer.geolocation
-                        )
-
-            # 2. Buscar máquinas que estavam disponíveis no último ciclo
-            previously_available = db.query(OfferStability).filter(
-                OfferStability.provider == "vast",
-                OfferStability.is_available == True,
-            ).all()
-            previous_ids = {str(m.machine_id) for m in previously_available}
-
-            # 3. Máquinas que desapareceram (estavam, não estão mais)
-            disappeared = previous_ids - current_machine_ids
-            for mid in disappeared:
-                stability = db.query(OfferStability).filter(
-                    OfferStability.provider == "vast",
-                    OfferStability.machine_id == mid,
-                ).first()
-                if stability:
-                    stability.record_disappeared()
-                    logger.debug(f"Machine {mid} disappeared (score={stability.stability_score:.2f})")
-
-            # 4. Máquinas que apareceram (novas ou reapareceram)
-            appeared = current_machine_ids - previous_ids
-            for mid in appeared:
-                stability = db.query(OfferStability).filter(
-                    OfferStability.provider == "vast",
-                    OfferStability.machine_id == mid,
-                ).first()
-
-                gpu_name, price, geo = machine_data.get(mid, (None, None, None))
-
-                if not stability:
-                    # Nova máquina
-                    stability = OfferStability(
-                        provider="vast",
-                        machine_id=mid,
-                        gpu_name=gpu_name,
-                        geolocation=geo,
-                    )
-                    db.add(stability)
-
-                stability.record_appeared(price=price, gpu_name=gpu_name, geolocation=geo)
-                logger.debug(f"Machine {mid} appeared (score={stability.stability_score:.2f})")
-
-            # 5. Atualizar last_seen para máquinas que continuam disponíveis
-            still_available = current_machine_ids & previous_ids
-            for mid in still_available:
-                stability = db.query(OfferStability).filter(
-                    OfferStability.provider == "vast",
-                    OfferStability.machine_id == mid,
-                ).first()
-                if stability:
-                    stability.last_seen_at = datetime.utcnow()
-                    gpu_name, price, geo = machine_data.get(mid, (None, None, None))
-                    if price:
-                        stability.price_per_hour = price
-
+            counts = upsert_offer_stability(db, all_offers)
             db.commit()
 
             # Log summary
@@ -680,8 +543,8 @@ class MarketMonitorAgent(Agent):
                 OfferStability.is_unstable == True,
             ).count()
 
-            logger.info(f"Stability update: {len(appeared)} appeared, {len(disappeared)} disappeared, "
-                        f"{len(still_available)} stable, {unstable_count} marked unstable")
+            logger.info(f"Stability update: {counts['appeared']} appeared, {counts['disappeared']} disappeared, "
+                        f"{counts['still_available']} stable, {unstable_count} marked unstable")
 
         except Exception as e:
             logger.error(f"Error updating offer stability: {e}", exc_info=True)
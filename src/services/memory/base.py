@@ -83,6 +83,8 @@ class MemoryConfig:
     # Embedding model
     embedding_model: str = "text-embedding-004"  # Vertex AI default
     embedding_dimensions: int = 768
+    embedding_batch_size: int = 100  # Texts per embedding request (text-embedding-004 accepts up to 250)
+    embedding_cache_size: int = 10_000  # Embeddings cached by content hash (0 = off)
 
     # Pinecone specific (future)
     pinecone_api_key: Optional[str] = None
@@ -98,6 +100,10 @@ class MemoryConfig:
     similarity_threshold: float = 0.7  # Minimum similarity for retrieval
     max_memories: int = 10  # Max memories to retrieve per query
 
+    # Local vector index (see vector_index.py)
+    index_dir: Optional[str] = None  # Persist per-store indexes here (None = memory only)
+    ann_threshold: int = 50_000  # Build HNSW (if hnswlib installed) above this many memories
+
     def to_dict(self) -> Dict[str, Any]:
         return {
             "provider": self.provider,
@@ -218,6 +224,13 @@ class MemoryProvider(ABC):
         """Generate embedding vector for text."""
         pass
 
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts.
+        Providers with a batch API should override this.
+        """
+        return [await self.generate_embedding(text) for text in texts]
+
     @abstractmethod
     async def extract_facts(self, conversation: List[Dict[str, str]]) -> List[Memory]:
         """
@@ -0,0 +1,92 @@
+"""
+Embedding cache for memory providers.
+
+Facts and short messages repeat a lot ("User prefers concise answers",
+"ok", "thanks"); caching embeddings by content hash avoids paying for an
+embedding request each time the same text is stored or searched.
+
+Embeddings are kept packed as float32 bytes (4 bytes per dimension instead
+of a list of Python floats, ~32 bytes each), so a full 10k x 768 cache
+stays around 30 MB; get() unpacks them back into a list.
+"""
+
+import hashlib
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+import numpy as np
+
+
+class EmbeddingCache:
+    """
+    LRU cache of embeddings keyed by sha256(model + text).
+
+    Usage:
+        cache = EmbeddingCache("text-embedding-004", max_size=10_000)
+        hits = cache.get_many(texts)          # {text: embedding}
+        cache.put_many(missing, embeddings)
+    """
+
+    def __init__(self, model: str, max_size: int = 10_000):
+        self.model = model
+        self.max_size = max_size
+        self._entries: "OrderedDict[str, bytes]" = OrderedDict()
+        self._bytes = 0
+        self.hits = 0
+        self.misses = 0
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.model}\0{text}".encode()).hexdigest()
+
+    def __len__(self) -> int:
+        return len(self._entries)
+
+    def get(self, text: str) -> Optional[List[float]]:
+        key = self._key(text)
+        packed = self._entries.get(key)
+        if packed is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return np.frombuffer(packed, dtype=np.float32).tolist()
+
+    def get_many(self, texts: Sequence[str]) -> Dict[str, List[float]]:
+        """Cached embeddings for the given texts (misses are left out)"""
+        found = {}
+        for text in texts:
+            if text in found:
+                continue
+            embedding = self.get(text)
+            if embedding is not None:
+                found[text] = embedding
+        return found
+
+    def put(self, text: str, embedding: List[float]):
+        if embedding is None or len(embedding) == 0 or self.max_size <= 0:
+            return
+        key = self._key(text)
+        packed = np.asarray(embedding, dtype=np.float32).tobytes()
+        previous = self._entries.pop(key, None)
+        if previous is not None:
+            self._bytes -= len(previous)
+        self._entries[key] = packed
+        self._bytes += len(packed)
+        while len(self._entries) > self.max_size:
+            _, evicted = self._entries.popitem(last=False)
+            self._bytes -= len(evicted)
+
+    def put_many(self, texts: Sequence[str], embeddings: Sequence[List[float]]):
+        for text, embedding in zip(texts, embeddings):
+            self.put(text, embedding)
+
+    def get_stats(self) -> Dict[str, float]:
+        total = self.hits + self.misses
+        return {
+            "size": len(self._entries),
+            "max_size": self.max_size,
+            "bytes": self._bytes,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": round(self.hits / total, 4) if total else 0.0,
+        }
@@ -10,9 +10,11 @@ Uses:
 This is the default provider since the user has GCP credits.
 """
 
+import asyncio
 import logging
 import json
-from typing import List, Dict, Any, Optional
+import os
+from typing import Any, Callable, Dict, List, Optional
 from datetime import datetime
 import hashlib
 
@@ -23,9 +25,14 @@ from .base import (
     MemoryType,
     register_provider
 )
+from .embedding_cache import EmbeddingCache
+from .vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
+FIRESTORE_BATCH_LIMIT = 500  # Max writes per Firestore batch (store counter update included)
+INDEX_SAVE_DELAY_SECONDS = 5.0  # Debounce for re-saving a persisted index after writes
+
 
 @register_provider("gcp")
 class GCPMemoryProvider(MemoryProvider):
@@ -53,6 +60,12 @@ class GCPMemoryProvider(MemoryProvider):
         self._vertexai = None
         self._embedding_model = None
         self._generative_model = None
+        # Local vector index per store, tagged with the store's index_version
+        self._indexes: Dict[str, VectorIndex] = {}
+        self._index_versions: Dict[str, int] = {}
+        self._index_locks: Dict[str, asyncio.Lock] = {}
+        self._index_saves: Dict[str, asyncio.Task] = {}
+        self._embedding_cache = EmbeddingCache(config.embedding_model, max_size=config.embedding_cache_size)
 
     async def initialize(self) -> bool:
         """Initialize GCP clients."""
@@ -107,6 +120,129 @@ class GCPMemoryProvider(MemoryProvider):
         """Get Firestore collection for memories in a store."""
         return self._get_store_collection(store_id).collection("memories")
 
+    def _index_path(self, store_id: str) -> Optional[str]:
+        if not self.config.index_dir:
+            return None
+        return os.path.join(self.config.index_dir, f"{store_id}.npz")
+
+    def _store_update(self, count_delta: int = 0) -> Dict[str, Any]:
+        """
+        Store document update recording a write.
+
+        index_version lets other processes notice their cached index is
+        stale; the local index is updated incrementally, so its version
+        moves along (see _update_index) instead of forcing a rebuild.
+        """
+        from google.cloud import firestore
+
+        update = {
+            "index_version": firestore.Increment(1),
+            "last_accessed": datetime.utcnow().isoformat(),
+        }
+        if count_delta:
+            update["memory_count"] = firestore.Increment(count_delta)
+        return update
+
+    def _index_lock(self, store_id: str) -> asyncio.Lock:
+        return self._index_locks.setdefault(store_id, asyncio.Lock())
+
+    async def _update_index(self, store_id: str, apply: Optional[Callable[[VectorIndex], None]] = None):
+        """
+        Apply a write to the local index (when loaded) and move its version along.
+
+        Runs under the store's index lock, so a save in progress never sees
+        a half-applied write; persisted indexes are re-saved (debounced).
+        """
+        async with self._index_lock(store_id):
+            if store_id in self._index_versions:
+                self._index_versions[store_id] += 1
+            index = self._indexes.get(store_id)
+            if index is not None and apply is not None:
+                apply(index)
+        if index is not None:
+            self._schedule_index_save(store_id)
+
+    async def _bump_index_version(
+        self,
+        store_id: str,
+        count_delta: int = 0,
+        apply: Optional[Callable[[VectorIndex], None]] = None,
+    ):
+        """Record a write on the store document, then on the local index"""
+        await self._get_store_collection(store_id).update(self._store_update(count_delta))
+        await self._update_index(store_id, apply)
+
+    def _schedule_index_save(self, store_id: str):
+        """Save the index to index_dir once writes settle (at most one pending save per store)"""
+        if self._index_path(store_id) and store_id not in self._index_saves:
+            self._index_saves[store_id] = asyncio.create_task(self._save_index_later(store_id))
+
+    async def _save_index_later(self, store_id: str):
+        await asyncio.sleep(INDEX_SAVE_DELAY_SECONDS)
+        self._index_saves.pop(store_id, None)  # Later writes schedule a new save
+        path = self._index_path(store_id)
+        async with self._index_lock(store_id):
+            index = self._indexes.get(store_id)
+            version = self._index_versions.get(store_id)
+            if index is None or version is None:
+                return
+            try:
+                await asyncio.to_thread(index.save, path, version)
+            except Exception as e:
+                logger.warning(f"Failed to persist vector index {path}: {e}")
+
+    async def _get_index(self, store_id: str) -> VectorIndex:
+        """
+        Get the store's vector index, (re)building it when stale.
+
+        One store document read per search checks index_version; the full
+        memories collection is only streamed on a miss (first use, writes
+        from another process), or loaded from index_dir when persisted.
+        """
+        async with self._index_lock(store_id):
+            store_doc = await self._get_store_collection(store_id).get()
+            version = (store_doc.to_dict() or {}).get("index_version", 0) if store_doc.exists else 0
+
+            index = self._indexes.get(store_id)
+            if index is not None and self._index_versions.get(store_id) == version:
+                return index
+
+            path = self._index_path(store_id)
+            if index is None and path and os.path.exists(path):
+                try:
+                    index, saved_version = await asyncio.to_thread(
+                        VectorIndex.load, path, self.config.ann_threshold
+                    )
+                    if saved_version == version:
+                        self._indexes[store_id] = index
+                        self._index_versions[store_id] = version
+                        return index
+                except Exception as e:
+                    logger.warning(f"Ignoring unreadable vector index {path}: {e}")
+
+            ids, vectors, types = [], [], []
+            async for doc in self._get_memories_collection(store_id).select(
+                ["embedding", "memory_type"]
+            ).stream():
+                data = doc.to_dict()
+                if data.get("embedding"):
+                    ids.append(doc.id)
+                    vectors.append(data["embedding"])
+                    types.append(data.get("memory_type", "conversation"))
+
+            index = VectorIndex(ann_threshold=self.config.ann_threshold)
+            await asyncio.to_thread(index.add, ids, vectors, types)
+            self._indexes[store_id] = index
+            self._index_versions[store_id] = version
+            logger.info(f"Built vector index for {store_id}: {len(index)} memories")
+
+            if path:
+                try:
+                    await asyncio.to_thread(index.save, path, version)
+                except Exception as e:
+                    logger.warning(f"Failed to persist vector index {path}: {e}")
+            return index
+
     async def create_memory_store(self, agent_id: str, user_id: str) -> str:
         """Create a new memory store for an agent-user pair."""
         # Generate deterministic store ID
@@ -120,8 +256,11 @@ class GCPMemoryProvider(MemoryProvider):
             "user_id": user_id,
             "created_at": datetime.utcnow().isoformat(),
             "memory_count": 0,
+            "index_version": 0,
             "last_accessed": datetime.utcnow().isoformat(),
         })
+        self._indexes.pop(store_id, None)
+        self._index_versions.pop(store_id, None)
 
         logger.info(f"Created memory store: {store_id} for agent={agent_id}, user={user_id}")
         return store_id
@@ -137,6 +276,16 @@ class GCPMemoryProvider(MemoryProvider):
             # Delete the store document
             await self._get_store_collection(store_id).delete()
 
+            self._indexes.pop(store_id, None)
+            self._index_versions.pop(store_id, None)
+            pending_save = self._index_saves.pop(store_id, None)
+            if pending_save is not None:
+                pending_save.cancel()
+            path = self._index_path(store_id)
+            for stale in (path, f"{path}.hnsw") if path else ():
+                if os.path.exists(stale):
+                    os.unlink(stale)
+
             logger.info(f"Deleted memory store: {store_id}")
             return True
         except Exception as e:
@@ -145,49 +294,86 @@ class GCPMemoryProvider(MemoryProvider):
 
     async def generate_embedding(self, text: str) -> List[float]:
         """Generate embedding vector using Vertex AI."""
-        try:
-            embeddings = self._embedding_model.get_embeddings([text])
-            return embeddings[0].values
-        except Exception as e:
-            logger.error(f"Failed to generate embedding: {e}")
-            return []
+        embeddings = await self.generate_embeddings([text])
+        return embeddings[0]
+
+    async def generate_embeddings(self, texts: List[str]) -> List[List[float]]:
+        """
+        Generate embeddings for several texts using Vertex AI.
+
+        Cached texts (by content hash) are not re-embedded; the rest are
+        deduplicated and sent in batches of config.embedding_batch_size.
+        A failed batch yields [] for its texts, like generate_embedding.
+        """
+        cached = self._embedding_cache.get_many(texts)
+        missing = list(dict.fromkeys(t for t in texts if t not in cached))
+        batch_size = max(1, self.config.embedding_batch_size)
+
+        for i in range(0, len(missing), batch_size):
+            batch = missing[i:i + batch_size]
+            try:
+                embeddings = await asyncio.to_thread(self._embedding_model.get_embeddings, batch)
+            except Exception as e:
+                logger.error(f"Failed to generate {len(batch)} embeddings: {e}")
+                continue
+            values = [e.values for e in embeddings]
+            self._embedding_cache.put_many(batch, values)
+            cached.update(zip(batch, values))
+
+        return [cached.get(text, []) for text in texts]
 
     async def add_memory(self, store_id: str, memory: Memory) -> str:
         """Add a single memory to the store."""
+        ids = await self.add_memories(store_id, [memory])
+        return ids[0]
+
+    async def add_memories(self, store_id: str, memories: List[Memory]) -> List[str]:
+        """
+        Batch add memories to the store.
+
+        Embeddings are generated in batches, documents are written with
+        Firestore batched writes and the store counter is incremented once
+        per batch (in the same atomic commit).
+        """
+        if not memories:
+            return []
         try:
-            # Generate embedding if not provided
-            if not memory.embedding:
-                memory.embedding = await self.generate_embedding(memory.content)
-
-            # Store in Firestore
-            memory_ref = self._get_memories_collection(store_id).document(memory.id)
-            await memory_ref.set({
-                **memory.to_dict(),
-                "embedding": memory.embedding,
-            })
-
-            # Update store metadata
-            store_ref = self._get_store_collection(store_id)
-            await store_ref.update({
-                "memory_count": firestore.Increment(1),
-                "last_accessed": datetime.utcnow().isoformat(),
-            })
+            # Generate embeddings for memories that don't have one
+            pending = [m for m in memories if not m.embedding]
+            if pending:
+                embeddings = await self.generate_embeddings([m.content for m in pending])
+                for memory, embedding in zip(pending, embeddings):
+                    memory.embedding = embedding
 
-            logger.debug(f"Added memory {memory.id} to store {store_id}")
-            return memory.id
+            memories_ref = self._get_memories_collection(store_id)
+            store_ref = self._get_store_collection(store_id)
+            per_batch = FIRESTORE_BATCH_LIMIT - 1
+
+            for i in range(0, len(memories), per_batch):
+                chunk = memories[i:i + per_batch]
+                batch = self._firestore.batch()
+                for memory in chunk:
+                    batch.set(memories_ref.document(memory.id), {
+                        **memory.to_dict(),
+                        "embedding": memory.embedding,
+                    })
+                batch.update(store_ref, self._store_update(count_delta=len(chunk)))
+                await batch.commit()
+
+                # Update the local index
+                await self._update_index(store_id, lambda index: index.add(
+                    [m.id for m in chunk],
+                    [m.embedding for m in chunk],
+                    [m.memory_type.value for m in chunk],
+                ))
+
+            logger.debug(f"Added {len(memories)} memories to store {store_id}")
+            return [m.id for m in memories]
 
         except Exception as e:
-            logger.error(f"Failed to add memory: {e}")
+            logger.error(f"Failed to add memories: {e}")
             raise
 
-    async def add_memories(self, store_id: str, memories: List[Memory]) -> List[str]:
-        """Batch add memories to the store."""
-        ids = []
-        for memory in memories:
-            memory_id = await self.add_memory(store_id, memory)
-            ids.append(memory_id)
-        return ids
-
     async def search_memories(
         self,
         store_id: str,
@@ -199,7 +385,8 @@ class GCPMemoryProvider(MemoryProvider):
         """
         Search for relevant memories using semantic similarity.
 
-        Uses cosine similarity between query embedding and stored embeddings.
+        Ranks the store's local vector index (see vector_index.py) and
+        fetches only the top matches from Firestore.
         """
         try:
             # Generate query embedding
@@ -207,52 +394,27 @@ class GCPMemoryProvider(MemoryProvider):
             if not query_embedding:
                 return []
 
-            # Get all memories from store (in production, use Vector Search index)
-            memories_ref = self._get_memories_collection(store_id)
-            results = []
-
-            async for doc in memories_ref.stream():
-                data = doc.to_dict()
-
-                # Filter by memory type if specified
-                if memory_types:
-                    mem_type = MemoryType(data.get("memory_type", "conversation"))
-                    if mem_type not in memory_types:
-                        continue
-
-                # Calculate cosine similarity
-                stored_embedding = data.get("embedding", [])
-                if stored_embedding:
-                    similarity = self._cosine_similarity(query_embedding, stored_embedding)
-
-                    # Apply threshold
-                    threshold = min_similarity or self.config.similarity_threshold
-                    if similarity >= threshold:
-                        memory = Memory.from_dict(data)
-                        results.append((similarity, memory))
+            index = await self._get_index(store_id)
+            hits = index.search(
+                query_embedding,
+                limit=limit,
+                types=[t.value for t in memory_types] if memory_types else None,
+                min_similarity=min_similarity or self.config.similarity_threshold,
+            )
+            if not hits:
+                return []
 
-            # Sort by similarity and limit
-            results.sort(key=lambda x: x[0], reverse=True)
-            return [m for _, m in results[:limit]]
+            memories_ref = self._get_memories_collection(store_id)
+            found = {}
+            async for doc in self._firestore.get_all([memories_ref.document(memory_id) for memory_id, _ in hits]):
+                if doc.exists:
+                    found[doc.id] = Memory.from_dict(doc.to_dict())
+            return [found[memory_id] for memory_id, _ in hits if memory_id in found]
 
         except Exception as e:
             logger.error(f"Failed to search memories: {e}")
             return []
 
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity between two vectors."""
-        if len(vec1) != len(vec2):
-            return 0.0
-
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = sum(a * a for a in vec1) ** 0.5
-        norm2 = sum(b * b for b in vec2) ** 0.5
-
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
-
-        return dot_product / (norm1 * norm2)
-
     async def get_memory(self, store_id: str, memory_id: str) -> Optional[Memory]:
         """Get a specific memory by ID."""
         try:
@@ -284,7 +446,16 @@ class GCPMemoryProvider(MemoryProvider):
             if metadata:
                 update_data["metadata"] = metadata
 
-            await self._get_memories_collection(store_id).document(memory_id).update(update_data)
+            memory_ref = self._get_memories_collection(store_id).document(memory_id)
+            await memory_ref.update(update_data)
+
+            memory_type = "conversation"
+            if store_id in self._indexes:
+                doc = await memory_ref.get(["memory_type"])
+                memory_type = (doc.to_dict() or {}).get("memory_type", memory_type)
+            await self._bump_index_version(
+                store_id, apply=lambda index: index.add([memory_id], [embedding], [memory_type])
+            )
             return True
         except Exception as e:
             logger.error(f"Failed to update memory {memory_id}: {e}")
@@ -295,11 +466,10 @@ class GCPMemoryProvider(MemoryProvider):
         try:
             await self._get_memories_collection(store_id).document(memory_id).delete()
 
-            # Update store count
-            store_ref = self._get_store_collection(store_id)
-            await store_ref.update({
-                "memory_count": firestore.Increment(-1),
-            })
+            # Update store count and the local index
+            await self._bump_index_version(
+                store_id, count_delta=-1, apply=lambda index: index.remove([memory_id])
+            )
             return True
         except Exception as e:
             logger.error(f"Failed to delete memory {memory_id}: {e}")
@@ -313,6 +483,8 @@ class GCPMemoryProvider(MemoryProvider):
     ) -> List[Memory]:
         """Get most recent memories for conversation context."""
         try:
+            from google.cloud import firestore
+
             query = self._get_memories_collection(store_id).order_by(
                 "created_at", direction=firestore.Query.DESCENDING
             ).limit(limit)
@@ -121,11 +121,9 @@ class MemoryManager:
         if not self.is_initialized:
             raise RuntimeError("MemoryManager not initialized")
 
-        memory_ids = []
-
-        # Add each message as a conversation memory
-        for msg in messages:
-            memory = Memory(
+        # Add all messages as conversation memories in one batch
+        memories = [
+            Memory(
                 content=msg["content"],
                 memory_type=MemoryType.CONVERSATION,
                 role=msg.get("role", "user"),
@@ -133,15 +131,15 @@ class MemoryManager:
                     "timestamp": datetime.utcnow().isoformat(),
                 }
             )
-            memory_id = await self._provider.add_memory(store_id, memory)
-            memory_ids.append(memory_id)
+            for msg in messages
+        ]
+        memory_ids = await self._provider.add_memories(store_id, memories) if memories else []
 
         # Optionally extract facts
         if extract_facts and len(messages) >= 2:
             facts = await self._provider.extract_facts(messages)
-            for fact in facts:
-                fact_id = await self._provider.add_memory(store_id, fact)
-                memory_ids.append(fact_id)
+            if facts:
+                memory_ids.extend(await self._provider.add_memories(store_id, facts))
 
         return memory_ids
 
@@ -18,6 +18,7 @@ from .base import (
     MemoryType,
     register_provider
 )
+from .vector_index import VectorIndex
 
 logger = logging.getLogger(__name__)
 
@@ -37,6 +38,7 @@ class MockMemoryProvider(MemoryProvider):
         super().__init__(config)
         self._stores: Dict[str, Dict[str, Any]] = {}
         self._memories: Dict[str, Dict[str, Memory]] = {}
+        self._indexes: Dict[str, VectorIndex] = {}
 
     async def initialize(self) -> bool:
         """Initialize mock provider (always succeeds)."""
@@ -60,6 +62,7 @@ class MockMemoryProvider(MemoryProvider):
             "created_at": datetime.utcnow().isoformat(),
         }
         self._memories[store_id] = {}
+        self._indexes[store_id] = VectorIndex(ann_threshold=self.config.ann_threshold)
 
         logger.info(f"Created mock store: {store_id}")
         return store_id
@@ -69,6 +72,7 @@ class MockMemoryProvider(MemoryProvider):
         if store_id in self._stores:
             del self._stores[store_id]
             del self._memories[store_id]
+            del self._indexes[store_id]
             return True
         return False
 
@@ -102,30 +106,28 @@ class MockMemoryProvider(MemoryProvider):
             memory.embedding = await self.generate_embedding(memory.content)
 
         self._memories[store_id][memory.id] = memory
+        self._indexes[store_id].add([memory.id], [memory.embedding], [memory.memory_type.value])
         logger.debug(f"Added memory {memory.id} to store {store_id}")
         return memory.id
 
     async def add_memories(self, store_id: str, memories: List[Memory]) -> List[str]:
-        """Batch add memories."""
-        ids = []
-        for memory in memories:
-            memory_id = await self.add_memory(store_id, memory)
-            ids.append(memory_id)
-        return ids
-
-    def _cosine_similarity(self, vec1: List[float], vec2: List[float]) -> float:
-        """Calculate cosine similarity."""
-        if len(vec1) != len(vec2):
-            return 0.0
-
-        dot_product = sum(a * b for a, b in zip(vec1, vec2))
-        norm1 = sum(a * a for a in vec1) ** 0.5
-        norm2 = sum(b * b for b in vec2) ** 0.5
+        """Batch add memories (one index update for the whole batch)."""
+        if store_id not in self._memories:
+            raise ValueError(f"Store {store_id} not found")
 
-        if norm1 == 0 or norm2 == 0:
-            return 0.0
+        pending = [m for m in memories if not m.embedding]
+        embeddings = await self.generate_embeddings([m.content for m in pending])
+        for memory, embedding in zip(pending, embeddings):
+            memory.embedding = embedding
 
-        return dot_product / (norm1 * norm2)
+        for memory in memories:
+            self._memories[store_id][memory.id] = memory
+        self._indexes[store_id].add(
+            [m.id for m in memories],
+            [m.embedding for m in memories],
+            [m.memory_type.value for m in memories],
+        )
+        return [m.id for m in memories]
 
     async def search_memories(
         self,
@@ -143,21 +145,14 @@ class MockMemoryProvider(MemoryProvider):
         # Use very low threshold for mock (hash-based embeddings don't have real similarity)
         threshold = min_similarity or 0.0  # Accept all for mock testing
 
-        results = []
-        for memory in self._memories[store_id].values():
-            # Filter by type
-            if memory_types and memory.memory_type not in memory_types:
-                continue
-
-            # Calculate similarity
-            if memory.embedding:
-                similarity = self._cosine_similarity(query_embedding, memory.embedding)
-                if similarity >= threshold:
-                    results.append((similarity, memory))
-
-        # Sort by similarity
-        results.sort(key=lambda x: x[0], reverse=True)
-        return [m for _, m in results[:limit]]
+        hits = self._indexes[store_id].search(
+            query_embedding,
+            limit=limit,
+            types=[t.value for t in memory_types] if memory_types else None,
+            min_similarity=threshold,
+        )
+        memories = self._memories[store_id]
+        return [memories[memory_id] for memory_id, _ in hits]
 
     async def get_memory(self, store_id: str, memory_id: str) -> Optional[Memory]:
         """Get a specific memory."""
@@ -180,6 +175,7 @@ class MockMemoryProvider(MemoryProvider):
             memory.updated_at = datetime.utcnow()
             if metadata:
                 memory.metadata = metadata
+            self._indexes[store_id].add([memory_id], [memory.embedding], [memory.memory_type.value])
             return True
         return False
 
@@ -187,6 +183,7 @@ class MockMemoryProvider(MemoryProvider):
         """Delete a memory."""
         if store_id in self._memories and memory_id in self._memories[store_id]:
             del self._memories[store_id][memory_id]
+            self._indexes[store_id].remove([memory_id])
             return True
         return False
 
@@ -0,0 +1,356 @@
+"""
+Local vector index for memory providers.
+
+Keeps a store's embeddings in a float32 NumPy matrix with unit-norm rows,
+so cosine similarity against every memory is one matrix-vector product
+and top-k is an argpartition. Large stores can add an HNSW graph
+(hnswlib, optional) for sub-linear search; its candidates are re-ranked
+exactly against the matrix.
+
+Supports incremental add/update/delete and persistence to disk.
+"""
+
+import json
+import logging
+import os
+import tempfile
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+try:
+    import hnswlib
+    HAS_HNSWLIB = True
+except ImportError:
+    HAS_HNSWLIB = False
+
+logger = logging.getLogger(__name__)
+
+
+DEFAULT_ANN_THRESHOLD = 50_000  # Build HNSW above this many vectors
+ANN_OVERSAMPLE = 4              # Candidates fetched per requested result (filters/threshold)
+_INITIAL_CAPACITY = 1024
+
+
+class VectorIndex:
+    """
+    Cosine-similarity index over memory embeddings.
+
+    Usage:
+        index = VectorIndex(dimensions=768)
+        index.add(["m1", "m2"], [vec1, vec2], ["fact", "conversation"])
+        hits = index.search(query_vec, limit=5, types={"fact"}, min_similarity=0.7)
+        # [("m1", 0.91), ...]
+
+    Rows stay dense: deleting swaps the last row into the hole. Each row
+    carries a label (memory type) so type filters run as a vector mask.
+    """
+
+    def __init__(
+        self,
+        dimensions: Optional[int] = None,
+        ann_threshold: int = DEFAULT_ANN_THRESHOLD,
+        use_ann: Optional[bool] = None,
+    ):
+        """
+        Initialize vector index.
+
+        Args:
+            dimensions: Embedding size (default: taken from the first vector)
+            ann_threshold: Vector count at which the HNSW index is built
+            use_ann: Force HNSW on/off (default: on when hnswlib is installed)
+        """
+        self.dimensions = dimensions
+        self.ann_threshold = ann_threshold
+        self.use_ann = HAS_HNSWLIB if use_ann is None else (use_ann and HAS_HNSWLIB)
+
+        self._matrix = np.zeros((0, dimensions or 0), dtype=np.float32)
+        self._types = np.zeros(0, dtype=np.int16)
+        self._count = 0
+        self._ids: List[str] = []
+        self._rows: Dict[str, int] = {}
+        self._type_codes: Dict[str, int] = {}
+
+        # HNSW labels are stable ints (rows move on delete)
+        self._ann = None
+        self._labels: Dict[str, int] = {}
+        self._label_ids: Dict[int, str] = {}
+        self._next_label = 0
+
+    def __len__(self) -> int:
+        return self._count
+
+    def __contains__(self, memory_id: str) -> bool:
+        return memory_id in self._rows
+
+    @property
+    def has_ann(self) -> bool:
+        return self._ann is not None
+
+    def _type_code(self, label: str) -> int:
+        code = self._type_codes.get(label)
+        if code is None:
+            code = len(self._type_codes)
+            self._type_codes[label] = code
+        return code
+
+    def _reserve(self, extra: int):
+        """Grow the matrix geometrically so appends are amortized O(1)"""
+        needed = self._count + extra
+        capacity = self._matrix.shape[0]
+        if needed <= capacity:
+            return
+        new_capacity = max(needed, capacity * 2, _INITIAL_CAPACITY)
+        matrix = np.zeros((new_capacity, self.dimensions), dtype=np.float32)
+        matrix[:self._count] = self._matrix[:self._count]
+        types = np.zeros(new_capacity, dtype=np.int16)
+        types[:self._count] = self._types[:self._count]
+        self._matrix, self._types = matrix, types
+
+    @staticmethod
+    def _normalize(vectors: np.ndarray) -> np.ndarray:
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+    def add(self, ids: Sequence[str], vectors: Sequence[Sequence[float]], types: Sequence[str]):
+        """
+        Add or replace vectors.
+
+        Args:
+            ids: Memory IDs (repeated IDs keep their last vector)
+            vectors: Embeddings (rows with the wrong size are skipped)
+            types: Label per vector (memory type) used by search filters
+        """
+        if not ids:
+            return
+        if self.dimensions is None:
+            first = next((v for v in vectors if v is not None and len(v)), None)
+            if first is None:
+                return
+            self.dimensions = len(first)
+            self._matrix = np.zeros((0, self.dimensions), dtype=np.float32)
+
+        keep = [i for i, v in enumerate(vectors) if v is not None and len(v) == self.dimensions]
+        if len(keep) < len(ids):
+            logger.warning(f"Skipping {len(ids) - len(keep)} embeddings with wrong dimensions")
+        if not keep:
+            return
+        if len({ids[i] for i in keep}) < len(keep):
+            # Same ID twice in one batch: the last vector wins
+            keep = sorted({ids[i]: i for i in keep}.values())
+
+        batch = self._normalize(np.asarray([vectors[i] for i in keep], dtype=np.float32))
+        self.remove(ids[i] for i in keep if ids[i] in self._rows)
+
+        self._reserve(len(keep))
+        start = self._count
+        self._matrix[start:start + len(keep)] = batch
+        for offset, i in enumerate(keep):
+            row = start + offset
+            self._types[row] = self._type_code(types[i])
+            self._ids.append(ids[i])
+            self._rows[ids[i]] = row
+        self._count += len(keep)
+
+        if self._ann is not None:
+            self._ann_add([ids[i] for i in keep], batch)
+        elif self.use_ann and self._count >= self.ann_threshold:
+            self._build_ann()
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Remove vectors by ID (unknown IDs are ignored). Returns count removed."""
+        removed = 0
+        for memory_id in ids:
+            row = self._rows.pop(memory_id, None)
+            if row is None:
+                continue
+            last = self._count - 1
+            if row != last:
+                moved_id = self._ids[last]
+                self._matrix[row] = self._matrix[last]
+                self._types[row] = self._types[last]
+                self._ids[row] = moved_id
+                self._rows[moved_id] = row
+            self._ids.pop()
+            self._count -= 1
+            removed += 1
+
+            label = self._labels.pop(memory_id, None)
+            if label is not None:
+                self._label_ids.pop(label, None)
+                self._ann.mark_deleted(label)
+        return removed
+
+    def _build_ann(self):
+        """Build the HNSW graph over every current vector"""
+        self._ann = hnswlib.Index(space='ip', dim=self.dimensions)
+        self._ann.init_index(max_elements=max(self._count * 2, _INITIAL_CAPACITY), ef_construction=200, M=16)
+        self._labels, self._label_ids, self._next_label = {}, {}, 0
+        self._ann_add(self._ids[:self._count], self._matrix[:self._count])
+        logger.info(f"Built HNSW index over {self._count} vectors")
+
+    def _ann_add(self, ids: List[str], vectors: np.ndarray):
+        needed = self._next_label + len(ids)
+        if needed > self._ann.get_max_elements():
+            self._ann.resize_index(needed * 2)
+        labels = np.arange(self._next_label, needed)
+        self._ann.add_items(vectors, labels)
+        for memory_id, label in zip(ids, labels.tolist()):
+            self._labels[memory_id] = label
+            self._label_ids[label] = memory_id
+        self._next_label = needed
+
+    def search(
+        self,
+        query: Sequence[float],
+        limit: int = 10,
+        types: Optional[Iterable[str]] = None,
+        min_similarity: float = -1.0,
+    ) -> List[Tuple[str, float]]:
+        """
+        Find the most similar vectors.
+
+        Args:
+            query: Query embedding
+            limit: Max results
+            types: Only return vectors with one of these labels
+            min_similarity: Cosine similarity threshold
+
+        Returns:
+            List of (memory_id, similarity), most similar first
+        """
+        if self._count == 0 or limit <= 0 or query is None or len(query) != self.dimensions:
+            return []
+        q = np.asarray(query, dtype=np.float32)
+        norm = np.linalg.norm(q)
+        if norm == 0:
+            return []
+        q = q / norm
+
+        type_mask_codes = None
+        if types is not None:
+            codes = [self._type_codes[t] for t in types if t in self._type_codes]
+            if not codes:
+                return []
+            type_mask_codes = np.asarray(codes, dtype=np.int16)
+
+        if self._ann is not None:
+            hits = self._search_ann(q, limit, type_mask_codes, min_similarity)
+            if hits is not None:
+                return hits
+
+        if type_mask_codes is None:
+            return self._rank(q, None, limit, min_similarity)
+        rows = np.flatnonzero(np.isin(self._types[:self._count], type_mask_codes))
+        return self._rank(q, rows, limit, min_similarity)
+
+    def _rank(self, q: np.ndarray, rows: Optional[np.ndarray], limit: int, min_similarity: float) -> List[Tuple[str, float]]:
+        """Exact top-k of the given rows (None = every row, no gather copy)"""
+        if rows is None:
+            rows = np.arange(self._count)
+            scores = self._matrix[:self._count] @ q
+        elif rows.size == 0:
+            return []
+        else:
+            scores = self._matrix[rows] @ q
+        keep = scores >= min_similarity
+        rows, scores = rows[keep], scores[keep]
+        if rows.size > limit:
+            top = np.argpartition(-scores, limit - 1)[:limit]
+            rows, scores = rows[top], scores[top]
+        order = np.argsort(-scores, kind='stable')
+        return [(self._ids[r], float(s)) for r, s in zip(rows[order].tolist(), scores[order].tolist())]
+
+    def _search_ann(self, q, limit, type_mask_codes, min_similarity) -> Optional[List[Tuple[str, float]]]:
+        """HNSW candidates re-ranked exactly; None if too few survive the filters"""
+        k = min(self._count, limit * ANN_OVERSAMPLE)
+        self._ann.set_ef(max(k, 64))
+        labels, _ = self._ann.knn_query(q, k=k)
+        rows = np.asarray(
+            [self._rows[self._label_ids[label]] for label in labels[0].tolist() if label in self._label_ids],
+            dtype=np.int64,
+        )
+        if type_mask_codes is not None:
+            rows = rows[np.isin(self._types[rows], type_mask_codes)]
+        hits = self._rank(q, rows, limit, min_similarity)
+        # Filters removed too many candidates: fall back to the exact scan
+        if len(hits) < limit and k < self._count and (type_mask_codes is not None or min_similarity > -1.0):
+            return None
+        return hits
+
+    # ------------------------------------------------------------------
+    # Persistence
+    # ------------------------------------------------------------------
+
+    def save(self, path: str, token: Optional[str] = None):
+        """
+        Write the index atomically to `path` (.npz), plus `path`.hnsw if built.
+
+        Args:
+            path: Output file
+            token: Opaque version tag stored alongside (e.g. store revision)
+        """
+        directory = os.path.dirname(path) or '.'
+        os.makedirs(directory, exist_ok=True)
+        meta = {
+            'dimensions': self.dimensions,
+            'type_codes': self._type_codes,
+            'token': token,
+            'labels': [self._labels.get(i, -1) for i in self._ids[:self._count]] if self._ann is not None else None,
+            'next_label': self._next_label,
+        }
+        fd, tmp = tempfile.mkstemp(dir=directory, suffix='.npz.tmp')
+        try:
+            with os.fdopen(fd, 'wb') as f:
+                np.savez(
+                    f,
+                    matrix=self._matrix[:self._count],
+                    types=self._types[:self._count],
+                    ids=np.asarray(self._ids[:self._count], dtype=str),
+                    meta=np.asarray(json.dumps(meta)),
+                )
+            os.replace(tmp, path)
+        except BaseException:
+            if os.path.exists(tmp):
+                os.unlink(tmp)
+            raise
+
+        if self._ann is not None:
+            tmp = f"{path}.hnsw.tmp"
+            self._ann.save_index(tmp)
+            os.replace(tmp, f"{path}.hnsw")
+
+    @classmethod
+    def load(cls, path: str, ann_threshold: int = DEFAULT_ANN_THRESHOLD) -> Tuple['VectorIndex', Optional[str]]:
+        """
+        Load an index written by save().
+
+        Pickled arrays are refused (index files may come from shared storage);
+        files saved with object-dtype IDs raise and are rebuilt by the caller.
+
+        Returns:
+            Tuple of (index, token)
+        """
+        with np.load(path, allow_pickle=False) as data:
+            meta = json.loads(str(data['meta']))
+            index = cls(dimensions=meta['dimensions'], ann_threshold=ann_threshold)
+            index._matrix = np.array(data['matrix'], dtype=np.float32)
+            index._types = np.array(data['types'], dtype=np.int16)
+            index._ids = [str(i) for i in data['ids'].tolist()]
+        index._count = len(index._ids)
+        index._rows = {memory_id: row for row, memory_id in enumerate(index._ids)}
+        index._type_codes = dict(meta['type_codes'])
+        if index._matrix.shape[1:] != (index.dimensions or 0,):
+            index._matrix = index._matrix.reshape(index._count, index.dimensions or 0)
+
+        ann_path = f"{path}.hnsw"
+        if index.use_ann and meta.get('labels') is not None and os.path.exists(ann_path):
+            index._ann = hnswlib.Index(space='ip', dim=index.dimensions)
+            index._ann.load_index(ann_path, max_elements=max(meta['next_label'] * 2, _INITIAL_CAPACITY))
+            index._labels = {i: label for i, label in zip(index._ids, meta['labels']) if label >= 0}
+            index._label_ids = {label: i for i, label in index._labels.items()}
+            index._next_label = meta['next_label']
+        elif index.use_ann and index._count >= index.ann_threshold:
+            index._build_ann()
+        return index, meta.get('token')
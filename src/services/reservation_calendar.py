@@ -0,0 +1,329 @@
+"""
+Reservation Calendar - In-memory GPU capacity calendar
+
+Mantem, por tipo de GPU, uma funcao degrau (sweep line) com a ocupacao
+das reservas PENDING/ACTIVE, carregada do banco e atualizada pelo
+ReservationService ao criar, cancelar, falhar ou completar reservas.
+
+Consultas de disponibilidade viram bisect + varredura dos degraus da
+janela, sem COUNT no banco a cada checagem. O calendario pode estar ate
+CALENDAR_TTL_SECONDS atrasado em relacao a outros workers, entao a criacao
+de reservas confirma a capacidade no banco (load_window) antes do commit.
+"""
+import logging
+import os
+import threading
+import time
+from bisect import bisect_left, bisect_right
+from datetime import datetime, timezone
+from typing import Dict, List, Optional, Tuple
+
+from sqlalchemy.orm import Session
+
+from src.models.reservation import Reservation, ReservationStatus
+
+logger = logging.getLogger(__name__)
+
+
+# Statuses that hold capacity
+BLOCKING_STATUSES = (ReservationStatus.PENDING, ReservationStatus.ACTIVE)
+
+# Re-warm from the DB after this many seconds (other API workers also book)
+CALENDAR_TTL_SECONDS = float(os.environ.get("RESERVATION_CALENDAR_TTL", "30"))
+
+
+def _parse_capacity(raw: str) -> Dict[str, int]:
+    """Parse "A100:4,H100:2" into {"A100": 4, "H100": 2}."""
+    capacity = {}
+    for item in raw.split(","):
+        if ":" not in item:
+            continue
+        gpu_type, count = item.rsplit(":", 1)
+        try:
+            capacity[gpu_type.strip()] = int(count)
+        except ValueError:
+            logger.warning(f"Ignoring invalid RESERVATION_CAPACITY entry: {item!r}")
+    return capacity
+
+
+# GPUs reservable per type. Types not listed are exclusive: one reservation
+# at a time, whatever its gpu_count (the original behavior).
+GPU_CAPACITY = _parse_capacity(os.environ.get("RESERVATION_CAPACITY", ""))
+
+
+def to_naive_utc(value: datetime) -> datetime:
+    """Normalize to naive UTC (how reservation times are stored and queried)."""
+    if value.tzinfo is not None:
+        return value.astimezone(timezone.utc).replace(tzinfo=None)
+    return value
+
+
+class GpuTimeline:
+    """
+    Step function of GPUs in use over time for one GPU type.
+
+    ``_times[i]`` starts a step whose usage is ``_levels[i]``; the step ends at
+    ``_times[i + 1]`` (the last level is always 0). Adding or removing a
+    reservation only touches the steps it covers.
+    """
+
+    def __init__(self, capacity: Optional[int] = None):
+        """
+        Args:
+            capacity: GPUs available for this type. None means exclusive:
+                      each reservation takes the whole type.
+        """
+        self.capacity = capacity
+        self._times: List[datetime] = []
+        self._levels: List[int] = []
+        # reservation_id -> (start, end, units)
+        self._reservations: Dict[int, Tuple[datetime, datetime, int]] = {}
+
+    @property
+    def total(self) -> int:
+        return self.capacity if self.capacity is not None else 1
+
+    def units(self, gpu_count: int) -> int:
+        """Capacity units taken by a reservation of gpu_count GPUs."""
+        return gpu_count if self.capacity is not None else 1
+
+    def __len__(self) -> int:
+        return len(self._reservations)
+
+    def __contains__(self, reservation_id: int) -> bool:
+        return reservation_id in self._reservations
+
+    def _breakpoint(self, at: datetime) -> int:
+        """Index of the step starting exactly at ``at``, splitting one if needed."""
+        i = bisect_left(self._times, at)
+        if i < len(self._times) and self._times[i] == at:
+            return i
+        level = self._levels[i - 1] if i > 0 else 0
+        self._times.insert(i, at)
+        self._levels.insert(i, level)
+        return i
+
+    def _merge(self, i: int) -> None:
+        """Drop breakpoint i if it no longer changes the level."""
+        if 0 <= i < len(self._times):
+            previous = self._levels[i - 1] if i > 0 else 0
+            if self._levels[i] == previous:
+                del self._times[i]
+                del self._levels[i]
+
+    def add(self, reservation_id: int, start: datetime, end: datetime, gpu_count: int) -> None:
+        """Add (or replace) a reservation."""
+        if reservation_id in self._reservations:
+            self.remove(reservation_id)
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        if end <= start:
+            return
+
+        units = self.units(gpu_count)
+        self._reservations[reservation_id] = (start, end, units)
+        i = self._breakpoint(start)
+        j = self._breakpoint(end)
+        for k in range(i, j):
+            self._levels[k] += units
+
+    def remove(self, reservation_id: int) -> bool:
+        """Remove a reservation. Returns False if it was not in the calendar."""
+        entry = self._reservations.pop(reservation_id, None)
+        if entry is None:
+            return False
+
+        start, end, units = entry
+        # Split again: merges after other changes may have dropped these bounds
+        i = self._breakpoint(start)
+        j = self._breakpoint(end)
+        for k in range(i, j):
+            self._levels[k] -= units
+        self._merge(j)
+        self._merge(i)
+        return True
+
+    def max_used(
+        self,
+        start: datetime,
+        end: datetime,
+        exclude_reservation_id: Optional[int] = None,
+    ) -> int:
+        """Peak capacity units in use anywhere in [start, end)."""
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        excluded = self._reservations.get(exclude_reservation_id) if exclude_reservation_id else None
+
+        i = max(bisect_right(self._times, start) - 1, 0)
+        j = bisect_left(self._times, end)
+        if not excluded:
+            return max(self._levels[i:j], default=0)
+
+        # _merge() may have dropped breakpoints at the excluded bounds: cut the
+        # window at both the steps and those bounds, so each segment has one
+        # level and is either fully inside or fully outside the exclusion
+        points = {max(t, start) for t in self._times[i:j]}
+        points.update(t for t in excluded[:2] if start <= t < end)
+        peak = 0
+        for point in points:
+            k = bisect_right(self._times, point) - 1
+            level = self._levels[k] if k >= 0 else 0
+            if excluded[0] <= point < excluded[1]:
+                level -= excluded[2]
+            peak = max(peak, level)
+        return peak
+
+    def available(
+        self,
+        start: datetime,
+        end: datetime,
+        gpu_count: int = 1,
+        exclude_reservation_id: Optional[int] = None,
+    ) -> bool:
+        """Whether gpu_count GPUs fit in [start, end)."""
+        return self.max_used(start, end, exclude_reservation_id) + self.units(gpu_count) <= self.total
+
+    def overlapping(self, start: datetime, end: datetime) -> List[Tuple[int, datetime, datetime]]:
+        """Reservations overlapping [start, end), ordered by start."""
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        return sorted(
+            (rid, s, e) for rid, (s, e, _) in self._reservations.items()
+            if e > start and s < end
+        )
+
+    def free_slots(
+        self,
+        start: datetime,
+        end: datetime,
+        gpu_count: int = 1,
+    ) -> List[Tuple[datetime, datetime, int]]:
+        """
+        Maximal sub-ranges of [start, end) where gpu_count GPUs fit.
+
+        Returns:
+            List of (slot_start, slot_end, min_free_units) tuples
+        """
+        start, end = to_naive_utc(start), to_naive_utc(end)
+        needed = self.units(gpu_count)
+        slots: List[Tuple[datetime, datetime, int]] = []
+
+        i = bisect_right(self._times, start) - 1
+        cursor = start
+        current: Optional[List] = None
+        while cursor < end:
+            level = self._levels[i] if i >= 0 else 0
+            step_end = self._times[i + 1] if i + 1 < len(self._times) else end
+            step_end = min(step_end, end)
+            free = self.total - level
+
+            if free >= needed:
+                if current is None:
+                    current = [cursor, step_end, free]
+                else:
+                    current[1] = step_end
+                    current[2] = min(current[2], free)
+            elif current is not None:
+                slots.append(tuple(current))
+                current = None
+
+            cursor = step_end
+            i += 1
+
+        if current is not None:
+            slots.append(tuple(current))
+        return slots
+
+
+class CapacityCalendar:
+    """
+    GPU timelines by type, shared by all ReservationService instances.
+
+    Each type is warmed from the DB on first use and re-warmed after
+    CALENDAR_TTL_SECONDS; in between, the service keeps it current.
+    """
+
+    def __init__(self, ttl_seconds: float = CALENDAR_TTL_SECONDS, capacity: Optional[Dict[str, int]] = None):
+        self.ttl_seconds = ttl_seconds
+        self.capacity = GPU_CAPACITY if capacity is None else capacity
+        self._timelines: Dict[str, GpuTimeline] = {}
+        self._warmed_at: Dict[str, float] = {}
+        self._lock = threading.RLock()
+
+    def timeline(self, db: Session, gpu_type: str) -> GpuTimeline:
+        """Timeline for gpu_type, warmed from the DB if missing or stale."""
+        with self._lock:
+            warmed_at = self._warmed_at.get(gpu_type)
+            if warmed_at is None or time.monotonic() - warmed_at > self.ttl_seconds:
+                self._warm(db, gpu_type)
+            return self._timelines[gpu_type]
+
+    def load_window(self, db: Session, gpu_type: str, start: datetime, end: datetime) -> GpuTimeline:
+        """
+        Timeline of the reservations overlapping [start, end), read from the DB.
+
+        Authoritative (not cached): used on the booking path, inside the
+        booking transaction, where a stale calendar could double-book.
+        """
+        return self._load(db, gpu_type, start, end)
+
+    def _load(
+        self,
+        db: Session,
+        gpu_type: str,
+        start: Optional[datetime] = None,
+        end: Optional[datetime] = None,
+    ) -> GpuTimeline:
+        query = db.query(
+            Reservation.id, Reservation.start_time, Reservation.end_time, Reservation.gpu_count
+        ).filter(
+            Reservation.gpu_type == gpu_type,
+            Reservation.status.in_(BLOCKING_STATUSES),
+            Reservation.end_time > (start or datetime.utcnow()),
+        )
+        if end is not None:
+            query = query.filter(Reservation.start_time < end)
+
+        timeline = GpuTimeline(self.capacity.get(gpu_type))
+        for reservation_id, res_start, res_end, gpu_count in query.all():
+            timeline.add(reservation_id, res_start, res_end, gpu_count or 1)
+        return timeline
+
+    def _warm(self, db: Session, gpu_type: str) -> None:
+        timeline = self._load(db, gpu_type)
+        self._timelines[gpu_type] = timeline
+        self._warmed_at[gpu_type] = time.monotonic()
+        logger.debug(f"Capacity calendar warmed for {gpu_type}: {len(timeline)} reservations")
+
+    def add(self, reservation: Reservation) -> None:
+        """Record a reservation that now holds capacity."""
+        with self._lock:
+            timeline = self._timelines.get(reservation.gpu_type)
+            if timeline is not None:
+                timeline.add(reservation.id, reservation.start_time, reservation.end_time, reservation.gpu_count or 1)
+
+    def remove(self, reservation: Reservation) -> None:
+        """Release the capacity of a cancelled, failed or completed reservation."""
+        with self._lock:
+            timeline = self._timelines.get(reservation.gpu_type)
+            if timeline is not None:
+                timeline.remove(reservation.id)
+
+    def invalidate(self, gpu_type: Optional[str] = None) -> None:
+        """Force a re-warm of one type (or all) on next use."""
+        with self._lock:
+            if gpu_type is None:
+                self._timelines.clear()
+                self._warmed_at.clear()
+            else:
+                self._timelines.pop(gpu_type, None)
+                self._warmed_at.pop(gpu_type, None)
+
+
+# Global calendar instance
+_capacity_calendar: Optional[CapacityCalendar] = None
+
+
+def get_capacity_calendar() -> CapacityCalendar:
+    """Get the global capacity calendar."""
+    global _capacity_calendar
+    if _capacity_calendar is None:
+        _capacity_calendar = CapacityCalendar()
+    return _capacity_calendar
@@ -17,6 +17,7 @@ from src.models.reservation_credit import (
     ReservationCredit, CreditStatus, CreditTransactionType, CREDIT_EXPIRY_DAYS
 )
 from src.models.usage import GPUPricingReference
+from src.services.reservation_calendar import CapacityCalendar, get_capacity_calendar
 from src.core.exceptions import (
     ValidationException,
     NotFoundException,
@@ -63,14 +64,16 @@ class ReservationService:
     credit management, and reservation lifecycle.
     """
 
-    def __init__(self, db: Session):
+    def __init__(self, db: Session, calendar: Optional[CapacityCalendar] = None):
         """
         Initialize reservation service.
 
         Args:
             db: SQLAlchemy database session
+            calendar: Capacity calendar (defaults to the shared one)
         """
         self.db = db
+        self.calendar = calendar or get_capacity_calendar()
 
     def check_availability(
         self,
@@ -83,8 +86,9 @@ class ReservationService:
         """
         Check if GPU capacity is available for the requested time slot.
 
-        Uses SQL query to detect overlapping reservations:
-        WHERE gpu_type = X AND NOT (end_time <= new_start OR start_time >= new_end)
+        Uses the in-memory capacity calendar: the peak usage of pending and
+        active reservations in the window plus gpu_count must fit the GPU
+        type's capacity.
 
         Args:
             gpu_type: GPU model (e.g., "A100", "H100")
@@ -96,33 +100,11 @@ class ReservationService:
         Returns:
             True if capacity is available, False otherwise
         """
-        logger.info(f"Checking availability for {gpu_type} from {start_time} to {end_time}")
-
-        # Build query for overlapping reservations
-        # Overlap condition: NOT (end_time <= start OR start_time >= end)
-        # Equivalent to: end_time > start AND start_time < end
-        query = self.db.query(func.count(Reservation.id)).filter(
-            Reservation.gpu_type == gpu_type,
-            Reservation.status.in_([
-                ReservationStatus.PENDING,
-                ReservationStatus.ACTIVE
-            ]),
-            Reservation.end_time > start_time,
-            Reservation.start_time < end_time
-        )
-
-        if exclude_reservation_id:
-            query = query.filter(Reservation.id != exclude_reservation_id)
-
-        conflicting_count = query.scalar() or 0
-
-        # For now, assume 1 GPU per type available
-        # This can be extended with capacity management
-        available = conflicting_count == 0
+        timeline = self.calendar.timeline(self.db, gpu_type)
+        available = timeline.available(start_time, end_time, gpu_count, exclude_reservation_id)
 
-        logger.info(
-            f"Availability check result: {available} "
-            f"(found {conflicting_count} conflicting reservations)"
+        logger.debug(
+            f"Availability check for {gpu_type} from {start_time} to {end_time}: {available}"
         )
 
         return available
@@ -131,7 +113,8 @@ class ReservationService:
         self,
         gpu_type: str,
         start_time: datetime,
-        end_time: datetime
+        end_time: datetime,
+        gpu_count: int = 1
     ) -> Dict[str, Any]:
         """
         Get detailed availability information for a time slot.
@@ -140,39 +123,68 @@ class ReservationService:
             gpu_type: GPU model
             start_time: Reservation start time (UTC)
             end_time: Reservation end time (UTC)
+            gpu_count: Number of GPUs requested
 
         Returns:
             Dictionary with availability details
         """
-        # Get conflicting reservations
-        conflicting = self.db.query(Reservation).filter(
-            Reservation.gpu_type == gpu_type,
-            Reservation.status.in_([
-                ReservationStatus.PENDING,
-                ReservationStatus.ACTIVE
-            ]),
-            Reservation.end_time > start_time,
-            Reservation.start_time < end_time
-        ).all()
-
-        available = len(conflicting) == 0
+        timeline = self.calendar.timeline(self.db, gpu_type)
+        free_capacity = max(timeline.total - timeline.max_used(start_time, end_time), 0)
+        available = timeline.units(gpu_count) <= free_capacity
+        conflicting = timeline.overlapping(start_time, end_time)
 
         return {
             "available": available,
             "gpu_type": gpu_type,
             "start_time": start_time.isoformat(),
             "end_time": end_time.isoformat(),
+            "capacity": timeline.total,
+            "free_capacity": free_capacity,
             "conflicting_reservations": len(conflicting),
             "conflicts": [
                 {
-                    "id": r.id,
-                    "start_time": r.start_time.isoformat() if r.start_time else None,
-                    "end_time": r.end_time.isoformat() if r.end_time else None,
+                    "id": reservation_id,
+                    "start_time": start.isoformat(),
+                    "end_time": end.isoformat(),
                 }
-                for r in conflicting
+                for reservation_id, start, end in conflicting
             ] if not available else []
         }
 
+    def get_free_slots(
+        self,
+        gpu_type: str,
+        start_time: datetime,
+        end_time: datetime,
+        gpu_count: int = 1,
+        min_duration_hours: float = 0
+    ) -> List[Dict[str, Any]]:
+        """
+        List time ranges where gpu_count GPUs are free (calendar view).
+
+        Args:
+            gpu_type: GPU model
+            start_time: Range start (UTC)
+            end_time: Range end (UTC)
+            gpu_count: Number of GPUs needed
+            min_duration_hours: Skip slots shorter than this
+
+        Returns:
+            List of slots with start_time, end_time and free_capacity
+        """
+        timeline = self.calendar.timeline(self.db, gpu_type)
+        min_seconds = min_duration_hours * 3600
+
+        return [
+            {
+                "start_time": slot_start.isoformat(),
+                "end_time": slot_end.isoformat(),
+                "free_capacity": free,
+            }
+            for slot_start, slot_end, free in timeline.free_slots(start_time, end_time, gpu_count)
+            if (slot_end - slot_start).total_seconds() >= min_seconds
+        ]
+
     def validate_reservation(
         self,
         user_id: str,
@@ -556,6 +568,9 @@ class ReservationService:
         Returns:
             Created reservation
 
+        Availability is pre-checked on the (possibly stale) calendar, then
+        confirmed with a DB query in the booking transaction before commit.
+
         Raises:
             ValidationException: If validation fails
             ReservationConflictException: If time slot not available
@@ -597,6 +612,14 @@ class ReservationService:
         self.db.add(reservation)
         self.db.flush()  # Get reservation ID before deducting credits
 
+        # The calendar may miss bookings made by other workers in the last
+        # TTL seconds: confirm against the DB inside this transaction
+        window = self.calendar.load_window(self.db, gpu_type, start_time, end_time)
+        if not window.available(start_time, end_time, gpu_count, exclude_reservation_id=reservation.id):
+            self.db.rollback()
+            self.calendar.invalidate(gpu_type)
+            raise ReservationConflictException(gpu_type, start_time, end_time)
+
         # Deduct credits
         self.deduct_credits(
             user_id=user_id,
@@ -605,6 +628,7 @@ class ReservationService:
         )
 
         self.db.commit()
+        self.calendar.add(reservation)
 
         logger.info(f"Created reservation {reservation.id} for user {user_id}")
 
@@ -714,6 +738,7 @@ class ReservationService:
             credit.updated_at = datetime.utcnow()
 
         self.db.commit()
+        self.calendar.remove(reservation)
 
         logger.info(f"Cancelled reservation {reservation_id}")
 
@@ -787,6 +812,7 @@ class ReservationService:
         reservation.completed_at = datetime.utcnow()
 
         self.db.commit()
+        self.calendar.remove(reservation)
 
         logger.info(f"Completed reservation {reservation_id}")
 
@@ -826,6 +852,7 @@ class ReservationService:
             credit.updated_at = datetime.utcnow()
 
         self.db.commit()
+        self.calendar.remove(reservation)
 
         logger.info(f"Failed reservation {reservation_id}: {reason}")
 
@@ -9,18 +9,22 @@ compliance e troubleshooting:
 - deletion_reason: Motivo da delecao (expired, manual, etc)
 - storage_freed_bytes: Espaco liberado em bytes
 
-Logs persistem independentemente dos snapshots deletados.
+Logs persistem independentemente dos snapshots deletados, em segmentos
+JSONL append-only com agregados por hora para as consultas de contagem.
 """
 
 import enum
 import json
 import logging
 import os
+import threading
+import time
 import uuid
+from collections import deque
 from dataclasses import dataclass, field, asdict
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from pathlib import Path
-from typing import Optional, Dict, Any, List
+from typing import Optional, Dict, Any, Deque, List, Tuple
 
 logger = logging.getLogger(__name__)
 
@@ -125,28 +129,72 @@ class SnapshotAuditLogger:
     Logger de auditoria para operacoes de snapshot.
 
     Registra todas as operacoes de delecao e alteracoes de configuracao
-    em um arquivo JSON persistente para auditoria e troubleshooting.
+    em um log append-only (JSONL) para auditoria e troubleshooting.
+
+    Armazenamento (a partir de audit_file_path, ex: audit.json):
+    - audit.000001.jsonl, audit.000002.jsonl...: segmentos append-only, uma
+      entrada por linha; rotacionados ao passar de segment_max_bytes e
+      mantidos no maximo max_segments
+    - audit.index.json: agregados por hora (delecoes, bytes liberados) ate
+      o ultimo segmento fechado; gravado atomicamente na rotacao
+
+    Cada entrada custa uma linha anexada; fsync e feito em lotes
+    (fsync_batch_size entradas ou fsync_interval_seconds) e ao fim de cada
+    ciclo de cleanup. Uma linha truncada por crash e ignorada ao carregar.
+
+    Memoria: as ultimas max_entries entradas, com indices por snapshot e
+    usuario para get_entries, e os agregados por hora para contagens.
     """
 
     DEFAULT_AUDIT_FILE = "snapshot_deletion_audit.json"
+    SEGMENT_MAX_BYTES = 8 * 1024 * 1024
+    MAX_SEGMENTS = 16
+    FSYNC_BATCH_SIZE = 64
+    FSYNC_INTERVAL_SECONDS = 1.0
+    AGGREGATE_RETENTION_DAYS = 400
 
     def __init__(
         self,
         audit_file_path: Optional[str] = None,
         max_entries: int = 10000,
+        segment_max_bytes: int = SEGMENT_MAX_BYTES,
+        max_segments: int = MAX_SEGMENTS,
+        fsync_batch_size: int = FSYNC_BATCH_SIZE,
+        fsync_interval_seconds: float = FSYNC_INTERVAL_SECONDS,
     ):
         """
         Inicializa o audit logger.
 
         Args:
-            audit_file_path: Caminho para o arquivo de auditoria.
-                            Se None, usa diretorio padrao.
-            max_entries: Numero maximo de entradas a manter (FIFO).
+            audit_file_path: Caminho base do log de auditoria (os segmentos
+                            ficam ao lado). Se None, usa diretorio padrao.
+            max_entries: Numero maximo de entradas mantidas em memoria (FIFO).
+            segment_max_bytes: Tamanho que dispara a rotacao do segmento.
+            max_segments: Segmentos mantidos em disco (os mais antigos saem).
+            fsync_batch_size: Entradas pendentes que forcam um fsync.
+            fsync_interval_seconds: Tempo maximo entre fsyncs com entradas pendentes.
         """
         self._audit_file_path = audit_file_path
         self.max_entries = max_entries
-        self._entries: List[SnapshotDeletionAuditEntry] = []
+        self.segment_max_bytes = segment_max_bytes
+        self.max_segments = max_segments
+        self.fsync_batch_size = fsync_batch_size
+        self.fsync_interval_seconds = fsync_interval_seconds
+
+        self._entries: Deque[SnapshotDeletionAuditEntry] = deque()
+        self._by_snapshot: Dict[str, Deque[SnapshotDeletionAuditEntry]] = {}
+        self._by_user: Dict[str, Deque[SnapshotDeletionAuditEntry]] = {}
+        # "YYYY-MM-DDTHH" (UTC) -> [delecoes, bytes liberados]
+        self._hourly: Dict[str, List[int]] = {}
         self._loaded = False
+        self._lock = threading.RLock()
+
+        # Segmento ativo
+        self._segment_seq = 0
+        self._segment_file = None
+        self._segment_size = 0
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
 
         # ID do ciclo de cleanup atual (para correlacao)
         self._current_cleanup_run_id: Optional[str] = None
@@ -164,52 +212,239 @@ class SnapshotAuditLogger:
 
         return str(audit_dir / self.DEFAULT_AUDIT_FILE)
 
+    @property
+    def _base_path(self) -> Path:
+        return Path(self.audit_file_path).with_suffix('')
+
+    @property
+    def _index_path(self) -> Path:
+        return self._base_path.with_name(f"{self._base_path.name}.index.json")
+
+    def _segment_path(self, seq: int) -> Path:
+        return self._base_path.with_name(f"{self._base_path.name}.{seq:06d}.jsonl")
+
+    def _segment_seqs(self) -> List[int]:
+        """Sequencias dos segmentos existentes, em ordem"""
+        base = self._base_path
+        if not base.parent.exists():
+            return []
+        seqs = []
+        for path in base.parent.glob(f"{base.name}.*.jsonl"):
+            seq = path.name[len(base.name) + 1:-len('.jsonl')]
+            if seq.isdigit():
+                seqs.append(int(seq))
+        return sorted(seqs)
+
+    # ------------------------------------------------------------------
+    # Indices em memoria
+    # ------------------------------------------------------------------
+
+    def _index_entry(self, entry: SnapshotDeletionAuditEntry, count_aggregate: bool = True) -> None:
+        """Adiciona a entrada aos indices (e aos agregados por hora)"""
+        self._entries.append(entry)
+        if entry.snapshot_id:
+            self._by_snapshot.setdefault(entry.snapshot_id, deque()).append(entry)
+        if entry.user_id:
+            self._by_user.setdefault(entry.user_id, deque()).append(entry)
+
+        if count_aggregate and entry.event_type == AuditEventType.DELETION:
+            bucket = self._hourly.setdefault(entry.timestamp[:13], [0, 0])
+            bucket[0] += 1
+            if entry.success:
+                bucket[1] += entry.storage_freed_bytes
+
+        # Aplicar limite maximo (FIFO); a mais antiga e a primeira de cada indice
+        while len(self._entries) > self.max_entries:
+            old = self._entries.popleft()
+            for index, key in ((self._by_snapshot, old.snapshot_id), (self._by_user, old.user_id)):
+                bucket = index.get(key)
+                if bucket and bucket[0] is old:
+                    bucket.popleft()
+                    if not bucket:
+                        del index[key]
+
+    def _prune_aggregates(self) -> None:
+        cutoff = (datetime.now(timezone.utc) - timedelta(days=self.AGGREGATE_RETENTION_DAYS)).isoformat()[:13]
+        for key in [k for k in self._hourly if k < cutoff]:
+            del self._hourly[key]
+
+    # ------------------------------------------------------------------
+    # Persistencia
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _read_segment(path: Path) -> List[SnapshotDeletionAuditEntry]:
+        entries = []
+        with open(path, 'r') as f:
+            for line_no, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    entries.append(SnapshotDeletionAuditEntry.from_dict(json.loads(line)))
+                except (json.JSONDecodeError, ValueError, TypeError) as e:
+                    # Linha truncada por crash no meio de um append
+                    logger.warning(f"Ignorando linha {line_no} invalida em {path.name}: {e}")
+        return entries
+
     def _ensure_loaded(self) -> None:
-        """Carrega entradas do arquivo se ainda nao foram carregadas."""
+        """Carrega indices e entradas recentes do disco se ainda nao carregou."""
         if self._loaded:
             return
+        with self._lock:
+            if not self._loaded:
+                self._load()
 
+    def _load(self) -> None:
         try:
-            if os.path.exists(self.audit_file_path):
-                with open(self.audit_file_path, 'r') as f:
-                    data = json.load(f)
-                    entries_data = data.get('entries', [])
-                    self._entries = [
-                        SnapshotDeletionAuditEntry.from_dict(e)
-                        for e in entries_data
-                    ]
-                    logger.debug(f"Carregadas {len(self._entries)} entradas de auditoria")
+            self._migrate_legacy_file()
+            seqs = self._segment_seqs()
+
+            # Agregados ate o ultimo segmento fechado
+            indexed_seq = 0
+            if self._index_path.exists():
+                with open(self._index_path, 'r') as f:
+                    index = json.load(f)
+                self._hourly = {k: list(v) for k, v in index.get('hourly', {}).items()}
+                indexed_seq = index.get('segment_seq', 0)
+
+            # Entradas recentes: segmentos do mais novo para o mais antigo
+            recent: List[Tuple[List[SnapshotDeletionAuditEntry], bool]] = []
+            loaded = 0
+            for seq in reversed(seqs):
+                needs_aggregate = seq > indexed_seq
+                if loaded >= self.max_entries and not needs_aggregate:
+                    break
+                segment = self._read_segment(self._segment_path(seq))
+                recent.append((segment, needs_aggregate))
+                loaded += len(segment)
+
+            for segment, needs_aggregate in reversed(recent):
+                for entry in segment:
+                    self._index_entry(entry, count_aggregate=needs_aggregate)
+
+            if seqs:
+                self._segment_seq = seqs[-1]
+            logger.debug(f"Carregadas {len(self._entries)} entradas de auditoria ({len(seqs)} segmentos)")
         except (json.JSONDecodeError, IOError) as e:
             logger.warning(f"Erro ao carregar arquivo de auditoria: {e}")
-            self._entries = []
 
         self._loaded = True
 
-    def _save(self) -> None:
-        """Persiste entradas no arquivo de auditoria."""
+    def _migrate_legacy_file(self) -> None:
+        """Converte o arquivo JSON antigo (um documento) para o primeiro segmento"""
+        legacy = Path(self.audit_file_path)
+        if not legacy.exists() or self._segment_seqs():
+            return
         try:
-            # Garantir que diretorio existe
-            audit_dir = Path(self.audit_file_path).parent
-            audit_dir.mkdir(parents=True, exist_ok=True)
-
-            # Aplicar limite maximo
-            if len(self._entries) > self.max_entries:
-                self._entries = self._entries[-self.max_entries:]
-
-            data = {
-                'version': '1.0',
-                'last_updated': datetime.now(timezone.utc).isoformat(),
-                'entry_count': len(self._entries),
-                'entries': [e.to_dict() for e in self._entries],
-            }
-
-            with open(self.audit_file_path, 'w') as f:
-                json.dump(data, f, indent=2)
-
-            logger.debug(f"Salvas {len(self._entries)} entradas de auditoria")
+            with open(legacy, 'r') as f:
+                data = json.load(f)
+        except (json.JSONDecodeError, IOError) as e:
+            logger.warning(f"Arquivo de auditoria antigo ilegivel, ignorado: {e}")
+            return
+        if not isinstance(data, dict) or 'entries' not in data:
+            return
 
-        except IOError as e:
-            logger.error(f"Erro ao salvar arquivo de auditoria: {e}")
+        path = self._segment_path(1)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'w') as f:
+            for item in data['entries']:
+                f.write(json.dumps(item, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, path)
+        os.replace(legacy, legacy.with_name(legacy.name + '.migrated'))
+        logger.info(f"Auditoria migrada para JSONL: {len(data['entries'])} entradas")
+
+    def _open_segment(self) -> None:
+        if self._segment_seq == 0:
+            self._segment_seq = 1
+        path = self._segment_path(self._segment_seq)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        self._segment_file = open(path, 'a')
+        self._segment_size = self._segment_file.tell()
+        if self._segment_size:
+            # Linha truncada por crash: termina-la para nao colar na proxima
+            with open(path, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b'\n':
+                    self._segment_file.write('\n')
+                    self._segment_size += 1
+
+    def _sync(self) -> None:
+        """flush + fsync das entradas pendentes"""
+        if self._segment_file is None or not self._unsynced:
+            return
+        self._segment_file.flush()
+        os.fsync(self._segment_file.fileno())
+        self._unsynced = 0
+        self._last_fsync = time.monotonic()
+
+    def _write_index(self) -> None:
+        """Grava os agregados atomicamente (cobrem ate o segmento ativo atual)"""
+        self._prune_aggregates()
+        data = {
+            'version': '2.0',
+            'last_updated': datetime.now(timezone.utc).isoformat(),
+            'segment_seq': self._segment_seq,
+            'hourly': self._hourly,
+        }
+        tmp = self._index_path.with_name(self._index_path.name + '.tmp')
+        with open(tmp, 'w') as f:
+            json.dump(data, f, separators=(',', ':'))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp, self._index_path)
+
+    def _rotate(self) -> None:
+        """Fecha o segmento ativo, grava os agregados e abre o proximo"""
+        self._sync()
+        self._segment_file.close()
+        self._segment_file = None
+        self._write_index()
+
+        # Retencao: o novo segmento conta no limite
+        for seq in self._segment_seqs()[:-(self.max_segments - 1) or None]:
+            self._segment_path(seq).unlink(missing_ok=True)
+        self._segment_seq += 1
+        self._segment_size = 0
+
+    def _append(self, entry: SnapshotDeletionAuditEntry, sync: bool = False) -> None:
+        """Anexa uma entrada ao log e aos indices."""
+        with self._lock:
+            self._ensure_loaded()
+            self._index_entry(entry)
+            try:
+                if self._segment_file is None:
+                    self._open_segment()
+                line = json.dumps(entry.to_dict(), separators=(',', ':')) + '\n'
+                self._segment_file.write(line)
+                self._segment_size += len(line)
+                self._unsynced += 1
+
+                if (sync or self._unsynced >= self.fsync_batch_size
+                        or time.monotonic() - self._last_fsync >= self.fsync_interval_seconds):
+                    self._sync()
+                if self._segment_size >= self.segment_max_bytes:
+                    self._rotate()
+            except IOError as e:
+                logger.error(f"Erro ao salvar arquivo de auditoria: {e}")
+
+    def flush(self) -> None:
+        """Forca o fsync das entradas pendentes."""
+        with self._lock:
+            try:
+                self._sync()
+            except IOError as e:
+                logger.error(f"Erro ao sincronizar arquivo de auditoria: {e}")
+
+    def close(self) -> None:
+        """Sincroniza e fecha o segmento ativo."""
+        with self._lock:
+            if self._segment_file is not None:
+                self.flush()
+                self._segment_file.close()
+                self._segment_file = None
 
     def log_deletion(
         self,
@@ -262,8 +497,7 @@ class SnapshotAuditLogger:
             metadata=metadata or {},
         )
 
-        self._entries.append(entry)
-        self._save()
+        self._append(entry)
 
         if success:
             logger.info(
@@ -308,8 +542,7 @@ class SnapshotAuditLogger:
             },
         )
 
-        self._entries.append(entry)
-        self._save()
+        self._append(entry)
 
         logger.info(f"Audit: Ciclo de cleanup iniciado (run_id={run_id[:8]}..., "
                    f"snapshots={snapshots_to_process})")
@@ -352,8 +585,8 @@ class SnapshotAuditLogger:
             },
         )
 
-        self._entries.append(entry)
-        self._save()
+        # Fim de ciclo: garante que todo o lote esta em disco
+        self._append(entry, sync=True)
 
         # Limpar ID do ciclo
         self._current_cleanup_run_id = None
@@ -399,8 +632,7 @@ class SnapshotAuditLogger:
             },
         )
 
-        self._entries.append(entry)
-        self._save()
+        self._append(entry)
 
         action = "habilitada" if keep_forever else "desabilitada"
         logger.info(f"Audit: Flag keep_forever {action} para snapshot {snapshot_id}")
@@ -442,8 +674,7 @@ class SnapshotAuditLogger:
             },
         )
 
-        self._entries.append(entry)
-        self._save()
+        self._append(entry)
 
         logger.info(
             f"Audit: Retencao alterada para snapshot {snapshot_id} "
@@ -479,31 +710,53 @@ class SnapshotAuditLogger:
         """
         self._ensure_loaded()
 
-        # Filtrar entradas
-        filtered = self._entries.copy()
-
-        if snapshot_id:
-            filtered = [e for e in filtered if e.snapshot_id == snapshot_id]
-
-        if user_id:
-            filtered = [e for e in filtered if e.user_id == user_id]
-
-        if event_type:
-            filtered = [e for e in filtered if e.event_type == event_type]
-
-        if start_date:
-            start_iso = start_date.isoformat()
-            filtered = [e for e in filtered if e.timestamp >= start_iso]
-
-        if end_date:
-            end_iso = end_date.isoformat()
-            filtered = [e for e in filtered if e.timestamp <= end_iso]
-
-        # Ordenar por timestamp descendente (mais recentes primeiro)
-        filtered.sort(key=lambda e: e.timestamp, reverse=True)
+        start_iso = start_date.isoformat() if start_date else None
+        end_iso = end_date.isoformat() if end_date else None
+
+        results: List[SnapshotDeletionAuditEntry] = []
+        with self._lock:
+            # Indices por snapshot/usuario evitam varrer todas as entradas
+            if snapshot_id:
+                candidates = self._by_snapshot.get(snapshot_id, ())
+            elif user_id:
+                candidates = self._by_user.get(user_id, ())
+            else:
+                candidates = self._entries
+
+            # Entradas estao em ordem de insercao: mais recentes primeiro
+            skipped = 0
+            for e in reversed(candidates):
+                if start_iso and e.timestamp < start_iso:
+                    break
+                if end_iso and e.timestamp > end_iso:
+                    continue
+                if snapshot_id and e.snapshot_id != snapshot_id:
+                    continue
+                if user_id and e.user_id != user_id:
+                    continue
+                if event_type and e.event_type != event_type:
+                    continue
+                if skipped < offset:
+                    skipped += 1
+                    continue
+                results.append(e)
+                if len(results) >= limit:
+                    break
+
+        return results
+
+    def _deletion_totals(self, days: int) -> Tuple[int, int]:
+        """Soma os agregados por hora dos ultimos N dias (resolucao de 1 hora)"""
+        self._ensure_loaded()
 
-        # Aplicar paginacao
-        return filtered[offset:offset + limit]
+        cutoff_hour = (datetime.now(timezone.utc) - timedelta(days=days)).isoformat()[:13]
+        count = freed = 0
+        with self._lock:
+            for hour, (deletions, freed_bytes) in self._hourly.items():
+                if hour >= cutoff_hour:
+                    count += deletions
+                    freed += freed_bytes
+        return count, freed
 
     def get_deletion_count(self, days: int = 30) -> int:
         """
@@ -515,19 +768,7 @@ class SnapshotAuditLogger:
         Returns:
             Contagem de delecoes
         """
-        self._ensure_loaded()
-
-        from datetime import timedelta
-        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-        cutoff_iso = cutoff.isoformat()
-
-        count = sum(
-            1 for e in self._entries
-            if e.event_type == AuditEventType.DELETION
-            and e.timestamp >= cutoff_iso
-        )
-
-        return count
+        return self._deletion_totals(days)[0]
 
     def get_storage_freed_total(self, days: int = 30) -> int:
         """
@@ -539,26 +780,23 @@ class SnapshotAuditLogger:
         Returns:
             Total de bytes liberados
         """
-        self._ensure_loaded()
-
-        from datetime import timedelta
-        cutoff = datetime.now(timezone.utc) - timedelta(days=days)
-        cutoff_iso = cutoff.isoformat()
-
-        total = sum(
-            e.storage_freed_bytes for e in self._entries
-            if e.event_type == AuditEventType.DELETION
-            and e.success
-            and e.timestamp >= cutoff_iso
-        )
-
-        return total
+        return self._deletion_totals(days)[1]
 
     def clear(self) -> None:
         """Limpa todas as entradas de auditoria (para testes)."""
-        self._entries = []
-        self._loaded = True
-        self._save()
+        with self._lock:
+            self.close()
+            for seq in self._segment_seqs():
+                self._segment_path(seq).unlink(missing_ok=True)
+            self._index_path.unlink(missing_ok=True)
+
+            self._entries.clear()
+            self._by_snapshot.clear()
+            self._by_user.clear()
+            self._hourly.clear()
+            self._segment_seq = 0
+            self._segment_size = 0
+            self._loaded = True
 
 
 # Singleton global do audit logger
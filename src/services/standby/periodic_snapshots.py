@@ -5,6 +5,7 @@ Estratégia:
 - Cria snapshot de todas GPUs ativas a cada X minutos
 - Mantém histórico dos últimos N snapshots
 - Permite failover rápido usando último snapshot + sync incremental
+- Modo dedup (opcional): ChunkStore na GPU, envia só os chunks novos
 """
 
 import asyncio
@@ -26,10 +27,12 @@ class PeriodicSnapshotService:
         snapshot_service: GPUSnapshotService,
         interval_minutes: int = 60,
         keep_last_n: int = 24,  # Manter últimas 24 horas
+        dedup: bool = False,  # Snapshots deduplicados (create_dedup_snapshot)
     ):
         self.snapshot_service = snapshot_service
         self.interval_minutes = interval_minutes
         self.keep_last_n = keep_last_n
+        self.dedup = dedup
         self.running = False
         self._task = None
 
@@ -77,11 +80,17 @@ class PeriodicSnapshotService:
         # Em produção, isso viria do banco de dados ou API
         active_gpus = []  # Lista de {instance_id, ssh_host, ssh_port}
 
+        # Dedup: cada ciclo envia só os chunks que mudaram desde o anterior
+        if self.dedup:
+            create_snapshot = self.snapshot_service.create_dedup_snapshot
+        else:
+            create_snapshot = self.snapshot_service.create_snapshot
+
         for gpu in active_gpus:
             try:
                 snapshot_id = f"periodic-{gpu['instance_id']}-{int(time.time())}"
 
-                snapshot_info = self.snapshot_service.create_snapshot(
+                snapshot_info = create_snapshot(
                     instance_id=str(gpu['instance_id']),
                     ssh_host=gpu['ssh_host'],
                     ssh_port=gpu['ssh_port'],
@@ -8,7 +8,8 @@ import logging
 import asyncio
 from dataclasses import dataclass, field
 from typing import List, Optional, Dict, Any
-import aiohttp
+
+from src.infrastructure.http_pool import get_vast_session
 
 logger = logging.getLogger(__name__)
 
@@ -68,6 +69,7 @@ class HostFinder:
     def __init__(self, vast_api_key: str):
         self.api_key = vast_api_key
         self.api_url = "https://cloud.vast.ai/api/v0"
+        self.timeout = 30
 
     async def search_offers(
         self,
@@ -101,66 +103,63 @@ class HostFinder:
                 "rentable": "true",
             }
 
-            async with aiohttp.ClientSession() as session:
-                headers = {
-                    "Accept": "application/json",
-                    "Authorization": f"Bearer {self.api_key}"
-                }
-
-                async with session.get(
-                    f"{self.api_url}/bundles/",
-                    headers=headers,
-                    params=params
-                ) as response:
-                    if response.status != 200:
-                        text = await response.text()
-                        logger.error(f"VAST API error: {response.status} - {text}")
-                        return []
-
-                    data = await response.json()
-                    offers_data = data.get("offers", [])
-
-                    offers = []
-                    for offer_data in offers_data:
-                        try:
-                            # Aplicar filtros locais
-                            if gpu_name and offer_data.get("gpu_name", "") != gpu_name:
-                                continue
-                            if offer_data.get("num_gpus", 0) < min_gpus:
-                                continue
-                            if max_price and offer_data.get("dph_total", 999) > max_price:
-                                continue
-                            if offer_data.get("reliability2", 0) < min_reliability:
-                                continue
-                            if geolocation and offer_data.get("geolocation", "") != geolocation:
-                                continue
-
-                            offer = GPUOffer(
-                                offer_id=offer_data.get("id"),
-                                machine_id=offer_data.get("machine_id"),
-                                gpu_name=offer_data.get("gpu_name", ""),
-                                num_gpus=offer_data.get("num_gpus", 1),
-                                gpu_ram_mb=offer_data.get("gpu_ram", 0),
-                                cpu_cores=offer_data.get("cpu_cores", 0),
-                                ram_mb=offer_data.get("cpu_ram", 0),
-                                disk_space_gb=offer_data.get("disk_space", 0),
-                                price_per_hour=offer_data.get("dph_total", 0),
-                                reliability=offer_data.get("reliability2", 0),
-                                verified=offer_data.get("verified", False),
-                                static_ip=offer_data.get("static_ip", False),
-                                geolocation=offer_data.get("geolocation", ""),
-                                inet_up_bps=offer_data.get("inet_up_bps", 0),
-                                inet_down_bps=offer_data.get("inet_down_bps", 0),
-                                cuda_max_good=offer_data.get("cuda_max_good", ""),
-                                rentable=offer_data.get("rentable", False),
-                            )
-                            offers.append(offer)
-                        except Exception as e:
-                            logger.warning(f"Failed to parse offer: {e}")
-                            continue
-
-                    logger.info(f"Found {len(offers)} GPU offers (filtered from {len(offers_data)})")
-                    return offers
+            # Pooled keep-alive session (shared with VastProvider/VastService);
+            # the blocking call runs in a worker thread
+            session = get_vast_session(self.api_key)
+            response = await asyncio.to_thread(
+                session.get,
+                f"{self.api_url}/bundles/",
+                params=params,
+                timeout=self.timeout,
+            )
+            if response.status_code != 200:
+                logger.error(f"VAST API error: {response.status_code} - {response.text}")
+                return []
+
+            data = response.json()
+            offers_data = data.get("offers", [])
+
+            offers = []
+            for offer_data in offers_data:
+                try:
+                    # Aplicar filtros locais
+                    if gpu_name and offer_data.get("gpu_name", "") != gpu_name:
+                        continue
+                    if offer_data.get("num_gpus", 0) < min_gpus:
+                        continue
+                    if max_price and offer_data.get("dph_total", 999) > max_price:
+                        continue
+                    if offer_data.get("reliability2", 0) < min_reliability:
+                        continue
+                    if geolocation and offer_data.get("geolocation", "") != geolocation:
+                        continue
+
+                    offer = GPUOffer(
+                        offer_id=offer_data.get("id"),
+                        machine_id=offer_data.get("machine_id"),
+                        gpu_name=offer_data.get("gpu_name", ""),
+                        num_gpus=offer_data.get("num_gpus", 1),
+                        gpu_ram_mb=offer_data.get("gpu_ram", 0),
+                        cpu_cores=offer_data.get("cpu_cores", 0),
+                        ram_mb=offer_data.get("cpu_ram", 0),
+                        disk_space_gb=offer_data.get("disk_space", 0),
+                        price_per_hour=offer_data.get("dph_total", 0),
+                        reliability=offer_data.get("reliability2", 0),
+                        verified=offer_data.get("verified", False),
+                        static_ip=offer_data.get("static_ip", False),
+                        geolocation=offer_data.get("geolocation", ""),
+                        inet_up_bps=offer_data.get("inet_up_bps", 0),
+                        inet_down_bps=offer_data.get("inet_down_bps", 0),
+                        cuda_max_good=offer_data.get("cuda_max_good", ""),
+                        rentable=offer_data.get("rentable", False),
+                    )
+                    offers.append(offer)
+                except Exception as e:
+                    logger.warning(f"Failed to parse offer: {e}")
+                    continue
+
+            logger.info(f"Found {len(offers)} GPU offers (filtered from {len(offers_data)})")
+            return offers
 
         except Exception as e:
             logger.error(f"Failed to search offers: {e}")
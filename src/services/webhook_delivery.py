@@ -0,0 +1,612 @@
+"""
+WebhookDeliveryEngine - Durable webhook delivery from the outbox table
+
+trigger_webhooks() only writes one webhook_outbox row per subscribed
+webhook; this engine delivers them:
+1. Dispatcher claims due rows in batches (lease via locked_until, SKIP LOCKED
+   on PostgreSQL so several API workers can share the table)
+2. Bounded asyncio.Queue + fixed worker pool (no task per webhook)
+3. Per-endpoint concurrency caps (per URL host); jobs for a saturated host
+   are parked and handed to the next worker that frees a slot on that host,
+   so one slow endpoint never blocks the pool
+4. One shared httpx.AsyncClient (keep-alive, HTTP/2 when h2 is installed)
+5. Delivery logs and outbox state changes buffered and written in bulk
+6. Queue depth and delivery latency metrics
+
+Retries are rescheduled in the outbox (next_attempt_at) instead of sleeping
+inside a task, so pending deliveries survive restarts. Leases of claimed
+rows (queued, parked or being delivered) are renewed while this process
+holds them, so other dispatchers never reclaim them mid-wait.
+"""
+import asyncio
+import logging
+import os
+import time
+from collections import deque
+from datetime import datetime, timedelta
+from typing import Any, Deque, Dict, List, Optional, Set
+from urllib.parse import urlsplit
+
+import httpx
+from sqlalchemy import and_, bindparam, func, insert, or_, update
+
+from src.config.database import SessionLocal
+from src.models.webhook_config import WebhookConfig, WebhookLog, WebhookOutbox
+from src.services.webhook_service import (
+    WEBHOOK_MAX_ATTEMPTS,
+    WEBHOOK_TIMEOUT_SECONDS,
+    build_webhook_headers,
+    retry_delay_seconds,
+    truncate_response,
+)
+
+try:
+    import h2  # noqa: F401 - enables httpx HTTP/2
+    HAS_HTTP2 = True
+except ImportError:
+    HAS_HTTP2 = False
+
+logger = logging.getLogger(__name__)
+
+# Engine configuration
+DEFAULT_WORKERS = 8
+DEFAULT_ENDPOINT_CONCURRENCY = 2    # Concurrent requests per webhook host
+DEFAULT_QUEUE_SIZE = 256            # Claimed deliveries waiting for a worker
+CLAIM_BATCH_SIZE = 100              # Outbox rows claimed per query
+LEASE_SECONDS = 120                 # in_flight rows are reclaimed after this (crash recovery)
+LEASE_RENEW_SECONDS = 40            # Leases of rows still held locally are extended this often
+POLL_INTERVAL_SECONDS = 2.0         # Outbox poll when nothing wakes the dispatcher
+FLUSH_INTERVAL_SECONDS = 1.0        # Max delay of buffered logs/state changes
+FLUSH_BATCH_SIZE = 200              # Flush early when this many are buffered
+RETENTION_DAYS = 7                  # Delivered/failed outbox rows kept this long
+PURGE_INTERVAL_SECONDS = 3600
+LATENCY_WINDOW = 1000               # Samples kept for latency percentiles
+
+OUTBOX_PENDING = "pending"
+OUTBOX_IN_FLIGHT = "in_flight"
+OUTBOX_DELIVERED = "delivered"
+OUTBOX_FAILED = "failed"
+
+
+def _percentiles(samples: Deque[float]) -> Dict[str, Optional[float]]:
+    if not samples:
+        return {"p50": None, "p95": None, "max": None}
+    ordered = sorted(samples)
+    return {
+        "p50": round(ordered[len(ordered) // 2], 1),
+        "p95": round(ordered[min(len(ordered) - 1, int(len(ordered) * 0.95))], 1),
+        "max": round(ordered[-1], 1),
+    }
+
+
+class WebhookDeliveryEngine:
+    """
+    Outbox-backed webhook delivery worker pool.
+
+    Usage:
+        engine = get_delivery_engine()
+        await engine.start()          # app startup
+        engine.enqueue([1, 2], "instance.started", payload)
+        engine.notify()
+        await engine.stop()           # app shutdown
+    """
+
+    def __init__(
+        self,
+        workers: int = DEFAULT_WORKERS,
+        endpoint_concurrency: int = DEFAULT_ENDPOINT_CONCURRENCY,
+        queue_size: int = DEFAULT_QUEUE_SIZE,
+        session_factory=SessionLocal,
+    ):
+        """
+        Initialize the delivery engine.
+
+        Args:
+            workers: Number of delivery workers
+            endpoint_concurrency: Max concurrent requests per webhook host
+            queue_size: Max claimed deliveries waiting for a worker
+            session_factory: SQLAlchemy session factory
+        """
+        self.workers = workers
+        self.endpoint_concurrency = endpoint_concurrency
+        self.queue_size = queue_size
+        self._session_factory = session_factory
+
+        self._loop: Optional[asyncio.AbstractEventLoop] = None
+        self._queue: Optional[asyncio.Queue] = None
+        self._wakeup: Optional[asyncio.Event] = None
+        self._client: Optional[httpx.AsyncClient] = None
+        self._tasks: List[asyncio.Task] = []
+        self._endpoint_active: Dict[str, int] = {}
+        self._parked: Dict[str, Deque[Dict[str, Any]]] = {}
+        self._inflight: Set[int] = set()
+
+        # Buffered writes (flushed in bulk)
+        self._logs: List[Dict[str, Any]] = []
+        self._updates: List[Dict[str, Any]] = []
+
+        # Metrics
+        self._enqueued = 0
+        self._delivered = 0
+        self._failed = 0
+        self._retried = 0
+        self._latencies_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+        self._lag_ms: Deque[float] = deque(maxlen=LATENCY_WINDOW)
+
+    @property
+    def running(self) -> bool:
+        return bool(self._tasks) and self._loop is not None and not self._loop.is_closed()
+
+    @property
+    def client(self) -> Optional[httpx.AsyncClient]:
+        """Shared client, only usable from the engine's event loop"""
+        try:
+            if self.running and asyncio.get_running_loop() is self._loop:
+                return self._client
+        except RuntimeError:
+            pass
+        return None
+
+    # ------------------------------------------------------------------
+    # Lifecycle
+    # ------------------------------------------------------------------
+
+    async def start(self):
+        """Start dispatcher, flusher and workers on the current event loop"""
+        if self.running:
+            return
+        self._loop = asyncio.get_running_loop()
+        self._queue = asyncio.Queue(maxsize=self.queue_size)
+        self._wakeup = asyncio.Event()
+        self._client = httpx.AsyncClient(
+            timeout=WEBHOOK_TIMEOUT_SECONDS,
+            http2=HAS_HTTP2,
+            limits=httpx.Limits(
+                max_connections=self.workers * 2,
+                max_keepalive_connections=self.workers * 2,
+                keepalive_expiry=60,
+            ),
+        )
+        self._tasks = [
+            asyncio.create_task(self._dispatch_loop(), name="webhook-dispatcher"),
+            asyncio.create_task(self._flush_loop(), name="webhook-flusher"),
+        ]
+        self._tasks += [
+            asyncio.create_task(self._worker(), name=f"webhook-worker-{i}")
+            for i in range(self.workers)
+        ]
+        logger.info(
+            f"[WebhookDelivery] Started {self.workers} workers "
+            f"(per-endpoint={self.endpoint_concurrency}, http2={HAS_HTTP2})"
+        )
+
+    async def stop(self):
+        """Stop all tasks, release unstarted claims and flush buffered writes"""
+        if not self._tasks:
+            return
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+        # Claimed but never started (queued or parked): hand back to the outbox right away
+        unstarted = []
+        while not self._queue.empty():
+            unstarted.append(self._queue.get_nowait())
+        for parked in self._parked.values():
+            unstarted.extend(parked)
+        for job in unstarted:
+            self._updates.append(self._state(job["id"], OUTBOX_PENDING, job["attempts"], datetime.utcnow()))
+        self._parked.clear()
+        self._endpoint_active.clear()
+        self._inflight.clear()
+
+        await self.flush()
+        await self._client.aclose()
+        self._client = None
+        logger.info("[WebhookDelivery] Stopped")
+
+    def notify(self):
+        """Wake the dispatcher (thread-safe); no-op when the engine isn't running"""
+        if self.running:
+            self._loop.call_soon_threadsafe(self._wakeup.set)
+
+    # ------------------------------------------------------------------
+    # Outbox (sync DB access, run via asyncio.to_thread)
+    # ------------------------------------------------------------------
+
+    def enqueue(self, webhook_ids: List[int], event_type: str, payload: Dict[str, Any]) -> int:
+        """
+        Persist one outbox row per webhook (single bulk insert).
+
+        Returns:
+            Number of rows written
+        """
+        if not webhook_ids:
+            return 0
+        now = datetime.utcnow()
+        rows = [
+            {
+                "webhook_id": webhook_id,
+                "event_type": event_type,
+                "payload": payload,
+                "status": OUTBOX_PENDING,
+                "attempts": 0,
+                "next_attempt_at": now,
+                "created_at": now,
+            }
+            for webhook_id in webhook_ids
+        ]
+        db = self._session_factory()
+        try:
+            db.execute(insert(WebhookOutbox.__table__), rows)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+        self._enqueued += len(rows)
+        return len(rows)
+
+    def _claim(self, limit: int) -> List[Dict[str, Any]]:
+        """Lease up to `limit` due rows and resolve their webhook URL/secret"""
+        now = datetime.utcnow()
+        db = self._session_factory()
+        try:
+            query = db.query(WebhookOutbox).filter(or_(
+                and_(WebhookOutbox.status == OUTBOX_PENDING, WebhookOutbox.next_attempt_at <= now),
+                and_(WebhookOutbox.status == OUTBOX_IN_FLIGHT, WebhookOutbox.locked_until < now),
+            ))
+            if self._inflight:
+                query = query.filter(~WebhookOutbox.id.in_(self._inflight))
+            rows = query.order_by(WebhookOutbox.next_attempt_at).limit(limit).with_for_update(skip_locked=True).all()
+            if not rows:
+                db.rollback()
+                return []
+
+            webhook_ids = {row.webhook_id for row in rows}
+            webhooks = {
+                w.id: w for w in db.query(WebhookConfig).filter(WebhookConfig.id.in_(webhook_ids))
+            }
+
+            jobs = []
+            for row in rows:
+                webhook = webhooks.get(row.webhook_id)
+                if webhook is None or not webhook.enabled:
+                    # Same as before: disabled/deleted webhooks are skipped
+                    row.status = OUTBOX_FAILED
+                    row.last_error = "Webhook disabled or deleted"
+                    row.locked_until = None
+                    continue
+                row.status = OUTBOX_IN_FLIGHT
+                row.locked_until = now + timedelta(seconds=LEASE_SECONDS)
+                jobs.append({
+                    "id": row.id,
+                    "webhook_id": row.webhook_id,
+                    "url": webhook.url,
+                    "secret": webhook.secret,
+                    "event_type": row.event_type,
+                    "payload": row.payload,
+                    "attempts": row.attempts,
+                    "created_at": row.created_at,
+                })
+            db.commit()
+            return jobs
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _renew_leases(self, outbox_ids: List[int]) -> int:
+        """Extend the lease of rows still held by this process (queued, parked or sending)"""
+        db = self._session_factory()
+        try:
+            renewed = db.query(WebhookOutbox).filter(
+                WebhookOutbox.id.in_(outbox_ids),
+                WebhookOutbox.status == OUTBOX_IN_FLIGHT,
+            ).update(
+                {WebhookOutbox.locked_until: datetime.utcnow() + timedelta(seconds=LEASE_SECONDS)},
+                synchronize_session=False,
+            )
+            db.commit()
+            return renewed
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _write(self, logs: List[Dict[str, Any]], updates: List[Dict[str, Any]]):
+        """Bulk insert delivery logs and bulk update outbox rows in one transaction"""
+        db = self._session_factory()
+        try:
+            if logs:
+                db.execute(insert(WebhookLog.__table__), logs)
+            if updates:
+                table = WebhookOutbox.__table__
+                stmt = update(table).where(table.c.id == bindparam("b_id")).values(
+                    status=bindparam("b_status"),
+                    attempts=bindparam("b_attempts"),
+                    next_attempt_at=bindparam("b_next_attempt_at"),
+                    locked_until=None,
+                    last_error=bindparam("b_last_error"),
+                    delivered_at=bindparam("b_delivered_at"),
+                )
+                db.connection().execute(stmt, updates)
+            db.commit()
+        except Exception:
+            db.rollback()
+            raise
+        finally:
+            db.close()
+
+    def _purge(self) -> int:
+        """Delete delivered/failed outbox rows past retention"""
+        cutoff = datetime.utcnow() - timedelta(days=RETENTION_DAYS)
+        db = self._session_factory()
+        try:
+            deleted = db.query(WebhookOutbox).filter(
+                WebhookOutbox.status.in_([OUTBOX_DELIVERED, OUTBOX_FAILED]),
+                WebhookOutbox.created_at < cutoff,
+            ).delete(synchronize_session=False)
+            db.commit()
+            return deleted
+        finally:
+            db.close()
+
+    # ------------------------------------------------------------------
+    # Buffered writes
+    # ------------------------------------------------------------------
+
+    @staticmethod
+    def _state(
+        outbox_id: int,
+        status: str,
+        attempts: int,
+        next_attempt_at: datetime,
+        error: Optional[str] = None,
+        delivered_at: Optional[datetime] = None,
+    ) -> Dict[str, Any]:
+        return {
+            "b_id": outbox_id,
+            "b_status": status,
+            "b_attempts": attempts,
+            "b_next_attempt_at": next_attempt_at,
+            "b_last_error": error[:500] if error else None,
+            "b_delivered_at": delivered_at,
+        }
+
+    def record_log(
+        self,
+        webhook_id: int,
+        event_type: str,
+        payload: Dict[str, Any],
+        status_code: Optional[int],
+        response: Optional[str],
+        attempt: int,
+        error: Optional[str] = None,
+    ):
+        """Buffer a WebhookLog row (written by the next flush)"""
+        self._logs.append({
+            "webhook_id": webhook_id,
+            "event_type": event_type,
+            "payload": payload,
+            "status_code": status_code,
+            "response": truncate_response(response),
+            "attempt": attempt,
+            "error": error[:500] if error else None,
+            "created_at": datetime.utcnow(),
+        })
+        if len(self._logs) >= FLUSH_BATCH_SIZE and self._wakeup is not None:
+            self._wakeup.set()
+
+    async def flush(self):
+        """Write buffered logs and outbox updates"""
+        logs, self._logs = self._logs, []
+        updates, self._updates = self._updates, []
+        if not logs and not updates:
+            return
+        try:
+            await asyncio.to_thread(self._write, logs, updates)
+        except Exception as e:
+            logger.error(f"[WebhookDelivery] Failed to flush {len(logs)} logs/{len(updates)} updates: {e}")
+            # Keep state changes (they drive retries); logs are best effort
+            self._updates = updates + self._updates
+            if len(self._logs) + len(logs) <= FLUSH_BATCH_SIZE * 50:
+                self._logs = logs + self._logs
+
+    # ------------------------------------------------------------------
+    # Tasks
+    # ------------------------------------------------------------------
+
+    def _backlog(self) -> int:
+        """Claimed jobs waiting locally (queued or parked behind a saturated host)"""
+        return self._queue.qsize() + sum(len(parked) for parked in self._parked.values())
+
+    async def _dispatch_loop(self):
+        next_purge = time.monotonic()
+        next_renew = time.monotonic() + LEASE_RENEW_SECONDS
+        while True:
+            self._wakeup.clear()
+            # Parked jobs count too: never hold more than the queue size locally
+            free = self._queue.maxsize - self._backlog()
+            jobs = []
+            if free > 0:
+                try:
+                    jobs = await asyncio.to_thread(self._claim, min(free, CLAIM_BATCH_SIZE))
+                except Exception as e:
+                    logger.error(f"[WebhookDelivery] Failed to claim outbox rows: {e}")
+            for job in jobs:
+                self._inflight.add(job["id"])
+                self._queue.put_nowait(job)
+
+            if time.monotonic() >= next_renew:
+                next_renew = time.monotonic() + LEASE_RENEW_SECONDS
+                if self._inflight:
+                    try:
+                        await asyncio.to_thread(self._renew_leases, list(self._inflight))
+                    except Exception as e:
+                        logger.warning(f"[WebhookDelivery] Failed to renew outbox leases: {e}")
+
+            if time.monotonic() >= next_purge:
+                next_purge = time.monotonic() + PURGE_INTERVAL_SECONDS
+                try:
+                    purged = await asyncio.to_thread(self._purge)
+                    if purged:
+                        logger.info(f"[WebhookDelivery] Purged {purged} old outbox rows")
+                except Exception as e:
+                    logger.warning(f"[WebhookDelivery] Outbox purge failed: {e}")
+
+            if len(jobs) == CLAIM_BATCH_SIZE:
+                continue  # More rows are probably due
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout=POLL_INTERVAL_SECONDS)
+            except asyncio.TimeoutError:
+                pass
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(FLUSH_INTERVAL_SECONDS)
+            await self.flush()
+
+    async def _worker(self):
+        while True:
+            job = await self._queue.get()
+            try:
+                endpoint = urlsplit(job["url"]).netloc
+                if self._endpoint_active.get(endpoint, 0) >= self.endpoint_concurrency:
+                    # Host saturated: park the job instead of blocking this worker;
+                    # whoever frees a slot on the host picks it up
+                    self._parked.setdefault(endpoint, deque()).append(job)
+                    continue
+                await self._run_endpoint(endpoint, job)
+            finally:
+                self._queue.task_done()
+                if self._backlog() < self._queue.maxsize // 2:
+                    self._wakeup.set()
+
+    async def _run_endpoint(self, endpoint: str, job: Dict[str, Any]):
+        """Hold one slot on `endpoint` and deliver `job`, then any jobs parked behind it"""
+        self._endpoint_active[endpoint] = self._endpoint_active.get(endpoint, 0) + 1
+        try:
+            while job is not None:
+                try:
+                    await self._deliver(job)
+                except Exception as e:
+                    logger.error(f"[webhook:{job['webhook_id']}] Delivery error (suppressed): {e}")
+                finally:
+                    self._inflight.discard(job["id"])
+                parked = self._parked.get(endpoint)
+                job = parked.popleft() if parked else None
+                if parked is not None and not parked:
+                    del self._parked[endpoint]
+        finally:
+            self._endpoint_active[endpoint] -= 1
+            if not self._endpoint_active[endpoint]:
+                del self._endpoint_active[endpoint]
+
+    async def _deliver(self, job: Dict[str, Any]):
+        """One delivery attempt; schedules the retry in the outbox on failure"""
+        webhook_id = job["webhook_id"]
+        attempt = job["attempts"] + 1
+
+        status_code = None
+        response_text = None
+        error = None
+        started = time.perf_counter()
+        try:
+            response = await self._client.post(
+                job["url"],
+                json=job["payload"],
+                headers=build_webhook_headers(job["payload"], job["secret"]),
+            )
+            status_code = response.status_code
+            response_text = response.text
+            if response.is_error:
+                error = f"HTTP {status_code}: {response_text[:200]}"
+        except httpx.TimeoutException:
+            error = f"Request timed out after {WEBHOOK_TIMEOUT_SECONDS}s"
+        except httpx.RequestError as e:
+            error = f"Connection error: {str(e)}"
+        except Exception as e:
+            error = f"Unexpected error: {str(e)}"
+        latency_ms = (time.perf_counter() - started) * 1000
+
+        self._latencies_ms.append(latency_ms)
+        self.record_log(webhook_id, job["event_type"], job["payload"], status_code, response_text, attempt, error)
+        now = datetime.utcnow()
+
+        if error is None:
+            self._delivered += 1
+            self._lag_ms.append((now - job["created_at"]).total_seconds() * 1000)
+            self._updates.append(self._state(job["id"], OUTBOX_DELIVERED, attempt, now, delivered_at=now))
+            logger.info(f"[webhook:{webhook_id}] Delivered (status={status_code}, attempt={attempt}, {latency_ms:.0f}ms)")
+        elif attempt >= WEBHOOK_MAX_ATTEMPTS:
+            self._failed += 1
+            self._updates.append(self._state(job["id"], OUTBOX_FAILED, attempt, now, error))
+            logger.error(f"[webhook:{webhook_id}] All {WEBHOOK_MAX_ATTEMPTS} attempts failed. Last error: {error}")
+        else:
+            self._retried += 1
+            retry_at = now + timedelta(seconds=retry_delay_seconds(attempt))
+            self._updates.append(self._state(job["id"], OUTBOX_PENDING, attempt, retry_at, error))
+            logger.warning(f"[webhook:{webhook_id}] Attempt {attempt} failed: {error}")
+
+    # ------------------------------------------------------------------
+    # Metrics
+    # ------------------------------------------------------------------
+
+    def get_metrics(self) -> Dict[str, Any]:
+        """
+        Queue depth and delivery latency.
+
+        Returns:
+            Dict with outbox depth (pending/in_flight), local queue, counters,
+            request latency and end-to-end lag percentiles (ms)
+        """
+        depth = {OUTBOX_PENDING: 0, OUTBOX_IN_FLIGHT: 0}
+        db = self._session_factory()
+        try:
+            for status, count in db.query(WebhookOutbox.status, func.count(WebhookOutbox.id)).filter(
+                WebhookOutbox.status.in_(list(depth))
+            ).group_by(WebhookOutbox.status):
+                depth[status] = count
+        except Exception as e:
+            logger.warning(f"[WebhookDelivery] Failed to read outbox depth: {e}")
+        finally:
+            db.close()
+
+        return {
+            "running": self.running,
+            "workers": self.workers,
+            "endpoint_concurrency": self.endpoint_concurrency,
+            "http2": HAS_HTTP2,
+            "outbox": depth,
+            "local_queue": self._queue.qsize() if self._queue else 0,
+            "parked": sum(len(parked) for parked in self._parked.values()),
+            "buffered_logs": len(self._logs),
+            "enqueued": self._enqueued,
+            "delivered": self._delivered,
+            "failed": self._failed,
+            "retried": self._retried,
+            "latency_ms": _percentiles(self._latencies_ms),
+            "lag_ms": _percentiles(self._lag_ms),
+        }
+
+
+# Singleton instance
+_delivery_engine: Optional[WebhookDeliveryEngine] = None
+
+
+def get_delivery_engine() -> WebhookDeliveryEngine:
+    """Get or create the WebhookDeliveryEngine singleton (sized from env)"""
+    global _delivery_engine
+
+    if _delivery_engine is None:
+        _delivery_engine = WebhookDeliveryEngine(
+            workers=int(os.environ.get("WEBHOOK_WORKERS", DEFAULT_WORKERS)),
+            endpoint_concurrency=int(os.environ.get("WEBHOOK_ENDPOINT_CONCURRENCY", DEFAULT_ENDPOINT_CONCURRENCY)),
+        )
+
+    return _delivery_engine
@@ -6,7 +6,8 @@ This service handles webhook delivery with:
 2. Retry logic with exponential backoff (3 attempts)
 3. HMAC-SHA256 signature generation
 4. Delivery logging to database
-5. Fire-and-forget pattern for non-blocking delivery
+5. Durable fire-and-forget: events go to the webhook_outbox table and are
+   delivered by WebhookDeliveryEngine (see webhook_delivery.py)
 """
 import asyncio
 import logging
@@ -49,6 +50,35 @@ VALID_EVENT_TYPES = {
 }
 
 
+def build_webhook_headers(payload: Dict[str, Any], secret: Optional[str] = None) -> Dict[str, str]:
+    """Request headers for a webhook delivery (HMAC signature if secret is set)."""
+    headers = {
+        "Content-Type": "application/json",
+        "User-Agent": "DumontCloud-Webhook/1.0",
+    }
+    if secret:
+        headers["X-Webhook-Signature"] = generate_signature(payload, secret)
+    return headers
+
+
+def retry_delay_seconds(attempt: int) -> float:
+    """Exponential backoff after failed attempt N (2s, 4s, 8s...)."""
+    return min(
+        WEBHOOK_RETRY_MIN_SECONDS * (WEBHOOK_RETRY_MULTIPLIER ** (attempt - 1)),
+        WEBHOOK_RETRY_MAX_SECONDS
+    )
+
+
+def truncate_response(response: Optional[str]) -> Optional[str]:
+    """Truncate a response body for storage in WebhookLog."""
+    if not response:
+        return None
+    truncated = response[:MAX_RESPONSE_SIZE]
+    if len(response) > MAX_RESPONSE_SIZE:
+        truncated += "... (truncated)"
+    return truncated
+
+
 class WebhookDeliveryError(Exception):
     """Exception raised when webhook delivery fails after all retries."""
     pass
@@ -62,14 +92,10 @@ class WebhookService:
     - httpx AsyncClient with 10-second timeout
     - Tenacity retry decorator (3 attempts, exponential backoff)
     - HMAC-SHA256 signature in X-Webhook-Signature header
-    - Fire-and-forget with asyncio.create_task()
+    - Events persisted to the outbox and delivered by WebhookDeliveryEngine
     - All delivery attempts logged to WebhookLog table
     """
 
-    def __init__(self):
-        """Initialize the webhook service."""
-        self._pending_tasks: Dict[str, asyncio.Task] = {}
-
     def _get_db_session(self):
         """Get a database session."""
         return SessionLocal()
@@ -145,10 +171,13 @@ class WebhookService:
         response: Optional[str],
         attempt: int,
         error: Optional[str] = None
-    ) -> WebhookLog:
+    ) -> Optional[WebhookLog]:
         """
         Log a webhook delivery attempt to the database.
 
+        While the delivery engine runs on this event loop the row is
+        buffered and bulk-inserted by its flusher (returns None).
+
         Args:
             webhook_id: The webhook configuration ID
             event_type: The event type being delivered
@@ -159,23 +188,23 @@ class WebhookService:
             error: Error message if delivery failed
 
         Returns:
-            The created WebhookLog record
+            The created WebhookLog record (None if buffered)
         """
+        from src.services.webhook_delivery import get_delivery_engine
+
+        engine = get_delivery_engine()
+        if engine.client is not None:
+            engine.record_log(webhook_id, event_type, payload, status_code, response, attempt, error)
+            return None
+
         db = self._get_db_session()
         try:
-            # Truncate response if too large
-            truncated_response = None
-            if response:
-                truncated_response = response[:MAX_RESPONSE_SIZE]
-                if len(response) > MAX_RESPONSE_SIZE:
-                    truncated_response += "... (truncated)"
-
             log = WebhookLog(
                 webhook_id=webhook_id,
                 event_type=event_type,
                 payload=payload,
                 status_code=status_code,
-                response=truncated_response,
+                response=truncate_response(response),
                 attempt=attempt,
                 error=error,
                 created_at=datetime.utcnow(),
@@ -214,24 +243,23 @@ class WebhookService:
             httpx.HTTPStatusError: If response has 4xx/5xx status
             httpx.TimeoutException: If request times out
         """
-        headers = {
-            "Content-Type": "application/json",
-            "User-Agent": "DumontCloud-Webhook/1.0",
-        }
+        from src.services.webhook_delivery import get_delivery_engine
 
-        # Add HMAC signature if secret is provided
-        if secret:
-            signature = generate_signature(payload, secret)
-            headers["X-Webhook-Signature"] = signature
+        headers = build_webhook_headers(payload, secret)
 
-        async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT_SECONDS) as client:
+        # Reuse the engine's keep-alive client when on its event loop
+        client = get_delivery_engine().client
+        if client is not None:
             response = await client.post(url, json=payload, headers=headers)
-            response.raise_for_status()  # Raises HTTPStatusError on 4xx/5xx
+        else:
+            async with httpx.AsyncClient(timeout=WEBHOOK_TIMEOUT_SECONDS) as client:
+                response = await client.post(url, json=payload, headers=headers)
+        response.raise_for_status()  # Raises HTTPStatusError on 4xx/5xx
 
-            return {
-                "status_code": response.status_code,
-                "response": response.text,
-            }
+        return {
+            "status_code": response.status_code,
+            "response": response.text,
+        }
 
     async def send_webhook(
         self,
@@ -377,10 +405,7 @@ class WebhookService:
 
             # If not the last attempt, wait before retrying
             if attempt < WEBHOOK_MAX_ATTEMPTS:
-                wait_time = min(
-                    WEBHOOK_RETRY_MIN_SECONDS * (WEBHOOK_RETRY_MULTIPLIER ** (attempt - 1)),
-                    WEBHOOK_RETRY_MAX_SECONDS
-                )
+                wait_time = retry_delay_seconds(attempt)
                 logger.info(
                     f"[webhook:{webhook.id}] Waiting {wait_time}s before retry..."
                 )
@@ -400,44 +425,6 @@ class WebhookService:
             "attempt": WEBHOOK_MAX_ATTEMPTS,
         }
 
-    async def _deliver_webhook_with_logging(
-        self,
-        webhook: WebhookConfig,
-        event_type: str,
-        payload: Dict[str, Any]
-    ):
-        """
-        Deliver webhook with error handling for fire-and-forget pattern.
-
-        This method wraps send_webhook to catch all exceptions,
-        ensuring that webhook errors never propagate to the main application.
-        """
-        try:
-            # Check if webhook is still enabled before delivery
-            db = self._get_db_session()
-            try:
-                current_webhook = db.query(WebhookConfig).filter(
-                    WebhookConfig.id == webhook.id,
-                    WebhookConfig.enabled == True
-                ).first()
-
-                if not current_webhook:
-                    logger.info(
-                        f"[webhook:{webhook.id}] Skipping delivery - "
-                        "webhook disabled or deleted"
-                    )
-                    return
-            finally:
-                db.close()
-
-            await self.send_webhook(webhook, event_type, payload)
-
-        except Exception as e:
-            # Never let webhook errors propagate
-            logger.error(
-                f"[webhook:{webhook.id}] Delivery error (suppressed): {e}"
-            )
-
     async def trigger_webhooks(
         self,
         event_type: str,
@@ -448,14 +435,17 @@ class WebhookService:
         Trigger webhooks for an event (fire-and-forget).
 
         This method finds all active webhooks subscribed to the event type
-        and delivers them in parallel without blocking. Errors are logged
-        but never propagated.
+        and writes one outbox row per webhook; WebhookDeliveryEngine
+        delivers them (with retries) without blocking the caller. Pending
+        deliveries survive restarts. Errors are logged but never propagated.
 
         Args:
             event_type: The event type (e.g., 'instance.started')
             data: The event data to include in the payload
             user_id: Optional user ID to filter webhooks
         """
+        from src.services.webhook_delivery import get_delivery_engine
+
         if event_type not in VALID_EVENT_TYPES:
             logger.warning(f"Invalid event type: {event_type}")
             return
@@ -467,30 +457,28 @@ class WebhookService:
             "timestamp": datetime.utcnow().isoformat() + "Z",
         }
 
-        # Find all active webhooks for this event
-        webhooks = self.get_active_webhooks_for_event(event_type, user_id)
-
-        if not webhooks:
-            logger.debug(f"No webhooks subscribed to event: {event_type}")
-            return
+        try:
+            # Find all active webhooks for this event (off the event loop)
+            webhooks = await asyncio.to_thread(
+                self.get_active_webhooks_for_event, event_type, user_id
+            )
 
-        logger.info(
-            f"Triggering {len(webhooks)} webhook(s) for event: {event_type}"
-        )
+            if not webhooks:
+                logger.debug(f"No webhooks subscribed to event: {event_type}")
+                return
 
-        # Fire-and-forget: create tasks without awaiting
-        for webhook in webhooks:
-            task = asyncio.create_task(
-                self._deliver_webhook_with_logging(webhook, event_type, payload)
+            engine = get_delivery_engine()
+            await asyncio.to_thread(
+                engine.enqueue, [webhook.id for webhook in webhooks], event_type, payload
             )
-            # Store task reference to prevent garbage collection
-            task_id = f"{webhook.id}_{event_type}_{datetime.utcnow().timestamp()}"
-            self._pending_tasks[task_id] = task
+            engine.notify()
 
-            # Clean up completed tasks
-            task.add_done_callback(
-                lambda t, tid=task_id: self._pending_tasks.pop(tid, None)
+            logger.info(
+                f"Queued {len(webhooks)} webhook(s) for event: {event_type}"
             )
+        except Exception as e:
+            # Never let webhook errors propagate
+            logger.error(f"Failed to queue webhooks for {event_type} (suppressed): {e}")
 
     async def test_webhook(
         self,
@@ -6,15 +6,21 @@ Sistema de snapshot otimizado para workspaces de ML com:
 - Chunks de 64 MB para download/descompressão paralela
 - Descompressão GPU ultra-rápida via nvCOMP
 - Formato .dumont com resume e verificação
+- Snapshots incrementais deduplicados (chunks por conteúdo)
 """
 
 from .snapshot_service import SnapshotService
 from .compression import HybridCompressor, DumontArchive
+from .chunk_store import ChunkStore, ChunkIndex, LocalChunkBackend, S3ChunkBackend
 
 __all__ = [
     'SnapshotService',
     'HybridCompressor',
     'DumontArchive',
+    'ChunkStore',
+    'ChunkIndex',
+    'LocalChunkBackend',
+    'S3ChunkBackend',
 ]
 
 __version__ = '1.0.0'
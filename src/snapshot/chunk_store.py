@@ -0,0 +1,546 @@
+"""
+Content-Addressed Chunk Store - Deduplicated incremental snapshots
+
+Workspaces are split with content-defined chunking (see compression/cdc.py)
+and every chunk is stored once, under the hash of its content:
+
+    chunks/<hash[:2]>/<hash>      [compressor_id: 1 byte][transforms][compressed data]
+    manifests/<snapshot_id>.json  (LZ4) files -> ordered list of chunk hashes
+
+The high bit of the compressor byte flags a transform chain (e.g. byte
+grouping for FP16 weights): it follows as [length: 1 byte][names, comma
+separated]. Chunks without the flag carry the compressed data right away.
+
+A new snapshot only uploads chunks the store has never seen. A local SQLite
+index answers "does this store already have this chunk?" without a
+round-trip to object storage (entries are keyed by the backend's identity,
+so one index can serve several stores), and remembers the chunk list of each file by (size, mtime),
+so unchanged files are not even re-read. Snapshot bytes and time therefore
+scale with what changed, not with the workspace size.
+"""
+
+import json
+import os
+import sqlite3
+import sys
+import threading
+import time
+from dataclasses import dataclass
+from pathlib import Path
+from typing import Callable, Iterable, Iterator, List, Optional, Sequence, Set, Tuple
+
+try:
+    import lz4.frame
+    HAS_LZ4 = True
+except ImportError:
+    HAS_LZ4 = False
+
+from .compression.cdc import ContentDefinedChunker, get_hasher, get_hasher_by_name
+from .compression.hybrid_compressor import Compressor, HybridCompressor
+from .compression.pipeline import ChunkPipeline
+
+MANIFEST_VERSION = 1
+DEFAULT_INDEX_PATH = '~/.dumont/chunk_index.db'
+CHUNK_TRANSFORMS_FLAG = 0x80
+
+# pip package of each codec, for the error when a chunk needs a missing one
+CODEC_PACKAGES = {
+    Compressor.LZ4: 'lz4',
+    Compressor.LZ4_HC: 'lz4',
+    Compressor.ZSTD: 'zstandard',
+}
+
+
+# =============================================================================
+# Backends
+# =============================================================================
+
+class LocalChunkBackend:
+    """Stores objects as files under a root directory (or a mounted bucket)"""
+
+    def __init__(self, root: str):
+        self.root = Path(root)
+        self.root.mkdir(parents=True, exist_ok=True)
+        self.identity = f"file://{self.root.resolve()}"
+
+    def put(self, key: str, data: bytes):
+        path = self.root / key
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(path.name + '.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(data)
+        os.replace(tmp, path)
+
+    def get(self, key: str) -> bytes:
+        with open(self.root / key, 'rb') as f:
+            return f.read()
+
+    def exists(self, key: str) -> bool:
+        return (self.root / key).exists()
+
+
+class S3ChunkBackend:
+    """Stores objects in an S3-compatible bucket (B2, R2, S3, Wasabi)"""
+
+    def __init__(
+        self,
+        bucket: str,
+        endpoint: Optional[str] = None,
+        access_key: Optional[str] = None,
+        secret_key: Optional[str] = None,
+        prefix: str = '',
+        region: str = 'auto',
+    ):
+        try:
+            import boto3
+        except ImportError:
+            raise RuntimeError("boto3 not installed. Run: pip install boto3")
+
+        self.bucket = bucket
+        self.prefix = prefix.rstrip('/') + '/' if prefix else ''
+        self.identity = f"s3://{endpoint or ''}/{bucket}/{self.prefix}"
+        self._client = boto3.client(
+            's3',
+            endpoint_url=endpoint,
+            aws_access_key_id=access_key,
+            aws_secret_access_key=secret_key,
+            region_name=region,
+        )
+
+    def put(self, key: str, data: bytes):
+        self._client.put_object(Bucket=self.bucket, Key=self.prefix + key, Body=data)
+
+    def get(self, key: str) -> bytes:
+        response = self._client.get_object(Bucket=self.bucket, Key=self.prefix + key)
+        return response['Body'].read()
+
+    def exists(self, key: str) -> bool:
+        try:
+            self._client.head_object(Bucket=self.bucket, Key=self.prefix + key)
+            return True
+        except Exception:
+            return False
+
+
+# =============================================================================
+# Local index
+# =============================================================================
+
+class ChunkIndex:
+    """
+    Local SQLite index of chunks known to be in each store.
+
+    Chunks are keyed by (store, hash), store being the backend's identity:
+    a chunk uploaded to one bucket says nothing about another. Also caches each file's chunk list keyed by (root, path, size, mtime_ns),
+    so unchanged files are skipped without reading them.
+    """
+
+    def __init__(self, path: str):
+        """
+        Initialize chunk index.
+
+        Args:
+            path: SQLite database file (":memory:" for tests)
+        """
+        if path != ':memory:':
+            Path(path).parent.mkdir(parents=True, exist_ok=True)
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        if path != ':memory:':
+            self._db.execute('PRAGMA journal_mode=WAL')
+        columns = [row[1] for row in self._db.execute('PRAGMA table_info(chunks)')]
+        if columns and 'store' not in columns:
+            # Index from before per-store keys: which store those chunks went
+            # to is unknown, so forget them (they are re-uploaded once)
+            self._db.execute('DROP TABLE chunks')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS chunks (
+                store TEXT NOT NULL,
+                hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                stored_size INTEGER NOT NULL,
+                created_at REAL NOT NULL,
+                PRIMARY KEY (store, hash)
+            );
+            CREATE TABLE IF NOT EXISTS files (
+                root TEXT NOT NULL,
+                path TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                mtime_ns INTEGER NOT NULL,
+                hash_algo TEXT NOT NULL,
+                chunks TEXT NOT NULL,
+                PRIMARY KEY (root, path)
+            );
+        ''')
+        self._db.commit()
+
+    def has(self, store: str, digest: str) -> bool:
+        with self._lock:
+            row = self._db.execute('SELECT 1 FROM chunks WHERE store = ? AND hash = ?', (store, digest)).fetchone()
+        return row is not None
+
+    def missing(self, store: str, digests: Iterable[str]) -> Set[str]:
+        """Subset of digests not indexed for `store` (batched lookups)"""
+        digests = list(set(digests))
+        found = set()
+        with self._lock:
+            for i in range(0, len(digests), 500):
+                batch = digests[i:i + 500]
+                placeholders = ','.join('?' * len(batch))
+                rows = self._db.execute(
+                    f'SELECT hash FROM chunks WHERE store = ? AND hash IN ({placeholders})', [store] + batch
+                )
+                found.update(row[0] for row in rows)
+        return set(digests) - found
+
+    def add(self, store: str, digest: str, size: int, stored_size: int):
+        with self._lock:
+            self._db.execute(
+                'INSERT OR IGNORE INTO chunks (store, hash, size, stored_size, created_at) VALUES (?, ?, ?, ?, ?)',
+                (store, digest, size, stored_size, time.time()),
+            )
+            self._db.commit()
+
+    def get_file(self, root: str, path: str, size: int, mtime_ns: int, hash_algo: str) -> Optional[List[str]]:
+        """Cached chunk list for an unchanged file, or None"""
+        with self._lock:
+            row = self._db.execute(
+                'SELECT chunks FROM files WHERE root = ? AND path = ? AND size = ? AND mtime_ns = ? AND hash_algo = ?',
+                (root, path, size, mtime_ns, hash_algo),
+            ).fetchone()
+        return json.loads(row[0]) if row else None
+
+    def put_files(self, root: str, entries: List[Tuple[str, int, int, str, List[str]]]):
+        """Record (path, size, mtime_ns, hash_algo, chunks) for many files at once"""
+        with self._lock:
+            self._db.executemany(
+                'INSERT OR REPLACE INTO files (root, path, size, mtime_ns, hash_algo, chunks) VALUES (?, ?, ?, ?, ?, ?)',
+                [(root, p, s, m, a, json.dumps(c)) for p, s, m, a, c in entries],
+            )
+            self._db.commit()
+
+    def close(self):
+        self._db.close()
+
+
+# =============================================================================
+# Store
+# =============================================================================
+
+@dataclass
+class DedupSnapshotStats:
+    """Result of a deduplicated snapshot"""
+    snapshot_id: str
+    num_files: int = 0
+    files_unchanged: int = 0
+    chunks_total: int = 0
+    chunks_new: int = 0
+    bytes_total: int = 0
+    bytes_new: int = 0          # Original bytes of new chunks
+    bytes_uploaded: int = 0     # Compressed bytes actually uploaded
+    elapsed_seconds: float = 0.0
+
+    def to_dict(self) -> dict:
+        return {
+            'snapshot_id': self.snapshot_id,
+            'num_files': self.num_files,
+            'files_unchanged': self.files_unchanged,
+            'chunks_total': self.chunks_total,
+            'chunks_new': self.chunks_new,
+            'bytes_total': self.bytes_total,
+            'bytes_new': self.bytes_new,
+            'bytes_uploaded': self.bytes_uploaded,
+            'dedup_ratio': round(self.bytes_total / max(1, self.bytes_new), 2),
+            'elapsed_seconds': self.elapsed_seconds,
+        }
+
+
+class ChunkStore:
+    """
+    Content-addressed, deduplicated snapshot store.
+
+    Usage:
+        store = ChunkStore(LocalChunkBackend("/mnt/b2/snapshots"), ChunkIndex("~/.dumont/index.db"))
+        stats = store.create_snapshot("/workspace", "ws-1700000000")
+        store.restore_snapshot("ws-1700000000", "/workspace")
+    """
+
+    def __init__(
+        self,
+        backend,
+        index: ChunkIndex,
+        chunker: Optional[ContentDefinedChunker] = None,
+        compressor: Optional[HybridCompressor] = None,
+        workers: Optional[int] = None,
+        max_inflight_chunks: Optional[int] = None,
+    ):
+        """
+        Initialize chunk store.
+
+        Args:
+            backend: LocalChunkBackend / S3ChunkBackend (put/get/exists, identity)
+            index: Local ChunkIndex used for dedup lookups
+            chunker: Content-defined chunker (default: 1/4/16 MB min/avg/max)
+            compressor: Compressor whose strategies are used per file type
+            workers: Threads hashing/compressing/uploading chunks (default: all CPUs)
+            max_inflight_chunks: Chunks held in memory at once (default: 2 x workers)
+        """
+        self.backend = backend
+        self.index = index
+        self.chunker = chunker or ContentDefinedChunker()
+        self._strategies = (compressor or HybridCompressor()).strategies
+        self._pipeline = ChunkPipeline(workers=workers, max_inflight=max_inflight_chunks)
+        self.hash_algo, self._hash = get_hasher()
+        self._thread_local = threading.local()
+
+    @staticmethod
+    def chunk_key(digest: str) -> str:
+        return f"chunks/{digest[:2]}/{digest}"
+
+    @staticmethod
+    def manifest_key(snapshot_id: str) -> str:
+        return f"manifests/{snapshot_id}.json"
+
+    def _worker_compressor(self) -> HybridCompressor:
+        compressor = getattr(self._thread_local, 'compressor', None)
+        if compressor is None:
+            compressor = HybridCompressor(strategies=self._strategies)
+            self._thread_local.compressor = compressor
+        return compressor
+
+    def _store_chunk(self, item: Tuple[bytes, str]) -> Tuple[str, int, int]:
+        """Hash a chunk and upload it if new (pipeline worker)"""
+        data, filepath = item
+        digest = self._hash(data)
+        if self.index.has(self.backend.identity, digest):
+            return digest, len(data), 0
+
+        compressor = self._worker_compressor()
+        compressed, codec, meta = compressor.compress_block(data, filepath)
+        payload = _encode_chunk(compressor.get_compressor_id(codec), meta.get('transforms', ()), compressed)
+        self.backend.put(self.chunk_key(digest), payload)
+        self.index.add(self.backend.identity, digest, len(data), len(payload))
+        return digest, len(data), len(payload)
+
+    def _store_file_chunk(self, item: Tuple[bytes, str, dict]) -> Tuple[dict, Tuple[str, int, int]]:
+        data, filepath, entry = item
+        return entry, self._store_chunk((data, filepath))
+
+    def create_snapshot(
+        self,
+        source_dir: str,
+        snapshot_id: str,
+        progress_callback: Optional[Callable[[str, int, int], None]] = None,
+    ) -> DedupSnapshotStats:
+        """
+        Snapshot a directory, uploading only chunks not already in the store.
+
+        Args:
+            source_dir: Directory to snapshot
+            snapshot_id: Name of the snapshot (manifest key)
+            progress_callback: Optional callback(file_path, file_index, total_files)
+
+        Returns:
+            DedupSnapshotStats
+        """
+        start_time = time.time()
+        source = Path(source_dir).resolve()
+        if not source.exists():
+            raise FileNotFoundError(f"Source directory not found: {source_dir}")
+
+        from .compression.dumont_format import DumontArchive
+        all_files = DumontArchive._collect_files(source)
+        stats = DedupSnapshotStats(snapshot_id=snapshot_id, num_files=len(all_files))
+
+        entries: List[dict] = []
+        changed: List[Tuple[str, int, int, str, List[str]]] = []
+
+        def _iter_chunks() -> Iterator[Tuple[bytes, str, dict]]:
+            for file_idx, fpath in enumerate(all_files):
+                if progress_callback:
+                    progress_callback(str(fpath), file_idx, len(all_files))
+
+                stat = fpath.stat()
+                entry = {
+                    'path': str(fpath.relative_to(source)),
+                    'size': stat.st_size,
+                    'mode': stat.st_mode,
+                    'mtime': stat.st_mtime,
+                    'chunks': [],
+                }
+                entries.append(entry)
+
+                cached = self.index.get_file(str(source), entry['path'], stat.st_size, stat.st_mtime_ns, self.hash_algo)
+                if cached is not None and not self.index.missing(self.backend.identity, cached):
+                    entry['chunks'] = cached
+                    stats.files_unchanged += 1
+                    continue
+
+                changed.append((entry['path'], stat.st_size, stat.st_mtime_ns, self.hash_algo, entry['chunks']))
+                with open(fpath, 'rb') as f:
+                    for data in self.chunker.split_stream(f):
+                        yield data, str(fpath), entry
+
+        # Results come back in chunk order, so each file's hash list stays ordered
+        for entry, (digest, size, uploaded) in self._pipeline.map(self._store_file_chunk, _iter_chunks()):
+            entry['chunks'].append(digest)
+            if uploaded:
+                stats.chunks_new += 1
+                stats.bytes_new += size
+                stats.bytes_uploaded += uploaded
+
+        for entry in entries:
+            stats.chunks_total += len(entry['chunks'])
+            stats.bytes_total += entry['size']
+
+        manifest = {
+            'version': MANIFEST_VERSION,
+            'snapshot_id': snapshot_id,
+            'created_at': time.time(),
+            'hash_algo': self.hash_algo,
+            'files': entries,
+        }
+        self.backend.put(self.manifest_key(snapshot_id), _encode_manifest(manifest))
+        self.index.put_files(str(source), changed)
+
+        stats.elapsed_seconds = time.time() - start_time
+        return stats
+
+    def load_manifest(self, snapshot_id: str) -> dict:
+        """Read a snapshot manifest from the store"""
+        return _decode_manifest(self.backend.get(self.manifest_key(snapshot_id)))
+
+    def _fetch_chunk(self, digest: str) -> bytes:
+        """Download and decompress one chunk (pipeline worker)"""
+        payload = self.backend.get(self.chunk_key(digest))
+        compressor_id, transforms, offset = _decode_chunk_header(payload)
+        compressor = self._worker_compressor()
+        codec = compressor.get_compressor_from_id(compressor_id)
+        # ZipNN chunks are left to decompress(), which falls back to LZ4
+        if codec in CODEC_PACKAGES and not compressor.is_available(codec):
+            raise RuntimeError(
+                f"Chunk {digest} is compressed with {codec.value}, which is not installed on this machine. "
+                f"Run: pip install {CODEC_PACKAGES[codec]}"
+            )
+        return compressor.decompress_block(payload[offset:], codec, {'transforms': transforms})
+
+    def restore_snapshot(self, snapshot_id: str, target_dir: str, verify: bool = True) -> dict:
+        """
+        Restore a deduplicated snapshot.
+
+        Args:
+            snapshot_id: Snapshot to restore
+            target_dir: Directory to restore to
+            verify: Check every chunk against its content hash
+
+        Returns:
+            Dict with restore statistics
+        """
+        start_time = time.time()
+        manifest = self.load_manifest(snapshot_id)
+        hasher = get_hasher_by_name(manifest['hash_algo']) if verify else None
+        target = Path(target_dir)
+
+        # One pipeline for the whole snapshot: chunks come back in manifest
+        # order and are consumed file by file, so small files do not each
+        # pay for a thread pool
+        digests = (digest for entry in manifest['files'] for digest in entry['chunks'])
+        chunks = self._pipeline.map(self._fetch_chunk, digests)
+
+        bytes_written = 0
+        try:
+            for entry in manifest['files']:
+                file_path = target / entry['path']
+                file_path.parent.mkdir(parents=True, exist_ok=True)
+                with open(file_path, 'wb') as f:
+                    for digest in entry['chunks']:
+                        data = next(chunks)
+                        if hasher and hasher(data) != digest:
+                            raise ValueError(f"Chunk {digest} content hash mismatch in {entry['path']}")
+                        f.write(data)
+                        bytes_written += len(data)
+                os.chmod(file_path, entry['mode'])
+                os.utime(file_path, (entry['mtime'], entry['mtime']))
+        finally:
+            chunks.close()
+
+        elapsed = time.time() - start_time
+        return {
+            'success': True,
+            'snapshot_id': snapshot_id,
+            'files_restored': len(manifest['files']),
+            'bytes_original': bytes_written,
+            'elapsed_seconds': elapsed,
+        }
+
+
+def _encode_chunk(compressor_id: int, transforms: Sequence[str], compressed: bytes) -> bytes:
+    if not transforms:
+        return bytes([compressor_id]) + compressed
+    names = ','.join(transforms).encode('ascii')
+    return bytes([compressor_id | CHUNK_TRANSFORMS_FLAG, len(names)]) + names + compressed
+
+
+def _decode_chunk_header(payload: bytes) -> Tuple[int, List[str], int]:
+    """(compressor_id, transforms, offset of the compressed data) of a stored chunk"""
+    if not payload[0] & CHUNK_TRANSFORMS_FLAG:
+        return payload[0], [], 1
+    end = 2 + payload[1]
+    return payload[0] & ~CHUNK_TRANSFORMS_FLAG, payload[2:end].decode('ascii').split(','), end
+
+
+def _encode_manifest(manifest: dict) -> bytes:
+    data = json.dumps(manifest).encode('utf-8')
+    return lz4.frame.compress(data) if HAS_LZ4 else data
+
+
+def _decode_manifest(data: bytes) -> dict:
+    if HAS_LZ4 and data[:4] == b'\x04\x22\x4d\x18':  # LZ4 frame magic
+        data = lz4.frame.decompress(data)
+    return json.loads(data.decode('utf-8'))
+
+
+# =============================================================================
+# Remote entry point
+# =============================================================================
+
+def _backend_from_params(params: dict):
+    """Build the backend described in the remote job params"""
+    if params.get('type') == 'local':
+        return LocalChunkBackend(params['root'])
+    # Credentials come from the environment of the SSH session
+    return S3ChunkBackend(
+        bucket=params['bucket'],
+        endpoint=params.get('endpoint'),
+        access_key=os.environ.get('B2_KEY_ID') or None,
+        secret_key=os.environ.get('B2_APPLICATION_KEY') or None,
+        prefix=params.get('prefix', ''),
+    )
+
+
+def run_remote(params_json: str) -> None:
+    """
+    Entry point on the GPU machine (see remote.py): prints one JSON line.
+
+    params: {"action": "create" | "restore", "backend": {...}, "snapshot_id",
+    "source" / "target", optional "index", "workers" and "chunker" sizes}
+    """
+    try:
+        params = json.loads(params_json)
+        chunker = ContentDefinedChunker(**params['chunker']) if params.get('chunker') else None
+        index = ChunkIndex(os.path.expanduser(params.get('index') or DEFAULT_INDEX_PATH))
+        try:
+            store = ChunkStore(_backend_from_params(params['backend']), index, chunker=chunker, workers=params.get('workers'))
+            if params['action'] == 'create':
+                result = store.create_snapshot(params['source'], params['snapshot_id']).to_dict()
+            elif params['action'] == 'restore':
+                result = store.restore_snapshot(params['snapshot_id'], params['target'])
+            else:
+                raise ValueError(f"Unknown action: {params['action']}")
+        finally:
+            index.close()
+        print(json.dumps({'success': True, **result}))
+    except Exception as e:
+        print(json.dumps({'error': str(e)}))
+        sys.exit(1)
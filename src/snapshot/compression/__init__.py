@@ -5,17 +5,28 @@ Provides:
 - HybridCompressor: Selects best compressor per file type
 - DumontArchive: Read/write .dumont format with chunks
 - ChunkManager: Splits data into 64MB chunks
+- ChunkPipeline: Ordered, bounded multi-threaded chunk processing
+- ContentDefinedChunker: Rolling-hash chunking for deduplication
+- Transforms: Byte grouping / bitshuffle before the codec (float weights)
+- Sparse: Hole / zero-page detection, stored as payload-free extents
+- LocalRangeReader / MmapRangeReader / HTTPRangeReader: Random access to local or remote archives
 - CompressionMethod: Named compression methods
 
 Methods:
 - hybrid_v1: Hybrid compression (LZ4 + ZipNN by file type)
+- adaptive_v1: Codec chosen per chunk from sampled data
+- hybrid_zstd: zstd with per-archive trained dictionaries for code/text
 - lz4_fast: Fast LZ4 for GPU decompression
 - none: Passthrough (just chunking, no compression)
 """
 
-from .hybrid_compressor import HybridCompressor, CompressionStrategy, FileCategory, Compressor
+from .hybrid_compressor import HybridCompressor, CompressionStrategy, FileCategory, Compressor, AdaptiveConfig
 from .dumont_format import DumontArchive, DumontHeader, ChunkInfo
 from .chunk_manager import ChunkManager
+from .pipeline import ChunkPipeline
+from .cdc import ContentDefinedChunker
+from .transforms import apply_transforms, invert_transforms, register_transform
+from .range_reader import LocalRangeReader, MmapRangeReader, HTTPRangeReader, open_range_reader
 from .methods import (
     CompressionMethod,
     CompressionMethodID,
@@ -31,10 +42,20 @@ __all__ = [
     'CompressionStrategy',
     'FileCategory',
     'Compressor',
+    'AdaptiveConfig',
     'DumontArchive',
     'DumontHeader',
     'ChunkInfo',
     'ChunkManager',
+    'ChunkPipeline',
+    'ContentDefinedChunker',
+    'apply_transforms',
+    'invert_transforms',
+    'register_transform',
+    'LocalRangeReader',
+    'MmapRangeReader',
+    'HTTPRangeReader',
+    'open_range_reader',
     'CompressionMethod',
     'CompressionMethodID',
     'get_method',
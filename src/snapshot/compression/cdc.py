@@ -0,0 +1,204 @@
+"""
+Content-Defined Chunking (CDC) - Shift-resistant chunk boundaries
+
+Splits a byte stream where a rolling gear hash hits a boundary pattern,
+so inserting or changing bytes only moves the boundaries around the edit.
+Unchanged regions of a workspace produce the same chunks (and hashes) from
+one snapshot to the next, which is what makes deduplication work.
+
+The 32-bit gear hash h_i = (h_{i-1} << 1) + GEAR[b_i] only depends on the
+last 32 bytes, so it is computed for a whole block at once with NumPy (5
+prefix-doubling passes) instead of a Python loop per byte.
+
+Hashing: BLAKE3 > xxh3-128 > BLAKE2b, whichever is installed.
+"""
+
+import hashlib
+from typing import BinaryIO, Callable, Iterator, List, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+try:
+    import blake3
+    HAS_BLAKE3 = True
+except ImportError:
+    HAS_BLAKE3 = False
+
+try:
+    import xxhash
+    HAS_XXHASH = True
+except ImportError:
+    HAS_XXHASH = False
+
+
+# Defaults tuned for ML workspaces (checkpoints, weights, code)
+DEFAULT_MIN_SIZE = 1 * 1024 * 1024   # 1 MB
+DEFAULT_AVG_SIZE = 4 * 1024 * 1024   # 4 MB
+DEFAULT_MAX_SIZE = 16 * 1024 * 1024  # 16 MB
+READ_BLOCK_SIZE = 1 * 1024 * 1024    # 1 MB (keeps NumPy temporaries in cache)
+
+GEAR_WINDOW = 32
+_HASH_MASK = 0xFFFFFFFF
+_GEAR_SEED = 0x64756D6F6E74  # "dumont" - fixed so boundaries are stable across hosts
+
+
+def _gear_table() -> List[int]:
+    """256 pseudo-random 32-bit values (deterministic)"""
+    table = []
+    state = _GEAR_SEED
+    for _ in range(256):
+        # splitmix64
+        state = (state + 0x9E3779B97F4A7C15) & 0xFFFFFFFFFFFFFFFF
+        z = state
+        z = ((z ^ (z >> 30)) * 0xBF58476D1CE4E5B9) & 0xFFFFFFFFFFFFFFFF
+        z = ((z ^ (z >> 27)) * 0x94D049BB133111EB) & 0xFFFFFFFFFFFFFFFF
+        table.append((z ^ (z >> 31)) & _HASH_MASK)
+    return table
+
+
+GEAR = _gear_table()
+
+
+def get_hasher() -> Tuple[str, Callable[[bytes], str]]:
+    """
+    Best available content hash.
+
+    Returns:
+        Tuple of (algorithm_name, hash_function -> hex digest)
+    """
+    if HAS_BLAKE3:
+        return 'blake3', lambda data: blake3.blake3(data).hexdigest()
+    if HAS_XXHASH:
+        return 'xxh3_128', lambda data: xxhash.xxh3_128_hexdigest(data)
+    return 'blake2b', lambda data: hashlib.blake2b(data, digest_size=32).hexdigest()
+
+
+def get_hasher_by_name(name: str) -> Callable[[bytes], str]:
+    """Hash function for a given algorithm name (as stored in manifests)"""
+    if name == 'blake3':
+        if not HAS_BLAKE3:
+            raise RuntimeError("blake3 not installed. Run: pip install blake3")
+        return lambda data: blake3.blake3(data).hexdigest()
+    if name == 'xxh3_128':
+        if not HAS_XXHASH:
+            raise RuntimeError("xxhash not installed. Run: pip install xxhash")
+        return lambda data: xxhash.xxh3_128_hexdigest(data)
+    if name == 'blake2b':
+        return lambda data: hashlib.blake2b(data, digest_size=32).hexdigest()
+    raise ValueError(f"Unknown hash algorithm: {name}")
+
+
+class ContentDefinedChunker:
+    """
+    Splits streams into variable-size, content-defined chunks.
+
+    Usage:
+        chunker = ContentDefinedChunker()
+        with open("model.safetensors", "rb") as f:
+            for chunk in chunker.split_stream(f):
+                store.put(chunk)
+
+    Memory is bounded by max_size + READ_BLOCK_SIZE.
+    """
+
+    def __init__(
+        self,
+        min_size: int = DEFAULT_MIN_SIZE,
+        avg_size: int = DEFAULT_AVG_SIZE,
+        max_size: int = DEFAULT_MAX_SIZE,
+    ):
+        """
+        Initialize chunker.
+
+        Args:
+            min_size: No boundary before this many bytes
+            avg_size: Target average chunk size (power of two recommended)
+            max_size: Boundary forced at this size
+        """
+        if not (0 < min_size <= avg_size <= max_size):
+            raise ValueError("Expected 0 < min_size <= avg_size <= max_size")
+        self.min_size = min_size
+        self.avg_size = avg_size
+        self.max_size = max_size
+
+        # Boundary when the top `bits` bits of the hash are zero
+        # (low bits of a gear hash only see the last few bytes)
+        bits = max(1, (avg_size - min_size).bit_length() - 1) if avg_size > min_size else 1
+        self._mask = ((1 << bits) - 1) << (GEAR_WINDOW - bits)
+
+        if HAS_NUMPY:
+            self._gear = np.array(GEAR, dtype=np.uint32)
+
+    def _candidates(self, history: bytes, block: bytes) -> List[int]:
+        """Offsets in block (inclusive end of chunk) where the hash hits the mask"""
+        if HAS_NUMPY:
+            window = np.frombuffer(history + block, dtype=np.uint8)
+            # Missing history (start of stream) contributes nothing, like h = 0
+            pad = np.zeros(GEAR_WINDOW - 1 - len(history), dtype=np.uint32)
+            h = np.concatenate((pad, self._gear[window]))
+            # Prefix doubling: after step m, h[i] = sum_{k<2m} GEAR[b[i-k]] << k
+            m = 1
+            while m < GEAR_WINDOW:
+                h[m:] += h[:-m] << np.uint32(m)
+                m *= 2
+            h = h[GEAR_WINDOW - 1:]
+            return np.nonzero((h & np.uint32(self._mask)) == 0)[0].tolist()
+
+        # Pure Python fallback (slow, but dependency free)
+        h = 0
+        for b in history[-GEAR_WINDOW:]:
+            h = ((h << 1) + GEAR[b]) & _HASH_MASK
+        result = []
+        for i, b in enumerate(block):
+            h = ((h << 1) + GEAR[b]) & _HASH_MASK
+            if h & self._mask == 0:
+                result.append(i)
+        return result
+
+    def split_stream(self, stream: BinaryIO) -> Iterator[bytes]:
+        """
+        Split a stream into content-defined chunks.
+
+        Args:
+            stream: Binary stream to read from
+
+        Yields:
+            Chunk bytes (last chunk may be shorter than min_size)
+        """
+        pending = bytearray()
+        candidates: List[int] = []  # Cut positions (exclusive end) in pending
+        history = b''
+
+        while True:
+            block = stream.read(READ_BLOCK_SIZE)
+            if block:
+                base = len(pending)
+                candidates.extend(base + i + 1 for i in self._candidates(history, block))
+                history = (history + block)[-(GEAR_WINDOW - 1):]
+                pending += block
+
+            # Emit every chunk whose boundary is already known
+            while True:
+                cut = next((c for c in candidates if c >= self.min_size), None)
+                if cut is None or cut > self.max_size:
+                    if len(pending) >= self.max_size:
+                        cut = self.max_size
+                    elif not block and pending:
+                        cut = len(pending)
+                    else:
+                        break
+                yield bytes(pending[:cut])
+                del pending[:cut]
+                candidates = [c - cut for c in candidates if c > cut]
+
+            if not block:
+                return
+
+    def split_bytes(self, data: bytes) -> Iterator[bytes]:
+        """Split in-memory bytes into content-defined chunks"""
+        import io
+        return self.split_stream(io.BytesIO(data))
@@ -3,21 +3,34 @@ Dumont Archive Format (.dumont)
 
 Binary format optimized for:
 - Chunked storage (64 MB default)
-- Independent chunk decompression
-- Resume support
+- Independent chunk decompression (v2+)
+- Resume support and random access by byte range
+- Solid blocks: small files of one category packed into shared chunks (v3)
+- Adaptive codec choice per chunk, recorded in the manifest
+- zstd chunks with per-archive trained dictionaries (v4)
+- Byte-grouping / bitshuffle transforms for float weights, per chunk (v4)
+- Sparse files: holes and zero pages stored as payload-free extents (v4)
 - GPU-friendly decompression
 
 Structure:
     [Header 512 bytes]
-    [Chunk Index]
-    [File Manifest (LZ4 compressed)]
     [Chunk Data...]
+    [zstd Dictionaries...]   <- optional, listed in the manifest
+    [Chunk Index]            <- trailer, located by header.index_offset
+    [File Manifest (LZ4 compressed)]
+
+Archives are written in a single streaming pass: each chunk is compressed
+and flushed as soon as it is read, so peak memory is bounded by the chunk
+size, not by the workspace size. Older archives that store the chunk index
+right after the header (index_offset == 0) are still readable.
 """
 
 import struct
 import json
 import os
-from dataclasses import dataclass, field
+import threading
+import fnmatch
+from dataclasses import dataclass, field, replace
 from typing import List, Dict, Optional, BinaryIO, Iterator, Tuple
 from pathlib import Path
 import zlib
@@ -28,14 +41,40 @@ try:
 except ImportError:
     HAS_LZ4 = False
 
-from .hybrid_compressor import Compressor
+from .hybrid_compressor import (
+    DICT_SAMPLE_BUDGET,
+    DICT_SAMPLE_MAX_FILE,
+    DEFAULT_ZSTD_LEVEL,
+    AdaptiveConfig,
+    Compressor,
+    FileCategory,
+    train_zstd_dictionary,
+)
+from .pipeline import ChunkPipeline
+from .range_reader import open_range_reader, release_view
+from .sparse import ZERO_PAGE_SIZE, expand_zeros, iter_data_extents, read_sparse_block
 
 
 # Constants
 MAGIC = b"DUMONT01"
-VERSION = 1
+VERSION = 4
+# v1: each file compressed as one stream, sliced into chunks (estimated sizes)
+# v2: each chunk is a self-contained frame with its exact original size
+# v3: small files may share a chunk, located by FileEntry.offset
+#     (archives without shared chunks are still written as v2)
+# v4: zstd chunks, optionally with dictionaries stored in the archive, and
+#     chunk transforms (byte grouping, bitshuffle) and zero extents listed
+#     in the manifest
+MIN_VERSION_INDEPENDENT_CHUNKS = 2
+MIN_VERSION_SHARED_CHUNKS = 3
+MIN_VERSION_ZSTD = 4
 HEADER_SIZE = 512
 DEFAULT_CHUNK_SIZE = 64 * 1024 * 1024  # 64 MB
+# Files up to this size are packed together in solid mode (capped at chunk_size)
+DEFAULT_SOLID_THRESHOLD = 1024 * 1024  # 1 MB
+
+# Header flags
+FLAG_TRAILER_INDEX = 0x0001  # Chunk index stored after chunk data
 
 
 @dataclass
@@ -44,9 +83,10 @@ class ChunkInfo:
     index: int
     offset: int              # Offset in file
     size_compressed: int     # Size after compression
-    size_original: int       # Size before compression
+    size_original: int       # Size before compression (exact since v2)
     compressor_id: int       # 0=none, 1=lz4, 2=lz4_hc, 3=zipnn
     checksum: int            # CRC32 of compressed data
+    meta: Optional[dict] = None  # Codec decision/ratio (stored in the manifest, not the index)
 
     def to_bytes(self) -> bytes:
         """Serialize to bytes (21 bytes total)"""
@@ -87,6 +127,7 @@ class FileEntry:
     chunk_start: int        # First chunk index
     chunk_end: int          # Last chunk index (exclusive)
     compressor_id: int      # Compressor used
+    offset: int = 0         # Start of the file's data in chunk_start (shared chunks, v3)
 
 
 @dataclass
@@ -103,14 +144,15 @@ class DumontHeader:
     chunk_size: int = DEFAULT_CHUNK_SIZE
     manifest_offset: int = 0
     manifest_size: int = 0
+    index_offset: int = 0  # 0 = index immediately after header (legacy)
 
     def to_bytes(self) -> bytes:
         """Serialize header to 512 bytes"""
         # Format: magic(8) version(2) flags(2) num_chunks(4) num_files(4)
         #         compressed(8) original(8) checksum_type(1) pad(3) chunk_size(4)
-        #         manifest_offset(8) manifest_size(4)
+        #         manifest_offset(8) manifest_size(4) index_offset(8)
         header = struct.pack(
-            "<8sHHIIQQBxxxIQI",
+            "<8sHHIIQQBxxxIQIQ",
             self.magic,
             self.version,
             self.flags,
@@ -122,6 +164,7 @@ class DumontHeader:
             self.chunk_size,
             self.manifest_offset,
             self.manifest_size,
+            self.index_offset,
         )
         # Pad to 512 bytes
         return header.ljust(HEADER_SIZE, b'\x00')
@@ -132,14 +175,17 @@ class DumontHeader:
         if len(data) < HEADER_SIZE:
             raise ValueError(f"Header too short: {len(data)} < {HEADER_SIZE}")
 
-        # Same format as to_bytes
+        # Same format as to_bytes (index_offset lives in what used to be padding,
+        # so legacy archives decode it as 0)
         magic, version, flags, num_chunks, num_files, total_compressed, total_original, \
-            checksum_type, chunk_size, manifest_offset, manifest_size = struct.unpack(
-                "<8sHHIIQQBxxxIQI", data[:56]
+            checksum_type, chunk_size, manifest_offset, manifest_size, index_offset = struct.unpack(
+                "<8sHHIIQQBxxxIQIQ", data[:64]
             )
 
         if magic != MAGIC:
             raise ValueError(f"Invalid magic: {magic}")
+        if version > VERSION:
+            raise ValueError(f"Unsupported archive version: {version} (max {VERSION})")
 
         return cls(
             magic=magic,
@@ -153,15 +199,41 @@ class DumontHeader:
             chunk_size=chunk_size,
             manifest_offset=manifest_offset,
             manifest_size=manifest_size,
+            index_offset=index_offset,
         )
 
+    @property
+    def independent_chunks(self) -> bool:
+        """True if every chunk can be decompressed on its own"""
+        return self.version >= MIN_VERSION_INDEPENDENT_CHUNKS
+
+    @property
+    def chunk_index_offset(self) -> int:
+        """Offset of the chunk index (trailer or right after the header)"""
+        if self.flags & FLAG_TRAILER_INDEX:
+            return self.index_offset
+        return HEADER_SIZE
+
+
+def matches_patterns(path: str, patterns: List[str]) -> bool:
+    """True if path matches a glob or sits under a directory prefix"""
+    for pattern in patterns:
+        if pattern.startswith('./'):
+            pattern = pattern[2:]
+        if fnmatch.fnmatchcase(path, pattern):
+            return True
+        prefix = pattern.rstrip('/')
+        if path == prefix or path.startswith(prefix + '/'):
+            return True
+    return False
+
 
 class DumontArchive:
     """
     Read/write Dumont archives (.dumont).
 
     For creating:
-        with DumontArchive.create("archive.dumont") as archive:
+        with DumontArchive.create("archive.dumont", workers=8) as archive:
             archive.add_directory("/workspace")
 
     For reading:
@@ -170,54 +242,180 @@ class DumontArchive:
                 # Process chunk
                 pass
             archive.extract_all("/workspace")
+
+    With use_mmap=True local archives are memory-mapped: chunks are read as
+    memoryviews of one shared mapping (no per-chunk read syscall or copy),
+    and restore workers all decompress straight out of it.
+
+    With solid=True, files up to solid_threshold bytes are packed with other
+    small files of the same category into shared chunks (one frame, one CRC
+    and one decompress call for many files).
+
+    With adaptive=AdaptiveConfig(...), each chunk's codec is chosen from
+    samples of its data; the decision and ratio are kept in ChunkInfo.meta.
+
+    With method="hybrid_zstd" (or any CompressionMethod), categories whose
+    strategy asks for a zstd dictionary get one trained from the small files
+    being archived; it is stored in the archive and loaded on open.
+
+    With sparse=True (the default for create), filesystem holes and all-zero
+    pages of large files are not compressed: each chunk keeps their
+    [offset, length] in ChunkInfo.meta["zeros"] and only the remaining bytes
+    as payload. Restores leave those ranges as holes in the target files.
     """
 
-    def __init__(self, path: str, mode: str = 'r'):
+    def __init__(
+        self,
+        path: str,
+        mode: str = 'r',
+        workers: Optional[int] = 1,
+        max_inflight_chunks: Optional[int] = None,
+        use_mmap: bool = False,
+        solid: bool = False,
+        solid_threshold: int = DEFAULT_SOLID_THRESHOLD,
+        adaptive: Optional[AdaptiveConfig] = None,
+        method=None,
+        sparse: bool = False,
+        zstd_threads: int = 0,
+    ):
         self.path = path
         self.mode = mode
+        self.use_mmap = use_mmap
+        self.solid = solid
+        self.solid_threshold = solid_threshold
+        self.adaptive = adaptive
+        self.method = method
+        self.sparse = sparse
+        self.zstd_threads = zstd_threads
         self.header: Optional[DumontHeader] = None
         self.chunks: List[ChunkInfo] = []
         self.files: List[FileEntry] = []
         self._file: Optional[BinaryIO] = None
+        self._reader = None  # Local / Mmap / HTTP range reader in read mode
         self._compressor = None
+        self._shared_chunks = 0  # Chunks holding more than one file
+        self._dictionaries: List[bytes] = []  # zstd dictionaries loaded from the archive
+        self._pipeline = ChunkPipeline(workers=workers, max_inflight=max_inflight_chunks)
+        self._thread_local = threading.local()
 
     def __enter__(self):
         if self.mode == 'r':
-            self._file = open(self.path, 'rb')
+            self._reader = open_range_reader(self.path, use_mmap=self.use_mmap)
             self._read_header()
         elif self.mode == 'w':
             self._file = open(self.path, 'wb')
-            self.header = DumontHeader()
+            if self.header is None:
+                self.header = DumontHeader()
             # Initialize compressor for writing
-            from .hybrid_compressor import HybridCompressor
-            self._compressor = HybridCompressor()
+            if self.method is not None:
+                self._compressor = self.method.get_compressor()
+                self._compressor.adaptive = self.adaptive or self._compressor.adaptive
+            else:
+                from .hybrid_compressor import HybridCompressor
+                self._compressor = HybridCompressor(adaptive=self.adaptive, zstd_threads=self.zstd_threads)
         return self
 
     def __exit__(self, exc_type, exc_val, exc_tb):
         if self._file:
             self._file.close()
+        if self._reader:
+            self._reader.close()
 
     @classmethod
-    def create(cls, path: str, chunk_size: int = DEFAULT_CHUNK_SIZE) -> 'DumontArchive':
-        """Create a new archive for writing"""
-        archive = cls(path, 'w')
+    def create(
+        cls,
+        path: str,
+        chunk_size: int = DEFAULT_CHUNK_SIZE,
+        workers: Optional[int] = 1,
+        max_inflight_chunks: Optional[int] = None,
+        solid: bool = False,
+        solid_threshold: int = DEFAULT_SOLID_THRESHOLD,
+        adaptive: Optional[AdaptiveConfig] = None,
+        method=None,
+        sparse: bool = True,
+        zstd_threads: Optional[int] = None,
+    ) -> 'DumontArchive':
+        """
+        Create a new archive for writing.
+
+        Args:
+            path: Output .dumont file
+            chunk_size: Uncompressed bytes per chunk
+            workers: Compression threads (None = all CPUs, 1 = serial)
+            max_inflight_chunks: Chunks buffered in memory at once (default: 2 x workers)
+            solid: Pack small files of the same category into shared chunks
+            solid_threshold: Largest file packed in solid mode (capped at chunk_size)
+            adaptive: Choose each chunk's codec from samples (see AdaptiveConfig)
+            method: CompressionMethod or its name (default: hybrid_v1 strategies)
+            sparse: Store holes and zero pages of large files as zero extents
+            zstd_threads: zstd threads per frame, on top of `workers` (None = the
+                method's own setting, 0 = single-threaded, -1 = all CPUs)
+        """
+        if isinstance(method, str):
+            from .methods import get_method_by_name
+            method = get_method_by_name(method)
+        if method is not None and zstd_threads is not None:
+            method = replace(method, threads=zstd_threads)
+        archive = cls(
+            path, 'w',
+            workers=workers,
+            max_inflight_chunks=max_inflight_chunks,
+            solid=solid,
+            solid_threshold=min(solid_threshold, chunk_size),
+            adaptive=adaptive,
+            method=method,
+            sparse=sparse,
+            zstd_threads=zstd_threads or 0,
+        )
         archive.header = DumontHeader(chunk_size=chunk_size)
         return archive
 
     @classmethod
-    def open(cls, path: str) -> 'DumontArchive':
-        """Open an existing archive for reading"""
-        return cls(path, 'r')
+    def open(cls, path: str, use_mmap: bool = False) -> 'DumontArchive':
+        """
+        Open an existing archive for reading.
+
+        Args:
+            path: Local .dumont file or HTTP(S) URL (e.g. B2/R2 presigned URL).
+                  URLs are read lazily with Range requests.
+            use_mmap: Memory-map local archives (ignored for URLs)
+        """
+        return cls(path, 'r', use_mmap=use_mmap)
+
+    def read_bytes(self, offset: int, size: int) -> bytes:
+        """Read raw archive bytes (local pread or HTTP Range request)"""
+        return self._reader.read_at(offset, size)
+
+    def read_view(self, offset: int, size: int):
+        """
+        Read raw archive bytes without copying when possible.
+
+        Returns a memoryview over the mapping in mmap mode (release it with
+        release_view() when done), plain bytes otherwise.
+        """
+        return self._reader.read_view(offset, size)
+
+    @property
+    def archive_size(self) -> int:
+        """Size of the .dumont file in bytes"""
+        return self._reader.size
 
     def _read_header(self):
         """Read and parse archive header"""
-        self._file.seek(0)
-        header_data = self._file.read(HEADER_SIZE)
+        header_data = self.read_bytes(0, HEADER_SIZE)
         self.header = DumontHeader.from_bytes(header_data)
 
-        # Read chunk index
+        index_offset = self.header.chunk_index_offset
         chunk_index_size = self.header.num_chunks * ChunkInfo.STRUCT_SIZE
-        chunk_data = self._file.read(chunk_index_size)
+
+        # Trailer index and manifest are adjacent: fetch both with one read
+        if self.header.manifest_offset == index_offset + chunk_index_size:
+            trailer = self.read_bytes(index_offset, chunk_index_size + self.header.manifest_size)
+            chunk_data = trailer[:chunk_index_size]
+            manifest_compressed = trailer[chunk_index_size:]
+        else:
+            chunk_data = self.read_bytes(index_offset, chunk_index_size)
+            manifest_compressed = self.read_bytes(self.header.manifest_offset, self.header.manifest_size)
 
         self.chunks = []
         for i in range(self.header.num_chunks):
@@ -225,10 +423,6 @@ class DumontArchive:
             chunk = ChunkInfo.from_bytes(chunk_data[offset:offset + ChunkInfo.STRUCT_SIZE], i)
             self.chunks.append(chunk)
 
-        # Read manifest
-        self._file.seek(self.header.manifest_offset)
-        manifest_compressed = self._file.read(self.header.manifest_size)
-
         if HAS_LZ4:
             manifest_data = lz4.frame.decompress(manifest_compressed)
         else:
@@ -236,6 +430,12 @@ class DumontArchive:
             manifest_data = manifest_compressed
 
         manifest = json.loads(manifest_data.decode('utf-8'))
+        for chunk, meta in zip(self.chunks, manifest.get('chunks', [])):
+            chunk.meta = meta or None
+        self._dictionaries = [
+            self.read_bytes(d['offset'], d['size'])
+            for d in manifest.get('dictionaries', [])
+        ]
         self.files = [
             FileEntry(
                 path=f['path'],
@@ -245,78 +445,312 @@ class DumontArchive:
                 chunk_start=f['chunk_start'],
                 chunk_end=f['chunk_end'],
                 compressor_id=f['compressor_id'],
+                offset=f.get('offset', 0),
             )
             for f in manifest['files']
         ]
 
-    def read_chunk(self, chunk_index: int) -> bytes:
-        """Read and decompress a single chunk"""
+    def _read_raw_chunk(self, chunk_index: int):
+        """
+        Read a chunk's compressed bytes and verify its checksum.
+
+        Returns a memoryview in mmap mode; callers release it with
+        release_view() once the chunk is decompressed.
+        """
         if chunk_index >= len(self.chunks):
             raise IndexError(f"Chunk {chunk_index} out of range")
 
         chunk = self.chunks[chunk_index]
-        self._file.seek(chunk.offset)
-        compressed_data = self._file.read(chunk.size_compressed)
+        if not chunk.size_compressed:
+            return b''  # All zero extents (no payload)
+        # Positional reads keep no shared file position (safe across threads)
+        compressed_data = self.read_view(chunk.offset, chunk.size_compressed)
 
-        # Verify checksum
+        # Verify checksum (crc32 reads the view in place)
         actual_crc = zlib.crc32(compressed_data) & 0xFFFFFFFF
         if actual_crc != chunk.checksum:
+            release_view(compressed_data)
             raise ValueError(f"Chunk {chunk_index} checksum mismatch: {actual_crc} != {chunk.checksum}")
+        return compressed_data
+
+    def _decompress(self, data, compressor_id: int, meta: Optional[dict] = None):
+        """
+        Decompress with this thread's cached compressor.
+
+        Returns `data` itself for uncompressed, untransformed chunks, so the
+        result may be a view into the archive.
+        """
+        compressor = self._worker_compressor()
+        comp_enum = compressor.get_compressor_from_id(compressor_id)
+        if comp_enum == Compressor.ZIPNN and isinstance(data, memoryview):
+            # ZipNN expects bytes
+            data = data.tobytes()
+        return compressor.decompress_block(data, comp_enum, meta)
 
-        # Decompress
-        from .hybrid_compressor import HybridCompressor, Compressor
-        compressor = HybridCompressor()
-        comp_enum = compressor.get_compressor_from_id(chunk.compressor_id)
-        return compressor.decompress(compressed_data, comp_enum)
+    def read_chunk(self, chunk_index: int) -> bytes:
+        """
+        Read and decompress a single chunk.
+
+        In v1 archives a chunk is a slice of a per-file compressed stream, so
+        only files stored in a single chunk can be read this way; use
+        read_file() instead.
+        """
+        compressed_data = self._read_raw_chunk(chunk_index)
+        try:
+            chunk = self.chunks[chunk_index]
+            data = self._decompress(compressed_data, chunk.compressor_id, chunk.meta)
+            if chunk.meta and chunk.meta.get('zeros'):
+                data = expand_zeros(data, chunk.meta['zeros'], chunk.size_original)
+            # Views into the archive and transform buffers become plain bytes
+            return data if isinstance(data, bytes) else bytes(data)
+        finally:
+            release_view(compressed_data)
+
+    def iter_chunks(self, start: int = 0, end: Optional[int] = None) -> Iterator[Tuple[int, bytes]]:
+        """
+        Iterate over chunks, yielding (index, data).
 
-    def iter_chunks(self) -> Iterator[Tuple[int, bytes]]:
-        """Iterate over all chunks, yielding (index, data)"""
-        for i in range(len(self.chunks)):
+        Args:
+            start: First chunk index (resume point)
+            end: Stop before this chunk index (default: all chunks)
+        """
+        if not self.header.independent_chunks:
+            raise ValueError(f"Archive version {self.header.version} chunks are not independently decompressible")
+        end = len(self.chunks) if end is None else min(end, len(self.chunks))
+        for i in range(start, end):
             yield i, self.read_chunk(i)
 
-    def extract_all(self, target_dir: str, progress_callback=None):
+    def get_file(self, path: str) -> FileEntry:
+        """Find a file entry by its relative path"""
+        for file_entry in self.files:
+            if file_entry.path == path:
+                return file_entry
+        raise KeyError(f"File not found in archive: {path}")
+
+    def read_file(self, file_entry: FileEntry) -> bytes:
+        """Read and decompress a whole file"""
+        if not self.header.independent_chunks:
+            # v1: chunks are slices of a single compressed stream
+            parts = [self._read_raw_chunk(i) for i in range(file_entry.chunk_start, file_entry.chunk_end)]
+            compressed_data = b''.join(parts)
+            for part in parts:
+                release_view(part)
+            if not compressed_data:
+                return b''
+            return self._decompress(compressed_data, file_entry.compressor_id)[:file_entry.size]
+
+        data = b''.join(
+            self.read_chunk(i) for i in range(file_entry.chunk_start, file_entry.chunk_end)
+        )
+        if file_entry.offset or len(data) != file_entry.size:
+            # Shared chunk: slice the file out of it
+            data = data[file_entry.offset:file_entry.offset + file_entry.size]
+        return data
+
+    def read_range(self, file_entry: FileEntry, offset: int, length: int) -> bytes:
+        """
+        Read a byte range of a file, decompressing only the chunks it spans.
+
+        Args:
+            file_entry: File to read from
+            offset: Start offset within the file
+            length: Number of bytes to read
+
+        Returns:
+            Up to `length` bytes (fewer at end of file)
+        """
+        if not self.header.independent_chunks:
+            return self.read_file(file_entry)[offset:offset + length]
+
+        end = min(offset + length, file_entry.size)
+        if offset >= end:
+            return b''
+
+        # Positions relative to the start of chunk_start (packed files start at offset)
+        start = file_entry.offset + offset
+        stop = file_entry.offset + end
+
+        chunk_size = self.header.chunk_size
+        first = file_entry.chunk_start + start // chunk_size
+        last = file_entry.chunk_start + (stop - 1) // chunk_size
+        data = b''.join(self.read_chunk(i) for i in range(first, last + 1))
+
+        skip = start - (first - file_entry.chunk_start) * chunk_size
+        return data[skip:skip + (end - offset)]
+
+    def select_files(self, patterns: List[str]) -> List[FileEntry]:
+        """
+        Select files by glob pattern or path prefix.
+
+        A pattern matches a file if it is a glob matching the relative path
+        (e.g. "*.py", "models/llama/*") or a directory prefix ("configs/").
+
+        Args:
+            patterns: Globs or paths relative to the archive root
+
+        Returns:
+            Matching entries, in archive order
+        """
+        return [f for f in self.files if matches_patterns(f.path, patterns)]
+
+    def extract_all(
+        self,
+        target_dir: str,
+        progress_callback=None,
+        workers: Optional[int] = None,
+        max_inflight_chunks: Optional[int] = None,
+    ):
         """
         Extract all files to target directory.
 
+        Files are created at their final size up front; chunks are then
+        decompressed on a worker pool and written straight to their offset
+        with pwrite, so at most max_inflight_chunks are held in memory.
+
+        Args:
+            target_dir: Directory to extract to
+            progress_callback: Optional callback(chunks_done, total_chunks, bytes_written)
+            workers: Decompression threads (None = all CPUs, 1 = serial)
+            max_inflight_chunks: Chunks buffered in memory at once (default: 2 x workers)
+        """
+        self.extract_files(target_dir, self.files, progress_callback, workers, max_inflight_chunks)
+
+    def extract_files(
+        self,
+        target_dir: str,
+        files: List[FileEntry],
+        progress_callback=None,
+        workers: Optional[int] = None,
+        max_inflight_chunks: Optional[int] = None,
+    ):
+        """
+        Extract a subset of files, reading only the chunks they reference.
+
         Args:
             target_dir: Directory to extract to
-            progress_callback: Optional callback(chunk_index, total_chunks)
+            files: Entries to restore (see select_files)
+            progress_callback: Optional callback(chunks_done, total_chunks, bytes_written)
+            workers: Decompression threads (None = all CPUs, 1 = serial)
+            max_inflight_chunks: Chunks buffered in memory at once (default: 2 x workers)
         """
         target = Path(target_dir)
         target.mkdir(parents=True, exist_ok=True)
 
-        # Build chunk -> file mapping
-        chunk_data = {}
-        for i, data in self.iter_chunks():
-            chunk_data[i] = data
-            if progress_callback:
-                progress_callback(i, len(self.chunks))
+        if not self.header.independent_chunks:
+            self._extract_files_v1(target, files, progress_callback)
+            return
 
-        # Reconstruct files
-        for file_entry in self.files:
+        # Preallocate every file at its final size and group the writes by
+        # chunk: a shared chunk is decompressed once for all its files
+        writes: Dict[int, List[Tuple[str, int, int, int]]] = {}  # chunk -> [(path, file_offset, start, end)]
+        for file_entry in files:
             file_path = target / file_entry.path
             file_path.parent.mkdir(parents=True, exist_ok=True)
-
-            # Combine chunks for this file
-            file_bytes = b''
+            with open(file_path, 'wb') as f:
+                f.truncate(file_entry.size)
             for chunk_idx in range(file_entry.chunk_start, file_entry.chunk_end):
-                file_bytes += chunk_data[chunk_idx]
+                if file_entry.offset:
+                    write = (str(file_path), 0, file_entry.offset, file_entry.offset + file_entry.size)
+                else:
+                    offset = (chunk_idx - file_entry.chunk_start) * self.header.chunk_size
+                    write = (str(file_path), offset, 0, file_entry.size - offset)
+                writes.setdefault(chunk_idx, []).append(write)
+
+        # Chunk order keeps reads sequential over the archive
+        targets = sorted(writes.items())
+
+        if files is self.files and hasattr(self._reader, 'advise_sequential'):
+            # Full restore walks the mapping front to back
+            self._reader.advise_sequential()
+
+        pipeline = ChunkPipeline(workers=workers, max_inflight=max_inflight_chunks)
+        total_chunks = len(targets)
+        bytes_written = 0
+        for chunks_done, written in enumerate(pipeline.map(self._restore_chunk, targets), start=1):
+            bytes_written += written
+            if progress_callback:
+                progress_callback(chunks_done, total_chunks, bytes_written)
+
+        for file_entry in files:
+            self._restore_metadata(target / file_entry.path, file_entry)
+
+    def _restore_chunk(self, item: Tuple[int, List[Tuple[str, int, int, int]]]) -> int:
+        """
+        Decompress one chunk and pwrite its slices into their target files (worker thread).
 
-            # Truncate to actual file size
-            file_bytes = file_bytes[:file_entry.size]
+        Zero extents are not written: the preallocated files keep them as holes.
+        """
+        chunk_idx, writes = item
+        compressed_data = self._read_raw_chunk(chunk_idx)
+        size = 0
+        try:
+            # Uncompressed chunks go from the mapping to the file with no copy
+            chunk = self.chunks[chunk_idx]
+            data = memoryview(self._decompress(compressed_data, chunk.compressor_id, chunk.meta))
+            zeros = chunk.meta.get('zeros') if chunk.meta else None
+            if zeros:
+                extents = list(iter_data_extents(zeros, chunk.size_original))
+            else:
+                extents = [(0, len(data), 0)]
+
+            for file_path, offset, start, end in writes:
+                end = min(end, chunk.size_original)
+                size += max(0, end - start)
+                fd = os.open(file_path, os.O_WRONLY)
+                try:
+                    for extent_start, extent_end, payload_offset in extents:
+                        lo, hi = max(start, extent_start), min(end, extent_end)
+                        if lo >= hi:
+                            continue
+                        view = data[payload_offset + lo - extent_start:payload_offset + hi - extent_start]
+                        position = offset + lo - start
+                        while view:
+                            written = os.pwrite(fd, view, position)
+                            view = view[written:]
+                            position += written
+                finally:
+                    os.close(fd)
+        finally:
+            release_view(compressed_data)
+        return size
+
+    def _extract_files_v1(self, target: Path, files: List[FileEntry], progress_callback=None):
+        """Extract from a v1 archive file by file (chunks are not independent)"""
+        total_chunks = sum(f.chunk_end - f.chunk_start for f in files)
+        chunks_done = 0
+        bytes_written = 0
+        for file_entry in files:
+            file_path = target / file_entry.path
+            file_path.parent.mkdir(parents=True, exist_ok=True)
 
-            # Write file
             with open(file_path, 'wb') as f:
-                f.write(file_bytes)
+                f.write(self.read_file(file_entry))
+            self._restore_metadata(file_path, file_entry)
 
-            # Restore permissions and mtime
-            os.chmod(file_path, file_entry.mode)
-            os.utime(file_path, (file_entry.mtime, file_entry.mtime))
+            chunks_done += file_entry.chunk_end - file_entry.chunk_start
+            bytes_written += file_entry.size
+            if progress_callback:
+                progress_callback(chunks_done, total_chunks, bytes_written)
+
+    @staticmethod
+    def _restore_metadata(file_path: Path, file_entry: FileEntry):
+        """Restore permissions and mtime"""
+        os.chmod(file_path, file_entry.mode)
+        os.utime(file_path, (file_entry.mtime, file_entry.mtime))
 
     def add_directory(self, source_dir: str, progress_callback=None):
         """
         Add all files from a directory to the archive.
 
+        Files are streamed: each file is read in chunk_size slices, every slice
+        is compressed on its own and written straight to disk. With workers > 1
+        slices are compressed concurrently, holding at most max_inflight_chunks
+        in memory. Only the small per-chunk index is kept until the trailer.
+
+        In solid mode small files are buffered per category (at most one
+        chunk_size buffer each) and written as shared chunks. In sparse mode
+        holes are skipped and zero pages are left out of the chunk payloads.
+
         Args:
             source_dir: Directory to archive
             progress_callback: Optional callback(file_path, file_index, total_files)
@@ -328,111 +762,238 @@ class DumontArchive:
         if not source.exists():
             raise FileNotFoundError(f"Source directory not found: {source_dir}")
 
-        # Collect all files
-        all_files = []
-        for root, dirs, files in os.walk(source):
-            # Skip hidden directories
-            dirs[:] = [d for d in dirs if not d.startswith('.')]
-            for fname in files:
-                if fname.startswith('.'):
-                    continue
-                fpath = Path(root) / fname
-                if fpath.is_file():
-                    all_files.append(fpath)
+        all_files = self._collect_files(source)
+        self._train_dictionaries(all_files)
 
-        total_files = len(all_files)
-        total_original = 0
-        total_compressed = 0
+        # Placeholder header, rewritten once the trailer offsets are known
+        self._file.seek(0)
+        self._file.write(b'\x00' * HEADER_SIZE)
+
+        # Blocks are compressed on the pipeline and written back in read order,
+        # so the output is identical whatever the worker count.
+        blocks = self._iter_blocks(source, all_files, progress_callback)
+        for compressed_data, compressor_id, size_original, meta in self._pipeline.map(self._compress_block, blocks):
+            self._write_chunk(compressed_data, compressor_id, size_original, meta)
+
+        self._write_trailer()
 
-        # First pass: compress all files and collect chunk data in memory
-        all_chunk_data = []  # List of (compressed_bytes, compressor_id, original_size)
+    def _iter_blocks(
+        self,
+        source: Path,
+        all_files: List[Path],
+        progress_callback=None,
+    ) -> Iterator[Tuple[bytes, str, int, Optional[list]]]:
+        """
+        Read files in chunk_size slices and register their FileEntry.
+
+        Chunk indices are assigned in read order, which is also write order.
+        Entries keep walk order; packed files get their chunk when their
+        solid block is flushed.
+
+        Yields:
+            Tuple of (block, file_path, compressor_id, zeros). In sparse mode
+            block is the payload left after removing the zero extents.
+        """
+        total_files = len(all_files)
+        self._next_chunk = 0
+        # category -> (parts, size, first file path, compressor_id, entries)
+        packs: Dict[str, list] = {}
 
         for file_idx, fpath in enumerate(all_files):
             if progress_callback:
                 progress_callback(str(fpath), file_idx, total_files)
 
-            # Read file
-            with open(fpath, 'rb') as f:
-                file_data = f.read()
-
-            # Get file info
             stat = fpath.stat()
             rel_path = str(fpath.relative_to(source))
-
-            # Determine compression strategy
-            compressed_data, strategy = self._compressor.compress_file(file_data, str(fpath))
+            strategy = self._compressor.get_strategy(str(fpath))
             compressor_id = self._compressor.get_compressor_id(strategy.compressor)
 
-            # Track chunk indices for this file
-            chunk_start = len(all_chunk_data)
-
-            # Split into chunks
-            offset = 0
-            while offset < len(compressed_data):
-                chunk_bytes = compressed_data[offset:offset + self.header.chunk_size]
-
-                # Calculate original size for this chunk
-                if strategy.compressor != Compressor.NONE and len(compressed_data) > 0:
-                    ratio = len(file_data) / len(compressed_data)
-                    orig_chunk_size = int(len(chunk_bytes) * ratio)
-                else:
-                    orig_chunk_size = len(chunk_bytes)
-
-                all_chunk_data.append((chunk_bytes, compressor_id, orig_chunk_size))
-                total_compressed += len(chunk_bytes)
-                offset += len(chunk_bytes)
-
-            chunk_end = len(all_chunk_data)
-            total_original += len(file_data)
-
-            # Create file entry
-            file_entry = FileEntry(
+            entry = FileEntry(
                 path=rel_path,
-                size=len(file_data),
+                size=0,
                 mode=stat.st_mode,
                 mtime=stat.st_mtime,
-                chunk_start=chunk_start,
-                chunk_end=chunk_end,
-                compressor_id=compressor_id,
-            )
-            self.files.append(file_entry)
-
-        # Now write everything in correct order:
-        # [Header 512b] [Chunk Index] [Chunk Data...] [Manifest]
-
-        num_chunks = len(all_chunk_data)
-        chunk_index_size = num_chunks * ChunkInfo.STRUCT_SIZE
-
-        # Calculate where chunk data starts
-        chunk_data_start = HEADER_SIZE + chunk_index_size
-
-        # Build chunk info with correct offsets
-        current_offset = chunk_data_start
-        for i, (chunk_bytes, compressor_id, orig_size) in enumerate(all_chunk_data):
-            checksum = zlib.crc32(chunk_bytes) & 0xFFFFFFFF
-            chunk_info = ChunkInfo(
-                index=i,
-                offset=current_offset,
-                size_compressed=len(chunk_bytes),
-                size_original=orig_size,
+                chunk_start=self._next_chunk,
+                chunk_end=self._next_chunk,
                 compressor_id=compressor_id,
-                checksum=checksum,
             )
-            self.chunks.append(chunk_info)
-            current_offset += len(chunk_bytes)
+            self.files.append(entry)
+
+            if self.solid and 0 < stat.st_size <= self.solid_threshold:
+                with open(fpath, 'rb') as f:
+                    data = f.read()
+                entry.size = len(data)
+
+                category = strategy.category.value
+                pack = packs.get(category)
+                if pack is not None and pack[1] + len(data) > self.header.chunk_size:
+                    yield self._flush_pack(packs.pop(category))
+                    pack = None
+                if pack is None:
+                    pack = packs[category] = [[], 0, str(fpath), compressor_id, []]
+                entry.offset = pack[1]
+                pack[0].append(data)
+                pack[1] += len(data)
+                pack[4].append(entry)
+                continue
 
-        # Write header (placeholder, will rewrite at end)
-        self._file.write(b'\x00' * HEADER_SIZE)
+            with open(fpath, 'rb') as f:
+                if self.sparse and stat.st_size >= ZERO_PAGE_SIZE:
+                    yield from self._iter_sparse_blocks(entry, f.fileno(), stat.st_size, str(fpath), compressor_id)
+                else:
+                    while True:
+                        block = f.read(self.header.chunk_size)
+                        if not block:
+                            break
+                        entry.size += len(block)
+                        self._next_chunk += 1
+                        yield block, str(fpath), compressor_id, None
+            entry.chunk_end = self._next_chunk
+
+        for pack in packs.values():
+            yield self._flush_pack(pack)
+
+    def _iter_sparse_blocks(self, entry: FileEntry, fd: int, file_size: int, filepath: str, compressor_id: int):
+        """chunk_size slices of a file without its holes and zero pages"""
+        position = 0
+        while position < file_size:
+            payload, zeros = read_sparse_block(fd, position, min(self.header.chunk_size, file_size - position))
+            size = len(payload) + sum(length for _, length in zeros)
+            if not size:
+                break  # File shrank while reading
+            entry.size += size
+            position += size
+            self._next_chunk += 1
+            yield payload, filepath, compressor_id, zeros or None
+
+    def _flush_pack(self, pack: list) -> Tuple[bytes, str, int, None]:
+        """Assign the next chunk to a solid block and its files"""
+        parts, _, first_path, compressor_id, entries = pack
+        for entry in entries:
+            entry.chunk_start = self._next_chunk
+            entry.chunk_end = self._next_chunk + 1
+        if len(entries) > 1:
+            self._shared_chunks += 1
+        self._next_chunk += 1
+        return b''.join(parts), first_path, compressor_id, None
+
+    def _compress_block(self, item: Tuple[bytes, str, int, Optional[list]]) -> Tuple[bytes, int, int, dict]:
+        """Compress one block on a pipeline worker"""
+        block, filepath, compressor_id, zeros = item
+        size_original = len(block) + sum(length for _, length in zeros or ())
+        if not block:
+            # Only zero extents: nothing to compress or store
+            return b'', 0, size_original, {'zeros': zeros}
+
+        compressor = self._worker_compressor()
+        compressed_data, used, meta = compressor.compress_block(block, filepath)
+        if meta:
+            # Adaptive/transformed: the chunk records the codec actually used
+            compressor_id = compressor.get_compressor_id(used)
+        if zeros:
+            meta = {**meta, 'zeros': zeros}
+        return compressed_data, compressor_id, size_original, meta
+
+    def _worker_compressor(self):
+        """Per-thread compressor (ZipNN and zstd contexts keep internal state)"""
+        compressor = getattr(self._thread_local, 'compressor', None)
+        if compressor is None:
+            if self._compressor is not None:
+                compressor = self._compressor.clone()
+            else:
+                from .hybrid_compressor import HybridCompressor
+                compressor = HybridCompressor(adaptive=self.adaptive)
+                for data in self._dictionaries:
+                    compressor.add_dictionary(data)
+            self._thread_local.compressor = compressor
+        return compressor
+
+    def _train_dictionaries(self, all_files: List[Path]):
+        """
+        Train a zstd dictionary per category whose strategy asks for one.
+
+        Samples are the category's small files (up to DICT_SAMPLE_BUDGET bytes
+        each); categories with too few samples simply go without.
+        """
+        wanted = {
+            category for category, strategy in self._compressor.strategies.items()
+            if strategy.compressor == Compressor.ZSTD and strategy.dictionary
+        }
+        if not wanted or not self._compressor.is_available(Compressor.ZSTD):
+            return
+
+        samples: Dict[FileCategory, List[bytes]] = {category: [] for category in wanted}
+        budget = {category: DICT_SAMPLE_BUDGET for category in wanted}
+        for fpath in all_files:
+            category = self._compressor.get_category(str(fpath))
+            if category not in wanted or budget[category] <= 0:
+                continue
+            try:
+                size = fpath.stat().st_size
+                if not 0 < size <= DICT_SAMPLE_MAX_FILE:
+                    continue
+                with open(fpath, 'rb') as f:
+                    data = f.read()
+            except OSError:
+                continue
+            samples[category].append(data)
+            budget[category] -= len(data)
+
+        for category, category_samples in samples.items():
+            level = self._compressor.strategies[category].level
+            dictionary = train_zstd_dictionary(category_samples, level=level or DEFAULT_ZSTD_LEVEL)
+            if dictionary:
+                self._compressor.add_dictionary(dictionary, category)
+
+    @staticmethod
+    def _collect_files(source: Path) -> List[Path]:
+        """List regular files under source, skipping hidden files and directories"""
+        all_files = []
+        for root, dirs, files in os.walk(source):
+            # Skip hidden directories
+            dirs[:] = [d for d in dirs if not d.startswith('.')]
+            for fname in files:
+                if fname.startswith('.'):
+                    continue
+                fpath = Path(root) / fname
+                if fpath.is_file():
+                    all_files.append(fpath)
+        return all_files
+
+    def _write_chunk(self, chunk_bytes: bytes, compressor_id: int, size_original: int, meta: Optional[dict] = None):
+        """Append one compressed chunk at the current position and index it"""
+        chunk_info = ChunkInfo(
+            index=len(self.chunks),
+            offset=self._file.tell(),
+            size_compressed=len(chunk_bytes),
+            size_original=size_original,
+            compressor_id=compressor_id,
+            checksum=zlib.crc32(chunk_bytes) & 0xFFFFFFFF,
+            meta=meta or None,
+        )
+        self._file.write(chunk_bytes)
+        self.chunks.append(chunk_info)
 
-        # Write chunk index
-        for chunk in self.chunks:
-            self._file.write(chunk.to_bytes())
+    def _write_trailer(self):
+        """
+        Write chunk index and manifest after the chunk data, then the final header.
 
-        # Write chunk data
-        for chunk_bytes, _, _ in all_chunk_data:
-            self._file.write(chunk_bytes)
+        Layout: [Header 512b] [Chunk Data...] [Chunk Index] [Manifest]
+        """
+        dictionaries = []
+        if self._compressor is not None:
+            for dict_id, (data, category) in self._compressor.dictionaries().items():
+                dictionaries.append({
+                    'id': dict_id,
+                    'category': category.value if category else None,
+                    'offset': self._file.tell(),
+                    'size': len(data),
+                })
+                self._file.write(data)
+
+        index_offset = self._file.tell()
+        self._file.write(b''.join(chunk.to_bytes() for chunk in self.chunks))
 
-        # Write manifest
         manifest = {
             'files': [
                 {
@@ -443,10 +1004,15 @@ class DumontArchive:
                     'chunk_start': f.chunk_start,
                     'chunk_end': f.chunk_end,
                     'compressor_id': f.compressor_id,
+                    **({'offset': f.offset} if f.offset else {}),
                 }
                 for f in self.files
             ]
         }
+        if any(chunk.meta for chunk in self.chunks):
+            manifest['chunks'] = [chunk.meta or {} for chunk in self.chunks]
+        if dictionaries:
+            manifest['dictionaries'] = dictionaries
         manifest_json = json.dumps(manifest).encode('utf-8')
         if HAS_LZ4:
             manifest_compressed = lz4.frame.compress(manifest_json)
@@ -456,16 +1022,31 @@ class DumontArchive:
         manifest_offset = self._file.tell()
         self._file.write(manifest_compressed)
 
-        # Update and write header at beginning
-        self.header.num_chunks = num_chunks
+        # Update and write header at beginning: the lowest version that can
+        # read it, so archives without newer features stay readable by older readers
+        zstd_id = self._compressor.get_compressor_id(Compressor.ZSTD) if self._compressor else None
+        if dictionaries or any(
+            chunk.compressor_id == zstd_id
+            or (chunk.meta and (chunk.meta.get('transforms') or chunk.meta.get('zeros')))
+            for chunk in self.chunks
+        ):
+            self.header.version = MIN_VERSION_ZSTD
+        elif self._shared_chunks:
+            self.header.version = MIN_VERSION_SHARED_CHUNKS
+        else:
+            self.header.version = MIN_VERSION_INDEPENDENT_CHUNKS
+        self.header.flags |= FLAG_TRAILER_INDEX
+        self.header.num_chunks = len(self.chunks)
         self.header.num_files = len(self.files)
-        self.header.total_size_compressed = total_compressed
-        self.header.total_size_original = total_original
+        self.header.total_size_compressed = sum(c.size_compressed for c in self.chunks)
+        self.header.total_size_original = sum(f.size for f in self.files)
+        self.header.index_offset = index_offset
         self.header.manifest_offset = manifest_offset
         self.header.manifest_size = len(manifest_compressed)
 
         self._file.seek(0)
         self._file.write(self.header.to_bytes())
+        self._file.seek(0, os.SEEK_END)
 
     def get_stats(self) -> dict:
         """Get archive statistics"""
@@ -3,16 +3,33 @@ Hybrid Compressor - Selects best compression algorithm per file type
 
 For ML workspaces:
 - LZ4 for code/text (GPU-friendly, fast decompression)
-- ZipNN for FP16/BF16 models (neural network specific)
+- ZipNN for FP16/BF16 models (neural network specific); without it, byte
+  grouping (see transforms.py) before zstd/LZ4
+- Zstandard (levels, multi-threaded, trained dictionaries) for small-file categories
 - Passthrough for already-compressed files (GGUF, media)
+
+Adaptive mode (AdaptiveConfig) ignores the extension table and picks the
+codec per chunk from a few sampled blocks: an entropy estimate rules out
+incompressible data, then trial compressions give each candidate's ratio,
+and the cheapest codec under the throughput/ratio objective wins. Each
+transform chain in AdaptiveConfig.transforms is tried in front of every
+codec, so float data gets byte grouping wherever it lives.
 """
 
+import math
 import os
+from collections import Counter
 from enum import Enum
-from dataclasses import dataclass
-from typing import Optional, Tuple, Callable
+from dataclasses import dataclass, field
+from typing import Dict, Optional, Sequence, Tuple, Callable
 from pathlib import Path
 
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
 try:
     import lz4.frame
     HAS_LZ4 = True
@@ -25,6 +42,14 @@ try:
 except ImportError:
     HAS_ZIPNN = False
 
+try:
+    import zstandard as zstd
+    HAS_ZSTD = True
+except ImportError:
+    HAS_ZSTD = False
+
+from .transforms import apply_transforms, invert_transforms
+
 
 class FileCategory(Enum):
     """Categories of files with different compression strategies"""
@@ -43,6 +68,10 @@ class Compressor(Enum):
     LZ4 = "lz4"            # Fast, GPU-friendly
     LZ4_HC = "lz4_hc"      # LZ4 High Compression
     ZIPNN = "zipnn"        # Neural network specific
+    ZSTD = "zstd"          # Zstandard (levels 1-22, optional dictionary)
+
+
+DEFAULT_ZSTD_LEVEL = 3
 
 
 @dataclass
@@ -53,6 +82,8 @@ class CompressionStrategy:
     level: int = 0  # Compression level (0 = default)
     gpu_decompress: bool = False  # Can use nvCOMP for decompression
     expected_ratio: float = 1.0  # Expected compression ratio
+    dictionary: bool = False  # zstd: train a per-archive dictionary for this category
+    transforms: Tuple[str, ...] = ()  # Applied before the codec (see transforms.py)
 
 
 # Extension to category mapping
@@ -122,10 +153,12 @@ EXTENSION_MAP = {
 DEFAULT_STRATEGIES = {
     FileCategory.MODELS_FP16: CompressionStrategy(
         category=FileCategory.MODELS_FP16,
-        compressor=Compressor.ZIPNN if HAS_ZIPNN else Compressor.LZ4,
+        # Without ZipNN: byte planes split before zstd (or LZ4), ZipNN-style
+        compressor=Compressor.ZIPNN if HAS_ZIPNN else (Compressor.ZSTD if HAS_ZSTD else Compressor.LZ4),
         level=0,
         gpu_decompress=False,  # ZipNN doesn't have GPU yet (IBM roadmap)
         expected_ratio=1.5,    # REAL: 1.51x on TinyLlama-1.1B BF16 (33% savings)
+        transforms=("byte_group16",) if HAS_NUMPY and not HAS_ZIPNN else (),
     ),
     FileCategory.MODELS_QUANTIZED: CompressionStrategy(
         category=FileCategory.MODELS_QUANTIZED,
@@ -172,6 +205,111 @@ DEFAULT_STRATEGIES = {
 }
 
 
+# Nominal single-core throughput in MB/s (compress, decompress) used by the
+# adaptive cost model. Static so that the choice, and the archive bytes, do
+# not depend on machine load.
+CODEC_THROUGHPUT_MB_S = {
+    Compressor.NONE: (float('inf'), float('inf')),
+    Compressor.LZ4: (700.0, 4000.0),
+    Compressor.LZ4_HC: (60.0, 4000.0),
+    Compressor.ZIPNN: (1100.0, 1500.0),
+    Compressor.ZSTD: (350.0, 1500.0),  # level 3; see ZSTD_LEVEL_COMPRESS_MB_S
+}
+
+# zstd compression speed by level (decompression barely depends on it)
+ZSTD_LEVEL_COMPRESS_MB_S = {1: 500.0, 3: 350.0, 6: 120.0, 9: 70.0, 12: 35.0, 15: 15.0, 19: 5.0}
+
+
+def zstd_compress_speed(level: int) -> float:
+    """Nominal zstd compression MB/s for a level (nearest table entry at or below it)"""
+    known = [lvl for lvl in ZSTD_LEVEL_COMPRESS_MB_S if lvl <= max(1, level)]
+    return ZSTD_LEVEL_COMPRESS_MB_S[max(known)]
+
+
+@dataclass
+class AdaptiveConfig:
+    """
+    Sample-based codec selection.
+
+    Each candidate is scored with the time it adds to a snapshot/restore
+    cycle for the whole chunk:
+
+        size_compressed / bandwidth + size / decompress_speed
+            + compress_weight * size / compress_speed
+
+    A low bandwidth_mb_s (slow uplink to B2/R2) favours ratio, a high one
+    favours fast codecs. NONE wins whenever compressing does not pay off.
+    """
+    candidates: Tuple[Compressor, ...] = (Compressor.LZ4, Compressor.LZ4_HC, Compressor.ZIPNN, Compressor.ZSTD)
+    zstd_levels: Tuple[int, ...] = (3, 9)  # Levels tried when ZSTD is a candidate
+    # Transform chains tried before each codec (ZipNN does its own grouping)
+    transforms: Tuple[Tuple[str, ...], ...] = ((), ("byte_group16",))
+    bandwidth_mb_s: float = 200.0      # Storage/network throughput the archive moves over
+    compress_weight: float = 0.25      # Weight of compression time vs restore time
+    num_samples: int = 4               # Blocks sampled per chunk
+    sample_size: int = 64 * 1024       # Bytes per sampled block
+    max_entropy: float = 7.95          # Bits/byte above which data is stored raw
+    min_ratio: float = 1.02            # Store raw unless the chunk shrinks at least this much
+    throughput_mb_s: Dict[Compressor, Tuple[float, float]] = field(
+        default_factory=lambda: dict(CODEC_THROUGHPUT_MB_S)
+    )
+
+    def cost(self, compressor: Compressor, size: int, ratio: float, level: int = 0) -> float:
+        """Estimated seconds added by storing `size` bytes with `compressor`"""
+        compress_speed, decompress_speed = self.throughput_mb_s.get(compressor, (1.0, 1.0))
+        if compressor == Compressor.ZSTD and level:
+            compress_speed = zstd_compress_speed(level)
+        mb = size / (1024 * 1024)
+        return (
+            mb / ratio / self.bandwidth_mb_s
+            + mb / decompress_speed
+            + self.compress_weight * mb / compress_speed
+        )
+
+
+# zstd dictionaries: ~100x their size in samples is what zstd recommends
+DEFAULT_DICT_SIZE = 112 * 1024
+DICT_SAMPLE_MAX_FILE = 64 * 1024      # Only small files are worth a dictionary
+DICT_SAMPLE_BUDGET = 8 * 1024 * 1024  # Sample bytes read per category
+
+
+def train_zstd_dictionary(samples, dict_size: int = DEFAULT_DICT_SIZE, level: int = DEFAULT_ZSTD_LEVEL) -> Optional[bytes]:
+    """
+    Train a zstd dictionary from sample files.
+
+    Returns:
+        Dictionary bytes, or None if zstd is missing or there is too little data
+    """
+    if not HAS_ZSTD or len(samples) < 8:
+        return None
+    try:
+        trained = zstd.train_dictionary(dict_size, list(samples), level=level)
+    except zstd.ZstdError:
+        return None
+    return trained.as_bytes()
+
+
+def estimate_entropy(data) -> float:
+    """Shannon entropy of the byte histogram, in bits per byte (0-8)"""
+    if not data:
+        return 0.0
+    if HAS_NUMPY:
+        counts = np.bincount(np.frombuffer(data, dtype=np.uint8), minlength=256)
+        p = counts[counts > 0] / len(data)
+        return float(-(p * np.log2(p)).sum())
+    total = len(data)
+    return -sum(c / total * math.log2(c / total) for c in Counter(bytes(data)).values())
+
+
+def sample_blocks(data, num_samples: int, sample_size: int) -> bytes:
+    """Evenly spaced blocks of data (all of it when it is small)"""
+    if len(data) <= num_samples * sample_size:
+        return bytes(data)
+    step = (len(data) - sample_size) // max(1, num_samples - 1)
+    step -= step % 8  # Keep float elements aligned for the transforms
+    return b''.join(bytes(data[i * step:i * step + sample_size]) for i in range(num_samples))
+
+
 class HybridCompressor:
     """
     Hybrid compressor that selects the best algorithm per file type.
@@ -183,17 +321,33 @@ class HybridCompressor:
         compressed, strategy = compressor.compress_file(data, "model.pt")
 
         # Decompress
-        original = compressor.decompress(compressed, strategy.compressor)
+        original = compressor.decompress(compressed, strategy.compressor, transforms=strategy.transforms)
     """
 
-    def __init__(self, strategies: Optional[dict] = None):
+    def __init__(
+        self,
+        strategies: Optional[dict] = None,
+        adaptive: Optional[AdaptiveConfig] = None,
+        zstd_threads: int = 0,
+    ):
         """
         Initialize hybrid compressor.
 
         Args:
             strategies: Custom strategies dict (FileCategory -> CompressionStrategy)
+            adaptive: Pick the codec per block from samples instead of the extension
+            zstd_threads: zstd worker threads per frame (0 = single-threaded, -1 = all CPUs)
         """
         self.strategies = strategies or DEFAULT_STRATEGIES
+        self.adaptive = adaptive
+        self.zstd_threads = zstd_threads
+
+        # zstd dictionaries (dict_id -> raw bytes / category) and cached contexts
+        self._zstd_dict_data: Dict[int, Tuple[bytes, Optional[FileCategory]]] = {}
+        self._zstd_dicts: Dict[int, 'zstd.ZstdCompressionDict'] = {}
+        self._zstd_category_dict: Dict[FileCategory, int] = {}
+        self._zstd_cctx: Dict[Tuple[int, int], 'zstd.ZstdCompressor'] = {}
+        self._zstd_dctx: Dict[int, 'zstd.ZstdDecompressor'] = {}
 
         # Initialize compressors
         self._zipnn = None
@@ -202,6 +356,62 @@ class HybridCompressor:
             self._zipnn = ZipNN()  # Default for generic use
             self._zipnn_bf16 = ZipNN(bytearray_dtype="bfloat16")  # Optimized for BF16/FP16 models
 
+    def clone(self) -> 'HybridCompressor':
+        """Same configuration and dictionaries, separate codec state (one per thread)"""
+        compressor = HybridCompressor(self.strategies, adaptive=self.adaptive, zstd_threads=self.zstd_threads)
+        for data, category in self._zstd_dict_data.values():
+            compressor.add_dictionary(data, category)
+        return compressor
+
+    def add_dictionary(self, data: bytes, category: Optional[FileCategory] = None) -> int:
+        """
+        Register a zstd dictionary.
+
+        Args:
+            data: Dictionary bytes (see train_zstd_dictionary)
+            category: Use it when compressing this category (None = decompression only)
+
+        Returns:
+            The dictionary ID embedded in the frames that use it
+        """
+        if not HAS_ZSTD:
+            raise RuntimeError("zstd not installed. Run: pip install zstandard")
+        dictionary = zstd.ZstdCompressionDict(data)
+        dict_id = dictionary.dict_id()
+        self._zstd_dict_data[dict_id] = (data, category)
+        self._zstd_dicts[dict_id] = dictionary
+        if category is not None:
+            self._zstd_category_dict[category] = dict_id
+        return dict_id
+
+    def dictionaries(self) -> Dict[int, Tuple[bytes, Optional[FileCategory]]]:
+        """Registered dictionaries: dict_id -> (bytes, category)"""
+        return dict(self._zstd_dict_data)
+
+    def _zstd_compressor(self, level: int, category: Optional[FileCategory]) -> 'zstd.ZstdCompressor':
+        dict_id = self._zstd_category_dict.get(category, 0) if category is not None else 0
+        key = (level, dict_id)
+        cctx = self._zstd_cctx.get(key)
+        if cctx is None:
+            cctx = zstd.ZstdCompressor(
+                level=level,
+                dict_data=self._zstd_dicts.get(dict_id),
+                threads=self.zstd_threads,
+                write_content_size=True,
+            )
+            self._zstd_cctx[key] = cctx
+        return cctx
+
+    def _zstd_decompressor(self, data) -> 'zstd.ZstdDecompressor':
+        dict_id = zstd.get_frame_parameters(data).dict_id
+        dctx = self._zstd_dctx.get(dict_id)
+        if dctx is None:
+            if dict_id and dict_id not in self._zstd_dicts:
+                raise ValueError(f"zstd dictionary {dict_id} not loaded")
+            dctx = zstd.ZstdDecompressor(dict_data=self._zstd_dicts.get(dict_id))
+            self._zstd_dctx[dict_id] = dctx
+        return dctx
+
     def get_category(self, filepath: str) -> FileCategory:
         """
         Determine file category from extension.
@@ -228,7 +438,14 @@ class HybridCompressor:
         category = self.get_category(filepath)
         return self.strategies.get(category, self.strategies[FileCategory.GENERIC])
 
-    def compress(self, data: bytes, compressor: Compressor, level: int = 0, use_bf16: bool = False) -> bytes:
+    def compress(
+        self,
+        data: bytes,
+        compressor: Compressor,
+        level: int = 0,
+        use_bf16: bool = False,
+        category: Optional[FileCategory] = None,
+    ) -> bytes:
         """
         Compress data using specified algorithm.
 
@@ -237,6 +454,7 @@ class HybridCompressor:
             compressor: Algorithm to use
             level: Compression level
             use_bf16: Use BF16-optimized ZipNN (for model weights)
+            category: zstd: use the dictionary registered for this category
 
         Returns:
             Compressed bytes
@@ -265,9 +483,20 @@ class HybridCompressor:
                 return self._zipnn_bf16.compress(data)
             return self._zipnn.compress(data)
 
+        if compressor == Compressor.ZSTD:
+            if not HAS_ZSTD:
+                raise RuntimeError("zstd not installed. Run: pip install zstandard")
+            return self._zstd_compressor(level or DEFAULT_ZSTD_LEVEL, category).compress(data)
+
         raise ValueError(f"Unknown compressor: {compressor}")
 
-    def decompress(self, data: bytes, compressor: Compressor, use_bf16: bool = False) -> bytes:
+    def decompress(
+        self,
+        data: bytes,
+        compressor: Compressor,
+        use_bf16: bool = False,
+        transforms: Sequence[str] = (),
+    ) -> bytes:
         """
         Decompress data using specified algorithm.
 
@@ -275,10 +504,14 @@ class HybridCompressor:
             data: Compressed bytes
             compressor: Algorithm used for compression
             use_bf16: Use BF16-optimized ZipNN (must match compression)
+            transforms: Transform chain applied before compression (undone after it)
 
         Returns:
             Original bytes
         """
+        if transforms:
+            return invert_transforms(self.decompress(data, compressor, use_bf16=use_bf16), transforms)
+
         if compressor == Compressor.NONE:
             return data
 
@@ -301,12 +534,21 @@ class HybridCompressor:
                 return self._zipnn_bf16.decompress(data)
             return self._zipnn.decompress(data)
 
+        if compressor == Compressor.ZSTD:
+            if not HAS_ZSTD:
+                raise RuntimeError("zstd not installed. Run: pip install zstandard")
+            # The frame names its dictionary, if any
+            return self._zstd_decompressor(data).decompress(data)
+
         raise ValueError(f"Unknown compressor: {compressor}")
 
     def compress_file(self, data: bytes, filepath: str) -> Tuple[bytes, CompressionStrategy]:
         """
         Compress data using strategy appropriate for file type.
 
+        The strategy's transforms run before the codec; pass
+        strategy.transforms to decompress to undo them.
+
         Args:
             data: Raw file bytes
             filepath: Original file path (for extension detection)
@@ -317,9 +559,107 @@ class HybridCompressor:
         strategy = self.get_strategy(filepath)
         # Use BF16-optimized compression for model weights
         use_bf16 = strategy.category == FileCategory.MODELS_FP16
-        compressed = self.compress(data, strategy.compressor, strategy.level, use_bf16=use_bf16)
+        category = strategy.category if strategy.dictionary else None
+        data = apply_transforms(data, strategy.transforms)
+        compressed = self.compress(data, strategy.compressor, strategy.level, use_bf16=use_bf16, category=category)
         return compressed, strategy
 
+    def is_available(self, compressor: Compressor) -> bool:
+        """True if the codec can run here (no silent fallback to another one)"""
+        if compressor in (Compressor.LZ4, Compressor.LZ4_HC):
+            return HAS_LZ4
+        if compressor == Compressor.ZIPNN:
+            return HAS_ZIPNN
+        if compressor == Compressor.ZSTD:
+            return HAS_ZSTD
+        return compressor == Compressor.NONE
+
+    def select_compressor(self, data, filepath: str = "") -> Tuple[Compressor, dict]:
+        """
+        Choose the codec for a block with the adaptive objective.
+
+        Args:
+            data: Block to compress
+            filepath: Source file (ZipNN uses its BF16 mode for model weights)
+
+        Returns:
+            Tuple of (compressor, decision metadata)
+        """
+        config = self.adaptive or AdaptiveConfig()
+        sample = sample_blocks(data, config.num_samples, config.sample_size)
+        entropy = estimate_entropy(sample)
+        decision = {"entropy": round(entropy, 3)}
+
+        if not sample or entropy >= config.max_entropy:
+            decision["reason"] = "entropy"
+            return Compressor.NONE, decision
+
+        use_bf16 = bool(filepath) and self.get_category(filepath) == FileCategory.MODELS_FP16
+        best, best_level, best_chain = Compressor.NONE, 0, ()
+        best_cost, best_ratio = config.cost(Compressor.NONE, len(data), 1.0), 1.0
+        for chain in config.transforms:
+            if chain and not HAS_NUMPY:
+                continue
+            transformed = apply_transforms(sample, chain)
+            for candidate in config.candidates:
+                if not self.is_available(candidate) or (chain and candidate == Compressor.ZIPNN):
+                    continue
+                levels = config.zstd_levels if candidate == Compressor.ZSTD else (0,)
+                for level in levels:
+                    compressed = self.compress(transformed, candidate, level=level, use_bf16=use_bf16)
+                    ratio = len(sample) / max(1, len(compressed))
+                    if ratio < config.min_ratio:
+                        continue
+                    cost = config.cost(candidate, len(data), ratio, level=level)
+                    if cost < best_cost:
+                        best, best_level, best_chain = candidate, level, chain
+                        best_cost, best_ratio = cost, ratio
+
+        decision["reason"] = "trial"
+        decision["sample_ratio"] = round(best_ratio, 3)
+        if best_level:
+            decision["level"] = best_level
+        if best_chain:
+            decision["transforms"] = list(best_chain)
+        return best, decision
+
+    def compress_block(self, data, filepath: str) -> Tuple[bytes, Compressor, dict]:
+        """
+        Compress one archive block, adaptively if configured.
+
+        Args:
+            data: Raw block
+            filepath: Source file (extension strategy / ZipNN mode)
+
+        Returns:
+            Tuple of (compressed_bytes, compressor_used, metadata). In extension
+            mode metadata only lists the strategy's transforms (if any); in
+            adaptive mode it holds the codec, the measured ratio, the
+            transforms and the sampling decision. Decode with decompress_block.
+        """
+        if self.adaptive is None:
+            compressed, strategy = self.compress_file(data, filepath)
+            meta = {"transforms": list(strategy.transforms)} if strategy.transforms else {}
+            return compressed, strategy.compressor, meta
+
+        compressor, meta = self.select_compressor(data, filepath)
+        use_bf16 = self.get_category(filepath) == FileCategory.MODELS_FP16
+        transformed = apply_transforms(data, meta.get("transforms", ()))
+        compressed = self.compress(transformed, compressor, level=meta.get("level", 0), use_bf16=use_bf16)
+        if compressor != Compressor.NONE and len(compressed) * self.adaptive.min_ratio > len(data):
+            # The samples were not representative: store the block raw
+            compressor, compressed = Compressor.NONE, data
+            meta["reason"] = "no_gain"
+            meta.pop("transforms", None)
+
+        meta["codec"] = compressor.value
+        meta["ratio"] = round(len(data) / max(1, len(compressed)), 3)
+        return compressed, compressor, meta
+
+    def decompress_block(self, data, compressor: Compressor, meta: Optional[dict] = None):
+        """Inverse of compress_block: decompress, then undo the chunk's transforms"""
+        return self.decompress(data, compressor, transforms=(meta or {}).get("transforms") or ())
+
     def compress_file_path(self, filepath: str) -> Tuple[bytes, CompressionStrategy]:
         """
         Read and compress a file from disk.
@@ -341,6 +681,7 @@ class HybridCompressor:
             Compressor.LZ4: 1,
             Compressor.LZ4_HC: 2,
             Compressor.ZIPNN: 3,
+            Compressor.ZSTD: 4,
         }
         return mapping.get(compressor, 0)
 
@@ -351,8 +692,11 @@ class HybridCompressor:
             1: Compressor.LZ4,
             2: Compressor.LZ4_HC,
             3: Compressor.ZIPNN,
+            4: Compressor.ZSTD,
         }
-        return mapping.get(compressor_id, Compressor.NONE)
+        if compressor_id not in mapping:
+            raise ValueError(f"Unknown compressor id: {compressor_id}")
+        return mapping[compressor_id]
 
     @staticmethod
     def get_compression_stats(original_size: int, compressed_size: int) -> dict:
@@ -8,6 +8,9 @@ Methods:
 - hybrid_v1: Hybrid compression by file type (LZ4 + ZipNN)
 - lz4_fast: Fast LZ4 compression (GPU-friendly)
 - zipnn_models: ZipNN for neural network weights
+- adaptive_v1: Codec chosen per chunk from sampled data
+- zstd: Zstandard level 3 for every file type
+- hybrid_zstd: Zstandard with trained dictionaries for code/data/logs, ZipNN for models
 - none: No compression (passthrough)
 """
 
@@ -16,11 +19,13 @@ from dataclasses import dataclass, field
 from typing import Dict, List, Optional
 
 from .hybrid_compressor import (
+    AdaptiveConfig,
     HybridCompressor,
     Compressor,
     FileCategory,
     CompressionStrategy,
     DEFAULT_STRATEGIES,
+    DEFAULT_ZSTD_LEVEL,
 )
 
 
@@ -30,7 +35,10 @@ class CompressionMethodID(Enum):
     LZ4_FAST = 1
     LZ4_HC = 2
     ZIPNN = 3
+    ZSTD = 4
     HYBRID_V1 = 10  # Our hybrid method
+    ADAPTIVE_V1 = 11  # Sample-based codec per chunk
+    HYBRID_ZSTD = 12  # Hybrid with zstd + per-archive dictionaries
 
 
 @dataclass
@@ -42,10 +50,16 @@ class CompressionMethod:
     version: str
     gpu_decompress: bool  # Supports nvCOMP GPU decompression
     strategies: Dict[FileCategory, CompressionStrategy] = field(default_factory=dict)
+    adaptive: Optional[AdaptiveConfig] = None  # Sample-based selection instead of strategies
+    threads: int = 0  # zstd worker threads per frame (0 = single-threaded)
 
     def get_compressor(self) -> HybridCompressor:
         """Get configured HybridCompressor for this method"""
-        return HybridCompressor(strategies=self.strategies if self.strategies else None)
+        return HybridCompressor(
+            strategies=self.strategies if self.strategies else None,
+            adaptive=self.adaptive,
+            zstd_threads=self.threads,
+        )
 
 
 # Registry of all available methods
@@ -156,6 +170,26 @@ register_method(CompressionMethod(
 ))
 
 
+# Method 4: Zstandard
+register_method(CompressionMethod(
+    id=CompressionMethodID.ZSTD,
+    name="zstd",
+    description="Zstandard level 3 (better ratio than LZ4, fast decompression)",
+    version="1.0",
+    gpu_decompress=False,
+    strategies={
+        cat: CompressionStrategy(
+            category=cat,
+            compressor=Compressor.ZSTD,
+            level=DEFAULT_ZSTD_LEVEL,
+            gpu_decompress=False,
+            expected_ratio=3.0,
+        )
+        for cat in FileCategory
+    },
+))
+
+
 # Method 10: Hybrid v1 (our main method)
 # Uses different algorithms per file type for optimal compression
 register_method(CompressionMethod(
@@ -168,6 +202,52 @@ register_method(CompressionMethod(
 ))
 
 
+# Method 11: Adaptive v1
+# Samples each chunk (entropy + trial compression) and picks NONE/LZ4/LZ4-HC/ZipNN
+register_method(CompressionMethod(
+    id=CompressionMethodID.ADAPTIVE_V1,
+    name="adaptive_v1",
+    description="Adaptive compression: codec chosen per chunk from sampled data",
+    version="1.0",
+    gpu_decompress=True,  # LZ4 chunks can use GPU
+    strategies=DEFAULT_STRATEGIES,
+    adaptive=AdaptiveConfig(),
+))
+
+
+# Method 12: Hybrid zstd
+# Like hybrid_v1, with zstd for text-like files; code/data/logs get a
+# dictionary trained from the archive's own small files (stored in it)
+register_method(CompressionMethod(
+    id=CompressionMethodID.HYBRID_ZSTD,
+    name="hybrid_zstd",
+    description="Hybrid compression: zstd + trained dictionaries for code/text, ZipNN for models",
+    version="1.0",
+    gpu_decompress=False,
+    strategies={
+        **DEFAULT_STRATEGIES,
+        **{
+            cat: CompressionStrategy(
+                category=cat,
+                compressor=Compressor.ZSTD,
+                level=6,
+                gpu_decompress=False,
+                expected_ratio=DEFAULT_STRATEGIES[cat].expected_ratio,
+                dictionary=True,
+            )
+            for cat in (FileCategory.CODE, FileCategory.DATA, FileCategory.LOGS)
+        },
+        FileCategory.GENERIC: CompressionStrategy(
+            category=FileCategory.GENERIC,
+            compressor=Compressor.ZSTD,
+            level=DEFAULT_ZSTD_LEVEL,
+            gpu_decompress=False,
+            expected_ratio=2.5,
+        ),
+    },
+))
+
+
 # =============================================================================
 # Utility Functions
 # =============================================================================
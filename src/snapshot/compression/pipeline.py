@@ -0,0 +1,75 @@
+"""
+Chunk Pipeline - Ordered, bounded parallel processing of chunks
+
+Features:
+- Configurable worker count (default: all CPUs)
+- Bounded number of in-flight chunks (fixed memory budget)
+- Results yielded in submission order (archives stay byte-identical)
+
+LZ4 and ZipNN release the GIL while compressing, so a thread pool scales
+across cores without pickling 64 MB buffers between processes.
+"""
+
+import os
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Callable, Iterable, Iterator, Optional, TypeVar
+
+T = TypeVar('T')
+R = TypeVar('R')
+
+
+def default_workers() -> int:
+    """Number of workers used when none is configured"""
+    return os.cpu_count() or 1
+
+
+class ChunkPipeline:
+    """
+    Runs a function over a stream of chunks on a thread pool.
+
+    Usage:
+        pipeline = ChunkPipeline(workers=8, max_inflight=16)
+        for compressed in pipeline.map(compress, iter_blocks()):
+            archive_file.write(compressed)
+
+    At most `max_inflight` items are pulled from the input iterator and not
+    yet yielded, so memory stays flat whatever the input size.
+    """
+
+    def __init__(self, workers: Optional[int] = None, max_inflight: Optional[int] = None):
+        """
+        Initialize chunk pipeline.
+
+        Args:
+            workers: Number of worker threads (default: CPU count)
+            max_inflight: Max chunks read but not yet consumed (default: 2 x workers)
+        """
+        self.workers = max(1, workers or default_workers())
+        self.max_inflight = max(1, max_inflight or self.workers * 2)
+
+    def map(self, fn: Callable[[T], R], items: Iterable[T]) -> Iterator[R]:
+        """
+        Apply fn to every item, yielding results in input order.
+
+        Args:
+            fn: Function to run on each item (must be thread-safe)
+            items: Input iterable, consumed lazily
+
+        Yields:
+            fn(item) for each item, in order
+        """
+        if self.workers == 1:
+            # Serial fast path: no pool, exactly one chunk in flight
+            for item in items:
+                yield fn(item)
+            return
+
+        with ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix='dumont-chunk') as executor:
+            pending = deque()
+            for item in items:
+                pending.append(executor.submit(fn, item))
+                if len(pending) >= self.max_inflight:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
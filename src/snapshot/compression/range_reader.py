@@ -0,0 +1,210 @@
+"""
+Range Readers - Random access to .dumont archives
+
+Readers expose read_at(offset, size) so an archive can be read without
+downloading it whole:
+- LocalRangeReader: pread on a local file (thread-safe, no shared position)
+- MmapRangeReader: shared read-only mapping, read_view() is zero-copy
+- HTTPRangeReader: HTTP Range requests (B2/R2 presigned URLs, any S3 endpoint)
+
+read_view(offset, size) returns a bytes-like object: a memoryview over the
+mapping for MmapRangeReader, plain bytes for the others. Callers release
+views with release_view() once done.
+"""
+
+import mmap
+import os
+import time
+from typing import Dict, Optional
+
+
+class LocalRangeReader:
+    """Random-access reader over a local file"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd = os.open(path, os.O_RDONLY)
+
+    @property
+    def size(self) -> int:
+        return os.fstat(self._fd).st_size
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """Read exactly `size` bytes at `offset` (fewer only at end of file)"""
+        data = os.pread(self._fd, size, offset)
+        if len(data) == size or not data:
+            return data
+        # Short read: keep going until size or EOF
+        parts = [data]
+        received = len(data)
+        while received < size:
+            part = os.pread(self._fd, size - received, offset + received)
+            if not part:
+                break
+            parts.append(part)
+            received += len(part)
+        return b''.join(parts)
+
+    def read_view(self, offset: int, size: int) -> bytes:
+        return self.read_at(offset, size)
+
+    def fileno(self) -> int:
+        return self._fd
+
+    def close(self):
+        if self._fd is not None:
+            os.close(self._fd)
+            self._fd = None
+
+
+class MmapRangeReader:
+    """
+    Random-access reader over a read-only memory mapping.
+
+    All threads share one mapping; read_view() hands out memoryviews over
+    chunk ranges without copying or issuing syscalls.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        with open(path, 'rb') as f:
+            self._mmap = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._view = memoryview(self._mmap)
+
+    @property
+    def size(self) -> int:
+        return len(self._mmap)
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        return self._mmap[offset:offset + size]
+
+    def read_view(self, offset: int, size: int) -> memoryview:
+        """Zero-copy view of [offset, offset + size); call release_view() when done"""
+        return self._view[offset:offset + size]
+
+    def advise_sequential(self):
+        """Hint the kernel to read ahead aggressively (full restores)"""
+        if hasattr(self._mmap, 'madvise') and hasattr(mmap, 'MADV_SEQUENTIAL'):
+            self._mmap.madvise(mmap.MADV_SEQUENTIAL)
+
+    def close(self):
+        if self._mmap is None:
+            return
+        self._view.release()
+        try:
+            self._mmap.close()
+        except BufferError:
+            # A caller still holds a view; the mapping is freed with it
+            pass
+        self._mmap = None
+
+
+class HTTPRangeReader:
+    """
+    Random-access reader over HTTP(S) using Range requests.
+
+    Only GET is used: presigned S3/B2/R2 URLs are signed for GET and answer
+    HEAD with 403, so the size comes from the Content-Range of a 1-byte GET.
+    Connection errors and 5xx responses are retried with backoff.
+
+    Usage:
+        reader = HTTPRangeReader(presigned_url)
+        header = reader.read_at(0, 512)
+    """
+
+    def __init__(
+        self,
+        url: str,
+        headers: Optional[Dict[str, str]] = None,
+        timeout: int = 120,
+        retries: int = 4,
+    ):
+        try:
+            import requests
+        except ImportError:
+            raise RuntimeError("requests not installed. Run: pip install requests")
+
+        self.url = url
+        self.headers = headers or {}
+        self.timeout = timeout
+        self.retries = max(1, retries)
+        self._requests = requests
+        self._session = requests.Session()
+        self._size: Optional[int] = None
+
+    def _get(self, first: int, last: int, stream: bool = False):
+        """GET bytes [first, last], retrying connection errors and 5xx"""
+        headers = dict(self.headers)
+        headers['Range'] = f"bytes={first}-{last}"
+        for attempt in range(self.retries):
+            retry = attempt + 1 < self.retries
+            try:
+                response = self._session.get(self.url, headers=headers, timeout=self.timeout, stream=stream)
+            except (self._requests.ConnectionError, self._requests.Timeout,
+                    self._requests.exceptions.ChunkedEncodingError):
+                if not retry:
+                    raise
+            else:
+                if response.status_code < 500 or not retry:
+                    return response
+                response.close()
+            time.sleep(min(2 ** attempt, 10))
+
+    @property
+    def size(self) -> int:
+        if self._size is None:
+            response = self._get(0, 0, stream=True)
+            with response:
+                content_range = response.headers.get('Content-Range', '')
+                if response.status_code in (206, 416) and '/' in content_range:
+                    # "bytes 0-0/12345" (or "bytes */0" for an empty object)
+                    self._size = int(content_range.rsplit('/', 1)[1])
+                else:
+                    response.raise_for_status()
+                    # Range ignored: the full body follows, its length is the size
+                    self._size = int(response.headers['Content-Length'])
+        return self._size
+
+    def read_at(self, offset: int, size: int) -> bytes:
+        """Fetch bytes [offset, offset + size) with a single Range request"""
+        if size <= 0:
+            return b''
+        response = self._get(offset, offset + size - 1)
+        if response.status_code == 416:
+            return b''
+        response.raise_for_status()
+        if response.status_code != 206:
+            raise RuntimeError(f"Server ignored Range request for {self.url} (HTTP {response.status_code})")
+        return response.content
+
+    def read_view(self, offset: int, size: int) -> bytes:
+        return self.read_at(offset, size)
+
+    def close(self):
+        self._session.close()
+
+
+def is_url(path: str) -> bool:
+    """True if path points to an HTTP(S) object instead of a local file"""
+    return path.startswith(('http://', 'https://'))
+
+
+def release_view(data):
+    """Release a view returned by read_view() (no-op for bytes)"""
+    if isinstance(data, memoryview):
+        data.release()
+
+
+def open_range_reader(path: str, use_mmap: bool = False):
+    """
+    Open a local path or HTTP(S) URL for random access.
+
+    Args:
+        path: Local file or HTTP(S) URL
+        use_mmap: Map local files into memory (zero-copy read_view)
+    """
+    if is_url(path):
+        return HTTPRangeReader(path)
+    if use_mmap:
+        return MmapRangeReader(path)
+    return LocalRangeReader(path)
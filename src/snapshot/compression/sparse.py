@@ -0,0 +1,148 @@
+"""
+Sparse files and zero regions
+
+Preallocated files (optimizer state, KV caches, disk images, sparse
+checkpoints) hold long runs of zeros. Instead of reading and compressing
+them, an archive block is split into:
+
+- zero extents: filesystem holes (SEEK_DATA / SEEK_HOLE, never read) and
+  all-zero pages of the data that was read (NumPy check per page)
+- a payload: the remaining bytes, concatenated, compressed as usual
+
+Zero extents are stored as [offset, length] pairs relative to the block
+(ChunkInfo.meta["zeros"]) with no payload. Restores skip them: the target
+file is preallocated with truncate(), so they stay sparse holes.
+"""
+
+import errno
+import os
+from typing import Iterator, List, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+# Zero runs shorter than this are left to the codec (which handles them well);
+# 64 KB keeps the manifest small and matches common filesystem block sizes
+ZERO_PAGE_SIZE = 64 * 1024
+
+
+def data_ranges(fd: int, start: int, end: int) -> List[Tuple[int, int]]:
+    """
+    Ranges of [start, end) backed by data, according to the filesystem.
+
+    Falls back to the whole range where SEEK_DATA/SEEK_HOLE are missing
+    (non-Linux/BSD) or unsupported by the filesystem.
+    """
+    if not hasattr(os, 'SEEK_DATA'):
+        return [(start, end)]
+
+    ranges = []
+    pos = start
+    try:
+        while pos < end:
+            try:
+                data_start = os.lseek(fd, pos, os.SEEK_DATA)
+            except OSError as e:
+                if e.errno == errno.ENXIO:  # Only a hole until EOF
+                    break
+                raise
+            if data_start >= end:
+                break
+            data_end = min(os.lseek(fd, data_start, os.SEEK_HOLE), end)
+            ranges.append((data_start, data_end))
+            pos = data_end
+    except OSError:
+        return [(start, end)]
+    return ranges
+
+
+def zero_runs(data, page_size: int = ZERO_PAGE_SIZE) -> List[Tuple[int, int]]:
+    """
+    All-zero runs of whole pages in `data`, as (start, end) offsets.
+
+    Pages are checked 8 bytes at a time with one vectorized any(); a
+    trailing partial page is checked on its own.
+    """
+    if not HAS_NUMPY or len(data) < page_size:
+        return []
+
+    full = len(data) - len(data) % page_size
+    words = np.frombuffer(data, dtype=np.uint64, count=full // 8).reshape(-1, page_size // 8)
+    zero = ~words.any(axis=1)
+    if full < len(data) and data.count(0, full) == len(data) - full:
+        # Short tail: only counts if it extends a zero run
+        zero = np.append(zero, zero[-1])
+
+    # Run boundaries: positions where the zero flag flips
+    edges = np.flatnonzero(np.diff(np.concatenate(([False], zero, [False])).astype(np.int8)))
+    runs = []
+    for first, last in zip(edges[::2], edges[1::2]):
+        runs.append((int(first) * page_size, min(int(last) * page_size, len(data))))
+    return runs
+
+
+def read_sparse_block(fd: int, start: int, size: int, page_size: int = ZERO_PAGE_SIZE) -> Tuple[bytes, List[List[int]]]:
+    """
+    Read [start, start + size) skipping holes and zero pages.
+
+    Returns:
+        Tuple of (payload, zeros): the non-zero bytes concatenated, and the
+        [offset, length] zero extents relative to `start`, in order
+    """
+    parts = []
+    zeros: List[List[int]] = []
+    cursor = 0  # Block offset up to which bytes are accounted for
+
+    def add_zeros(offset: int, length: int):
+        if zeros and zeros[-1][0] + zeros[-1][1] == offset:
+            zeros[-1][1] += length
+        else:
+            zeros.append([offset, length])
+
+    for range_start, range_end in data_ranges(fd, start, start + size):
+        if range_start - start > cursor:
+            add_zeros(cursor, range_start - start - cursor)
+        data = os.pread(fd, range_end - range_start, range_start)
+        base = range_start - start
+        pos = 0
+        for zero_start, zero_end in zero_runs(data, page_size):
+            parts.append(data[pos:zero_start])
+            add_zeros(base + zero_start, zero_end - zero_start)
+            pos = zero_end
+        parts.append(data[pos:])
+        cursor = base + len(data)
+        if len(data) < range_end - range_start:  # File shrank while reading
+            return b''.join(parts), zeros
+    if cursor < size:
+        add_zeros(cursor, size - cursor)
+    return b''.join(parts), zeros
+
+
+def iter_data_extents(zeros: List[List[int]], size: int) -> Iterator[Tuple[int, int, int]]:
+    """
+    Block ranges that are not zero extents, in order.
+
+    Yields:
+        Tuple of (start, end, payload_offset)
+    """
+    pos = 0
+    payload_offset = 0
+    for offset, length in zeros:
+        if offset > pos:
+            yield pos, offset, payload_offset
+            payload_offset += offset - pos
+        pos = offset + length
+    if pos < size:
+        yield pos, size, payload_offset
+
+
+def expand_zeros(payload, zeros: List[List[int]], size: int) -> bytearray:
+    """Rebuild a full block from its payload and zero extents"""
+    out = bytearray(size)
+    for start, end, payload_offset in iter_data_extents(zeros, size):
+        out[start:end] = payload[payload_offset:payload_offset + end - start]
+    return out
@@ -0,0 +1,144 @@
+"""
+Pre-compression transforms - Byte grouping and bitshuffle for float data
+
+FP16/BF16 weights compress badly as-is: each 2-byte value interleaves a
+low-entropy byte (sign + exponent) with a near-random one (mantissa), so
+LZ4/zstd see noise everywhere. Regrouping the data so that the same byte
+(or bit) of every value is contiguous exposes the redundant planes to the
+codec. This is the core idea behind ZipNN, here without the dependency.
+
+Transforms are reversible byte -> byte functions, chained before the codec
+and undone in reverse order after it. The chain is recorded per chunk
+(ChunkInfo.meta["transforms"]) so readers know how to invert it.
+
+All transforms are vectorized with NumPy and write into one preallocated
+buffer; a trailing partial element (or, for bitshuffle, group of 8) is
+kept as-is at the end of the output.
+"""
+
+from typing import Callable, Dict, Sequence, Tuple
+
+try:
+    import numpy as np
+    HAS_NUMPY = True
+except ImportError:
+    HAS_NUMPY = False
+
+
+def byte_group(data, width: int) -> bytearray:
+    """
+    Split `width`-byte elements into byte planes.
+
+    [a0 a1 b0 b1 c0 c1] -> [a0 b0 c0 a1 b1 c1]
+    """
+    body = len(data) - len(data) % width
+    elements = np.frombuffer(data, dtype=np.uint8, count=body).reshape(-1, width)
+    out = bytearray(len(data))
+    planes = np.frombuffer(out, dtype=np.uint8, count=body).reshape(width, -1)
+    # One strided copy per plane into a preallocated buffer (a full
+    # transpose().tobytes() is several times slower)
+    for i in range(width):
+        planes[i] = elements[:, i]
+    out[body:] = data[body:]
+    return out
+
+
+def byte_ungroup(data, width: int) -> bytearray:
+    """Inverse of byte_group"""
+    body = len(data) - len(data) % width
+    planes = np.frombuffer(data, dtype=np.uint8, count=body).reshape(width, -1)
+    out = bytearray(len(data))
+    elements = np.frombuffer(out, dtype=np.uint8, count=body).reshape(-1, width)
+    for i in range(width):
+        elements[:, i] = planes[i]
+    out[body:] = data[body:]
+    return out
+
+
+def _transpose_bits_8x8(words):
+    """
+    Transpose the 8x8 bit matrix held in each uint64 (rows = bytes).
+
+    Three mask/shift/xor rounds (Hacker's Delight), in place; the transpose
+    is its own inverse.
+    """
+    for shift, mask in ((7, 0x00AA00AA00AA00AA), (14, 0x0000CCCC0000CCCC), (28, 0x00000000F0F0F0F0)):
+        shift, mask = np.uint64(shift), np.uint64(mask)
+        t = ((words >> shift) ^ words) & mask
+        words ^= t ^ (t << shift)
+    return words
+
+
+def bitshuffle(data, width: int) -> bytearray:
+    """
+    Split `width`-byte elements into bit planes (8 * width planes).
+
+    Finer than byte grouping: the sign and exponent bits of every value end
+    up in planes of their own, which are mostly constant. Each byte plane is
+    cut in groups of 8 bytes whose 8x8 bit matrices are transposed, so
+    elements are processed in multiples of 8.
+    """
+    block = 8 * width
+    body = len(data) - len(data) % block
+    grouped = byte_group(memoryview(data)[:body], width)
+    n = body // width
+    out = bytearray(len(data))
+    bit_planes = np.frombuffer(out, dtype=np.uint8, count=body).reshape(width, 8, n // 8)
+    for i in range(width):
+        words = np.frombuffer(grouped, dtype=np.uint64, count=n // 8, offset=i * n).copy()
+        bit_planes[i] = _transpose_bits_8x8(words).view(np.uint8).reshape(-1, 8).T
+    out[body:] = data[body:]
+    return out
+
+
+def bitunshuffle(data, width: int) -> bytearray:
+    """Inverse of bitshuffle"""
+    block = 8 * width
+    body = len(data) - len(data) % block
+    n = body // width
+    bit_planes = np.frombuffer(data, dtype=np.uint8, count=body).reshape(width, 8, n // 8)
+    grouped = bytearray(body)
+    byte_planes = np.frombuffer(grouped, dtype=np.uint8).reshape(width, n // 8, 8)
+    for i in range(width):
+        byte_planes[i] = bit_planes[i].T
+        _transpose_bits_8x8(byte_planes[i].reshape(-1).view(np.uint64))
+    out = byte_ungroup(grouped, width)
+    out += data[body:]
+    return out
+
+
+# name -> (forward, inverse)
+TRANSFORMS: Dict[str, Tuple[Callable, Callable]] = {}
+
+
+def register_transform(name: str, forward: Callable, inverse: Callable):
+    """Register a reversible transform usable in strategies and AdaptiveConfig"""
+    TRANSFORMS[name] = (forward, inverse)
+
+
+def apply_transforms(data, names: Sequence[str]):
+    """Run a transform chain, in order"""
+    for name in names:
+        data = _lookup(name)[0](data)
+    return data
+
+
+def invert_transforms(data, names: Sequence[str]):
+    """Undo a transform chain, in reverse order"""
+    for name in reversed(names):
+        data = _lookup(name)[1](data)
+    return data
+
+
+def _lookup(name: str) -> Tuple[Callable, Callable]:
+    if not HAS_NUMPY:
+        raise RuntimeError("numpy not installed. Run: pip install numpy")
+    if name not in TRANSFORMS:
+        raise ValueError(f"Unknown transform: {name}")
+    return TRANSFORMS[name]
+
+
+# 2-byte floats (FP16/BF16) and 4-byte floats (FP32, optimizer state)
+register_transform("byte_group16", lambda d: byte_group(d, 2), lambda d: byte_ungroup(d, 2))
+register_transform("byte_group32", lambda d: byte_group(d, 4), lambda d: byte_ungroup(d, 4))
+register_transform("bitshuffle16", lambda d: bitshuffle(d, 2), lambda d: bitunshuffle(d, 2))
@@ -0,0 +1,93 @@
+"""
+Remote chunk store job - runs ChunkStore on a GPU machine
+
+The GPU machine does not have this repository installed, so the chunk store
+travels with the job: chunk_store.py and the compression modules it imports
+are embedded in one script, unpacked there into a temporary package and run
+with `python3 -` (the script goes over SSH stdin, not the command line).
+"""
+
+import base64
+import json
+import zlib
+from pathlib import Path
+from typing import Dict, Iterable
+
+PACKAGE = 'dumont_snapshot'
+
+# chunk_store.py and every compression module it imports, directly or not
+BUNDLED_MODULES = (
+    'chunk_store.py',
+    'compression/cdc.py',
+    'compression/dumont_format.py',
+    'compression/hybrid_compressor.py',
+    'compression/pipeline.py',
+    'compression/range_reader.py',
+    'compression/sparse.py',
+    'compression/transforms.py',
+)
+
+# Installed on the remote machine when missing (boto3 for the S3 backend,
+# the others enable the fast paths). zstandard too: chunks written by a
+# host that has it use ZSTD for model weights, and every host restores them.
+REMOTE_REQUIREMENTS = ('boto3', 'lz4', 'numpy', 'zstandard')
+
+
+def bundle_sources() -> Dict[str, str]:
+    """Source of the bundled modules, keyed by path inside the package"""
+    root = Path(__file__).parent
+    sources = {rel: (root / rel).read_text() for rel in BUNDLED_MODULES}
+    # Empty package markers: compression/__init__ would import every module
+    sources['__init__.py'] = ''
+    sources['compression/__init__.py'] = ''
+    return sources
+
+
+def build_remote_script(params: dict, requirements: Iterable[str] = REMOTE_REQUIREMENTS) -> str:
+    """
+    Build the script that runs chunk_store.run_remote(params) on the remote machine.
+
+    Args:
+        params: Job params (see chunk_store.run_remote)
+        requirements: Packages to pip install there if they cannot be imported
+
+    Returns:
+        Python source to feed to `python3 -`
+    """
+    payload = base64.b64encode(zlib.compress(json.dumps(bundle_sources()).encode('utf-8'))).decode('ascii')
+    return f'''
+import base64
+import json
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import zlib
+
+missing = []
+for name in {list(requirements)!r}:
+    try:
+        __import__(name)
+    except ImportError:
+        missing.append(name)
+
+if missing:
+    print(f"Installing dependencies: {{missing}}...", file=sys.stderr, flush=True)
+    subprocess.run([sys.executable, "-m", "pip", "install", "-q"] + missing + ["--break-system-packages"], stdout=sys.stderr, check=False)
+
+root = tempfile.mkdtemp(prefix="{PACKAGE}-")
+try:
+    sources = json.loads(zlib.decompress(base64.b64decode("{payload}")))
+    for rel, source in sources.items():
+        path = os.path.join(root, "{PACKAGE}", rel)
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        with open(path, "w") as f:
+            f.write(source)
+    sys.path.insert(0, root)
+
+    from {PACKAGE}.chunk_store import run_remote
+    run_remote({json.dumps(json.dumps(params))})
+finally:
+    shutil.rmtree(root, ignore_errors=True)
+'''
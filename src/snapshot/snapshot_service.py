@@ -12,10 +12,13 @@ import os
 import time
 import hashlib
 from pathlib import Path
-from typing import Optional, Callable, Dict, Any
+import threading
+from typing import Optional, Callable, Dict, Any, List
 from dataclasses import dataclass
 
 from .compression import DumontArchive, HybridCompressor, ChunkManager
+from .compression.dumont_format import matches_patterns
+from .compression.range_reader import is_url
 
 
 @dataclass
@@ -37,12 +40,52 @@ class RestoreProgress:
     phase: str  # 'download', 'decompress', 'extract'
     current_chunk: int
     total_chunks: int
-    bytes_processed: int
-    bytes_total: int
+    bytes_processed: int     # Decompressed bytes written so far
+    bytes_total: int         # Total original (uncompressed) bytes
     elapsed_seconds: float
     estimated_remaining: float
 
 
+class BackgroundRestore:
+    """
+    Handle for the background phase of SnapshotService.restore_lazy.
+
+    Usage:
+        restore = service.restore_lazy("snap.dumont", "/workspace", ["*.py", "configs/"])
+        # code and configs are on disk here
+        restore.wait()  # rest of the workspace
+    """
+
+    def __init__(self, first_phase: Dict[str, Any]):
+        self.first_phase = first_phase
+        self.restored_files: List[str] = []
+        self.bytes_restored = 0
+        self.error: Optional[Exception] = None
+        self.started_at = time.time()
+        self._thread: Optional[threading.Thread] = None
+
+    def start(self, target: Callable[[], None]):
+        def _run():
+            try:
+                target()
+            except Exception as e:
+                self.error = e
+
+        self._thread = threading.Thread(target=_run, name='dumont-lazy-restore', daemon=True)
+        self._thread.start()
+
+    @property
+    def done(self) -> bool:
+        return self._thread is not None and not self._thread.is_alive()
+
+    def wait(self, timeout: Optional[float] = None) -> bool:
+        """Wait for the background phase; re-raises its error. Returns True if done."""
+        self._thread.join(timeout)
+        if self.error:
+            raise self.error
+        return self.done
+
+
 class SnapshotService:
     """
     High-level service for creating and restoring workspace snapshots.
@@ -57,14 +100,32 @@ class SnapshotService:
         service.restore_snapshot("snapshot.dumont", "/workspace", use_gpu=True)
     """
 
-    def __init__(self, chunk_size: int = 64 * 1024 * 1024):
+    def __init__(
+        self,
+        chunk_size: int = 64 * 1024 * 1024,
+        workers: Optional[int] = None,
+        max_inflight_chunks: Optional[int] = None,
+        solid: bool = True,
+        method: Optional[str] = None,
+        zstd_threads: Optional[int] = None,
+    ):
         """
         Initialize snapshot service.
 
         Args:
             chunk_size: Size of chunks in bytes (default 64 MB)
+            workers: Compression/decompression threads (default: all CPUs)
+            max_inflight_chunks: Chunks held in memory at once (default: 2 x workers)
+            solid: Pack small files into shared chunks (code-heavy workspaces)
+            method: Compression method name (e.g. "hybrid_zstd"; default hybrid_v1)
+            zstd_threads: zstd threads per frame (None = method default, -1 = all CPUs)
         """
         self.chunk_size = chunk_size
+        self.workers = workers
+        self.max_inflight_chunks = max_inflight_chunks
+        self.solid = solid
+        self.method = method
+        self.zstd_threads = zstd_threads
         self.compressor = HybridCompressor()
 
     def create_snapshot(
@@ -87,20 +148,23 @@ class SnapshotService:
         start_time = time.time()
 
         # Create archive
-        with DumontArchive.create(output_path, chunk_size=self.chunk_size) as archive:
+        with DumontArchive.create(
+            output_path,
+            chunk_size=self.chunk_size,
+            workers=self.workers,
+            max_inflight_chunks=self.max_inflight_chunks,
+            solid=self.solid,
+            method=self.method,
+            zstd_threads=self.zstd_threads,
+        ) as archive:
             archive.add_directory(source_dir, progress_callback)
 
         # Read back stats
         with DumontArchive.open(output_path) as archive:
             stats = archive.get_stats()
 
-        # Generate snapshot ID from file hash
-        with open(output_path, 'rb') as f:
-            # Read first and last 1MB for quick hash
-            first_chunk = f.read(1024 * 1024)
-            f.seek(-min(1024 * 1024, os.path.getsize(output_path)), 2)
-            last_chunk = f.read()
-            snapshot_id = hashlib.sha256(first_chunk + last_chunk).hexdigest()[:12]
+            # Generate snapshot ID from file hash
+            snapshot_id = self._snapshot_id(archive)
 
         return SnapshotInfo(
             id=snapshot_id,
@@ -163,36 +227,29 @@ class SnapshotService:
             Dict with restore statistics
         """
         start_time = time.time()
-        bytes_processed = 0
 
         # Auto-detect GPU if not specified
         if use_gpu is None:
             use_gpu = self.detect_gpu()
 
-        with DumontArchive.open(snapshot_path) as archive:
+        with DumontArchive.open(snapshot_path, use_mmap=True) as archive:
             stats = archive.get_stats()
-            total_chunks = stats['num_chunks']
-            total_bytes = stats['total_compressed']
+            total_bytes = stats['total_original']
 
-            def _progress(chunk_idx, total):
-                nonlocal bytes_processed
+            def _progress(chunks_done, total_chunks, bytes_written):
                 if progress_callback:
                     elapsed = time.time() - start_time
-                    # Estimate bytes per chunk
-                    bytes_per_chunk = total_bytes / max(1, total)
-                    bytes_processed = chunk_idx * bytes_per_chunk
-
-                    if chunk_idx > 0:
-                        rate = bytes_processed / elapsed
-                        remaining = (total_bytes - bytes_processed) / rate
+                    if bytes_written > 0 and elapsed > 0:
+                        rate = bytes_written / elapsed
+                        remaining = (total_bytes - bytes_written) / rate
                     else:
                         remaining = 0
 
                     progress = RestoreProgress(
                         phase='decompress_gpu' if use_gpu else 'extract',
-                        current_chunk=chunk_idx,
-                        total_chunks=total,
-                        bytes_processed=int(bytes_processed),
+                        current_chunk=chunks_done,
+                        total_chunks=total_chunks,
+                        bytes_processed=bytes_written,
                         bytes_total=total_bytes,
                         elapsed_seconds=elapsed,
                         estimated_remaining=remaining,
@@ -203,7 +260,7 @@ class SnapshotService:
             if use_gpu:
                 self._restore_with_gpu(archive, target_dir, _progress)
             else:
-                archive.extract_all(target_dir, _progress)
+                self._extract(archive, target_dir, _progress)
 
         elapsed = time.time() - start_time
 
@@ -219,6 +276,15 @@ class SnapshotService:
             'gpu_detected': self.detect_gpu(),
         }
 
+    def _extract(self, archive: DumontArchive, target_dir: str, progress_callback):
+        """CPU restore on a worker pool with bounded memory"""
+        archive.extract_all(
+            target_dir,
+            progress_callback,
+            workers=self.workers,
+            max_inflight_chunks=self.max_inflight_chunks,
+        )
+
     def _restore_with_gpu(self, archive: DumontArchive, target_dir: str, progress_callback):
         """
         Restore using GPU-accelerated decompression.
@@ -232,7 +298,7 @@ class SnapshotService:
             raise ImportError("nvCOMP not implemented yet")
         except ImportError:
             # Fall back to CPU (GPU detected but nvCOMP not installed)
-            archive.extract_all(target_dir, progress_callback)
+            self._extract(archive, target_dir, progress_callback)
 
     def get_snapshot_info(self, snapshot_path: str) -> SnapshotInfo:
         """
@@ -247,12 +313,11 @@ class SnapshotService:
         with DumontArchive.open(snapshot_path) as archive:
             stats = archive.get_stats()
 
-        # Generate snapshot ID
-        with open(snapshot_path, 'rb') as f:
-            first_chunk = f.read(1024 * 1024)
-            f.seek(-min(1024 * 1024, os.path.getsize(snapshot_path)), 2)
-            last_chunk = f.read()
-            snapshot_id = hashlib.sha256(first_chunk + last_chunk).hexdigest()[:12]
+            snapshot_id = self._snapshot_id(archive)
+            created_at = (
+                max((f.mtime for f in archive.files), default=0.0)
+                if is_url(snapshot_path) else os.path.getmtime(snapshot_path)
+            )
 
         return SnapshotInfo(
             id=snapshot_id,
@@ -262,9 +327,160 @@ class SnapshotService:
             num_files=stats['num_files'],
             num_chunks=stats['num_chunks'],
             compression_ratio=stats['ratio'],
-            created_at=os.path.getmtime(snapshot_path),
+            created_at=created_at,
         )
 
+    @staticmethod
+    def _snapshot_id(archive: DumontArchive) -> str:
+        """Snapshot ID from a quick hash of the first and last 1 MB"""
+        size = archive.archive_size
+        first_chunk = archive.read_bytes(0, 1024 * 1024)
+        tail = min(1024 * 1024, size)
+        last_chunk = archive.read_bytes(size - tail, tail)
+        return hashlib.sha256(first_chunk + last_chunk).hexdigest()[:12]
+
+    def restore_files(
+        self,
+        snapshot_path: str,
+        target_dir: str,
+        patterns: List[str],
+        progress_callback: Optional[Callable[[RestoreProgress], None]] = None,
+    ) -> Dict[str, Any]:
+        """
+        Restore only the files matching some globs or paths.
+
+        Only the chunks those files reference are read, so restoring a few
+        configs from a 200 GB snapshot on B2/R2 downloads a few MB.
+
+        Args:
+            snapshot_path: Path or HTTP(S) URL of the .dumont file
+            target_dir: Directory to restore to
+            patterns: Globs ("*.py") or path prefixes ("models/llama/")
+            progress_callback: Optional callback(RestoreProgress)
+
+        Returns:
+            Dict with restore statistics
+        """
+        start_time = time.time()
+
+        with DumontArchive.open(snapshot_path, use_mmap=True) as archive:
+            files = archive.select_files(patterns)
+            total_bytes = sum(f.size for f in files)
+
+            def _progress(chunks_done, total_chunks, bytes_written):
+                if progress_callback:
+                    elapsed = time.time() - start_time
+                    rate = bytes_written / elapsed if elapsed > 0 else 0
+                    progress_callback(RestoreProgress(
+                        phase='extract',
+                        current_chunk=chunks_done,
+                        total_chunks=total_chunks,
+                        bytes_processed=bytes_written,
+                        bytes_total=total_bytes,
+                        elapsed_seconds=elapsed,
+                        estimated_remaining=(total_bytes - bytes_written) / rate if rate > 0 else 0,
+                    ))
+
+            archive.extract_files(
+                target_dir,
+                files,
+                _progress,
+                workers=self.workers,
+                max_inflight_chunks=self.max_inflight_chunks,
+            )
+
+        elapsed = time.time() - start_time
+
+        return {
+            'success': True,
+            'files_restored': len(files),
+            'paths': [f.path for f in files],
+            'bytes_original': total_bytes,
+            'elapsed_seconds': elapsed,
+            'throughput_mbps': (total_bytes / 1024 / 1024) / elapsed if elapsed > 0 else 0,
+        }
+
+    def restore_lazy(
+        self,
+        snapshot_path: str,
+        target_dir: str,
+        patterns: List[str],
+        priority: Optional[List[str]] = None,
+        progress_callback: Optional[Callable[[RestoreProgress], None]] = None,
+    ) -> 'BackgroundRestore':
+        """
+        Restore a subset now and the rest of the workspace in the background.
+
+        Files matching `patterns` are restored before returning. The remaining
+        files are then restored on a background thread: files matching
+        priority[0] first, then priority[1], ..., then everything else.
+
+        Args:
+            snapshot_path: Path or HTTP(S) URL of the .dumont file
+            target_dir: Directory to restore to
+            patterns: Globs or path prefixes needed immediately
+            priority: Ordered globs/prefixes for the background phase
+            progress_callback: Optional callback(RestoreProgress) for both phases
+
+        Returns:
+            BackgroundRestore handle (call wait() to block until complete)
+        """
+        first = self.restore_files(snapshot_path, target_dir, patterns, progress_callback)
+
+        restore = BackgroundRestore(first)
+        restore.start(lambda: self._restore_remaining(
+            snapshot_path, target_dir, set(first['paths']), priority or [], progress_callback, restore,
+        ))
+        return restore
+
+    def _restore_remaining(
+        self,
+        snapshot_path: str,
+        target_dir: str,
+        done: set,
+        priority: List[str],
+        progress_callback,
+        restore: 'BackgroundRestore',
+    ):
+        """Background phase of restore_lazy: remaining files in priority order"""
+        with DumontArchive.open(snapshot_path, use_mmap=True) as archive:
+            remaining = [f for f in archive.files if f.path not in done]
+
+            # One group per priority pattern, then everything left
+            groups = []
+            for pattern in priority:
+                groups.append([f for f in remaining if matches_patterns(f.path, [pattern])])
+                remaining = [f for f in remaining if not matches_patterns(f.path, [pattern])]
+            groups.append(remaining)
+
+            bytes_total = sum(f.size for group in groups for f in group)
+            for group in groups:
+                if not group:
+                    continue
+                base = restore.bytes_restored
+
+                def _progress(chunks_done, total_chunks, bytes_written):
+                    if progress_callback:
+                        progress_callback(RestoreProgress(
+                            phase='background',
+                            current_chunk=chunks_done,
+                            total_chunks=total_chunks,
+                            bytes_processed=base + bytes_written,
+                            bytes_total=bytes_total,
+                            elapsed_seconds=time.time() - restore.started_at,
+                            estimated_remaining=0,
+                        ))
+
+                archive.extract_files(
+                    target_dir,
+                    group,
+                    _progress,
+                    workers=self.workers,
+                    max_inflight_chunks=self.max_inflight_chunks,
+                )
+                restore.restored_files.extend(f.path for f in group)
+                restore.bytes_restored += sum(f.size for f in group)
+
     def list_files(self, snapshot_path: str) -> list:
         """
         List files in a snapshot without extracting.
@@ -0,0 +1,112 @@
+"""
+Testes do HTTPSessionPool - Dumont Cloud
+
+Testa o pool de sessoes HTTP keep-alive por API key:
+- Mesma sessao para a mesma key, sessoes distintas por key
+- Reuso de conexoes medido pelas metricas do pool (contadas no adapter)
+- Eviccao LRU quando excede max_sessions
+"""
+
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.infrastructure.http_pool import HTTPSessionPool
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"  # keep-alive
+
+    def do_GET(self):
+        body = self.headers.get("Authorization", "").encode()
+        self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+class _ClosingHandler(_Handler):
+    protocol_version = "HTTP/1.0"  # fecha a conexao a cada resposta
+
+
+def _serve(handler):
+    server = ThreadingHTTPServer(("127.0.0.1", 0), handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    return server
+
+
+@pytest.fixture
+def server_url():
+    server = _serve(_Handler)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def closing_server_url():
+    server = _serve(_ClosingHandler)
+    yield f"http://127.0.0.1:{server.server_address[1]}"
+    server.shutdown()
+    server.server_close()
+
+
+# ============================================================
+# Testes
+# ============================================================
+
+def test_same_key_shares_session():
+    pool = HTTPSessionPool()
+    assert pool.get_session("key-a") is pool.get_session("key-a")
+    assert pool.get_session("key-a") is not pool.get_session("key-b")
+    assert pool.get_session("key-a").headers["Authorization"] == "Bearer key-a"
+
+
+def test_connections_are_reused(server_url):
+    pool = HTTPSessionPool()
+    session = pool.get_session("key-a")
+    for _ in range(5):
+        assert session.get(f"{server_url}/bundles/", timeout=5).text == "Bearer key-a"
+
+    stats = pool.get_stats()
+    assert stats["requests"] == 5
+    assert stats["connections_opened"] == 1
+    assert stats["connections_reused"] == 4
+    assert stats["reuse_ratio"] == pytest.approx(0.8)
+    assert "key-a" not in str(stats["sessions"])
+    pool.close()
+
+
+def test_closed_connections_count_as_new(closing_server_url):
+    pool = HTTPSessionPool()
+    session = pool.get_session("key-a")
+    for _ in range(3):
+        assert session.get(f"{closing_server_url}/bundles/", timeout=5).status_code == 200
+
+    stats = pool.get_stats()
+    assert stats["requests"] == 3
+    assert stats["connections_opened"] == 3
+    assert stats["reuse_ratio"] == 0.0
+    pool.close()
+
+
+def test_evicts_least_recently_used_session():
+    pool = HTTPSessionPool(max_sessions=2)
+    first = pool.get_session("key-a")
+    pool.get_session("key-b")
+    pool.get_session("key-a")
+    pool.get_session("key-c")
+
+    stats = pool.get_stats()
+    assert stats["active_sessions"] == 2
+    assert stats["sessions_evicted"] == 1
+    assert pool.get_session("key-a") is first
@@ -0,0 +1,89 @@
+"""
+Testes da coleta de mercado concorrente do VastProvider - Dumont Cloud
+
+Testa fetch_all_market_data:
+- Queries GPU x tipo em paralelo (tempo ~ query mais lenta)
+- Ordem dos resultados igual a do loop serial
+- Falhas isoladas por query e latencia registrada
+- Uma unica camada de retry em 429 (sem multiplicar as requisicoes)
+"""
+
+import threading
+import time
+
+import requests
+
+import src.infrastructure.providers.vast_provider as vast_provider
+from src.infrastructure.providers.vast_provider import VastProvider
+
+
+def make_provider(monkeypatch, delay=0.1, fail=()):
+    provider = VastProvider(api_key="test-key")
+    active = {"now": 0, "max": 0}
+    lock = threading.Lock()
+
+    def fake_search(machine_type, gpu_name, max_price, limit):
+        with lock:
+            active["now"] += 1
+            active["max"] = max(active["max"], active["now"])
+        try:
+            time.sleep(delay)
+            if f"{gpu_name}:{machine_type}" in fail:
+                raise ValueError("boom")
+            return [f"{gpu_name}/{machine_type}"]
+        finally:
+            with lock:
+                active["now"] -= 1
+
+    monkeypatch.setattr(provider, "search_offers_by_type", fake_search)
+    return provider, active
+
+
+def test_queries_run_concurrently_in_order(monkeypatch):
+    provider, active = make_provider(monkeypatch)
+    gpus = ["RTX 4090", "A100", "H100", "L40S"]
+
+    start = time.perf_counter()
+    result = provider.fetch_all_market_data(gpus, ["on-demand", "interruptible"], max_workers=8)
+    elapsed = time.perf_counter() - start
+
+    assert list(result) == [f"{g}:{t}" for g in gpus for t in ["on-demand", "interruptible"]]
+    assert result["A100:interruptible"] == ["A100/interruptible"]
+    assert active["max"] > 1
+    assert elapsed < 0.1 * 8 / 2
+
+
+def test_failed_query_is_isolated_and_latency_recorded(monkeypatch):
+    provider, _ = make_provider(monkeypatch, delay=0.01, fail={"A100:bid"})
+
+    result = provider.fetch_all_market_data(["A100"], ["on-demand", "bid"], max_workers=2)
+
+    assert result["A100:bid"] == []
+    assert result["A100:on-demand"] == ["A100/on-demand"]
+    stats = provider.last_fetch_stats
+    assert stats["failed"] == 1
+    assert stats["queries"]["A100:bid"]["error"] == "boom"
+    assert stats["queries"]["A100:on-demand"]["latency_ms"] >= 10
+
+
+def test_rate_limited_query_is_retried_once_per_request(monkeypatch):
+    provider = VastProvider(api_key="test-key")
+    calls = []
+
+    class RateLimitedSession:
+        def request(self, method, url, **kwargs):
+            calls.append(url)
+            response = requests.Response()
+            response.status_code = 429
+            response.url = url
+            return response
+
+    monkeypatch.setattr(provider, "session", RateLimitedSession())
+    monkeypatch.setattr(vast_provider.time, "sleep", lambda seconds: None)
+
+    result = provider.fetch_all_market_data(["A100"], ["on-demand"], max_workers=1)
+
+    assert result["A100:on-demand"] == []
+    assert provider.last_fetch_stats["failed"] == 1
+    # _make_request's own retries only (1 + 3), not multiplied by an outer layer
+    assert len(calls) == 4
@@ -0,0 +1,135 @@
+"""
+Testes do market_latest - Dumont Cloud
+
+Testa a tabela de último snapshot e o cache dos endpoints de resumo (SQLite):
+- upsert_market_latest mantendo uma linha por gpu:tipo
+- Histórico gravado mesmo sem a tabela market_latest
+- Resumo/comparação lendo market_latest em vez do histórico
+- Cache curto das respostas (LRU limitado, chave de /compare normalizada)
+"""
+
+import asyncio
+from datetime import datetime, timedelta
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.api.v1.endpoints import metrics as metrics_endpoints
+from src.models.metrics import MarketLatest, ProviderReliability
+from src.modules.market.persistence import upsert_market_latest
+
+
+@pytest.fixture
+def db(monkeypatch):
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    MarketLatest.__table__.create(engine)
+    factory = sessionmaker(bind=engine)
+    monkeypatch.setattr(metrics_endpoints, "get_session_factory", lambda: factory)
+    metrics_endpoints.clear_market_cache()
+    session = factory()
+    yield session
+    session.close()
+    metrics_endpoints.clear_market_cache()
+
+
+def make_snapshot(gpu_name, machine_type, avg_price, timestamp=None, cost_per_tflops=None):
+    return SimpleNamespace(
+        gpu_name=gpu_name, machine_type=machine_type, timestamp=timestamp or datetime.utcnow(),
+        min_price=avg_price * 0.8, max_price=avg_price * 1.2, avg_price=avg_price, median_price=avg_price,
+        total_offers=10, available_gpus=20, verified_offers=5, avg_reliability=0.95,
+        avg_total_flops=80.0, min_cost_per_tflops=cost_per_tflops,
+    )
+
+
+# ============================================================
+# upsert_market_latest
+# ============================================================
+
+def test_upsert_keeps_one_row_per_gpu_and_type(db):
+    old = datetime.utcnow() - timedelta(hours=1)
+    upsert_market_latest(db, [
+        make_snapshot("RTX 4090", "on-demand", 0.40, timestamp=old),
+        make_snapshot("RTX 4090", "bid", 0.20, timestamp=old),
+    ])
+    db.commit()
+    upsert_market_latest(db, [make_snapshot("RTX 4090", "on-demand", 0.50)])
+    db.commit()
+
+    rows = {(r.gpu_name, r.machine_type): r.avg_price for r in db.query(MarketLatest).all()}
+    assert rows == {("RTX 4090", "on-demand"): 0.50, ("RTX 4090", "bid"): 0.20}
+
+
+def test_history_is_saved_when_latest_table_is_missing():
+    # MarketSnapshot usa JSONB (so PostgreSQL); outra escrita do ciclo faz o papel do historico
+    engine = create_engine("sqlite://")
+    ProviderReliability.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+
+    session.add(ProviderReliability(machine_id=1, gpu_name="RTX 4090"))
+    assert upsert_market_latest(session, [make_snapshot("RTX 4090", "on-demand", 0.40)]) == 0
+    session.commit()
+
+    assert session.query(ProviderReliability).count() == 1
+    session.close()
+
+
+# ============================================================
+# Endpoints
+# ============================================================
+
+def test_summary_and_compare_read_latest(db):
+    upsert_market_latest(db, [
+        make_snapshot("RTX 4090", "on-demand", 0.40, cost_per_tflops=0.005),
+        make_snapshot("A100", "on-demand", 1.20, cost_per_tflops=0.004),
+        make_snapshot("RTX 3090", "on-demand", 0.20, timestamp=datetime.utcnow() - timedelta(days=2)),
+    ])
+    db.commit()
+
+    summary = asyncio.run(metrics_endpoints.get_market_summary(gpu_name=None, machine_type=None))
+    assert set(summary["data"]) == {"RTX 4090", "A100"}  # RTX 3090 fora das 24h
+    assert summary["data"]["A100"]["on-demand"]["avg_price"] == 1.20
+
+    comparison = asyncio.run(metrics_endpoints.compare_gpus(gpus="A100, RTX 4090, H100", machine_type="on-demand"))
+    assert [g.gpu_name for g in comparison.gpus] == ["RTX 4090", "A100"]
+    assert comparison.best_value.gpu_name == "A100"
+
+    assert asyncio.run(metrics_endpoints.list_available_gpus()) == ["A100", "RTX 3090", "RTX 4090"]
+
+
+def test_responses_are_cached(db, monkeypatch):
+    upsert_market_latest(db, [make_snapshot("RTX 4090", "on-demand", 0.40)])
+    db.commit()
+    first = asyncio.run(metrics_endpoints.list_available_gpus())
+
+    upsert_market_latest(db, [make_snapshot("H100", "on-demand", 2.50)])
+    db.commit()
+    assert asyncio.run(metrics_endpoints.list_available_gpus()) == first
+
+    monkeypatch.setattr(metrics_endpoints, "MARKET_CACHE_TTL_SECONDS", 0)
+    assert asyncio.run(metrics_endpoints.list_available_gpus()) == ["H100", "RTX 4090"]
+
+
+def test_cache_is_bounded_and_compare_key_normalized(db, monkeypatch):
+    upsert_market_latest(db, [
+        make_snapshot("RTX 4090", "on-demand", 0.40),
+        make_snapshot("A100", "on-demand", 1.20),
+    ])
+    db.commit()
+    monkeypatch.setattr(metrics_endpoints, "MARKET_CACHE_MAX_ENTRIES", 3)
+
+    asyncio.run(metrics_endpoints.compare_gpus(gpus="A100,RTX 4090", machine_type="on-demand"))
+    asyncio.run(metrics_endpoints.compare_gpus(gpus=" RTX 4090, A100,A100,", machine_type="on-demand"))
+    assert len(metrics_endpoints._market_cache) == 1
+
+    for i in range(10):
+        asyncio.run(metrics_endpoints.compare_gpus(gpus=f"GPU {i}", machine_type="on-demand"))
+    assert len(metrics_endpoints._market_cache) == 3
+    assert ("compare", ("GPU 9",), "on-demand") in metrics_endpoints._market_cache
+
+    # Entradas expiradas saem na próxima escrita
+    monkeypatch.setattr(metrics_endpoints, "MARKET_CACHE_TTL_SECONDS", 0)
+    asyncio.run(metrics_endpoints.list_available_gpus())
+    assert len(metrics_endpoints._market_cache) == 0
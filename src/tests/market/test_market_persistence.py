@@ -0,0 +1,107 @@
+"""
+Testes da persistencia em lote do mercado - Dumont Cloud
+
+Testa upsert_provider_reliability e upsert_offer_stability (SQLite):
+- Linhas novas criadas com defaults, existentes atualizadas via ON CONFLICT
+- Contadores e media movel acumulam entre ciclos
+- Aparecer/desaparecer de maquinas entre ciclos
+- Numero de statements independente do numero de maquinas
+"""
+
+import time
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import create_engine, event
+from sqlalchemy.orm import sessionmaker
+
+from src.models.metrics import ProviderReliability
+from src.models.machine_history import OfferStability
+from src.modules.market.persistence import upsert_offer_stability, upsert_provider_reliability
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://")
+    ProviderReliability.__table__.create(engine)
+    OfferStability.__table__.create(engine)
+    statements = []
+    event.listen(engine, "before_cursor_execute", lambda *args: statements.append(args[2]))
+    session = sessionmaker(bind=engine)()
+    session.statements = statements
+    yield session
+    session.close()
+
+
+def make_offer(machine_id, price=0.5):
+    return SimpleNamespace(
+        machine_id=machine_id, hostname=f"host-{machine_id}", geolocation="US",
+        verified=True, gpu_name="RTX 4090", dph_total=price, min_bid=None,
+        total_flops=80.0, dlperf=50.0, reliability=0.99,
+    )
+
+
+def score(provider, offer):
+    provider.reliability_score = offer.reliability
+
+
+# ============================================================
+# ProviderReliability
+# ============================================================
+
+def test_provider_reliability_upsert_accumulates(db):
+    upsert_provider_reliability(db, {"RTX 4090:on-demand": [make_offer(1, 0.4), make_offer(2)]}, score)
+    db.commit()
+    upsert_provider_reliability(db, {"RTX 4090:on-demand": [make_offer(1, 0.8)]}, score)
+    db.commit()
+
+    rows = {p.machine_id: p for p in db.query(ProviderReliability).all()}
+    assert set(rows) == {1, 2}
+    assert rows[1].total_observations == 2
+    assert rows[1].min_price_seen == 0.4
+    assert rows[1].max_price_seen == 0.8
+    assert rows[1].avg_price == pytest.approx(0.4 * 0.9 + 0.8 * 0.1)
+    assert rows[1].reliability_score == 0.99
+    assert rows[2].times_unavailable == 0
+
+
+def test_provider_reliability_statements_do_not_scale_with_machines(db):
+    offers = {"RTX 4090:on-demand": [make_offer(i) for i in range(1, 10001)]}
+
+    start = time.perf_counter()
+    assert upsert_provider_reliability(db, offers, score) == 10000
+    db.commit()
+    elapsed = time.perf_counter() - start
+
+    assert db.query(ProviderReliability).count() == 10000
+    assert len(db.statements) < 30
+    assert elapsed < 10
+
+
+# ============================================================
+# OfferStability
+# ============================================================
+
+def test_offer_stability_tracks_appear_and_disappear(db):
+    counts = upsert_offer_stability(db, {"k": [make_offer(1), make_offer(2)]})
+    db.commit()
+    assert counts == {"appeared": 2, "disappeared": 0, "still_available": 0}
+
+    counts = upsert_offer_stability(db, {"k": [make_offer(2, 0.7), make_offer(3)]})
+    db.commit()
+    assert counts == {"appeared": 1, "disappeared": 1, "still_available": 1}
+
+    rows = {s.machine_id: s for s in db.query(OfferStability).all()}
+    assert len(rows) == 3
+    assert rows["1"].is_available is False
+    assert rows["1"].times_disappeared == 1
+    assert rows["2"].price_per_hour == 0.7
+    assert rows["3"].times_appeared == 1
+
+    upsert_offer_stability(db, {"k": [make_offer(1)]})
+    db.commit()
+    assert db.query(OfferStability).filter_by(machine_id="1").one().times_appeared == 2
@@ -0,0 +1,149 @@
+"""
+Testes do cache do ModelRegistry - Dumont Cloud
+
+Testa o cache de metadados (API do HuggingFace substituída por uma sessão fake):
+- Resolução em lote com concorrência limitada e chamadas deduplicadas
+- Cache negativo para modelos inexistentes e TTL por entrada
+- Entrada expirada usada quando a API falha
+- Gravação atômica agrupada e recarga do disco
+- Modelos do templates_seed.json para warm-up
+"""
+
+import json
+import threading
+import time
+
+import pytest
+
+from src.modules.models.registry import ModelRegistry
+
+
+class FakeResponse:
+    def __init__(self, status_code, data=None):
+        self.status_code = status_code
+        self._data = data or {}
+
+    def json(self):
+        return self._data
+
+
+class FakeSession:
+    def __init__(self, models, delay=0.0):
+        self.models = models
+        self.delay = delay
+        self.calls = []
+        self.active = 0
+        self.max_active = 0
+        self.lock = threading.Lock()
+        self.fail = False
+
+    def get(self, url, headers=None, timeout=None):
+        model_id = url.split("/api/models/", 1)[1]
+        with self.lock:
+            self.calls.append(model_id)
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+        time.sleep(self.delay)
+        with self.lock:
+            self.active -= 1
+        if self.fail:
+            return FakeResponse(500)
+        if model_id not in self.models:
+            return FakeResponse(404)
+        return FakeResponse(200, self.models[model_id])
+
+
+MODELS = {
+    f"org/model-{i}": {"pipeline_tag": "text-classification", "library_name": "transformers"}
+    for i in range(12)
+}
+
+
+@pytest.fixture
+def registry(tmp_path):
+    registry = ModelRegistry(cache_dir=str(tmp_path))
+    registry._session = FakeSession(MODELS, delay=0.02)
+    yield registry
+    registry.clear_cache()
+
+
+# ============================================================
+# Resolução
+# ============================================================
+
+def test_batch_resolution_is_concurrent_and_deduplicated(registry):
+    ids = list(MODELS) + ["org/model-0", "meta-llama/Llama-3.1-8B-Instruct"]
+
+    infos = registry.get_model_infos(ids, max_concurrency=4)
+
+    assert list(infos) == list(dict.fromkeys(ids))
+    assert infos["org/model-3"].runtime == "transformers"
+    assert infos["meta-llama/Llama-3.1-8B-Instruct"].source == "static"
+    assert sorted(registry._session.calls) == sorted(MODELS)
+    assert 1 < registry._session.max_active <= 4
+
+    # Tudo em cache: nenhuma chamada nova
+    registry.get_model_infos(ids)
+    assert len(registry._session.calls) == len(MODELS)
+
+
+def test_concurrent_lookups_share_one_fetch(registry):
+    registry._session.delay = 0.2
+    threads = [threading.Thread(target=registry.get_model_info, args=("org/model-1",)) for _ in range(5)]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+
+    assert registry._session.calls == ["org/model-1"]
+
+
+def test_negative_cache_and_ttl(registry):
+    first = registry.get_model_info("org/missing")
+    assert first.source == "negative"
+    assert registry.get_model_info("org/missing") is first
+    assert registry._session.calls == ["org/missing"]
+
+    # Expirado: busca de novo
+    first.cached_at -= ModelRegistry.NEGATIVE_TTL_SECONDS + 1
+    registry.get_model_info("org/missing")
+    assert registry._session.calls == ["org/missing"] * 2
+
+
+def test_stale_entry_used_when_api_fails(registry):
+    info = registry.get_model_info("org/model-2")
+    info.cached_at -= ModelRegistry.CACHE_TTL_SECONDS + 1
+    registry._session.fail = True
+
+    assert registry.get_model_info("org/model-2") is info
+    # Erro transitório não entra no cache negativo
+    assert registry.get_model_info("org/model-5").source == "fallback"
+    assert "org/model-5" not in registry._cache
+
+
+# ============================================================
+# Persistência e warm-up
+# ============================================================
+
+def test_writes_are_debounced_and_reloaded(registry, tmp_path):
+    registry.get_model_infos(["org/model-1", "org/model-2", "org/missing"])
+    assert not registry.cache_file.exists()  # ainda dentro do debounce
+
+    registry.flush()
+    data = json.loads(registry.cache_file.read_text())
+    assert set(data) == {"org/model-1", "org/model-2", "org/missing"}
+    assert not list(tmp_path.glob("*.tmp"))
+
+    reloaded = ModelRegistry(cache_dir=str(tmp_path))
+    reloaded._session = FakeSession(MODELS)
+    assert reloaded.get_model_info("org/model-1").source == "cache"
+    assert reloaded.get_model_info("org/missing").source == "negative"
+    assert reloaded._session.calls == []
+
+
+def test_seed_model_ids_and_warm_up(registry):
+    seed_ids = ModelRegistry.seed_model_ids()
+    assert "meta-llama/Llama-2-7b-hf" in seed_ids
+
+    assert registry.warm_up(["org/model-7"]) == 1
+    assert "org/model-7" in json.loads(registry.cache_file.read_text())
@@ -0,0 +1,260 @@
+"""
+Testes do download paralelo de modelos - Dumont Cloud
+
+Testa o ShardFetcher e o ModelDownloader contra um servidor HTTP local com Range:
+- Arquivos divididos em ranges e verificados por SHA-256
+- Retomada de arquivo parcial baixando só os ranges faltantes
+- Checksum divergente descarta o arquivo
+- Mirror do StorageService antes do Hub, com throughput em bytes
+- Mirror corrompido cai para o Hub (local e remoto); erro remoto preservado
+"""
+
+import hashlib
+import json
+import os
+import subprocess
+import sys
+import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+from src.modules.models.downloader import DownloadStatus, ModelDownloader
+from src.modules.models.shard_fetcher import FetchError, ShardFetcher, ShardFile
+
+
+CHUNK = 1024
+
+FILES = {
+    "config.json": b'{"model_type": "llama"}',
+    "model-00001-of-00002.safetensors": os.urandom(5 * CHUNK + 100),
+    "model-00002-of-00002.safetensors": os.urandom(3 * CHUNK),
+}
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+class _RangeHandler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    objects = {}
+    requests = []
+
+    def do_GET(self):
+        type(self).requests.append(self.path)
+        body = self.objects.get(self.path)
+        if body is None:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        range_header = self.headers.get("Range")
+        if range_header:
+            first, last = (int(x) for x in range_header.split("=")[1].split("-"))
+            body = body[first:last + 1]
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    _RangeHandler.objects = {}
+    _RangeHandler.requests = []
+    httpd = ThreadingHTTPServer(("127.0.0.1", 0), _RangeHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", _RangeHandler
+    httpd.shutdown()
+    httpd.server_close()
+
+
+def shard_files(base_url, handler, prefix="/files"):
+    files = []
+    for path, data in FILES.items():
+        handler.objects[f"{prefix}/{path}"] = data
+        files.append(ShardFile(
+            path=path, size=len(data), url=f"{base_url}{prefix}/{path}",
+            sha256=hashlib.sha256(data).hexdigest(),
+        ))
+    return files
+
+
+class FakeStorage:
+    def __init__(self, base_url):
+        self.base_url = base_url
+
+    def get_object_url(self, object_key, expires_hours=1):
+        return f"{self.base_url}/mirror/{object_key}"
+
+
+# ============================================================
+# ShardFetcher
+# ============================================================
+
+def test_fetch_files_in_ranges(server, tmp_path):
+    base_url, handler = server
+    files = shard_files(base_url, handler)
+
+    stats = ShardFetcher(max_workers=4, chunk_size=CHUNK).fetch(files, str(tmp_path))
+
+    for path, data in FILES.items():
+        assert (tmp_path / path).read_bytes() == data
+    assert stats.bytes_downloaded == stats.total_bytes == sum(len(d) for d in FILES.values())
+    assert len(handler.requests) == 1 + 6 + 3
+    assert not list(tmp_path.glob("*.incomplete*"))
+
+    # Segunda execução reaproveita tudo
+    again = ShardFetcher(chunk_size=CHUNK).fetch(files, str(tmp_path))
+    assert again.bytes_downloaded == 0
+    assert again.bytes_reused == again.total_bytes
+
+
+def test_resume_fetches_only_missing_ranges(server, tmp_path):
+    base_url, handler = server
+    shard = shard_files(base_url, handler)[1]
+    data = FILES[shard.path]
+
+    # Execução anterior interrompida com os ranges 0-3 gravados
+    part = tmp_path / f"{shard.path}.incomplete"
+    part.write_bytes(data[:4 * CHUNK] + b"\0" * (len(data) - 4 * CHUNK))
+    (tmp_path / f"{shard.path}.incomplete.json").write_text(json.dumps({
+        "size": shard.size, "sha256": shard.sha256, "chunk_size": CHUNK, "done": [0, 1, 2, 3],
+    }))
+
+    stats = ShardFetcher(chunk_size=CHUNK).fetch([shard], str(tmp_path))
+
+    assert (tmp_path / shard.path).read_bytes() == data
+    assert stats.bytes_reused == 4 * CHUNK
+    assert stats.bytes_downloaded == len(data) - 4 * CHUNK
+    assert len(handler.requests) == 2
+
+
+def test_checksum_mismatch_discards_file(server, tmp_path):
+    base_url, handler = server
+    shard = shard_files(base_url, handler)[2]
+    shard.sha256 = "0" * 64
+
+    with pytest.raises(FetchError, match="sha256 mismatch"):
+        ShardFetcher(chunk_size=CHUNK).fetch([shard], str(tmp_path))
+
+    assert list(tmp_path.iterdir()) == []
+
+
+# ============================================================
+# ModelDownloader
+# ============================================================
+
+def test_download_local_prefers_mirror(server, tmp_path):
+    base_url, handler = server
+    model_id, commit = "meta-llama/Tiny", "abc123"
+    handler.objects[f"/mirror/models/{model_id}/main/manifest.json"] = json.dumps({
+        "commit": commit,
+        "files": [
+            {"path": path, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+            for path, data in FILES.items()
+        ],
+    }).encode()
+    for path, data in FILES.items():
+        handler.objects[f"/mirror/models/{model_id}/{commit}/{path}"] = data
+
+    downloader = ModelDownloader(
+        cache_dir=str(tmp_path), registry=object(), storage=FakeStorage(base_url), chunk_size=CHUNK,
+    )
+    result = downloader.download_local(model_id)
+
+    assert result.status == DownloadStatus.COMPLETED
+    assert result.source == "mirror"
+    assert result.size_bytes == result.bytes_downloaded == sum(len(d) for d in FILES.values())
+    assert result.throughput_bytes_per_second > 0
+    assert result.cache_path.endswith(f"snapshots/{commit}")
+    assert downloader.is_cached_locally(model_id)
+    assert (tmp_path / "models--meta-llama--Tiny" / "refs" / "main").read_text() == commit
+    assert downloader.download_local(model_id).status == DownloadStatus.CACHED
+
+
+def publish_model(handler, model_id, commit, corrupt_mirror=False):
+    """Mirror (manifest + objetos) e Hub (API + resolve) do mesmo commit"""
+    handler.objects[f"/mirror/models/{model_id}/main/manifest.json"] = json.dumps({
+        "commit": commit,
+        "files": [
+            {"path": path, "size": len(data), "sha256": hashlib.sha256(data).hexdigest()}
+            for path, data in FILES.items()
+        ],
+    }).encode()
+    handler.objects[f"/hub/api/models/{model_id}/revision/main?blobs=true"] = json.dumps({
+        "sha": commit,
+        "siblings": [
+            {"rfilename": path, "lfs": {"size": len(data), "sha256": hashlib.sha256(data).hexdigest()}}
+            for path, data in FILES.items()
+        ],
+    }).encode()
+    for path, data in FILES.items():
+        mirrored = bytes(len(data)) if corrupt_mirror else data
+        handler.objects[f"/mirror/models/{model_id}/{commit}/{path}"] = mirrored
+        handler.objects[f"/hub/{model_id}/resolve/{commit}/{path}"] = data
+
+
+def make_downloader(base_url, cache_dir):
+    downloader = ModelDownloader(
+        cache_dir=str(cache_dir), registry=object(), storage=FakeStorage(base_url), chunk_size=CHUNK,
+    )
+    downloader.HF_ENDPOINT = f"{base_url}/hub"
+    return downloader
+
+
+def local_ssh_exec(ssh_host, ssh_port, ssh_user, command, timeout=30, input=None):
+    # `python3 -` da instância rodando aqui
+    assert command == "python3 -"
+    return subprocess.run([sys.executable, "-"], input=input, capture_output=True, text=True, timeout=timeout)
+
+
+def test_download_local_falls_back_to_hub_on_corrupt_mirror(server, tmp_path):
+    base_url, handler = server
+    publish_model(handler, "meta-llama/Tiny", "abc123", corrupt_mirror=True)
+
+    result = make_downloader(base_url, tmp_path).download_local("meta-llama/Tiny")
+
+    assert result.status == DownloadStatus.COMPLETED
+    assert result.source == "hub"
+    for path, data in FILES.items():
+        assert (tmp_path / "models--meta-llama--Tiny" / "snapshots" / "abc123" / path).read_bytes() == data
+
+
+def test_download_remote_falls_back_to_hub_on_corrupt_mirror(server, tmp_path, monkeypatch):
+    base_url, handler = server
+    publish_model(handler, "meta-llama/Tiny", "abc123", corrupt_mirror=True)
+    downloader = make_downloader(base_url, tmp_path / "local")
+    monkeypatch.setattr(downloader, "_ssh_exec", local_ssh_exec)
+
+    remote_cache = tmp_path / "remote"
+    result = downloader.download_remote(
+        "meta-llama/Tiny", "gpu-host", cache_dir=str(remote_cache), check_cache_first=False,
+    )
+
+    assert result.status == DownloadStatus.COMPLETED
+    assert result.source == "hub"
+    assert (remote_cache / "models--meta-llama--Tiny" / "snapshots" / "abc123" / "config.json").exists()
+
+
+def test_download_remote_reports_fetch_error(server, tmp_path, monkeypatch):
+    base_url, handler = server
+    publish_model(handler, "meta-llama/Tiny", "abc123", corrupt_mirror=True)
+    del handler.objects["/hub/meta-llama/Tiny/resolve/abc123/config.json"]
+    downloader = make_downloader(base_url, tmp_path / "local")
+    monkeypatch.setattr(downloader, "_ssh_exec", local_ssh_exec)
+
+    result = downloader.download_remote(
+        "meta-llama/Tiny", "gpu-host", cache_dir=str(tmp_path / "remote"), check_cache_first=False,
+    )
+
+    assert result.status == DownloadStatus.FAILED
+    assert "config.json" in result.error and "404" in result.error
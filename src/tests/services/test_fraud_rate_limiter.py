@@ -0,0 +1,106 @@
+"""
+Testes do rate limiter anti-fraude - Dumont Cloud
+
+Testa o InMemoryRateLimiter (sliding window counter aproximado):
+- Bloqueio ao atingir o limite dentro da janela
+- Janela anterior ponderada pela fração ainda coberta
+- Memória constante por chave sob rajadas
+- Reset e remoção de chaves expiradas
+- Escolha Redis/memória pelo redis_client público do RegionCache
+"""
+
+import sys
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.fraud_detection_service import InMemoryRateLimiter, RedisRateLimiter, create_rate_limiter
+
+
+class FakeClock:
+    def __init__(self, now: float = 1_000_000.0):
+        self.now = now
+
+    def __call__(self) -> float:
+        return self.now
+
+
+@pytest.fixture
+def clock():
+    return FakeClock()
+
+
+@pytest.fixture
+def limiter(clock):
+    return InMemoryRateLimiter(clock=clock)
+
+
+def test_blocks_after_max_count(limiter):
+    results = [limiter.check_and_increment("ip_hourly:1.2.3.4", 5, 3600) for _ in range(7)]
+
+    assert [allowed for allowed, _ in results] == [True] * 5 + [False] * 2
+    assert [count for _, count in results[:5]] == [1, 2, 3, 4, 5]
+    assert limiter.get_count("ip_hourly:1.2.3.4", 3600) == 5
+    # Outra chave não é afetada
+    assert limiter.check_and_increment("ip_hourly:5.6.7.8", 5, 3600) == (True, 1)
+
+
+def test_previous_window_is_weighted(limiter, clock):
+    clock.now = 3600 * 1000  # início de uma janela
+    for _ in range(10):
+        limiter.check_and_increment("k", 10, 3600)
+
+    # 3/4 da janela seguinte: a anterior ainda pesa 25%
+    clock.now += 3600 + 2700
+    assert limiter.get_count("k", 3600) == 2
+    allowed = [limiter.check_and_increment("k", 10, 3600)[0] for _ in range(9)]
+    assert allowed == [True] * 8 + [False]  # 2.5 + 8 >= 10
+
+    # Duas janelas depois tudo expirou
+    clock.now += 7200
+    assert limiter.get_count("k", 3600) == 0
+
+
+def test_memory_is_constant_under_burst(limiter):
+    for _ in range(10_000):
+        limiter.check_and_increment("referral_daily:user", 10, 86400)
+
+    assert limiter.key_count() == 1
+    assert limiter.get_count("referral_daily:user", 86400) == 10
+
+
+def test_reset_and_cleanup(limiter, clock):
+    limiter.check_and_increment("ip_hourly:a", 5, 3600)
+    limiter.check_and_increment("ip_daily:a", 10, 86400)
+    limiter.check_and_increment("ip_hourly:b", 5, 3600)
+
+    limiter.reset("ip_hourly:a")
+    assert limiter.get_count("ip_hourly:a", 3600) == 0
+    assert limiter.key_count() == 2
+
+    clock.now += 3 * 3600
+    assert limiter.cleanup_expired() == 1  # ip_hourly:b; a janela diária continua
+    assert limiter.key_count() == 1
+
+
+def test_periodic_eviction_runs_incrementally(limiter, clock):
+    for i in range(1000):
+        limiter.check_and_increment(f"ip_hourly:{i}", 5, 3600)
+
+    clock.now += 3 * 3600
+    for _ in range(InMemoryRateLimiter.NUM_SHARDS):
+        clock.now += InMemoryRateLimiter.EVICTION_INTERVAL
+        limiter.check_and_increment("ip_hourly:new", 5, 3600)
+
+    assert limiter.key_count() == 1
+
+
+@pytest.mark.parametrize("client", [None, SimpleNamespace(register_script=lambda script: None)])
+def test_create_rate_limiter_uses_public_redis_client(monkeypatch, client):
+    # Só a propriedade pública existe no cache falso (nada de _use_fallback)
+    cache = SimpleNamespace(redis_client=client)
+    monkeypatch.setenv("REDIS_URL", "redis://localhost:6379/0")
+    monkeypatch.setitem(sys.modules, "src.utils.region_cache", SimpleNamespace(get_region_cache=lambda: cache))
+
+    limiter = create_rate_limiter()
+    assert isinstance(limiter, RedisRateLimiter if client else InMemoryRateLimiter)
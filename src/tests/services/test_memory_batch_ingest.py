@@ -0,0 +1,108 @@
+"""
+Testes da ingestao em lote de memorias - Dumont Cloud
+
+Testa o caminho em lote dos memory providers:
+- Embeddings gerados em lotes do tamanho configurado, sem repetir textos
+- Cache de embeddings por hash do conteudo (float32 compactado)
+- MemoryManager.add_conversation usando add_memories
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from src.services.memory.base import MemoryConfig, MemoryType
+from src.services.memory.embedding_cache import EmbeddingCache
+from src.services.memory.gcp_provider import GCPMemoryProvider
+from src.services.memory.manager import MemoryManager
+
+
+class FakeEmbeddingModel:
+    """Conta as chamadas a get_embeddings e o tamanho de cada lote"""
+
+    def __init__(self):
+        self.batches = []
+
+    def get_embeddings(self, texts):
+        self.batches.append(list(texts))
+        return [SimpleNamespace(values=[float(len(t)), 1.0]) for t in texts]
+
+
+# ============================================================
+# Embeddings em lote
+# ============================================================
+
+def test_generate_embeddings_batches_and_caches():
+    provider = GCPMemoryProvider(MemoryConfig(embedding_batch_size=2))
+    provider._embedding_model = FakeEmbeddingModel()
+
+    texts = ["a", "bb", "a", "ccc", "dddd"]
+    embeddings = asyncio.run(provider.generate_embeddings(texts))
+
+    assert embeddings == [[1.0, 1.0], [2.0, 1.0], [1.0, 1.0], [3.0, 1.0], [4.0, 1.0]]
+    assert provider._embedding_model.batches == [["a", "bb"], ["ccc", "dddd"]]
+
+    # Segunda vez: tudo vem do cache, exceto o texto novo
+    asyncio.run(provider.generate_embeddings(["bb", "eeeee"]))
+    assert provider._embedding_model.batches[-1] == ["eeeee"]
+    assert provider._embedding_cache.get_stats()["hits"] >= 1
+
+
+def test_embedding_cache_is_lru():
+    cache = EmbeddingCache("model", max_size=2)
+    cache.put("a", [1.0])
+    cache.put("b", [2.0])
+    assert cache.get("a") == [1.0]
+
+    cache.put("c", [3.0])  # evicts "b", the least recently used
+
+    assert cache.get("b") is None
+    assert cache.get_many(["a", "c", "b"]) == {"a": [1.0], "c": [3.0]}
+
+
+def test_embedding_cache_stores_packed_float32():
+    cache = EmbeddingCache("model")
+    embedding = [0.1 * i for i in range(768)]
+    cache.put("fact", embedding)
+    cache.put("fact", embedding)  # overwrite does not double count
+
+    assert cache.get_stats()["bytes"] == 768 * 4
+    cached = cache.get("fact")
+    assert isinstance(cached, list) and len(cached) == 768
+    assert cached == pytest.approx(embedding, rel=1e-6)
+
+
+# ============================================================
+# MemoryManager
+# ============================================================
+
+def test_add_conversation_uses_one_batch():
+    async def run():
+        manager = MemoryManager()
+        await manager.initialize(MemoryConfig(provider="mock"))
+        provider = manager._provider
+
+        calls = []
+        original = provider.add_memories
+
+        async def add_memories(store_id, memories):
+            calls.append(len(memories))
+            return await original(store_id, memories)
+
+        provider.add_memories = add_memories
+        store_id = await manager.create_store("agent", "user")
+        messages = [
+            {"role": "user", "content": "my name is Ana"},
+            {"role": "assistant", "content": "Hi Ana"},
+            {"role": "user", "content": "I prefer short answers"},
+        ]
+
+        ids = await manager.add_conversation(store_id, messages)
+
+        assert calls == [3, 2]  # messages, then extracted facts
+        assert len(ids) == 5
+        recent = await provider.get_recent_memories(store_id, memory_types=[MemoryType.CONVERSATION])
+        assert len(recent) == 3
+
+    asyncio.run(run())
@@ -0,0 +1,178 @@
+"""
+Testes do VectorIndex (memoria de agentes) - Dumont Cloud
+
+Testa o indice vetorial local usado pelos memory providers:
+- Top-k igual a busca exaustiva por similaridade de cosseno
+- Filtro por tipo e limiar de similaridade
+- Atualizacao e remocao incrementais (IDs repetidos no lote: vale o ultimo)
+- Persistencia em disco (save/load, sem pickle), regravada apos escritas
+- MockMemoryProvider buscando via indice
+"""
+
+import asyncio
+
+import numpy as np
+import pytest
+
+from src.services.memory import gcp_provider
+from src.services.memory.base import Memory, MemoryConfig, MemoryType
+from src.services.memory.mock_provider import MockMemoryProvider
+from src.services.memory.vector_index import VectorIndex
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+@pytest.fixture
+def vectors():
+    rng = np.random.default_rng(7)
+    return rng.standard_normal((2000, 64)).astype(np.float32)
+
+
+@pytest.fixture
+def index(vectors):
+    idx = VectorIndex(use_ann=False)
+    ids = [f"m{i}" for i in range(len(vectors))]
+    types = ["fact" if i % 3 == 0 else "conversation" for i in range(len(vectors))]
+    idx.add(ids, vectors.tolist(), types)
+    return idx
+
+
+def brute_force(vectors, query, rows):
+    unit = vectors / np.linalg.norm(vectors, axis=1, keepdims=True)
+    scores = unit[rows] @ (query / np.linalg.norm(query))
+    return [f"m{rows[i]}" for i in np.argsort(-scores)]
+
+
+# ============================================================
+# Busca
+# ============================================================
+
+def test_search_matches_brute_force(index, vectors):
+    query = vectors[42] + 0.1
+    hits = index.search(query.tolist(), limit=10)
+
+    assert [h[0] for h in hits] == brute_force(vectors, query, np.arange(len(vectors)))[:10]
+    assert hits[0][1] >= hits[-1][1]
+
+
+def test_search_filters_type_and_threshold(index, vectors):
+    query = vectors[9]
+    fact_rows = np.arange(0, len(vectors), 3)
+
+    hits = index.search(query.tolist(), limit=5, types=["fact"])
+    assert [h[0] for h in hits] == brute_force(vectors, query, fact_rows)[:5]
+
+    hits = index.search(query.tolist(), limit=5, min_similarity=0.99)
+    assert [h[0] for h in hits] == ["m9"]
+    assert index.search(query.tolist(), types=["episodic"]) == []
+
+
+def test_update_and_remove(index, vectors):
+    index.remove(["m0", "m5", "missing"])
+    assert len(index) == len(vectors) - 2
+    assert "m0" not in index
+    assert all(h[0] != "m0" for h in index.search(vectors[0].tolist(), limit=20))
+
+    # Replace m7 with m100's vector: both now tie at the top
+    index.add(["m7"], [vectors[100].tolist()], ["fact"])
+    assert len(index) == len(vectors) - 2
+    top = {h[0] for h in index.search(vectors[100].tolist(), limit=2)}
+    assert top == {"m7", "m100"}
+
+
+def test_duplicate_ids_in_one_batch_keep_last():
+    index = VectorIndex(dimensions=2, use_ann=False)
+    index.add(["a", "a", "b"], [[1.0, 0.0], [0.0, 1.0], [1.0, 1.0]], ["fact"] * 3)
+
+    assert len(index) == 2
+    assert [h[0] for h in index.search([0.0, 1.0], limit=5)] == ["a", "b"]
+    assert index.search([0.0, 1.0], limit=1)[0][1] == pytest.approx(1.0)
+
+    index.remove(["a"])
+    assert [h[0] for h in index.search([1.0, 0.0], limit=5)] == ["b"]
+
+
+def test_save_and_load(index, vectors, tmp_path):
+    path = str(tmp_path / "store.npz")
+    index.remove(["m3"])
+    index.save(path, token=12)
+
+    loaded, token = VectorIndex.load(path)
+
+    assert token == 12
+    assert len(loaded) == len(index)
+    query = vectors[500].tolist()
+    assert loaded.search(query, limit=10, types=["conversation"]) == index.search(query, limit=10, types=["conversation"])
+
+
+def test_load_refuses_pickled_arrays(index, tmp_path):
+    path = str(tmp_path / "store.npz")
+    index.save(path)
+    with np.load(path) as data:
+        assert data["ids"].dtype.kind == "U"
+        arrays = dict(data)
+    arrays["ids"] = arrays["ids"].astype(object)
+    np.savez(path, **arrays)
+
+    with pytest.raises(ValueError):
+        VectorIndex.load(path)
+
+
+# ============================================================
+# MockMemoryProvider
+# ============================================================
+
+def test_mock_provider_search_uses_index():
+    async def run():
+        provider = MockMemoryProvider(MemoryConfig(provider="mock"))
+        await provider.initialize()
+        store_id = await provider.create_memory_store("agent", "user")
+
+        fact = Memory(content="User prefers RTX 4090", memory_type=MemoryType.FACT)
+        await provider.add_memories(store_id, [
+            fact,
+            Memory(content="hello", memory_type=MemoryType.CONVERSATION),
+        ])
+
+        hits = await provider.search_memories(store_id, "User prefers RTX 4090", limit=1)
+        assert [m.id for m in hits] == [fact.id]
+
+        hits = await provider.search_memories(
+            store_id, "User prefers RTX 4090", memory_types=[MemoryType.CONVERSATION], limit=5
+        )
+        assert fact.id not in [m.id for m in hits]
+
+        await provider.delete_memory(store_id, fact.id)
+        hits = await provider.search_memories(store_id, "User prefers RTX 4090", limit=5)
+        assert fact.id not in [m.id for m in hits]
+
+    asyncio.run(run())
+
+
+# ============================================================
+# GCPMemoryProvider (persistencia incremental)
+# ============================================================
+
+def test_incremental_writes_resave_persisted_index(tmp_path, monkeypatch):
+    monkeypatch.setattr(gcp_provider, "INDEX_SAVE_DELAY_SECONDS", 0.05)
+
+    async def run():
+        provider = gcp_provider.GCPMemoryProvider(MemoryConfig(index_dir=str(tmp_path)))
+        index = VectorIndex(dimensions=2, use_ann=False)
+        index.add(["a"], [[1.0, 0.0]], ["fact"])
+        provider._indexes["s1"], provider._index_versions["s1"] = index, 3
+
+        # Duas escritas seguidas: uma unica gravacao, com a versao final
+        await provider._update_index("s1", lambda i: i.add(["b"], [[0.0, 1.0]], ["fact"]))
+        await provider._update_index("s1", lambda i: i.remove(["a"]))
+        assert len(provider._index_saves) == 1
+        await asyncio.sleep(0.2)
+        assert provider._index_saves == {}
+
+        loaded, version = VectorIndex.load(str(tmp_path / "s1.npz"))
+        assert version == 5
+        assert "b" in loaded and "a" not in loaded
+
+    asyncio.run(run())
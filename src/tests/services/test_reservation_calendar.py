@@ -0,0 +1,167 @@
+"""
+Testes do calendario de capacidade de reservas - Dumont Cloud
+
+Testa o GpuTimeline/CapacityCalendar (funcao degrau por tipo de GPU):
+- Pico de uso na janela respeitando a capacidade por tipo
+- Tipos sem capacidade configurada continuam exclusivos
+- Remocao libera a capacidade e exclusao de reserva em updates
+- Janelas livres para o calendario
+- ReservationService mantendo o calendario em criar/cancelar
+- Criacao confirmando a capacidade no banco (calendario desatualizado)
+"""
+
+from datetime import datetime, timedelta
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+from sqlalchemy.pool import StaticPool
+
+from src.models.reservation import Reservation
+from src.models.reservation_credit import CreditStatus, ReservationCredit
+from src.models.usage import GPUPricingReference
+from src.services.reservation_calendar import CapacityCalendar, GpuTimeline
+from src.services.reservation_service import ReservationConflictException, ReservationService
+
+
+T0 = datetime(2030, 1, 1)
+
+
+def at(hours: float) -> datetime:
+    return T0 + timedelta(hours=hours)
+
+
+# ============================================================
+# GpuTimeline
+# ============================================================
+
+def test_peak_usage_against_capacity():
+    timeline = GpuTimeline(capacity=4)
+    timeline.add(1, at(0), at(4), 2)
+    timeline.add(2, at(2), at(6), 1)
+    timeline.add(3, at(5), at(8), 2)
+
+    assert timeline.max_used(at(0), at(2)) == 2
+    assert timeline.max_used(at(1), at(5.5)) == 3
+    assert timeline.max_used(at(8), at(10)) == 0
+    assert timeline.available(at(3), at(4), gpu_count=1)
+    assert not timeline.available(at(3), at(4), gpu_count=2)
+    assert timeline.available(at(6), at(10), gpu_count=2)
+
+
+def test_exclusive_type_blocks_any_overlap():
+    timeline = GpuTimeline()
+    timeline.add(1, at(0), at(2), 4)
+
+    assert not timeline.available(at(1), at(3))
+    assert timeline.available(at(2), at(3), gpu_count=8)  # fim exclusivo
+
+
+def test_remove_and_exclude_release_capacity():
+    timeline = GpuTimeline(capacity=2)
+    timeline.add(1, at(0), at(4), 1)
+    timeline.add(2, at(2), at(6), 1)
+
+    assert not timeline.available(at(3), at(5))
+    assert timeline.available(at(3), at(5), exclude_reservation_id=2)
+
+    assert timeline.remove(1)
+    assert not timeline.remove(1)
+    assert timeline.max_used(at(0), at(10)) == 1
+    timeline.remove(2)
+    assert timeline._times == [] and timeline._levels == []
+
+
+def test_exclude_after_merged_breakpoints():
+    # Reservas exclusivas C[1,3), B[3,5), A[1,3); remover C funde o degrau em 3
+    timeline = GpuTimeline()
+    timeline.add(3, at(1), at(3), 1)
+    timeline.add(2, at(3), at(5), 1)
+    timeline.add(1, at(1), at(3), 1)
+    timeline.remove(3)
+    assert timeline._times == [at(1), at(5)]
+
+    assert timeline.available(at(3), at(5), exclude_reservation_id=2)
+    assert not timeline.available(at(2), at(5), exclude_reservation_id=2)  # A ainda ocupa [2,3)
+    assert timeline.max_used(at(0), at(6), exclude_reservation_id=1) == 1
+
+    # Remover A com o limite em 3 ja fundido nao pode apagar B
+    timeline.remove(1)
+    assert timeline.max_used(at(3), at(5)) == 1
+    assert timeline.available(at(1), at(3))
+    assert not timeline.available(at(4), at(6))
+
+
+def test_free_slots():
+    timeline = GpuTimeline(capacity=2)
+    timeline.add(1, at(2), at(4), 2)
+    timeline.add(2, at(6), at(8), 1)
+
+    assert timeline.free_slots(at(0), at(10)) == [(at(0), at(2), 2), (at(4), at(10), 1)]
+    assert timeline.free_slots(at(0), at(10), gpu_count=2) == [
+        (at(0), at(2), 2), (at(4), at(6), 2), (at(8), at(10), 2),
+    ]
+
+
+# ============================================================
+# ReservationService
+# ============================================================
+
+@pytest.fixture
+def db():
+    engine = create_engine("sqlite://", connect_args={"check_same_thread": False}, poolclass=StaticPool)
+    for model in (Reservation, ReservationCredit, GPUPricingReference):
+        model.__table__.create(engine)
+    session = sessionmaker(bind=engine)()
+    session.add(ReservationCredit(
+        user_id="u1", amount=10_000, original_amount=10_000,
+        expires_at=datetime.utcnow() + timedelta(days=30), status=CreditStatus.AVAILABLE,
+    ))
+    session.commit()
+    yield session
+    session.close()
+
+
+def test_service_keeps_calendar_current(db):
+    calendar = CapacityCalendar(ttl_seconds=3600, capacity={"A100": 2})
+    service = ReservationService(db, calendar=calendar)
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+    end = start + timedelta(hours=2)
+
+    first = service.create_reservation("u1", "A100", start, end, gpu_count=1)
+    service.create_reservation("u1", "A100", start, end, gpu_count=1)
+    assert not service.check_availability("A100", start, end)
+
+    details = service.get_availability_details("A100", start, end)
+    assert details["free_capacity"] == 0
+    assert details["conflicting_reservations"] == 2
+
+    service.cancel_reservation(first.id)
+    assert service.check_availability("A100", start, end)
+    assert service.get_free_slots("A100", start - timedelta(hours=1), end) == [
+        {"start_time": (start - timedelta(hours=1)).isoformat(), "end_time": end.isoformat(), "free_capacity": 1},
+    ]
+
+    # Um calendario novo aquece do banco com o mesmo estado
+    fresh = ReservationService(db, calendar=CapacityCalendar(capacity={"A100": 2}))
+    assert fresh.get_availability_details("A100", start, end)["free_capacity"] == 1
+
+
+def test_booking_rechecks_db_when_calendar_is_stale(db):
+    start = datetime.utcnow().replace(microsecond=0) + timedelta(days=1)
+    end = start + timedelta(hours=2)
+
+    # Dois workers, cada um com seu calendario ja aquecido (vazio)
+    worker_a = ReservationService(db, calendar=CapacityCalendar(ttl_seconds=3600))
+    worker_b = ReservationService(db, calendar=CapacityCalendar(ttl_seconds=3600))
+    assert worker_a.check_availability("A100", start, end)
+    assert worker_b.check_availability("A100", start, end)
+
+    worker_a.create_reservation("u1", "A100", start, end)
+    assert worker_b.check_availability("A100", start, end)  # ainda desatualizado
+
+    with pytest.raises(ReservationConflictException):
+        worker_b.create_reservation("u1", "A100", start, end)
+    assert db.query(Reservation).count() == 1
+    # Conflito forca o recarregamento do calendario
+    assert not worker_b.check_availability("A100", start, end)
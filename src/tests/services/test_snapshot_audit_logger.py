@@ -0,0 +1,113 @@
+"""
+Testes do SnapshotAuditLogger - Dumont Cloud
+
+Testa o armazenamento append-only (segmentos JSONL):
+- Uma linha por entrada, recarregada por uma nova instancia
+- Rotacao de segmentos com agregados preservados no indice
+- Linha truncada por crash ignorada e log continua utilizavel
+- Migracao do arquivo JSON antigo
+- Consultas por snapshot/usuario com paginacao
+"""
+
+import json
+
+import pytest
+
+from src.services.snapshot_audit_logger import AuditEventType, SnapshotAuditLogger
+
+
+@pytest.fixture
+def audit_path(tmp_path):
+    return str(tmp_path / "audit.json")
+
+
+def segment_files(tmp_path):
+    return sorted(p.name for p in tmp_path.glob("audit.*.jsonl"))
+
+
+# ============================================================
+# Persistencia
+# ============================================================
+
+def test_entries_are_appended_and_reloaded(audit_path, tmp_path):
+    audit = SnapshotAuditLogger(audit_file_path=audit_path)
+    audit.log_cleanup_started(snapshots_to_process=2)
+    audit.log_deletion("snap-1", "user-1", "expired", 1000)
+    audit.log_deletion("snap-2", "user-1", "expired", 500, success=False, error_message="boom")
+    audit.log_cleanup_completed(snapshots_deleted=1, snapshots_failed=1, storage_freed_bytes=1000)
+
+    assert segment_files(tmp_path) == ["audit.000001.jsonl"]
+    lines = (tmp_path / "audit.000001.jsonl").read_text().splitlines()
+    assert [json.loads(line)["event_type"] for line in lines] == [
+        "cleanup_started", "deletion", "deletion_failed", "cleanup_completed",
+    ]
+
+    reloaded = SnapshotAuditLogger(audit_file_path=audit_path)
+    assert [e.snapshot_id for e in reloaded.get_entries(event_type=AuditEventType.DELETION)] == ["snap-1"]
+    assert reloaded.get_deletion_count() == 1
+    assert reloaded.get_storage_freed_total() == 1000
+
+
+def test_rotation_keeps_aggregates(audit_path, tmp_path):
+    audit = SnapshotAuditLogger(audit_file_path=audit_path, max_entries=10, segment_max_bytes=2048, max_segments=3)
+    for i in range(100):
+        audit.log_deletion(f"snap-{i}", "user-1", "expired", 10)
+    audit.close()
+
+    assert len(segment_files(tmp_path)) == 3
+    assert (tmp_path / "audit.index.json").exists()
+    assert audit.get_deletion_count() == 100
+    assert audit.get_storage_freed_total() == 1000
+    assert len(audit.get_entries(limit=1000)) == 10
+
+    reloaded = SnapshotAuditLogger(audit_file_path=audit_path, max_entries=10, segment_max_bytes=2048, max_segments=3)
+    assert reloaded.get_deletion_count() == 100
+    assert reloaded.get_storage_freed_total() == 1000
+    assert reloaded.get_entries(limit=1)[0].snapshot_id == "snap-99"
+
+
+def test_torn_line_is_skipped(audit_path, tmp_path):
+    audit = SnapshotAuditLogger(audit_file_path=audit_path)
+    audit.log_deletion("snap-1", "user-1", "expired", 10)
+    audit.close()
+    with open(tmp_path / "audit.000001.jsonl", "a") as f:
+        f.write('{"event_type": "deletion", "snapsh')
+
+    reloaded = SnapshotAuditLogger(audit_file_path=audit_path)
+    reloaded.log_deletion("snap-2", "user-1", "expired", 20)
+    reloaded.close()
+
+    again = SnapshotAuditLogger(audit_file_path=audit_path)
+    assert [e.snapshot_id for e in again.get_entries()] == ["snap-2", "snap-1"]
+    assert again.get_storage_freed_total() == 30
+
+
+def test_legacy_json_file_is_migrated(audit_path, tmp_path):
+    legacy = SnapshotAuditLogger(audit_file_path=audit_path)
+    entries = [legacy.log_deletion(f"snap-{i}", "user-1", "manual", 5) for i in range(3)]
+    legacy.clear()
+    with open(audit_path, "w") as f:
+        json.dump({"version": "1.0", "entries": [e.to_dict() for e in entries]}, f, indent=2)
+
+    audit = SnapshotAuditLogger(audit_file_path=audit_path)
+    assert audit.get_deletion_count() == 3
+    assert segment_files(tmp_path) == ["audit.000001.jsonl"]
+    assert (tmp_path / "audit.json.migrated").exists()
+
+
+# ============================================================
+# Consultas
+# ============================================================
+
+def test_get_entries_filters_and_paginates(audit_path):
+    audit = SnapshotAuditLogger(audit_file_path=audit_path)
+    for i in range(5):
+        audit.log_deletion("snap-a", "user-1", "expired", 1)
+        audit.log_deletion(f"snap-{i}", "user-2", "expired", 1)
+    audit.log_keep_forever_changed("snap-a", "user-1", True)
+
+    page = audit.get_entries(snapshot_id="snap-a", limit=2, offset=1)
+    assert [e.event_type for e in page] == [AuditEventType.DELETION] * 2
+    assert len(audit.get_entries(user_id="user-2")) == 5
+    assert len(audit.get_entries(snapshot_id="snap-a", event_type=AuditEventType.KEEP_FOREVER_SET)) == 1
+    assert audit.get_entries(user_id="user-3") == []
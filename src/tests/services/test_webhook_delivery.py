@@ -0,0 +1,228 @@
+"""
+Testes do WebhookDeliveryEngine - Dumont Cloud
+
+Testa a entrega de webhooks a partir do outbox (SQLite + servidor HTTP local):
+- Eventos persistidos no outbox e entregues pelos workers
+- Retentativas reagendadas no outbox ate esgotar as tentativas
+- Limite de concorrencia por endpoint (host saturado nao bloqueia os workers)
+- Renovacao do lease das linhas retidas localmente
+- Logs gravados em lote e metricas de fila/latencia
+"""
+
+import asyncio
+import threading
+import time
+from datetime import datetime, timedelta
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+from sqlalchemy import create_engine
+from sqlalchemy.orm import sessionmaker
+
+import src.services.webhook_delivery as webhook_delivery
+from src.models.webhook_config import WebhookConfig, WebhookLog, WebhookOutbox
+from src.services.webhook_delivery import WebhookDeliveryEngine
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+class _Handler(BaseHTTPRequestHandler):
+    protocol_version = "HTTP/1.1"
+    lock = threading.Lock()
+    active = 0
+    max_active = 0
+
+    def do_POST(self):
+        cls = type(self)
+        with cls.lock:
+            cls.active += 1
+            cls.max_active = max(cls.max_active, cls.active)
+        self.rfile.read(int(self.headers.get("Content-Length", 0)))
+        time.sleep(0.3 if self.path == "/slow" else 0.05)
+        with cls.lock:
+            cls.active -= 1
+
+        status = 500 if self.path == "/fail" else 200
+        body = b"ok" if status == 200 else b"boom"
+        self.send_response(status)
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def _serve():
+    server = ThreadingHTTPServer(("127.0.0.1", 0), _Handler)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server, f"http://127.0.0.1:{server.server_address[1]}"
+
+
+@pytest.fixture
+def server_url():
+    _Handler.active = _Handler.max_active = 0
+    server, url = _serve()
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def other_server_url():
+    server, url = _serve()
+    yield url
+    server.shutdown()
+    server.server_close()
+
+
+@pytest.fixture
+def session_factory(monkeypatch, tmp_path):
+    monkeypatch.setattr(webhook_delivery, "POLL_INTERVAL_SECONDS", 0.05)
+    monkeypatch.setattr(webhook_delivery, "FLUSH_INTERVAL_SECONDS", 0.05)
+    monkeypatch.setattr(webhook_delivery, "retry_delay_seconds", lambda attempt: 0)
+
+    # File database: each thread gets its own connection, like PostgreSQL
+    engine = create_engine(f"sqlite:///{tmp_path / 'webhooks.db'}", connect_args={"check_same_thread": False})
+    for model in (WebhookConfig, WebhookLog, WebhookOutbox):
+        model.__table__.create(engine)
+    yield sessionmaker(bind=engine)
+    engine.dispose()
+
+
+def add_webhook(session_factory, url: str, enabled: bool = True) -> int:
+    db = session_factory()
+    webhook = WebhookConfig(user_id="u1", name="hook", url=url, events=["instance.started"], enabled=enabled)
+    db.add(webhook)
+    db.commit()
+    webhook_id = webhook.id
+    db.close()
+    return webhook_id
+
+
+async def wait_until(predicate, timeout: float = 10.0):
+    deadline = time.monotonic() + timeout
+    while not predicate():
+        assert time.monotonic() < deadline, "timed out"
+        await asyncio.sleep(0.02)
+
+
+def outbox_statuses(session_factory, webhook_id=None):
+    db = session_factory()
+    try:
+        query = db.query(WebhookOutbox)
+        if webhook_id is not None:
+            query = query.filter(WebhookOutbox.webhook_id == webhook_id)
+        return [row.status for row in query.order_by(WebhookOutbox.id)]
+    finally:
+        db.close()
+
+
+# ============================================================
+# Testes
+# ============================================================
+
+def test_delivers_outbox_rows_with_endpoint_cap(session_factory, server_url):
+    async def run():
+        webhook_id = add_webhook(session_factory, f"{server_url}/ok")
+        disabled_id = add_webhook(session_factory, f"{server_url}/ok", enabled=False)
+        engine = WebhookDeliveryEngine(workers=8, endpoint_concurrency=2, session_factory=session_factory)
+
+        # Persisted before the engine runs: picked up on start (restart safety)
+        engine.enqueue([webhook_id] * 10 + [disabled_id], "instance.started", {"event": "instance.started"})
+        await engine.start()
+        try:
+            await wait_until(lambda: outbox_statuses(session_factory).count("delivered") == 10)
+        finally:
+            await engine.stop()
+
+        assert outbox_statuses(session_factory)[-1] == "failed"  # disabled webhook skipped
+        assert _Handler.max_active <= 2
+
+        db = session_factory()
+        logs = db.query(WebhookLog).all()
+        db.close()
+        assert len(logs) == 10
+        assert all(log.status_code == 200 and log.attempt == 1 for log in logs)
+
+        metrics = engine.get_metrics()
+        assert metrics["delivered"] == 10
+        assert metrics["outbox"] == {"pending": 0, "in_flight": 0}
+        assert metrics["latency_ms"]["p50"] is not None
+
+    asyncio.run(run())
+
+
+def test_failed_delivery_is_retried_then_failed(session_factory, server_url):
+    async def run():
+        webhook_id = add_webhook(session_factory, f"{server_url}/fail")
+        engine = WebhookDeliveryEngine(workers=2, session_factory=session_factory)
+        await engine.start()
+        try:
+            engine.enqueue([webhook_id], "instance.started", {"event": "instance.started"})
+            engine.notify()
+            await wait_until(lambda: outbox_statuses(session_factory) == ["failed"])
+        finally:
+            await engine.stop()
+
+        db = session_factory()
+        row = db.query(WebhookOutbox).one()
+        attempts = sorted(log.attempt for log in db.query(WebhookLog))
+        db.close()
+
+        assert row.attempts == webhook_delivery.WEBHOOK_MAX_ATTEMPTS
+        assert row.last_error.startswith("HTTP 500")
+        assert attempts == list(range(1, webhook_delivery.WEBHOOK_MAX_ATTEMPTS + 1))
+        assert engine.get_metrics()["retried"] == webhook_delivery.WEBHOOK_MAX_ATTEMPTS - 1
+
+    asyncio.run(run())
+
+
+def test_saturated_endpoint_does_not_block_workers(session_factory, server_url, other_server_url):
+    async def run():
+        slow_id = add_webhook(session_factory, f"{server_url}/slow")
+        fast_id = add_webhook(session_factory, f"{other_server_url}/ok")
+        engine = WebhookDeliveryEngine(workers=2, endpoint_concurrency=1, session_factory=session_factory)
+
+        # Slow host first in the outbox: its jobs fill the queue ahead of the fast one
+        engine.enqueue([slow_id] * 6, "instance.started", {"event": "instance.started"})
+        engine.enqueue([fast_id], "instance.started", {"event": "instance.started"})
+        await engine.start()
+        try:
+            await wait_until(lambda: outbox_statuses(session_factory, fast_id) == ["delivered"])
+            slow_delivered = outbox_statuses(session_factory, slow_id).count("delivered")
+            assert engine.get_metrics()["parked"] > 0
+            await wait_until(lambda: outbox_statuses(session_factory, slow_id).count("delivered") == 6)
+        finally:
+            await engine.stop()
+
+        # Fast host served while the slow one was still working through its backlog
+        assert slow_delivered < 3
+        assert engine.get_metrics()["parked"] == 0
+
+    asyncio.run(run())
+
+
+def test_renew_leases_only_extends_held_rows(session_factory, server_url):
+    webhook_id = add_webhook(session_factory, f"{server_url}/ok")
+    engine = WebhookDeliveryEngine(session_factory=session_factory)
+    engine.enqueue([webhook_id] * 2, "instance.started", {"event": "instance.started"})
+    jobs = engine._claim(10)
+
+    expired = datetime.utcnow() - timedelta(seconds=1)
+    db = session_factory()
+    held, done = db.query(WebhookOutbox).order_by(WebhookOutbox.id).all()
+    held.locked_until = expired
+    done.status, done.locked_until = "delivered", None
+    db.commit()
+    db.close()
+
+    assert engine._renew_leases([job["id"] for job in jobs]) == 1
+    db = session_factory()
+    held, done = db.query(WebhookOutbox).order_by(WebhookOutbox.id).all()
+    db.close()
+    assert held.locked_until > datetime.utcnow()
+    assert done.locked_until is None
+    assert engine._claim(10) == []  # renewed lease keeps the row out of other claims
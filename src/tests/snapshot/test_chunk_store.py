@@ -0,0 +1,273 @@
+"""
+Testes do ChunkStore (snapshots deduplicados) - Dumont Cloud
+
+Testa:
+- Chunking por conteudo resistente a deslocamento (insercao de bytes)
+- Segundo snapshot sem mudancas nao envia nenhum chunk
+- Snapshot incremental envia apenas os chunks alterados
+- Restore completo e verificacao de hash
+- Um indice compartilhado entre dois stores nao pula uploads
+- Restore de muitos arquivos pequenos com um unico pool de threads
+- Byte grouping da estrategia FP16 aplicado e registrado no chunk
+- Erro claro quando um chunk usa um codec ausente na maquina
+- Script remoto (enviado pelo stdin do SSH) com snapshots incrementais
+"""
+
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+from src.snapshot.chunk_store import CHUNK_TRANSFORMS_FLAG, ChunkIndex, ChunkStore, LocalChunkBackend
+from src.snapshot.compression.cdc import ContentDefinedChunker
+import src.snapshot.compression.hybrid_compressor as hybrid_compressor
+from src.snapshot.compression.hybrid_compressor import HybridCompressor
+from src.snapshot.compression.transforms import apply_transforms
+import src.snapshot.compression.cdc as cdc
+import src.snapshot.compression.pipeline as pipeline
+from src.snapshot.remote import REMOTE_REQUIREMENTS, build_remote_script
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+@pytest.fixture
+def chunker():
+    return ContentDefinedChunker(min_size=4 * 1024, avg_size=16 * 1024, max_size=64 * 1024)
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    src = tmp_path / "workspace"
+    (src / "ckpt").mkdir(parents=True)
+    (src / "ckpt" / "step_100.pt").write_bytes(os.urandom(512 * 1024))
+    (src / "ckpt" / "step_200.pt").write_bytes(os.urandom(512 * 1024))
+    (src / "train.py").write_bytes(b"for step in range(1000):\n    loss.backward()\n" * 2000)
+    return src
+
+
+@pytest.fixture
+def store(tmp_path, chunker):
+    return ChunkStore(
+        LocalChunkBackend(str(tmp_path / "bucket")),
+        ChunkIndex(str(tmp_path / "index.db")),
+        chunker=chunker,
+        workers=4,
+    )
+
+
+def read_tree(root):
+    tree = {}
+    for dirpath, _, files in os.walk(root):
+        for fname in files:
+            fpath = os.path.join(dirpath, fname)
+            with open(fpath, "rb") as f:
+                tree[os.path.relpath(fpath, root)] = f.read()
+    return tree
+
+
+# ============================================================
+# Chunking
+# ============================================================
+
+def test_chunks_survive_insertions(chunker):
+    data = os.urandom(1024 * 1024)
+    shifted = data[:1000] + b"inserted bytes" + data[1000:]
+
+    original = list(chunker.split_bytes(data))
+    after = list(chunker.split_bytes(shifted))
+
+    assert b"".join(after) == shifted
+    assert len(set(original) & set(after)) >= len(original) - 2
+    assert all(len(c) <= chunker.max_size for c in after)
+
+
+def test_numpy_and_python_boundaries_match(chunker, monkeypatch):
+    pytest.importorskip("numpy")
+    data = os.urandom(300 * 1024)
+    vectorized = list(chunker.split_bytes(data))
+    monkeypatch.setattr(cdc, "HAS_NUMPY", False)
+    assert list(chunker.split_bytes(data)) == vectorized
+
+
+# ============================================================
+# Deduplicacao
+# ============================================================
+
+def test_unchanged_snapshot_uploads_nothing(store, workspace):
+    first = store.create_snapshot(str(workspace), "snap-1")
+    second = store.create_snapshot(str(workspace), "snap-2")
+
+    assert first.bytes_uploaded > 0
+    assert second.chunks_new == 0
+    assert second.bytes_uploaded == 0
+    assert second.files_unchanged == 3
+
+
+def test_incremental_snapshot_uploads_only_changed_chunks(store, workspace, tmp_path):
+    first = store.create_snapshot(str(workspace), "snap-1")
+
+    ckpt = workspace / "ckpt" / "step_200.pt"
+    data = bytearray(ckpt.read_bytes())
+    data[100:200] = os.urandom(100)
+    ckpt.write_bytes(bytes(data))
+    (workspace / "ckpt" / "step_300.pt").write_bytes(os.urandom(64 * 1024))
+
+    second = store.create_snapshot(str(workspace), "snap-2")
+
+    assert second.files_unchanged == 2
+    assert 0 < second.bytes_new < first.bytes_new / 4
+
+    target = tmp_path / "restored"
+    store.restore_snapshot("snap-2", str(target))
+    assert read_tree(target) == read_tree(workspace)
+
+
+def test_one_index_serves_two_stores(workspace, tmp_path, chunker):
+    index = ChunkIndex(str(tmp_path / "index.db"))
+    first = ChunkStore(LocalChunkBackend(str(tmp_path / "bucket-a")), index, chunker=chunker, workers=2)
+    second = ChunkStore(LocalChunkBackend(str(tmp_path / "bucket-b")), index, chunker=chunker, workers=2)
+
+    stats_a = first.create_snapshot(str(workspace), "snap-1")
+    stats_b = second.create_snapshot(str(workspace), "snap-1")
+
+    # O segundo store nao tem nenhum chunk: tudo e enviado de novo
+    assert stats_b.files_unchanged == 0
+    assert stats_b.chunks_new == stats_a.chunks_new
+
+    target = tmp_path / "restored"
+    second.restore_snapshot("snap-1", str(target))
+    assert read_tree(target) == read_tree(workspace)
+
+
+def test_restore_uses_one_pool_for_all_files(store, tmp_path, monkeypatch):
+    src = tmp_path / "ws"
+    src.mkdir()
+    for i in range(50):
+        (src / f"config_{i}.json").write_bytes(b'{"step": %d}' % i)
+    (src / "empty.txt").write_bytes(b"")
+    store.create_snapshot(str(src), "snap-1")
+
+    pools = []
+
+    class CountingExecutor(pipeline.ThreadPoolExecutor):
+        def __init__(self, *args, **kwargs):
+            pools.append(self)
+            super().__init__(*args, **kwargs)
+
+    monkeypatch.setattr(pipeline, "ThreadPoolExecutor", CountingExecutor)
+    target = tmp_path / "restored"
+    assert store.restore_snapshot("snap-1", str(target))["files_restored"] == 51
+    assert len(pools) == 1
+    assert read_tree(target) == read_tree(src)
+
+
+def test_restore_detects_corrupted_chunk(store, workspace, tmp_path):
+    store.create_snapshot(str(workspace), "snap-1")
+    manifest = store.load_manifest("snap-1")
+    digest = manifest["files"][0]["chunks"][0]
+
+    # Substitui o chunk por outro conteudo valido (mesmo compressor)
+    other = store.backend.get(store.chunk_key(manifest["files"][-1]["chunks"][-1]))
+    store.backend.put(store.chunk_key(digest), other)
+
+    with pytest.raises(ValueError, match="hash mismatch"):
+        store.restore_snapshot("snap-1", str(tmp_path / "restored"))
+
+
+def test_fp16_chunks_are_byte_grouped(store, tmp_path):
+    np = pytest.importorskip("numpy")
+    if not HybridCompressor().get_strategy("model.safetensors").transforms:
+        pytest.skip("ZipNN instalado: estrategia FP16 sem transforms")
+
+    weights = (np.random.default_rng(0).standard_normal(256 * 1024) * 0.02).astype(np.float16)
+    src = tmp_path / "ws"
+    src.mkdir()
+    (src / "model.safetensors").write_bytes(weights.tobytes())
+
+    store.create_snapshot(str(src), "snap-1")
+    compressor = HybridCompressor()
+    chunks = list(store.chunker.split_bytes(weights.tobytes()))
+    digests = store.load_manifest("snap-1")["files"][0]["chunks"]
+    assert len(digests) == len(chunks)
+    for digest, chunk in zip(digests, chunks):
+        payload = store.backend.get(store.chunk_key(digest))
+        assert payload[0] & CHUNK_TRANSFORMS_FLAG
+        assert payload[2:2 + payload[1]] == b"byte_group16"
+        # O codec guardou os planos de bytes, nao os valores intercalados
+        codec = compressor.get_compressor_from_id(payload[0] & ~CHUNK_TRANSFORMS_FLAG)
+        stored = compressor.decompress(payload[2 + payload[1]:], codec)
+        assert stored == apply_transforms(chunk, ["byte_group16"])
+
+    target = tmp_path / "restored"
+    store.restore_snapshot("snap-1", str(target))
+    assert (target / "model.safetensors").read_bytes() == weights.tobytes()
+
+
+def test_restore_reports_missing_codec(store, workspace, tmp_path, monkeypatch):
+    pytest.importorskip("zstandard")
+    assert "zstandard" in REMOTE_REQUIREMENTS
+    if HybridCompressor().get_strategy("step_100.pt").compressor != hybrid_compressor.Compressor.ZSTD:
+        pytest.skip("ZipNN instalado: pesos .pt nao usam zstd")
+    store.create_snapshot(str(workspace), "snap-1")
+
+    # Maquina recem-criada, sem zstandard instalado
+    monkeypatch.setattr(hybrid_compressor, "HAS_ZSTD", False)
+    with pytest.raises(RuntimeError, match="compressed with zstd.*pip install zstandard"):
+        store.restore_snapshot("snap-1", str(tmp_path / "restored"))
+
+
+# ============================================================
+# Script remoto
+# ============================================================
+
+def run_remote_script(params, cwd):
+    # Executa como na GPU: `python3 -` com o script no stdin, fora do repositorio
+    result = subprocess.run(
+        [sys.executable, "-"],
+        input=build_remote_script(params, requirements=()),
+        capture_output=True,
+        text=True,
+        cwd=cwd,
+    )
+    return result.returncode, json.loads(result.stdout.strip().split("\n")[-1])
+
+
+def test_remote_script_uploads_only_changed_chunks(workspace, tmp_path):
+    params = {
+        "backend": {"type": "local", "root": str(tmp_path / "bucket")},
+        "index": str(tmp_path / "index.db"),
+        "chunker": {"min_size": 4 * 1024, "avg_size": 16 * 1024, "max_size": 64 * 1024},
+        "workers": 2,
+    }
+
+    code, first = run_remote_script({**params, "action": "create", "snapshot_id": "snap-1", "source": str(workspace)}, tmp_path)
+    assert code == 0 and first["success"]
+    assert first["bytes_uploaded"] > 0
+
+    (workspace / "ckpt" / "step_300.pt").write_bytes(os.urandom(64 * 1024))
+    code, second = run_remote_script({**params, "action": "create", "snapshot_id": "snap-2", "source": str(workspace)}, tmp_path)
+    assert code == 0
+    assert second["files_unchanged"] == 3
+    assert 0 < second["bytes_new"] <= 64 * 1024
+
+    target = tmp_path / "restored"
+    code, restored = run_remote_script({**params, "action": "restore", "snapshot_id": "snap-2", "target": str(target)}, tmp_path)
+    assert code == 0 and restored["files_restored"] == 4
+    assert read_tree(target) == read_tree(workspace)
+
+
+def test_remote_script_reports_errors(tmp_path):
+    code, result = run_remote_script({
+        "action": "create",
+        "backend": {"type": "local", "root": str(tmp_path / "bucket")},
+        "index": str(tmp_path / "index.db"),
+        "snapshot_id": "snap-1",
+        "source": str(tmp_path / "missing"),
+    }, tmp_path)
+
+    assert code == 1
+    assert "not found" in result["error"]
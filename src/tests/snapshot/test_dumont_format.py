@@ -0,0 +1,590 @@
+"""
+Testes do formato DumontArchive (.dumont) - Dumont Cloud
+
+Testa a escrita e leitura de arquivos .dumont:
+- Roundtrip completo (add_directory -> extract_all)
+- Arquivos maiores que chunk_size divididos em varios chunks
+- Indice de chunks no trailer (escrita em streaming)
+- Leitura de arquivos legados com indice logo apos o header
+- Formato v2: chunks independentes, leitura por faixa de bytes
+- Compatibilidade com arquivos v1 (stream unico por arquivo)
+- Leitura via mmap (memoryviews sobre um unico mapeamento)
+- Arquivos esparsos: buracos e paginas zeradas sem payload
+- Leitura por URL pre-assinada (so GET) com retentativas em 5xx
+"""
+
+import os
+import threading
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pytest
+
+lz4_frame = pytest.importorskip("lz4.frame")
+
+from src.snapshot.snapshot_service import SnapshotService
+from src.snapshot.compression.dumont_format import (
+    DumontArchive,
+    DumontHeader,
+    ChunkInfo,
+    FLAG_TRAILER_INDEX,
+    HEADER_SIZE,
+)
+from src.snapshot.compression import range_reader
+from src.snapshot.compression.sparse import ZERO_PAGE_SIZE, zero_runs
+
+
+# ============================================================
+# Fixtures
+# ============================================================
+
+CHUNK_SIZE = 64 * 1024
+
+
+@pytest.fixture
+def workspace(tmp_path):
+    """Cria um workspace pequeno com codigo, dados e pesos."""
+    src = tmp_path / "workspace"
+    (src / "models").mkdir(parents=True)
+    (src / "code").mkdir()
+    (src / ".git").mkdir()
+
+    (src / "code" / "train.py").write_bytes(b"import torch\n" * 20000)
+    (src / "code" / "config.json").write_bytes(b'{"lr": 1e-5}\n' * 100)
+    (src / "models" / "weights.bin").write_bytes(os.urandom(CHUNK_SIZE * 3 + 123))
+    (src / "empty.txt").write_bytes(b"")
+    (src / ".git" / "HEAD").write_bytes(b"ref: refs/heads/main\n")
+    return src
+
+
+def build_archive(workspace, path, **kwargs):
+    with DumontArchive.create(str(path), chunk_size=CHUNK_SIZE, **kwargs) as archive:
+        archive.add_directory(str(workspace))
+    return path
+
+
+def read_tree(root):
+    tree = {}
+    for dirpath, _, files in os.walk(root):
+        for fname in files:
+            fpath = os.path.join(dirpath, fname)
+            with open(fpath, "rb") as f:
+                tree[os.path.relpath(fpath, root)] = f.read()
+    return tree
+
+
+# ============================================================
+# Roundtrip
+# ============================================================
+
+def test_roundtrip_restores_all_files(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    target = tmp_path / "restored"
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        archive.extract_all(str(target))
+
+    expected = {k: v for k, v in read_tree(workspace).items() if not k.startswith(".git")}
+    assert read_tree(target) == expected
+
+
+def test_large_file_split_into_chunks(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        entry = next(f for f in archive.files if f.path == os.path.join("models", "weights.bin"))
+        assert entry.chunk_end - entry.chunk_start == 4
+        sizes = [archive.chunks[i].size_original for i in range(entry.chunk_start, entry.chunk_end)]
+        assert sizes == [CHUNK_SIZE, CHUNK_SIZE, CHUNK_SIZE, 123]
+
+
+def test_empty_file_has_no_chunks(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        entry = next(f for f in archive.files if f.path == "empty.txt")
+        assert entry.size == 0
+        assert entry.chunk_start == entry.chunk_end
+
+
+# ============================================================
+# Layout
+# ============================================================
+
+def test_chunk_index_written_as_trailer(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        header = archive.header
+        assert header.flags & FLAG_TRAILER_INDEX
+        assert archive.chunks[0].offset == HEADER_SIZE
+        last = archive.chunks[-1]
+        assert header.index_offset == last.offset + last.size_compressed
+        assert header.manifest_offset == header.index_offset + header.num_chunks * ChunkInfo.STRUCT_SIZE
+
+
+def test_reads_legacy_layout_with_index_after_header(tmp_path):
+    payload = b"hello dumont"
+    chunk = ChunkInfo(
+        index=0,
+        offset=HEADER_SIZE + ChunkInfo.STRUCT_SIZE,
+        size_compressed=len(payload),
+        size_original=len(payload),
+        compressor_id=0,
+        checksum=zlib.crc32(payload) & 0xFFFFFFFF,
+    )
+    manifest = (
+        b'{"files": [{"path": "a.txt", "size": 12, "mode": 33188, "mtime": 0,'
+        b' "chunk_start": 0, "chunk_end": 1, "compressor_id": 0}]}'
+    )
+    manifest = lz4_frame.compress(manifest)
+    header = DumontHeader(
+        version=1,
+        num_chunks=1,
+        num_files=1,
+        manifest_offset=chunk.offset + len(payload),
+        manifest_size=len(manifest),
+    )
+    # Header legado: 56 bytes uteis, resto zerado
+    legacy_header = header.to_bytes()[:56].ljust(HEADER_SIZE, b"\x00")
+
+    path = tmp_path / "legacy.dumont"
+    path.write_bytes(legacy_header + chunk.to_bytes() + payload + manifest)
+
+    with DumontArchive.open(str(path)) as archive:
+        assert archive.header.index_offset == 0
+        assert archive.read_chunk(0) == payload
+        assert archive.files[0].path == "a.txt"
+
+
+# ============================================================
+# Compressao paralela
+# ============================================================
+
+@pytest.mark.parametrize("workers,max_inflight", [(4, None), (3, 1), (None, 2)])
+def test_parallel_output_is_byte_identical(workspace, tmp_path, workers, max_inflight):
+    serial = build_archive(workspace, tmp_path / "serial.dumont", workers=1)
+    parallel = build_archive(
+        workspace,
+        tmp_path / "parallel.dumont",
+        workers=workers,
+        max_inflight_chunks=max_inflight,
+    )
+
+    assert parallel.read_bytes() == serial.read_bytes()
+
+
+# ============================================================
+# Formato v2 / compatibilidade v1
+# ============================================================
+
+def write_v1_archive(path, name, data, chunk_size):
+    """Escreve um arquivo v1: um stream LZ4 por arquivo, fatiado em chunks."""
+    compressed = lz4_frame.compress(data)
+    slices = [compressed[i:i + chunk_size] for i in range(0, len(compressed), chunk_size)]
+
+    chunks = []
+    offset = HEADER_SIZE + len(slices) * ChunkInfo.STRUCT_SIZE
+    for i, piece in enumerate(slices):
+        chunks.append(ChunkInfo(
+            index=i,
+            offset=offset,
+            size_compressed=len(piece),
+            size_original=len(piece),
+            compressor_id=1,
+            checksum=zlib.crc32(piece) & 0xFFFFFFFF,
+        ))
+        offset += len(piece)
+
+    manifest = lz4_frame.compress((
+        '{"files": [{"path": "%s", "size": %d, "mode": 33188, "mtime": 0,'
+        ' "chunk_start": 0, "chunk_end": %d, "compressor_id": 1}]}' % (name, len(data), len(slices))
+    ).encode())
+    header = DumontHeader(
+        version=1,
+        num_chunks=len(chunks),
+        num_files=1,
+        chunk_size=chunk_size,
+        manifest_offset=offset,
+        manifest_size=len(manifest),
+    )
+    path.write_bytes(
+        header.to_bytes()
+        + b"".join(c.to_bytes() for c in chunks)
+        + b"".join(slices)
+        + manifest
+    )
+
+
+def test_new_archives_are_v2(workspace, tmp_path):
+    # Sem zstd nem transforms (que exigem v4)
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont", method="lz4_fast")
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        assert archive.header.version == 2
+        assert archive.header.independent_chunks
+
+
+def test_chunks_decompress_independently(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    weights = (workspace / "models" / "weights.bin").read_bytes()
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        entry = archive.get_file(os.path.join("models", "weights.bin"))
+        third = archive.read_chunk(entry.chunk_start + 2)
+        assert third == weights[2 * CHUNK_SIZE:3 * CHUNK_SIZE]
+
+        resumed = [i for i, _ in archive.iter_chunks(start=entry.chunk_start + 1)]
+        assert resumed[0] == entry.chunk_start + 1
+
+
+def test_read_range_spans_chunk_boundaries(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    weights = (workspace / "models" / "weights.bin").read_bytes()
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        entry = archive.get_file(os.path.join("models", "weights.bin"))
+        offset = CHUNK_SIZE - 10
+        assert archive.read_range(entry, offset, CHUNK_SIZE + 20) == weights[offset:offset + CHUNK_SIZE + 20]
+        assert archive.read_range(entry, len(weights) - 5, 100) == weights[-5:]
+        assert archive.read_range(entry, len(weights), 10) == b""
+
+
+def test_extracts_v1_archive_with_sliced_stream(tmp_path):
+    data = os.urandom(50000) + b"a" * 50000
+    path = tmp_path / "v1.dumont"
+    write_v1_archive(path, "data.bin", data, chunk_size=16 * 1024)
+
+    with DumontArchive.open(str(path)) as archive:
+        assert not archive.header.independent_chunks
+        assert len(archive.chunks) > 1
+        archive.extract_all(str(tmp_path / "out"))
+        with pytest.raises(ValueError):
+            list(archive.iter_chunks())
+
+    assert (tmp_path / "out" / "data.bin").read_bytes() == data
+
+
+def test_rejects_future_versions():
+    with pytest.raises(ValueError, match="Unsupported archive version"):
+        DumontHeader.from_bytes(DumontHeader(version=99).to_bytes())
+
+
+# ============================================================
+# Restore paralelo
+# ============================================================
+
+@pytest.mark.parametrize("workers,max_inflight", [(1, None), (4, 2)])
+def test_parallel_extract_reports_real_bytes(workspace, tmp_path, workers, max_inflight):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    target = tmp_path / "restored"
+    calls = []
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        archive.extract_all(
+            str(target),
+            lambda done, total, written: calls.append((done, total, written)),
+            workers=workers,
+            max_inflight_chunks=max_inflight,
+        )
+        total_original = archive.header.total_size_original
+        num_chunks = archive.header.num_chunks
+
+    expected = {k: v for k, v in read_tree(workspace).items() if not k.startswith(".git")}
+    assert read_tree(target) == expected
+    assert calls[-1] == (num_chunks, num_chunks, total_original)
+    assert [c[2] for c in calls] == sorted(c[2] for c in calls)
+    weights = target / "models" / "weights.bin"
+    assert weights.stat().st_mtime == pytest.approx((workspace / "models" / "weights.bin").stat().st_mtime)
+
+
+# ============================================================
+# Leitura via mmap
+# ============================================================
+
+@pytest.mark.parametrize("workers", [1, 4])
+def test_mmap_extract_matches_pread(workspace, tmp_path, workers):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    target = tmp_path / "restored"
+
+    with DumontArchive.open(str(archive_path), use_mmap=True) as archive:
+        assert isinstance(archive.read_view(0, HEADER_SIZE), memoryview)
+        archive.extract_all(str(target), workers=workers)
+        chunks = [data for _, data in archive.iter_chunks()]
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        assert chunks == [data for _, data in archive.iter_chunks()]
+    assert all(isinstance(data, bytes) for data in chunks)
+    expected = {k: v for k, v in read_tree(workspace).items() if not k.startswith(".git")}
+    assert read_tree(target) == expected
+
+
+def test_mmap_detects_corrupted_chunk(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    with DumontArchive.open(str(archive_path)) as archive:
+        offset = archive.chunks[0].offset
+
+    data = bytearray(archive_path.read_bytes())
+    data[offset] ^= 0xFF
+    archive_path.write_bytes(bytes(data))
+
+    with DumontArchive.open(str(archive_path), use_mmap=True) as archive:
+        with pytest.raises(ValueError, match="checksum mismatch"):
+            archive.read_chunk(0)
+
+
+def test_decompressor_is_reused(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+
+    with DumontArchive.open(str(archive_path), use_mmap=True) as archive:
+        archive.read_chunk(0)
+        compressor = archive._worker_compressor()
+        archive.read_chunk(1)
+        assert archive._worker_compressor() is compressor
+
+
+# ============================================================
+# Restore seletivo
+# ============================================================
+
+def test_select_files_by_glob_and_prefix(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        assert [f.path for f in archive.select_files(["code/"])] == sorted(
+            f.path for f in archive.files if f.path.startswith("code/")
+        )
+        assert [f.path for f in archive.select_files(["*.py"])] == ["code/train.py"]
+        assert [f.path for f in archive.select_files(["./empty.txt"])] == ["empty.txt"]
+
+
+def test_extract_files_reads_only_needed_chunks(workspace, tmp_path, monkeypatch):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    target = tmp_path / "restored"
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        entry = archive.get_file("code/config.json")
+        read = []
+        original = archive._read_raw_chunk
+        monkeypatch.setattr(archive, "_read_raw_chunk", lambda i: read.append(i) or original(i))
+
+        archive.extract_files(str(target), archive.select_files(["code/config.json"]))
+
+    assert read == list(range(entry.chunk_start, entry.chunk_end))
+    assert read_tree(target) == {"code/config.json": (workspace / "code" / "config.json").read_bytes()}
+
+
+def test_restore_lazy_restores_rest_in_background(workspace, tmp_path):
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    target = tmp_path / "restored"
+    service = SnapshotService(chunk_size=CHUNK_SIZE, workers=2)
+
+    restore = service.restore_lazy(
+        str(archive_path), str(target), ["code/"], priority=["models/"],
+    )
+    assert sorted(restore.first_phase["paths"]) == ["code/config.json", "code/train.py"]
+    assert restore.wait(timeout=30)
+
+    assert restore.restored_files == ["models/weights.bin", "empty.txt"]
+    expected = {k: v for k, v in read_tree(workspace).items() if not k.startswith(".git")}
+    assert read_tree(target) == expected
+
+
+@pytest.fixture
+def presigned_server(tmp_path):
+    """Servidor que imita uma URL pre-assinada: HEAD 403, GET com Range, 503 intermitente."""
+    pytest.importorskip("requests")
+    state = {"body": b"", "gets": 0, "always_fail": False}
+
+    class Handler(BaseHTTPRequestHandler):
+        def do_HEAD(self):
+            self.send_error(403)
+
+        def do_GET(self):
+            state["gets"] += 1
+            if state["always_fail"] or state["gets"] % 3 == 1:
+                self.send_error(503)
+                return
+            body = state["body"]
+            first, last = self.headers["Range"].split("=")[1].split("-")
+            first, last = int(first), min(int(last), len(body) - 1)
+            self.send_response(206)
+            self.send_header("Content-Range", f"bytes {first}-{last}/{len(body)}")
+            self.send_header("Content-Length", str(last - first + 1))
+            self.end_headers()
+            self.wfile.write(body[first:last + 1])
+
+        def log_message(self, *args):
+            pass
+
+    server = ThreadingHTTPServer(("127.0.0.1", 0), Handler)
+    thread = threading.Thread(target=server.serve_forever, daemon=True)
+    thread.start()
+    state["url"] = f"http://127.0.0.1:{server.server_address[1]}/ws.dumont?X-Amz-Signature=abc"
+    yield state
+    server.shutdown()
+    server.server_close()
+
+
+def test_presigned_url_size_and_retries(workspace, tmp_path, presigned_server, monkeypatch):
+    monkeypatch.setattr(range_reader.time, "sleep", lambda seconds: None)
+    archive_path = build_archive(workspace, tmp_path / "ws.dumont")
+    presigned_server["body"] = archive_path.read_bytes()
+
+    reader = range_reader.HTTPRangeReader(presigned_server["url"])
+    assert reader.size == archive_path.stat().st_size
+    reader.close()
+
+    target = tmp_path / "restored"
+    with DumontArchive.open(presigned_server["url"]) as archive:
+        archive.extract_all(str(target))
+    expected = {k: v for k, v in read_tree(workspace).items() if not k.startswith(".git")}
+    assert read_tree(target) == expected
+
+
+def test_presigned_url_gives_up_after_retries(presigned_server, monkeypatch):
+    monkeypatch.setattr(range_reader.time, "sleep", lambda seconds: None)
+    presigned_server["always_fail"] = True
+
+    reader = range_reader.HTTPRangeReader(presigned_server["url"], retries=3)
+    with pytest.raises(Exception, match="503"):
+        reader.read_at(0, 512)
+    assert presigned_server["gets"] == 3
+    reader.close()
+
+
+# ============================================================
+# Modo solido (arquivos pequenos em chunks compartilhados)
+# ============================================================
+
+@pytest.fixture
+def small_files(tmp_path):
+    """Workspace com muitos arquivos pequenos de codigo e config."""
+    src = tmp_path / "small"
+    for i in range(300):
+        pkg = src / f"pkg{i % 7}"
+        pkg.mkdir(parents=True, exist_ok=True)
+        (pkg / f"mod{i}.py").write_bytes(b"def f%d(x):\n    return x * %d\n" % (i, i) * (i % 40 + 1))
+        (pkg / f"cfg{i}.json").write_bytes(b'{"id": %d, "lr": 1e-5}\n' % i)
+    (src / "big.py").write_bytes(b"import os\n" * 20000)
+    (src / "empty.txt").write_bytes(b"")
+    return src
+
+
+def test_solid_packs_small_files_into_shared_chunks(small_files, tmp_path):
+    plain = build_archive(small_files, tmp_path / "plain.dumont")
+    solid = build_archive(small_files, tmp_path / "solid.dumont", solid=True)
+    target = tmp_path / "restored"
+
+    with DumontArchive.open(str(plain)) as archive:
+        plain_stats = archive.get_stats()
+    with DumontArchive.open(str(solid)) as archive:
+        assert archive.header.version == 3
+        stats = archive.get_stats()
+        assert stats["num_files"] == plain_stats["num_files"]
+        assert stats["num_chunks"] * 10 < plain_stats["num_chunks"]
+        assert stats["total_compressed"] < plain_stats["total_compressed"]
+
+        # Arquivo grande continua em chunks proprios
+        big = archive.get_file("big.py")
+        assert big.offset == 0 and big.chunk_end - big.chunk_start == 4
+        archive.extract_all(str(target), workers=4)
+
+    assert read_tree(target) == read_tree(small_files)
+
+
+def test_solid_random_access_and_selective_restore(small_files, tmp_path, monkeypatch):
+    archive_path = build_archive(small_files, tmp_path / "solid.dumont", solid=True)
+    expected = (small_files / "pkg3" / "mod10.py").read_bytes()
+    target = tmp_path / "restored"
+
+    with DumontArchive.open(str(archive_path), use_mmap=True) as archive:
+        entry = archive.get_file("pkg3/mod10.py")
+        assert entry.chunk_end - entry.chunk_start == 1
+        assert archive.read_file(entry) == expected
+        assert archive.read_range(entry, 5, 20) == expected[5:25]
+        assert archive.read_range(entry, len(expected) - 3, 10) == expected[-3:]
+
+        read = []
+        original = archive._read_raw_chunk
+        monkeypatch.setattr(archive, "_read_raw_chunk", lambda i: read.append(i) or original(i))
+        archive.extract_files(str(target), archive.select_files(["pkg3/*.py"]))
+
+    # Um chunk compartilhado lido uma vez para todos os arquivos dele
+    assert len(read) == len(set(read))
+    restored = read_tree(target)
+    assert restored == {k: v for k, v in read_tree(small_files).items() if k.startswith("pkg3/") and k.endswith(".py")}
+
+
+def test_solid_output_is_byte_identical_across_workers(small_files, tmp_path):
+    serial = build_archive(small_files, tmp_path / "serial.dumont", workers=1, solid=True)
+    parallel = build_archive(small_files, tmp_path / "parallel.dumont", workers=4, solid=True)
+
+    assert parallel.read_bytes() == serial.read_bytes()
+
+
+# ============================================================
+# Arquivos esparsos
+# ============================================================
+
+@pytest.fixture
+def sparse_files(tmp_path):
+    """Checkpoint preallocado (buraco no meio) e estado com paginas zeradas."""
+    src = tmp_path / "sparse"
+    src.mkdir()
+    head, tail = os.urandom(50_000), os.urandom(50_000)
+    with open(src / "optimizer.pt", "wb") as f:
+        f.write(head)
+        f.truncate(CHUNK_SIZE * 6)
+        f.seek(CHUNK_SIZE * 6 - len(tail))
+        f.write(tail)
+    # Zeros gravados de verdade (nao e buraco): detectados pelo conteudo
+    (src / "kv_cache.bin").write_bytes(os.urandom(1000) + bytes(CHUNK_SIZE * 2) + os.urandom(1000))
+    return src
+
+
+def test_zero_runs_are_page_aligned():
+    pytest.importorskip("numpy")
+    page = ZERO_PAGE_SIZE
+    data = bytes(page) + b"y" * page + bytes(2 * page + 10)
+
+    # A cauda zerada estende a ultima pagina; com um byte != 0 ela fica fora
+    assert zero_runs(data) == [(0, page), (2 * page, len(data))]
+    assert zero_runs(bytes(2 * page) + b"z") == [(0, 2 * page)]
+    assert zero_runs(b"x" + bytes(2 * page - 1)) == [(page, 2 * page)]
+    assert zero_runs(bytes(page - 1)) == []
+
+
+def test_sparse_regions_have_no_payload(sparse_files, tmp_path):
+    pytest.importorskip("numpy")
+    archive_path = build_archive(sparse_files, tmp_path / "sparse.dumont", method="lz4_fast")
+    plain_path = build_archive(sparse_files, tmp_path / "plain.dumont", method="lz4_fast", sparse=False)
+    target = tmp_path / "restored"
+
+    with DumontArchive.open(str(archive_path)) as archive:
+        assert archive.header.version == 4
+        optimizer = archive.get_file("optimizer.pt")
+        chunks = archive.chunks[optimizer.chunk_start:optimizer.chunk_end]
+        # Chunks so de zeros: nenhum byte gravado
+        assert [c.size_compressed == 0 for c in chunks] == [False, True, True, True, True, False]
+        assert chunks[1].meta == {"zeros": [[0, CHUNK_SIZE]]}
+        assert archive.read_range(optimizer, CHUNK_SIZE - 10, 20) == bytes(20)
+        archive.extract_all(str(target), workers=2)
+
+    assert read_tree(target) == read_tree(sparse_files)
+    assert archive_path.stat().st_size < plain_path.stat().st_size
+
+    restored = target / "optimizer.pt"
+    if (sparse_files / "optimizer.pt").stat().st_blocks * 512 < CHUNK_SIZE * 6:
+        # Sistema de arquivos com buracos: o restore tambem fica esparso
+        assert restored.stat().st_blocks * 512 < CHUNK_SIZE * 6
+
+
+def test_sparse_mode_matches_plain_content(sparse_files, tmp_path):
+    pytest.importorskip("numpy")
+    archive_path = build_archive(sparse_files, tmp_path / "sparse.dumont")
+
+    with DumontArchive.open(str(archive_path), use_mmap=True) as archive:
+        for entry in archive.files:
+            assert archive.read_file(entry) == (sparse_files / entry.path).read_bytes()
+        assert [i for i, _ in archive.iter_chunks()] == list(range(len(archive.chunks)))
@@ -0,0 +1,259 @@
+"""
+Testes do HybridCompressor - Dumont Cloud
+
+Testa a selecao adaptativa de compressor (AdaptiveConfig):
+- Dados aleatorios guardados sem compressao (entropia)
+- Objetivo banda/ratio escolhendo entre LZ4 e LZ4-HC
+- Decisao e ratio medido gravados por chunk no arquivo .dumont
+- zstd com niveis, threads e dicionario treinado guardado no arquivo
+- Transforms (byte grouping / bitshuffle) para pesos FP16/BF16
+"""
+
+import json
+import os
+
+import pytest
+
+pytest.importorskip("lz4")
+
+from src.snapshot.compression.dumont_format import DumontArchive
+from src.snapshot.compression.hybrid_compressor import (
+    AdaptiveConfig,
+    Compressor,
+    HybridCompressor,
+    estimate_entropy,
+)
+from src.snapshot.compression.methods import get_method_by_name
+from src.snapshot.compression.transforms import TRANSFORMS, apply_transforms, invert_transforms
+from src.snapshot.snapshot_service import SnapshotService
+
+
+def text_data(size):
+    words = [b"tensor", b"grad", b"loss", b"epoch", b"batch", b"model", b"step"]
+    rnd = __import__("random").Random(1)
+    out = bytearray()
+    while len(out) < size:
+        out += rnd.choice(words) + b" " + str(rnd.randint(0, 999)).encode() + b"\n"
+    return bytes(out[:size])
+
+
+# ============================================================
+# Selecao
+# ============================================================
+
+def test_entropy_estimate():
+    assert estimate_entropy(b"\x00" * 1000) == 0.0
+    assert estimate_entropy(bytes(range(256)) * 4) == pytest.approx(8.0)
+    assert estimate_entropy(os.urandom(1 << 16)) > 7.9
+
+
+def test_random_data_is_stored_raw():
+    compressor = HybridCompressor(adaptive=AdaptiveConfig())
+    data = os.urandom(256 * 1024)
+
+    compressed, used, meta = compressor.compress_block(data, "weights.bin")
+    assert used == Compressor.NONE
+    assert compressed == data
+    assert meta["reason"] == "entropy" and meta["ratio"] == 1.0
+
+
+def test_bandwidth_objective_trades_ratio_for_speed():
+    data = text_data(512 * 1024)
+    candidates = (Compressor.LZ4, Compressor.LZ4_HC)
+
+    local_disk = HybridCompressor(adaptive=AdaptiveConfig(candidates=candidates, bandwidth_mb_s=50_000))
+    fast_link = HybridCompressor(adaptive=AdaptiveConfig(candidates=candidates, bandwidth_mb_s=500))
+    slow_link = HybridCompressor(adaptive=AdaptiveConfig(candidates=candidates, bandwidth_mb_s=1, compress_weight=0))
+
+    # Mais rapido copiar do que descomprimir
+    assert local_disk.select_compressor(data)[0] == Compressor.NONE
+    assert fast_link.select_compressor(data)[0] == Compressor.LZ4
+    assert slow_link.select_compressor(data)[0] == Compressor.LZ4_HC
+
+    compressed, used, meta = slow_link.compress_block(data, "train.log")
+    assert slow_link.decompress(compressed, used) == data
+    assert meta["codec"] == "lz4_hc" and meta["ratio"] > 2
+
+
+# ============================================================
+# Arquivo .dumont
+# ============================================================
+
+def test_archive_records_decision_per_chunk(tmp_path):
+    src = tmp_path / "ws"
+    src.mkdir()
+    # Extensao diz modelo FP16, conteudo e texto (e vice-versa)
+    (src / "notes.bin").write_bytes(text_data(100_000))
+    (src / "random.py").write_bytes(os.urandom(100_000))
+
+    path = tmp_path / "ws.dumont"
+    with DumontArchive.create(str(path), chunk_size=64 * 1024, adaptive=AdaptiveConfig()) as archive:
+        archive.add_directory(str(src))
+
+    with DumontArchive.open(str(path)) as archive:
+        by_file = {}
+        for entry in archive.files:
+            chunks = archive.chunks[entry.chunk_start:entry.chunk_end]
+            by_file[entry.path] = {c.meta["codec"] for c in chunks}
+            for chunk in chunks:
+                assert chunk.meta["ratio"] == pytest.approx(chunk.size_original / chunk.size_compressed, abs=1e-3)
+            assert archive.read_file(entry) == (src / entry.path).read_bytes()
+
+    assert by_file["random.py"] == {"none"}
+    assert by_file["notes.bin"] <= {"lz4", "lz4_hc", "zstd"}
+
+
+# ============================================================
+# zstd
+# ============================================================
+
+def small_json_files(root, count):
+    rnd = __import__("random").Random(2)
+    for i in range(count):
+        record = {
+            "id": i,
+            "model": rnd.choice(["llama-3-8b", "mistral-7b", "qwen2-7b"]),
+            "gpu": rnd.choice(["RTX 4090", "A100", "H100"]),
+            "learning_rate": rnd.choice([1e-4, 2e-5, 5e-5]),
+            "batch_size": rnd.choice([8, 16, 32]),
+            "status": rnd.choice(["running", "finished", "failed"]),
+        }
+        (root / f"run_{i:04d}.json").write_text(json.dumps(record, indent=2))
+
+
+def test_zstd_levels_and_threads_roundtrip():
+    pytest.importorskip("zstandard")
+    data = text_data(4 * 1024 * 1024)
+
+    single = HybridCompressor()
+    threaded = HybridCompressor(zstd_threads=2)
+    fast = single.compress(data, Compressor.ZSTD, level=1)
+    strong = single.compress(data, Compressor.ZSTD, level=9)
+    assert len(strong) < len(fast)
+
+    multi = threaded.compress(data, Compressor.ZSTD, level=3)
+    assert single.decompress(multi, Compressor.ZSTD) == data
+    assert single.get_compressor_from_id(single.get_compressor_id(Compressor.ZSTD)) == Compressor.ZSTD
+    with pytest.raises(ValueError, match="Unknown compressor id"):
+        single.get_compressor_from_id(99)
+
+
+def test_zstd_threads_through_archive_and_service(tmp_path):
+    pytest.importorskip("zstandard")
+    src = tmp_path / "ws"
+    src.mkdir()
+    (src / "train.log").write_bytes(text_data(3 * 1024 * 1024))
+    small_json_files(src, 20)
+
+    with DumontArchive.create(str(tmp_path / "a.dumont"), method="zstd", zstd_threads=2, workers=2) as archive:
+        archive.add_directory(str(src))
+        assert archive._compressor.zstd_threads == 2
+    assert get_method_by_name("zstd").threads == 0  # registry entry untouched
+
+    service = SnapshotService(chunk_size=1024 * 1024, workers=2, method="zstd", zstd_threads=2)
+    service.create_snapshot(str(src), str(tmp_path / "b.dumont"))
+    service.restore_snapshot(str(tmp_path / "b.dumont"), str(tmp_path / "out"), use_gpu=False)
+
+    for path in src.iterdir():
+        assert (tmp_path / "out" / path.name).read_bytes() == path.read_bytes()
+
+
+def test_dictionary_is_stored_in_archive(tmp_path):
+    pytest.importorskip("zstandard")
+    src = tmp_path / "ws"
+    src.mkdir()
+    small_json_files(src, 300)
+
+    plain = tmp_path / "plain.dumont"
+    with DumontArchive.create(str(plain), method="zstd") as archive:
+        archive.add_directory(str(src))
+    trained = tmp_path / "trained.dumont"
+    with DumontArchive.create(str(trained), method="hybrid_zstd") as archive:
+        archive.add_directory(str(src))
+
+    with DumontArchive.open(str(plain)) as archive:
+        plain_size = archive.get_stats()["total_compressed"]
+    with DumontArchive.open(str(trained)) as archive:
+        assert archive.header.version == 4
+        assert len(archive._dictionaries) == 1
+        # Com dicionario cada arquivo pequeno comprime muito melhor
+        assert archive.get_stats()["total_compressed"] * 2 < plain_size
+        archive.extract_all(str(tmp_path / "out"))
+
+    for path in src.iterdir():
+        assert (tmp_path / "out" / path.name).read_bytes() == path.read_bytes()
+
+
+def test_missing_dictionary_is_an_error():
+    pytest.importorskip("zstandard")
+    from src.snapshot.compression.hybrid_compressor import FileCategory, train_zstd_dictionary
+
+    samples = [json.dumps({"id": i, "gpu": "A100", "status": "running"}).encode() for i in range(500)]
+    writer = HybridCompressor()
+    writer.add_dictionary(train_zstd_dictionary(samples, dict_size=4096), FileCategory.DATA)
+    compressed = writer.compress(samples[0], Compressor.ZSTD, category=FileCategory.DATA)
+
+    assert writer.clone().decompress(compressed, Compressor.ZSTD) == samples[0]
+    with pytest.raises(ValueError, match="dictionary"):
+        HybridCompressor().decompress(compressed, Compressor.ZSTD)
+
+
+# ============================================================
+# Transforms
+# ============================================================
+
+def bf16_weights(count):
+    np = pytest.importorskip("numpy")
+    weights = (np.random.default_rng(0).standard_normal(count) * 0.02).astype(np.float32)
+    return (weights.view(np.uint32) >> 16).astype(np.uint16).tobytes()
+
+
+@pytest.mark.parametrize("name", sorted(TRANSFORMS))
+def test_transforms_roundtrip(name):
+    pytest.importorskip("numpy")
+    for size in (0, 1, 7, 15, 16, 17, 1000, 4099):
+        data = os.urandom(size)
+        assert invert_transforms(apply_transforms(data, [name]), [name]) == data
+
+    chain = ["byte_group16", name]
+    data = bf16_weights(10_000) + b"tail"
+    assert invert_transforms(apply_transforms(data, chain), chain) == data
+
+
+def test_bitshuffle_splits_bit_planes():
+    pytest.importorskip("numpy")
+    # 1.0 em BF16 (0x3F80): cada plano de bits e todo 0 ou todo 1
+    shuffled = apply_transforms(b"\x80\x3f" * 64, ["bitshuffle16"])
+    planes = [shuffled[i:i + 8] for i in range(0, len(shuffled), 8)]  # 64 bits por plano
+    assert all(set(plane) <= {0x00} or set(plane) == {0xFF} for plane in planes)
+
+
+def test_fp16_chunks_are_byte_grouped(tmp_path):
+    data = bf16_weights(512 * 1024)
+    plain = HybridCompressor().compress(data, Compressor.LZ4)
+
+    adaptive = HybridCompressor(adaptive=AdaptiveConfig(candidates=(Compressor.LZ4,), bandwidth_mb_s=50))
+    compressed, used, meta = adaptive.compress_block(data, "model.safetensors")
+    assert meta["transforms"] == ["byte_group16"]
+    assert len(compressed) * 1.1 < len(plain)
+    assert adaptive.decompress_block(compressed, used, meta) == data
+
+    # compress_file aplica os transforms da estrategia; decompress os desfaz
+    compressor = HybridCompressor()
+    compressed, strategy = compressor.compress_file(data, "model.safetensors")
+    assert compressor.decompress(compressed, strategy.compressor, transforms=strategy.transforms) == data
+
+    # Modo por extensao: transform da estrategia gravado no chunk
+    src = tmp_path / "ws"
+    src.mkdir()
+    (src / "model.safetensors").write_bytes(data)
+    path = tmp_path / "ws.dumont"
+    with DumontArchive.create(str(path), chunk_size=256 * 1024) as archive:
+        archive.add_directory(str(src))
+
+    with DumontArchive.open(str(path)) as archive:
+        strategy = HybridCompressor().get_strategy("model.safetensors")
+        expected = {"transforms": list(strategy.transforms)} if strategy.transforms else None
+        assert all(chunk.meta == expected for chunk in archive.chunks)
+        archive.extract_all(str(tmp_path / "out"))
+    assert (tmp_path / "out" / "model.safetensors").read_bytes() == data
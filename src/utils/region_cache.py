@@ -89,6 +89,13 @@ class RegionCache:
             self._use_fallback = True
             self._redis_client = None
 
+    @property
+    def redis_client(self) -> Optional[Any]:
+        """Connected Redis client, or None when using the in-memory fallback."""
+        if self._use_fallback:
+            return None
+        return self._redis_client
+
     def _mask_url(self, url: str) -> str:
         """Mask password in Redis URL for logging."""
         if "@" in url: